@@ -129,11 +129,17 @@ else:
 #     - multi_worker    : Flag to choose multiple worker (True: Multiple worker, False: Single worker)
 #     - mean_norm       : Flag to normalize using mean and std
 #     - check           : Flag to check the data is correct
+#     - pred_batch      : Number of fields predicted in each evaluation of the model
+#     - infer_traced    : Flag to predict with a traced function
+#     - jit_compile     : Flag to compile the traced function with XLA
+#     - intra_threads   : Threads used inside each operation of tensorflow
+#     - inter_threads   : Threads used to run independent operations of tensorflow
 #     - tfrecord_folder : Folder to the tfrecord files
 #     - flag_tfrecord   : Flag to read the tfrecord file
 #     - error_file      : file to store the error
 #     - umax_file       : file to store the maximum and minimum velocity
 #     - urmspred_file   : file to store the rms predicted by the model 
+#     - pred_store      : folder of the store of the predictions of the model
 # ----------------------------------------------------------------------------------------------------------------------
 ngpu            = tr_data.ngpu
 learat          = tr_data.learat
@@ -163,6 +169,12 @@ flag_central    = tr_data.flag_central
 data_type       = tr_data.data_type
 multi_worker    = tr_data.multi_worker
 prefetch        = tr_data.prefetch
+field_prefetch  = tr_data.field_prefetch
+pred_batch      = tr_data.pred_batch
+infer_traced    = tr_data.infer_traced
+jit_compile     = tr_data.jit_compile
+intra_threads   = tr_data.intra_threads
+inter_threads   = tr_data.inter_threads
 mean_norm       = tr_data.mean_norm
 check           = tr_data.check
 tfrecord_folder = folders.tfrecord_folder
@@ -170,6 +182,7 @@ flag_tfrecord   = tr_data.flag_tfrecord
 error_file      = folders.error_file
 umax_file       = folders.umax_file
 urmspred_file   = folders.urmspred_file
+pred_store      = folders.pred_store
 save_fields     = tr_data.save_fields
 traintest_index = folders.traintest_index
 
@@ -182,7 +195,7 @@ DL_data  = {"uvw_folder":uvw_folder,"uvw_file":uvw_file,"padding":padding,
             "rey":rey,"utau":utau,"ssh_flag_train":ssh_flag_train,
             "uvw_folder_temp":folders.uvw_folder_temp,"ssh_server":folders.ssh_server,
             "ssh_username":folders.ssh_username,"ssh_password":folders.ssh_password,"error_file":error_file,
-            "umax_file":umax_file,"urmspred_file":urmspred_file}
+            "umax_file":umax_file,"urmspred_file":urmspred_file,"pred_store":pred_store}
 Unet = ann.deep_model(DL_data)
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -196,9 +209,11 @@ Training_data = {"ngpu":ngpu,"learat":learat,"optmom":optmom,"batch_size":batch_
                  "adapt_batch":adapt_batch,"prep_data":prep_data,"flag_model":True,"flag_central":flag_central,
                  "data_type":data_type,"multi_worker":multi_worker,"prefetch":prefetch,"mean_norm":mean_norm,
                  "check":check,"tfrecord_folder":tfrecord_folder,"flag_tfrecord":flag_tfrecord,
-                 "save_fields":save_fields,"traintest_index":traintest_index}
+                 "save_fields":save_fields,"traintest_index":traintest_index,
+                 "field_prefetch":field_prefetch,"pred_batch":pred_batch,"infer_traced":infer_traced,
+                 "jit_compile":jit_compile,"intra_threads":intra_threads,"inter_threads":inter_threads}
 Unet.define_model(Training_data)
 # ----------------------------------------------------------------------------------------------------------------------
 # Train the model
 # ----------------------------------------------------------------------------------------------------------------------
-Unet.pred_error()
\ No newline at end of file
+Unet.pred_stats(data_in={"error":True,"error_y":True,"urms":True})
\ No newline at end of file
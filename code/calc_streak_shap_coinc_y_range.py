@@ -41,6 +41,7 @@ from py_bin.py_class.streak_structure import streak_structure
 from py_bin.py_class.shap_structure import shap_structure
 import os
 from py_bin.py_functions.calc_coinc import calc_coinc,save_coinc
+from py_bin.py_functions.prefetch_fields import prefetch_fields,read_struc_pair
 import h5py
 import numpy as np
 
@@ -90,6 +91,7 @@ exec("from "+folder_def+" import "+tr_data_str+" as tr_data")
 #     - nsamples         : number of samples of the shap calculation
 #     - SHAPrms_file     : file of the rms of the shap
 #     - streak_shap_file : file for saving the coincidence between streaks and shap structures
+#     - field_prefetch   : number of fields read in the background (0 to read the fields sequentially)
 # -----------------------------------------------------------------------------------------------------------------------
 index_ini        = st_data.field_ini
 index_fin        = st_data.field_fin
@@ -123,6 +125,7 @@ SHAPq_file       = folders.SHAPq_file
 nsamples         = sh_data.nsamples
 SHAPrms_file     = folders.SHAPrms_file
 streak_shap_file = folders.streak_shap_file
+field_prefetch   = st_data.field_prefetch
 
 # -----------------------------------------------------------------------------------------------------------------------
 # Create the data of the uv structure
@@ -148,14 +151,14 @@ data_shap = {"uvw_folder":uvw_folder,"uvw_file":uvw_file,"Hperc":Hperc,"index":0
 # calculate the coincidence between the uv and the shap structures as a function of y
 # -----------------------------------------------------------------------------------------------------------------------
 index_range = range(index_ini,index_fin,index_delta)
-for ii in index_range:
+data_read   = [{"struc_1":streak_structure,"data_1":data_streak,"struc_2":shap_structure,"data_2":data_shap,"index":ii}
+               for ii in index_range]
+fields_read = prefetch_fields(data_in={"function":read_struc_pair,"data_read":data_read,
+                                       "nprefetch":field_prefetch,"nworkers":1})
+for ii,data_fields in zip(index_range,fields_read):
     print(ii,flush=True)
-    data_streak["index"] = ii
-    data_shap["index"]   = ii
-    streak_struc         = streak_structure(data_in=data_streak)
-    streak_struc.read_struc()
-    shap_struc           = shap_structure(data_in=data_shap)
-    shap_struc.read_struc()
+    streak_struc         = data_fields["struc_1"]
+    shap_struc           = data_fields["struc_2"]
     data_out             = calc_coinc(data_in={"data_struc1":shap_struc,"data_struc2":streak_struc,"save_data":False,
                                                "calc_coin_file":streak_shap_file,"folder":data_folder,"dy":dy,"dx":dx,
                                                "dz":dz,"uvw_folder":uvw_folder,"uvw_file":uvw_file,"L_x":L_x,
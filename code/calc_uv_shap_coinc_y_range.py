@@ -41,6 +41,7 @@ from py_bin.py_class.uv_structure import uv_structure
 from py_bin.py_class.shap_structure import shap_structure
 import os
 from py_bin.py_functions.calc_coinc import calc_coinc,save_coinc
+from py_bin.py_functions.prefetch_fields import prefetch_fields,read_struc_pair
 import h5py
 import numpy as np
 
@@ -89,6 +90,7 @@ exec("from "+folder_def+" import "+tr_data_str+" as tr_data")
 #     - SHAPq_file   : file of the uv structures
 #     - nsamples     : number of samples of the shap calculation
 #     - SHAPrms_file : file of the rms of the shap
+#     - field_prefetch : number of fields read in the background (0 to read the fields sequentially)
 # -----------------------------------------------------------------------------------------------------------------------
 index_ini    = st_data.field_ini
 index_fin    = st_data.field_fin
@@ -121,6 +123,7 @@ SHAPq_folder = folders.SHAPq_folder+"_real"
 SHAPq_file   = folders.SHAPq_file
 nsamples     = sh_data.nsamples
 SHAPrms_file = folders.SHAPrms_file
+field_prefetch = st_data.field_prefetch
 uv_shap_file = folders.uv_shap_file
 
 # -----------------------------------------------------------------------------------------------------------------------
@@ -147,14 +150,14 @@ data_shap = {"uvw_folder":uvw_folder,"uvw_file":uvw_file,"Hperc":Hperc,"index":0
 # calculate the coincidence between the uv and the shap structures as a function of y
 # -----------------------------------------------------------------------------------------------------------------------
 index_range = range(index_ini,index_fin,index_delta)
-for ii in index_range:
+data_read   = [{"struc_1":uv_structure,"data_1":data_uv,"struc_2":shap_structure,"data_2":data_shap,"index":ii}
+               for ii in index_range]
+fields_read = prefetch_fields(data_in={"function":read_struc_pair,"data_read":data_read,
+                                       "nprefetch":field_prefetch,"nworkers":1})
+for ii,data_fields in zip(index_range,fields_read):
     print(ii,flush=True)
-    data_uv["index"]   = ii
-    data_shap["index"] = ii
-    uv_struc           = uv_structure(data_in=data_uv)
-    uv_struc.read_struc()
-    shap_struc         = shap_structure(data_in=data_shap)
-    shap_struc.read_struc()
+    uv_struc           = data_fields["struc_1"]
+    shap_struc         = data_fields["struc_2"]
     data_out           = calc_coinc(data_in={"data_struc1":shap_struc,"data_struc2":uv_struc,"save_data":False,
                                              "calc_coin_file":uv_shap_file,"folder":data_folder,"dy":dy,"dx":dx,
                                              "dz":dz,"uvw_folder":uvw_folder,"uvw_file":uvw_file,"L_x":L_x,
@@ -20,6 +20,13 @@ Data for the training of the model:
                                                                           batch size, False: use the default data 
                                                                           loaded in memory)
     - prefetch     : Number of batches to load in memory
+    - field_prefetch : Number of flow fields read in the background while the current fields are evaluated
+    - pred_batch   : Number of flow fields predicted in each evaluation of the model
+    - infer_traced : Flag to predict with a traced function instead of the predict function of keras
+    - jit_compile  : Flag to compile the traced function with XLA
+    - intra_threads : Number of threads used inside each operation of tensorflow (0 for the default)
+    - inter_threads : Number of threads used to run independent operations of tensorflow (0 for the default)
+    - bench_nrep   : Number of evaluations measured in the benchmark of the inference
     - epoch_save   : Number of epoch to trained before saving
     - epoch_max    : Number of maximum epochs of the training
     - nfil         : Number of filters of the first layer of the Unet
@@ -74,6 +81,9 @@ batch_size  = 1
 #                     batch is required in the case of using multiple GPU. (True: adapt the amount of fields to the
 #                     batch size, False: use the default data loaded in memory)
 #     - prefetch    : Number of batches to load in memory
+#     - field_prefetch : Number of flow fields read in the background (0 to read the fields sequentially)
+#     - pred_batch  : Number of flow fields predicted in each evaluation of the model. The input fields of the batch
+#                     are stored in memory together
 # ----------------------------------------------------------------------------------------------------------------------
 field_ini   = 26000
 field_fin   = 26010
@@ -82,6 +92,23 @@ field_mem   = 10
 test_size   = 0.2
 adapt_batch = True
 prefetch    = -1
+field_prefetch = 2
+pred_batch  = 4
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Inference of the model
+#     - infer_traced  : Flag to predict with a function traced once with a fixed input signature instead of the predict
+#                       function of keras
+#     - jit_compile   : Flag to compile the traced function with XLA. The first prediction includes the compilation
+#     - intra_threads : Number of threads used inside each operation of tensorflow (0 for the default of tensorflow)
+#     - inter_threads : Number of threads used to run independent operations of tensorflow (0 for the default)
+#     - bench_nrep    : Number of evaluations measured in the benchmark of the inference (benchmark_inference.py)
+# ----------------------------------------------------------------------------------------------------------------------
+infer_traced  = True
+jit_compile   = False
+intra_threads = 0
+inter_threads = 0
+bench_nrep    = 20
 
 # ----------------------------------------------------------------------------------------------------------------------
 # Epoch of the training before saving or updating the data
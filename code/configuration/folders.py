@@ -24,6 +24,7 @@ Folder structure for the problem: folders and files for the flow fields, structu
     - hist_file                 : File to store the training history
     - error_file                : File to store the error of the predictions
     - urmspred_file             : File to save the rms predicted by the model
+    - pred_store                : Folder of the store of the predictions of the model
     - SHAPmean_file             : File to save the mean SHAP values
     - SHAPrms_file              : File to save the rms of the SHAP values
     - perc_uv_file              : File of the percolation of the uv structures
@@ -110,6 +111,8 @@ ssh_password      = "-"
 #     - hist_file           : File to store the training history
 #     - error_file          : File to store the error in the predictions
 #     - urmspred_file       : File to save the rms predicted by the model
+#     - pred_store          : Folder of the store of the predictions of the model ("" to not use it). The predictions
+#                             are stored for each model and delta_pred and reused by the evaluations and the plots
 #     - SHAPmean_file       : File to save the mean SHAP values
 #     - SHAPrms_file        : File to save the rms of the SHAP values
 #     - perc_uv_file        : File of the percolation of the uv structures
@@ -125,6 +128,7 @@ urms_file           = "Urms.txt"
 hist_file           = "hist.txt"
 error_file          = "error.txt"
 urmspred_file       = "Urms_pred.txt"
+pred_store          = "../results/pred_store/"
 SHAPmean_file       = "SHAPmean.txt"
 SHAPrms_file        = "SHAPrms.txt"
 perc_uv_file        = "perc_uv.txt"
@@ -9,11 +9,23 @@ Data for the training of the model:
     - field_fin    : Final field of the training
     - field_delta  : Separation between files
     - nsamples     : number of samples used for the calculation of the SHAP values in the Expected Gradients
-    - nsamples_max : maximum number of samples loaded in memory for calculating the SHAPs
+    - nsamples_max : maximum number of samples of the adaptive sampling (0: always use nsamples)
     - nrep_field   : number of repetitions of the fields for calculating the shap values. The SHAPs are averaged along
                      the repetitions
     - shap_batch   : batch size used for the gradient SHAPs
     - repeat exist : flag for repeating an existing file (True: recalculate, False: skip)
+    - batch_rep    : flag for calculating all the repetitions of a field in a single evaluation (True: stack the 
+                     translations in a batch, False: calculate the translations one after another). Only used by
+                     the gradient SHAP, the kernel SHAP requires False
+    - quadrature   : quadrature rule for integrating the gradients ("gauss": Gauss-Legendre, "trapezoid": trapezoidal
+                     rule, None: expected gradients with nsamples random samples)
+    - nquad        : number of nodes of the quadrature rule
+    - shap_tol     : tolerance of the relative standard error of the sum of the SHAP values in the adaptive sampling 
+                     (None: always use nsamples). The tolerance is only checked after nsamples samples
+    - nsamples_check : number of samples between the convergence checks of the adaptive sampling
+    - field_prefetch : number of flow fields read in the background while the SHAP values are calculated
+    - intra_threads  : number of threads used inside each operation of tensorflow (0 for the default)
+    - inter_threads  : number of threads used to run independent operations of tensorflow (0 for the default)
 """
 # ----------------------------------------------------------------------------------------------------------------------
 # Fields used in the training
@@ -28,13 +40,50 @@ field_delta = 1
 # ----------------------------------------------------------------------------------------------------------------------
 # Select the number of samples for calculating the SHAP values
 #     - nsamples     : number of samples used for the calculation of the SHAP values in the Expected Gradients
-#     - nsamples_max : maximum number of samples loaded in memory for calculating the SHAPs
+#     - nsamples_max : maximum number of samples of the adaptive sampling (0: always use nsamples). The adaptive 
+#                      sampling uses at least nsamples samples
 #     - nrep_field   : number of repetitions of the field
 #     - shap_batch   : batch size used for the gradient SHAPs
 #     - repeat exist : flag for repeating an existing file (True: recalculate, False: skip)
+#     - batch_rep    : flag for calculating all the repetitions of a field in a single evaluation
 # ----------------------------------------------------------------------------------------------------------------------
 nsamples     = 200
 nsamples_max = 0
 nrep_field   = 0
 shap_batch   = 1
 repeat_exist = False
+batch_rep    = False
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Select the quadrature of the gradients. With a single background field the expected gradients are the integral of 
+# the gradients along the path from the background to the field, which can be calculated with a fixed rule.
+#     - quadrature   : quadrature rule ("gauss", "trapezoid" or None for the random samples of the expected gradients)
+#     - nquad        : number of nodes of the quadrature rule
+# ----------------------------------------------------------------------------------------------------------------------
+quadrature   = None
+nquad        = 16
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Adaptive sampling of the expected gradients. Every nsamples_check samples the relative standard error of the sum of 
+# the SHAP values is calculated, the sampling stops when it is lower than shap_tol or after nsamples_max samples. 
+# The tolerance is only checked after nsamples samples, which is the minimum number of samples of the adaptive sampling.
+#     - shap_tol       : tolerance of the relative standard error (None: always use nsamples)
+#     - nsamples_check : number of samples between the convergence checks
+# ----------------------------------------------------------------------------------------------------------------------
+shap_tol       = None
+nsamples_check = 10
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Reading of the flow fields. The next fields are read in the background while the SHAP values of the current field 
+# are calculated.
+#     - field_prefetch : number of fields read in the background (0 to read the fields sequentially)
+# ----------------------------------------------------------------------------------------------------------------------
+field_prefetch = 2
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Threads of tensorflow. In the evaluations on CPU the default threads can compete with the reading of the fields.
+#     - intra_threads : number of threads used inside each operation (0 for the default of tensorflow)
+#     - inter_threads : number of threads used to run independent operations (0 for the default of tensorflow)
+# ----------------------------------------------------------------------------------------------------------------------
+intra_threads = 0
+inter_threads = 0
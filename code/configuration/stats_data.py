@@ -10,6 +10,10 @@ File containing the information about the calculation of the statistics:
     - field_delta : separation between the fields of the database
     - save_file   : Flag to save the files of the mean, rms or normalization
     - mean_norm   : Flag to normalize using mean and std
+    - nworkers    : number of processes used to calculate the statistics
+    - chunk_size  : number of fields of each chunk of the parallel calculation (0 to use a single chunk)
+    - checkpoint  : flag to store the partial statistics of each chunk to resume an interrupted calculation
+    - field_prefetch : number of fields read in the background while the current field is evaluated
     - file_trj    : file containing the data of Torroja
     - Hmin        : minimum percolation index
     - Hmax        : maximum percolation index
@@ -34,6 +38,23 @@ field_delta = 1
 save_file = True
 mean_norm = False
 
+# ----------------------------------------------------------------------------------------------------------------------
+# Parallel calculation of the statistics. The partial statistics of each chunk can be stored to resume an interrupted
+# calculation, the stored chunks are removed at the end of the calculation
+#     - nworkers   : number of processes used to calculate the statistics
+#     - chunk_size : number of fields of each chunk of the parallel calculation (0 to use a single chunk)
+#     - checkpoint : flag to store the partial statistics of each chunk
+# ----------------------------------------------------------------------------------------------------------------------
+nworkers   = 1
+chunk_size = 0
+checkpoint = False
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Reading of the fields in the loops over the fields
+#     - field_prefetch : number of fields read in the background (0 to read the fields sequentially)
+# ----------------------------------------------------------------------------------------------------------------------
+field_prefetch = 2
+
 # ----------------------------------------------------------------------------------------------------------------------
 # File of statistics from Torroja database
 #     - file_trj : file containing the data of Torroja
@@ -14,12 +14,14 @@ Data for the training of the model:
     - field_fin    : Final field of the training     
     - field_delta  : Distance between the fields of the training
     - field_mem    : Number of fields loaded in memory
+    - field_overlap : Fraction of the fields loaded in memory kept in the next window of the training
     - test_size    : Percentage of data for the validation data
     - adapt_batch  : Flag to decide if the fields loaded in the memory need to adapt the batch size. Adapting the
                      batch is required in the case of using multiple GPU. (True: adapt the amount of fields to the
                                                                           batch size, False: use the default data 
                                                                           loaded in memory)
     - prefetch     : Number of batches to load in memory
+    - field_prefetch : Number of flow fields read in the background while the current field is evaluated
     - epoch_save   : Number of epoch to trained before saving
     - epoch_max    : Number of maximum epochs of the training
     - nfil         : Number of filters of the first layer of the Unet
@@ -37,7 +39,21 @@ Data for the training of the model:
     - multi_worker  : Flag to choose multiple worker (True: Multiple worker, False: Single worker)
     - mean_norm     : Flag to normalize using mean and std
     - check         : Flag for checking the data
+    - check_hash    : Flag to compare the checksum of the tfrecord files in the check
     - flag_tfrecord : Flag to read the tfrecord file
+    - tfrecord_compression : Compression of the tfrecord files ("": no compression, "ZLIB", "GZIP")
+    - tfrecord_mode : Storage mode of the tfrecord files ("pair": padded input and output fields in each file,
+                      "snapshot": each normalized field stored once and paired when the files are read)
+    - tfrecord_workers : Number of processes writing the tfrecord files
+    - tfrecord_memory  : Memory available for the processes writing the tfrecord files in GB (0 for no limit)
+    - parse_parallel  : Number of samples parsed in parallel in the input pipeline (-1 for autotune)
+    - deterministic   : Flag to keep the order of the samples in the input pipeline
+    - shuffle_files   : Flag to shuffle the tfrecord files of the training data in each epoch (not cached samples)
+    - data_cache      : Cache of the parsed samples ("": no cache, "memory", or prefix of the cache files)
+    - shuffle_buffer  : Number of samples of the shuffle buffer (0 to avoid it)
+    - autotune_ram    : Memory budget of the autotune of the input pipeline in GB (0 for the default)
+    - private_threads : Number of threads of the input pipeline (0 for the default)
+    - bench_nbatch    : Number of batches measured by the benchmark of the input pipeline
     - save_fields   : Flag for saving the fields used in the training in a file. If the training is restarted it will
                       use the same fields
 """
@@ -69,19 +85,24 @@ batch_size  = 1
 #     - field_fin   : Final field of the training
 #     - field_delta : Distance between the fields of the training
 #     - field_mem   : Number of fields loaded in memory
+#     - field_overlap : Fraction of the fields loaded in memory kept in the next window of the training. The fields
+#                       kept are not read again when the data is read from the velocity files
 #     - test_size   : Percentage of data for the validation data
 #     - adapt_batch : Flag to decide if the fields loaded in the memory need to adapt the batch size. Adapting the
 #                     batch is required in the case of using multiple GPU. (True: adapt the amount of fields to the
 #                     batch size, False: use the default data loaded in memory)
 #     - prefetch    : Number of batches to load in memory
+#     - field_prefetch : Number of flow fields read in the background (0 to read the fields sequentially)
 # ----------------------------------------------------------------------------------------------------------------------
 field_ini   = 26000
 field_fin   = 26010
 field_delta = 1
 field_mem   = 10
+field_overlap = 0.5
 test_size   = 0.2
 adapt_batch = True
 prefetch    = -1
+field_prefetch = 2
 
 # ----------------------------------------------------------------------------------------------------------------------
 # Epoch of the training before saving or updating the data
@@ -117,8 +138,18 @@ delta_pred  = 1
 #     - data_type     : Format of the data of the training
 #     - multi_worker  : Flag to choose multiple worker (True: Multiple worker, False: Single worker)
 #     - mean_norm     : Flag to normalize using mean and std
-#     - check         : Flag for checking the data
+#     - check         : Flag for checking the data. The tfrecord files are validated with the manifest of the folder
+#     - check_hash    : Flag to compare the checksum of the tfrecord files in the check (the files are read once)
 #     - flag_tfrecord : Flag to read the tfrecord file
+#     - tfrecord_compression : Compression of the tfrecord files ("": no compression, "ZLIB", "GZIP"). The files need
+#                              to be generated again after changing it
+#     - tfrecord_mode : Storage mode of the tfrecord files ("pair": padded input and output fields in each file,
+#                       "snapshot": each normalized field stored once without padding, the pairs are built and padded
+#                       when the files are read, so delta_pred can be changed without generating them again)
+#     - tfrecord_workers : Number of processes writing the tfrecord files. The finished files are stored in the
+#                          manifest of the tfrecord folder and they are skipped if the generation is restarted
+#     - tfrecord_memory  : Memory available for the processes writing the tfrecord files in GB, the number of
+#                          processes is reduced to fit it (0 for no limit)
 #     - save_fields   : Flag for saving the fields used in the training in a file. If the training is restarted it will
 #                       use the same fields
 # ----------------------------------------------------------------------------------------------------------------------
@@ -128,5 +159,32 @@ data_type     = "float32"
 multi_worker  = False
 mean_norm     = False
 check         = False
+check_hash    = False
 flag_tfrecord = True
+tfrecord_compression = ""
+tfrecord_mode = "pair"
+tfrecord_workers = 1
+tfrecord_memory  = 0
 save_fields   = True
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Input pipeline of the tfrecord files
+#     - parse_parallel  : Number of samples parsed in parallel (-1 for autotune)
+#     - deterministic   : Flag to keep the order of the samples (False allows to return the samples as they are read)
+#     - shuffle_files   : Flag to shuffle the tfrecord files of the training data in each epoch. The validation files
+#                         and the cached samples are not shuffled
+#     - data_cache      : Cache of the parsed samples ("": no cache, "memory": cache in memory, other: prefix of the
+#                         cache files). The cached samples are shuffled only by the shuffle buffer
+#     - shuffle_buffer  : Number of samples of the shuffle buffer of the training data (0 to avoid it)
+#     - autotune_ram    : Memory budget of the autotune of tensorflow in GB (0 for the default)
+#     - private_threads : Number of threads of the pipeline (0 for the default)
+#     - bench_nbatch    : Number of batches measured by benchmark_pipeline.py
+# ----------------------------------------------------------------------------------------------------------------------
+parse_parallel  = -1
+deterministic   = True
+shuffle_files   = False
+data_cache      = ""
+shuffle_buffer  = 0
+autotune_ram    = 0
+private_threads = 0
+bench_nbatch    = 100
@@ -138,6 +138,7 @@ else:
 #     - field_fin       : Final field of the training
 #     - field_delta     : Distance between the fields used in the training
 #     - field_mem       : Number of fields loaded in memory
+#     - field_overlap   : Fraction of the fields loaded in memory kept in the next window
 #     - epoch_save      : Number of epoch to trained before saving
 #     - epoch_max       : Number of maximum epochs of the training
 #     - read_model      : Flag to define or read the model (False=define, True=read)
@@ -158,8 +159,13 @@ else:
 #     - multi_worker    : Flag to choose multiple worker (True: Multiple worker, False: Single worker)
 #     - mean_norm       : Flag to normalize using mean and std
 #     - check           : Flag to check the data is correct
+#     - check_hash      : Flag to compare the checksum of the tfrecord files in the check
 #     - tfrecord_folder : Folder to the tfrecord files
 #     - flag_tfrecord   : Flag to read the tfrecord file
+#     - tfrecord_compression : Compression of the tfrecord files
+#     - tfrecord_mode   : Storage mode of the tfrecord files
+#     - parse_parallel, deterministic, shuffle_files, data_cache, shuffle_buffer, autotune_ram, private_threads :
+#                         Configuration of the input pipeline of the tfrecord files
 #     - error_file      : file to store the error
 #     - umax_file       : file to store the maximum and minimum velocity
 #     - urmspred_file   : file to store the rms predicted by the model 
@@ -172,6 +178,7 @@ field_ini       = tr_data.field_ini
 field_fin       = tr_data.field_fin
 field_delta     = tr_data.field_delta
 field_mem       = tr_data.field_mem
+field_overlap   = tr_data.field_overlap
 epoch_save      = tr_data.epoch_save
 epoch_max       = tr_data.epoch_max
 read_model      = tr_data.read_model
@@ -192,10 +199,21 @@ flag_central    = tr_data.flag_central
 data_type       = tr_data.data_type
 multi_worker    = tr_data.multi_worker
 prefetch        = tr_data.prefetch
+field_prefetch  = tr_data.field_prefetch
 mean_norm       = tr_data.mean_norm
 check           = tr_data.check
+check_hash      = tr_data.check_hash
 tfrecord_folder = folders.tfrecord_folder
 flag_tfrecord   = tr_data.flag_tfrecord
+tfrecord_compression = tr_data.tfrecord_compression
+tfrecord_mode   = tr_data.tfrecord_mode
+parse_parallel  = tr_data.parse_parallel
+deterministic   = tr_data.deterministic
+shuffle_files   = tr_data.shuffle_files
+data_cache      = tr_data.data_cache
+shuffle_buffer  = tr_data.shuffle_buffer
+autotune_ram    = tr_data.autotune_ram
+private_threads = tr_data.private_threads
 error_file      = folders.error_file
 umax_file       = folders.umax_file
 urmspred_file   = folders.urmspred_file
@@ -220,13 +238,19 @@ Unet = ann.deep_model(DL_data)
 # ----------------------------------------------------------------------------------------------------------------------
 Training_data = {"ngpu":ngpu,"learat":learat,"optmom":optmom,"batch_size":batch_size,"field_ini":field_ini,
                  "field_fin":field_fin,"field_delta":field_delta,"field_mem":field_mem,"epoch_save":epoch_save,
+                 "field_overlap":field_overlap,
                  "epoch_max":epoch_max,"read_model":read_model,"model_folder":model_folder,"model_write":model_write,
                  "model_read":model_read,"nfil":nfil,"stride":stride,"activation":activation,"kernel":kernel,
                  "pooling":pooling,"delta_pred":delta_pred,"hist_file":hist_file,"test_size":test_size,
                  "adapt_batch":adapt_batch,"prep_data":prep_data,"flag_model":True,"flag_central":flag_central,
                  "data_type":data_type,"multi_worker":multi_worker,"prefetch":prefetch,"mean_norm":mean_norm,
-                 "check":check,"tfrecord_folder":tfrecord_folder,"flag_tfrecord":flag_tfrecord,
-                 "save_fields":save_fields,"traintest_index":traintest_index}
+                 "check":check,"check_hash":check_hash,"tfrecord_folder":tfrecord_folder,"flag_tfrecord":flag_tfrecord,
+                 "save_fields":save_fields,"traintest_index":traintest_index,
+                 "field_prefetch":field_prefetch,
+                 "tfrecord_compression":tfrecord_compression,"tfrecord_mode":tfrecord_mode,
+                 "parse_parallel":parse_parallel,"deterministic":deterministic,"shuffle_files":shuffle_files,
+                 "data_cache":data_cache,"shuffle_buffer":shuffle_buffer,"autotune_ram":autotune_ram,
+                 "private_threads":private_threads}
 Unet.define_model(Training_data)
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -121,6 +121,14 @@ uvw_folderii_tf = folders.uvw_folderii_tf
 #     - nrep_field      : number of repetitions of each field for calculating the SHAP values
 #     - shap_batch      : batch size used for the shap
 #     - repeat exist    : flag for repeating an existing file (True: recalculate, False: skip)
+#     - batch_rep       : flag for calculating all the repetitions of a field in a single evaluation
+#     - quadrature      : quadrature rule of the gradients (None: random samples of the expected gradients)
+#     - nquad           : number of nodes of the quadrature rule
+#     - shap_tol        : tolerance of the adaptive sampling (None: always use nsamples)
+#     - nsamples_check  : number of samples between the convergence checks of the adaptive sampling
+#     - field_prefetch  : number of fields read in the background
+#     - intra_threads   : threads used inside each operation of tensorflow
+#     - inter_threads   : threads used to run independent operations of tensorflow
 # ----------------------------------------------------------------------------------------------------------------------
 ngpu            = tr_data.ngpu
 field_ini       = sh_data.field_ini
@@ -146,6 +154,14 @@ tfrecord_folder = folders.tfrecord_folder
 nrep_field      = sh_data.nrep_field
 shap_batch      = sh_data.shap_batch
 repeat_exist    = sh_data.repeat_exist
+batch_rep       = sh_data.batch_rep
+quadrature      = sh_data.quadrature
+nquad           = sh_data.nquad
+shap_tol        = sh_data.shap_tol
+nsamples_check  = sh_data.nsamples_check
+field_prefetch  = sh_data.field_prefetch
+intra_threads   = sh_data.intra_threads
+inter_threads   = sh_data.inter_threads
 
 # ----------------------------------------------------------------------------------------------------------------------
 # Define dict containing the information needed for the shap model
@@ -158,7 +174,9 @@ data_shap = {"shap_folder":shap_folder,"shap_file":shap_file,"uvw_folder":uvw_fo
              "pooling":pooling,"delta_pred":delta_pred,"nsamples":nsamples,"nsamples_max":nsamples_max,
              "data_type":data_type,"error_file":error_file,"umax_file":umax_file,"urmspred_file":urmspred_file,
              "mean_norm":mean_norm,"tfrecord_folder":tfrecord_folder,"nrep_field":nrep_field,"shap_batch":shap_batch,
-             "repeat_exist":repeat_exist,"flag_model":True}
+             "repeat_exist":repeat_exist,"flag_model":True,"batch_rep":batch_rep,
+             "quadrature":quadrature,"nquad":nquad,"shap_tol":shap_tol,"nsamples_check":nsamples_check,
+             "field_prefetch":field_prefetch,"intra_threads":intra_threads,"inter_threads":inter_threads}
 shap_model = sc.shap_config(data_in=data_shap)
 shap_model.calc_gradientSHAP()
 
@@ -29,8 +29,7 @@ st_data_str = "stats_data"
 # -----------------------------------------------------------------------------------------------------------------------
 # Import Packages
 # -----------------------------------------------------------------------------------------------------------------------
-from py_bin.py_functions.umean import calc_Umean
-from py_bin.py_functions.urms import calc_rms
+from py_bin.py_functions.flow_statistics import calc_statistics
 from py_bin.py_class.flow_field import flow_field
 import os
 
@@ -66,6 +65,10 @@ exec("from "+folder_def+" import "+st_data_str+" as st_data")
 #     - unorm_file  : file for saving the normalization
 #     - rey         : Friction Reynolds number
 #     - utau        : Friction velocity
+#     - mean_norm   : flag to normalize with the mean and the standard deviation
+#     - nworkers    : number of processes
+#     - chunk_size  : number of fields of each chunk
+#     - chk_folder  : folder to store the partial statistics of the chunks (None to avoid storing them)
 # -----------------------------------------------------------------------------------------------------------------------
 field_ini   = st_data.field_ini
 field_fin   = st_data.field_fin
@@ -85,47 +88,40 @@ urms_file   = folders.urms_file
 rey         = chd.rey
 utau        = chd.utau
 mean_norm   = bool(st_data.mean_norm)
-
-if mean_norm:
-    from py_bin.py_functions.normalization_normaldist import calc_norm
+nworkers    = st_data.nworkers
+chunk_size  = st_data.chunk_size
+if st_data.checkpoint:
+    chk_folder = data_folder+'/checkpoint_stats'
 else:
-    from py_bin.py_functions.normalization import calc_norm
-
-# -----------------------------------------------------------------------------------------------------------------------
-# Create the folder to store the data
-# -----------------------------------------------------------------------------------------------------------------------
-try:
-    os.mkdir(data_folder)
-except:
-    pass
-
-# -----------------------------------------------------------------------------------------------------------------------
-# Obtain the flow characteristics
-# -----------------------------------------------------------------------------------------------------------------------
-Data_flow={"folder":folder,"file":file,"down_x":dx,"down_y":dy,"down_z":dz,"L_x":L_x,"L_y":L_y,"L_z":L_z,
-           "rey":rey,"utau":utau}
-flow = flow_field(data_in=Data_flow)
-flow.shape_tensor()
+    chk_folder = None
 
 # -----------------------------------------------------------------------------------------------------------------------
-# Calculate the mean values of the velocity
-# -----------------------------------------------------------------------------------------------------------------------
-Data_umean={"field_ini":field_ini,"field_fin":field_fin,"folder":folder,"file":file,"save_file":save_file,
-            "umean_file":umean_file,"data_folder":data_folder,"shpx":flow.shpx,"shpy":flow.shpy,"shpz":flow.shpz}
-calc_Umean(data_in=Data_umean)
+# Calculate the statistics. The calculation is only run by the main process, the processes of the parallel calculation
+# import this file without running it
+# -----------------------------------------------------------------------------------------------------------------------
+if __name__=="__main__":
+    # ------------------------------------------------------------------------------------------------------------------
+    # Create the folder to store the data
+    # ------------------------------------------------------------------------------------------------------------------
+    try:
+        os.mkdir(data_folder)
+    except:
+        pass
 
-# -----------------------------------------------------------------------------------------------------------------------
-# Calculate the RMS of the velocity
-# -----------------------------------------------------------------------------------------------------------------------
-data_rms={"field_ini":field_ini,"field_fin":field_fin,"umean_file":umean_file,"data_folder":data_folder,
-          "file":file,"folder":folder,"dx":dx,"dy":dy,"dz":dz,"shpx":flow.shpx,"shpy":flow.shpy,"shpz":flow.shpz,
-          "save_file":save_file,"urms_file":urms_file}
-calc_rms(data_in=data_rms)
+    # ------------------------------------------------------------------------------------------------------------------
+    # Obtain the flow characteristics
+    # ------------------------------------------------------------------------------------------------------------------
+    Data_flow={"folder":folder,"file":file,"down_x":dx,"down_y":dy,"down_z":dz,"L_x":L_x,"L_y":L_y,"L_z":L_z,
+               "rey":rey,"utau":utau}
+    flow = flow_field(data_in=Data_flow)
+    flow.shape_tensor()
 
-# -----------------------------------------------------------------------------------------------------------------------
-# Calculate the normalization values for the dataset
-# -----------------------------------------------------------------------------------------------------------------------
-data_norm={"field_ini":field_ini,"field_fin":field_fin,"data_folder":data_folder,"umean_file":umean_file,
-            "dx":dx,"dy":dy,"dz":dz,"folder":folder,"file":file,"shpx":flow.shpx,"shpy":flow.shpy,"shpz":flow.shpz,
-            "save_file":save_file,"unorm_file":unorm_file}
-calc_norm(data_in=data_norm)
\ No newline at end of file
+    # ------------------------------------------------------------------------------------------------------------------
+    # Calculate the mean, the RMS and the normalization values of the velocity. The statistics are accumulated in a
+    # first pass of the fields, the extremes of the uv and uw stresses in a second pass with the final mean velocity
+    # ------------------------------------------------------------------------------------------------------------------
+    data_stats={"field_ini":field_ini,"field_fin":field_fin,"folder":folder,"file":file,"save_file":save_file,
+                "data_folder":data_folder,"umean_file":umean_file,"urms_file":urms_file,"unorm_file":unorm_file,
+                "dx":dx,"dy":dy,"dz":dz,"mean_norm":mean_norm,"nworkers":nworkers,"chunk_size":chunk_size,
+                "chk_folder":chk_folder}
+    calc_statistics(data_in=data_stats)
@@ -68,6 +68,9 @@ exec("from "+folder_def+" import "+sh_data_str+" as sh_data")
 #     - unorm_file          : file for saving the normalization
 #     - rey                 : Friction Reynolds number
 #     - utau                : Friction velocity
+#     - nworkers            : number of processes
+#     - chunk_size          : number of fields of each chunk
+#     - chk_folder          : folder to store the partial statistics of the chunks (None to avoid storing them)
 # -----------------------------------------------------------------------------------------------------------------------
 field_ini           = st_data.field_ini
 field_fin           = st_data.field_fin
@@ -91,6 +94,12 @@ SHAPrms_file        = folders.SHAPrms_file
 rey                 = chd.rey
 utau                = chd.utau
 mean_norm           = bool(st_data.mean_norm)
+nworkers            = st_data.nworkers
+chunk_size          = st_data.chunk_size
+if st_data.checkpoint:
+    chk_folder = data_folder+'/checkpoint_stats'
+else:
+    chk_folder = None
 
 if mean_norm:
     from py_bin.py_functions.normalization_normaldist import calc_norm
@@ -98,41 +107,49 @@ else:
     from py_bin.py_functions.normalization import calc_norm
 
 # -----------------------------------------------------------------------------------------------------------------------
-# Create the folder to store the data
-# -----------------------------------------------------------------------------------------------------------------------
-try:
-    os.mkdir(data_folder)
-except:
-    pass
+# Calculate the statistics. The calculation is only run by the main process, the processes of the parallel calculation
+# import this file without running it
+# -----------------------------------------------------------------------------------------------------------------------
+if __name__=="__main__":
+    # ------------------------------------------------------------------------------------------------------------------
+    # Create the folder to store the data
+    # ------------------------------------------------------------------------------------------------------------------
+    try:
+        os.mkdir(data_folder)
+    except:
+        pass
 
-# -----------------------------------------------------------------------------------------------------------------------
-# Obtain the flow characteristics
-# -----------------------------------------------------------------------------------------------------------------------
-Data_flow={"folder":folder,"file":file,"down_x":dx,"down_y":dy,"down_z":dz,"L_x":L_x,"L_y":L_y,"L_z":L_z,
-            "rey":rey,"utau":utau}
-flow = flow_field(data_in=Data_flow)
-flow.shape_tensor()
+    # ------------------------------------------------------------------------------------------------------------------
+    # Obtain the flow characteristics
+    # ------------------------------------------------------------------------------------------------------------------
+    Data_flow={"folder":folder,"file":file,"down_x":dx,"down_y":dy,"down_z":dz,"L_x":L_x,"L_y":L_y,"L_z":L_z,
+                "rey":rey,"utau":utau}
+    flow = flow_field(data_in=Data_flow)
+    flow.shape_tensor()
 
-# -----------------------------------------------------------------------------------------------------------------------
-# Calculate the mean values of the velocity
-# -----------------------------------------------------------------------------------------------------------------------
-Data_shapmean={"field_ini":field_ini,"field_fin":field_fin,"field_delta":field_delta,"folder":folder_shap,
-                "file":file_shap,"save_file":save_file,"SHAPmean_file":SHAPmean_file,"data_folder":data_folder,
-                "shpx":flow.shpx,"shpy":flow.shpy,"shpz":flow.shpz}
-calc_SHAPmean(data_in=Data_shapmean)
+    # ------------------------------------------------------------------------------------------------------------------
+    # Calculate the mean values of the velocity
+    # ------------------------------------------------------------------------------------------------------------------
+    Data_shapmean={"field_ini":field_ini,"field_fin":field_fin,"field_delta":field_delta,"folder":folder_shap,
+                    "file":file_shap,"save_file":save_file,"SHAPmean_file":SHAPmean_file,"data_folder":data_folder,
+                    "shpx":flow.shpx,"shpy":flow.shpy,"shpz":flow.shpz,"nworkers":nworkers,"chunk_size":chunk_size,
+                    "chk_folder":chk_folder}
+    calc_SHAPmean(data_in=Data_shapmean)
 
-# -----------------------------------------------------------------------------------------------------------------------
-# Calculate the RMS of the velocity
-# -----------------------------------------------------------------------------------------------------------------------
-data_rms={"field_ini":field_ini,"field_fin":field_fin,"field_delta":field_delta,"SHAPmean_file":SHAPmean_file,
-          "data_folder":data_folder,"file":file_shap,"folder":folder_shap,"dx":dx,"dy":dy,"dz":dz,
-          "shpx":flow.shpx,"shpy":flow.shpy,"shpz":flow.shpz,"save_file":save_file,"SHAPrms_file":SHAPrms_file}
-calc_rms_nomean(data_in=data_rms)
+    # ------------------------------------------------------------------------------------------------------------------
+    # Calculate the RMS of the velocity
+    # ------------------------------------------------------------------------------------------------------------------
+    data_rms={"field_ini":field_ini,"field_fin":field_fin,"field_delta":field_delta,"SHAPmean_file":SHAPmean_file,
+              "data_folder":data_folder,"file":file_shap,"folder":folder_shap,"dx":dx,"dy":dy,"dz":dz,
+              "shpx":flow.shpx,"shpy":flow.shpy,"shpz":flow.shpz,"save_file":save_file,"SHAPrms_file":SHAPrms_file,
+              "nworkers":nworkers,"chunk_size":chunk_size,"chk_folder":chk_folder}
+    calc_rms_nomean(data_in=data_rms)
 
-# -----------------------------------------------------------------------------------------------------------------------
-# Calculate the RMS of the velocity
-# -----------------------------------------------------------------------------------------------------------------------
-data_rms={"field_ini":field_ini,"field_fin":field_fin,"field_delta":field_delta,"SHAPmean_file":SHAPmean_file,
-          "data_folder":data_folder,"file":file_shap,"folder":folder_shap,"dx":dx,"dy":dy,"dz":dz,
-          "shpx":flow.shpx,"shpy":flow.shpy,"shpz":flow.shpz,"save_file":save_file,"SHAPrms_file":SHAPrms_file}
-calc_rms(data_in=data_rms)
\ No newline at end of file
+    # ------------------------------------------------------------------------------------------------------------------
+    # Calculate the RMS of the velocity
+    # ------------------------------------------------------------------------------------------------------------------
+    data_rms={"field_ini":field_ini,"field_fin":field_fin,"field_delta":field_delta,"SHAPmean_file":SHAPmean_file,
+              "data_folder":data_folder,"file":file_shap,"folder":folder_shap,"dx":dx,"dy":dy,"dz":dz,
+              "shpx":flow.shpx,"shpy":flow.shpy,"shpz":flow.shpz,"save_file":save_file,"SHAPrms_file":SHAPrms_file,
+              "nworkers":nworkers,"chunk_size":chunk_size,"chk_folder":chk_folder}
+    calc_rms(data_in=data_rms)
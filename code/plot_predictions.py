@@ -193,6 +193,7 @@ else:
 #     - error_file      : file to store the error
 #     - umax_file       : file to store the maximum and minimum velocity
 #     - urmspred_file   : file to store the rms predicted by the model 
+#     - pred_store      : folder of the store of the predictions of the model
 # ----------------------------------------------------------------------------------------------------------------------
 ngpu            = tr_data.ngpu
 learat          = tr_data.learat
@@ -222,6 +223,7 @@ flag_central    = tr_data.flag_central
 data_type       = tr_data.data_type
 multi_worker    = tr_data.multi_worker
 prefetch        = tr_data.prefetch
+field_prefetch  = tr_data.field_prefetch
 mean_norm       = tr_data.mean_norm
 check           = tr_data.check
 tfrecord_folder = folders.tfrecord_folder
@@ -229,6 +231,7 @@ flag_tfrecord   = tr_data.flag_tfrecord
 error_file      = folders.error_file
 umax_file       = folders.umax_file
 urmspred_file   = folders.urmspred_file
+pred_store      = folders.pred_store
 save_fields     = tr_data.save_fields
 traintest_index = folders.traintest_index
 save_fields     = tr_data.save_fields
@@ -243,7 +246,7 @@ DL_data  = {"uvw_folder":uvw_folder,"uvw_file":uvw_file,"padding":padding,
             "rey":rey,"utau":utau,"ssh_flag_train":ssh_flag_train,
             "uvw_folder_temp":folders.uvw_folder_temp,"ssh_server":folders.ssh_server,
             "ssh_username":folders.ssh_username,"ssh_password":folders.ssh_password,"error_file":error_file,
-            "umax_file":umax_file,"urmspred_file":urmspred_file}
+            "umax_file":umax_file,"urmspred_file":urmspred_file,"pred_store":pred_store}
 Unet = ann.deep_model(DL_data)
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -257,7 +260,8 @@ Training_data = {"ngpu":ngpu,"learat":learat,"optmom":optmom,"batch_size":batch_
                  "adapt_batch":adapt_batch,"prep_data":prep_data,"flag_model":True,"flag_central":flag_central,
                  "data_type":data_type,"multi_worker":multi_worker,"prefetch":prefetch,"mean_norm":mean_norm,
                  "check":check,"tfrecord_folder":tfrecord_folder,"flag_tfrecord":flag_tfrecord,
-                 "save_fields":save_fields,"traintest_index":traintest_index}
+                 "save_fields":save_fields,"traintest_index":traintest_index,
+                 "field_prefetch":field_prefetch}
 Unet.define_model(Training_data)
 
 
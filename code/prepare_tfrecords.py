@@ -134,6 +134,10 @@ else:
 #     - check           : Flag to check the data is correct
 #     - tfrecord_folder : Folder to the tfrecord files
 #     - flag_tfrecord   : Flag to read the tfrecord file
+#     - tfrecord_compression : Compression of the tfrecord files
+#     - tfrecord_mode   : Storage mode of the tfrecord files
+#     - tfrecord_workers : Number of processes writing the tfrecord files
+#     - tfrecord_memory : Memory available for the processes writing the tfrecord files in GB
 #     - error_file      : file to store the error
 #     - umax_file       : file to store the maximum and minimum velocity
 #     - urmspred_file   : file to store the rms predicted by the model 
@@ -166,42 +170,54 @@ flag_central    = tr_data.flag_central
 data_type       = tr_data.data_type
 multi_worker    = tr_data.multi_worker
 prefetch        = tr_data.prefetch
+field_prefetch  = tr_data.field_prefetch
 mean_norm       = tr_data.mean_norm
 check           = tr_data.check
 tfrecord_folder = folders.tfrecord_folder
 flag_tfrecord   = tr_data.flag_tfrecord
+tfrecord_compression = tr_data.tfrecord_compression
+tfrecord_mode   = tr_data.tfrecord_mode
+tfrecord_workers = tr_data.tfrecord_workers
+tfrecord_memory = tr_data.tfrecord_memory
 error_file      = folders.error_file
 umax_file       = folders.umax_file
 urmspred_file   = folders.urmspred_file
 
 # ----------------------------------------------------------------------------------------------------------------------
-# Define dict containing the information needed for the deep model definition and call the deep learning model
-# ----------------------------------------------------------------------------------------------------------------------
-DL_data  = {"uvw_folder":uvw_folder,"uvw_file":uvw_file,"padding":padding,
-            "dx":dx,"dy":dy,"dz":dz,"data_folder":data_folder,"umean_file":umean_file,"unorm_file":unorm_file,
-            "L_x":L_x,"L_z":L_z,"L_y":L_y,"uvw_folder_tf":uvw_folder_tf,"uvw_folderii_tf":uvw_folderii_tf,
-            "rey":rey,"utau":utau,"ssh_flag_train":ssh_flag_train,
-            "uvw_folder_temp":folders.uvw_folder_temp,"ssh_server":folders.ssh_server,
-            "ssh_username":folders.ssh_username,"ssh_password":folders.ssh_password,"error_file":error_file,
-            "umax_file":umax_file,"urmspred_file":urmspred_file}
-Unet = ann.deep_model(DL_data)
+# Prepare the tfrecords. The calculation is only run by the main process, the processes writing the tfrecord files
+# import this file without running it
+# ----------------------------------------------------------------------------------------------------------------------
+if __name__=="__main__":
+    # ------------------------------------------------------------------------------------------------------------------
+    # Define dict containing the information needed for the deep model definition and call the deep learning model
+    # ------------------------------------------------------------------------------------------------------------------
+    DL_data  = {"uvw_folder":uvw_folder,"uvw_file":uvw_file,"padding":padding,
+                "dx":dx,"dy":dy,"dz":dz,"data_folder":data_folder,"umean_file":umean_file,"unorm_file":unorm_file,
+                "L_x":L_x,"L_z":L_z,"L_y":L_y,"uvw_folder_tf":uvw_folder_tf,"uvw_folderii_tf":uvw_folderii_tf,
+                "rey":rey,"utau":utau,"ssh_flag_train":ssh_flag_train,
+                "uvw_folder_temp":folders.uvw_folder_temp,"ssh_server":folders.ssh_server,
+                "ssh_username":folders.ssh_username,"ssh_password":folders.ssh_password,"error_file":error_file,
+                "umax_file":umax_file,"urmspred_file":urmspred_file}
+    Unet = ann.deep_model(DL_data)
 
 
-# ----------------------------------------------------------------------------------------------------------------------
-# Define dict containing the information needed for the training, define and train the model
-# ----------------------------------------------------------------------------------------------------------------------
-Training_data = {"ngpu":ngpu,"learat":learat,"optmom":optmom,"batch_size":batch_size,"field_ini":field_ini,
-                 "field_fin":field_fin,"field_delta":field_delta,"field_mem":field_mem,"epoch_save":epoch_save,
-                 "epoch_max":epoch_max,"read_model":read_model,"model_folder":model_folder,"model_write":model_write,
-                 "model_read":model_read,"nfil":nfil,"stride":stride,"activation":activation,"kernel":kernel,
-                 "pooling":pooling,"delta_pred":delta_pred,"hist_file":hist_file,"test_size":test_size,
-                 "adapt_batch":adapt_batch,"prep_data":prep_data,"flag_model":False,"flag_central":flag_central,
-                 "data_type":data_type,"multi_worker":multi_worker,"prefetch":prefetch,"mean_norm":mean_norm,
-                 "check":check,"tfrecord_folder":tfrecord_folder,"flag_tfrecord":flag_tfrecord,"save_fields":False,
-                 "traintest_index":"-"}
-Unet.define_model(Training_data)
+    # ------------------------------------------------------------------------------------------------------------------
+    # Define dict containing the information needed for the training, define and train the model
+    # ------------------------------------------------------------------------------------------------------------------
+    Training_data = {"ngpu":ngpu,"learat":learat,"optmom":optmom,"batch_size":batch_size,"field_ini":field_ini,
+                     "field_fin":field_fin,"field_delta":field_delta,"field_mem":field_mem,"epoch_save":epoch_save,
+                     "epoch_max":epoch_max,"read_model":read_model,"model_folder":model_folder,"model_write":model_write,
+                     "model_read":model_read,"nfil":nfil,"stride":stride,"activation":activation,"kernel":kernel,
+                     "pooling":pooling,"delta_pred":delta_pred,"hist_file":hist_file,"test_size":test_size,
+                     "adapt_batch":adapt_batch,"prep_data":prep_data,"flag_model":False,"flag_central":flag_central,
+                     "data_type":data_type,"multi_worker":multi_worker,"prefetch":prefetch,"mean_norm":mean_norm,
+                     "check":check,"tfrecord_folder":tfrecord_folder,"flag_tfrecord":flag_tfrecord,"save_fields":False,
+                     "traintest_index":"-","field_prefetch":field_prefetch,
+                     "tfrecord_compression":tfrecord_compression,"tfrecord_mode":tfrecord_mode,
+                     "tfrecord_workers":tfrecord_workers,"tfrecord_memory":tfrecord_memory}
+    Unet.define_model(Training_data)
 
-# ----------------------------------------------------------------------------------------------------------------------
-# Prepare the data
-# ----------------------------------------------------------------------------------------------------------------------
-Unet.prepare_tfrecords()
+    # ------------------------------------------------------------------------------------------------------------------
+    # Prepare the data
+    # ------------------------------------------------------------------------------------------------------------------
+    Unet.prepare_tfrecords()
@@ -34,6 +34,7 @@ class deep_model():
             - create_model      : creates the Deep Learning model
             - model_base        : defines the model layers
             - train_model       : trains the DL model
+            - benchmark_pipeline : measures the throughput of the input pipeline of the training
             - prepare_data      : function to create the data in the tensorflow format
             - architecture_Unet : definition of the architecture of the U-net
             - _save_training    : function for saving the training data
@@ -41,8 +42,17 @@ class deep_model():
             - pred_field        : function to use the model for predicting the next field
             - field_error       : function to calculate field containing the error of the prediction in all the 
                                   velocity components
+            - pred_fields       : function to predict a batch of fields in a single evaluation of the model
+            - _pred_store_file  : function to define the file of the store of the predictions of the model
+            - benchmark_inference : function to measure the latency of the prediction of a field
+            - predict_range     : function to fill the store of the predictions with a range of fields
+            - pred_stats        : function to calculate the error, the error along y+ and the rms of the predictions
+                                  in a single evaluation of the fields
             - pred_error        : function to calculate the error of the prediction weighted by the volume in a set of
                                   fields
+            - _prefetch_fields  : function to iterate over the fields of the predictions reading the next fields in the
+                                  background
+            - _read_field_in    : function to read the normalized input field of a prediction
         * Variables:
             - uvw_folder        : folder of the velocity fields
             - uvw_file          : file name of the velocity fileds without index
@@ -75,6 +85,7 @@ class deep_model():
             - field_ini         : initial field for the training
             - field_fin         : final fields for the training
             - field_mem         : number of fields load in memory
+            - field_overlap     : fraction of the fields of a window of the training kept in the next window
             - epoch_save        : number of epoch for saving the solution during the training
             - epoch_max         : number of epoch of the training before refreshing the data loaded in the memory
             - read_model        : flag to define if the model has to be created or read
@@ -105,6 +116,21 @@ class deep_model():
                                   worker...
             - prefetch          : number of batches to load in memory
             - error_file        : file to store the prediction error
+            - pred_store        : folder of the store of the predictions ("" if it is not used)
+            - pred_fingerprint  : fingerprint of the model in the store of the predictions
+            - field_cache       : cache of the fields read by the predictions. The input field of the index ii and
+                                  the output field of the index ii-delta_pred are read once
+            - field_prefetch    : number of fields read in the background during the predictions
+            - pred_batch        : number of fields predicted in each evaluation of the model
+            - infer_traced      : flag to predict with a traced function
+            - jit_compile       : flag to compile the traced function with XLA
+            - infer_function    : traced inference function of the model (None until the first prediction)
+            - tfrecord_compression : compression of the tfrecord files ("", "ZLIB", "GZIP")
+            - tfrecord_mode     : storage mode of the tfrecord files ("pair", "snapshot")
+            - check_hash        : flag to compare the checksum of the tfrecord files in the check
+            - tfrecord_workers  : number of processes writing the tfrecord files
+            - tfrecord_memory   : memory available for the processes writing the tfrecord files in GB
+            - pipeline          : configuration of the input pipeline of the training
         * Classes
             - strategy          : strategy to use for the multiple gpu. Three different strategies can be used
                                   (MirroredStrategy, CentralStorageStrategy and MultiWorkerMirroredStrategy)
@@ -119,7 +145,7 @@ class deep_model():
                                  "rey":125,"utau":0.060523258443963,"ssh_flag_train":False,
                                  "uvw_folder_temp":"-","ssh_server":"-","ssh_username":"-","ssh_password":"-",
                                  "error_file":"error.txt","umax_file":"umax_file.txt",
-                                 "urmspred_file":"Urms_pred.txt"}):
+                                 "urmspred_file":"Urms_pred.txt","pred_store":""}):
         """
         .................................................................................................................
         # __init__
@@ -136,7 +162,7 @@ class deep_model():
                                          "rey":125,"utau":0.060523258443963,"ssh_flag_train":False,
                                          "uvw_folder_temp":"-","ssh_server":"-","ssh_username":"-","ssh_password":"-",
                                          "error_file":"error.txt","umax_file":"umax_file.txt",
-                                         "urmspred_file":"Urms_pred.txt"}.
+                                         "urmspred_file":"Urms_pred.txt","pred_store":""}.
             Data:
                 - uvw_folder      : folder of the velocity fields
                 - uvw_file        : file name of the velocity fileds without index
@@ -163,6 +189,7 @@ class deep_model():
                 - error_file      : file to store the prediction errors
                 - umax_file       : file containing maximum and minimum velocities
                 - urmspred_file   : file contatining the urms predicted by the model
+                - pred_store      : (optional) folder of the store of the predictions ("" to not use it, default "")
 
         Returns
         -------
@@ -201,6 +228,11 @@ class deep_model():
         self.error_file      = str(data_in["error_file"])        # file to store the prediction errors
         self.umax_file       = str(data_in["umax_file"])
         self.urmspred_file   = str(data_in["urmspred_file"])
+        if "pred_store" in data_in.keys():
+            self.pred_store = str(data_in["pred_store"])         # folder of the store of the predictions
+        else:
+            self.pred_store = ""
+        self.pred_fingerprint = None
         
         # ---------------------------------------------------------------------------------------------------------------
         # Calculate the shape of the tensors in the different directions this is useful in the case
@@ -255,6 +287,8 @@ class deep_model():
                 - field_fin       : final fields for the training
                 - field_delta     : distance between the fields used for the model
                 - field_mem       : number of fields load in memory
+                - field_overlap   : (optional) fraction of the fields of a window of the training kept in the next
+                                    window (default 0.5)
                 - epoch_save      : number of epoch for saving the solution during the training
                 - epoch_max       : number of epoch of the training before refreshing the data loaded in the memory
                 - read_model      : flag to define if the model has to be created or read
@@ -286,6 +320,28 @@ class deep_model():
                 - save_fields     : flag to activate if the fields used for training and validation need to be stored
                                     (True to save, False not save)
                 - traintest_index : file to store training and test files
+                - field_prefetch  : (optional) number of fields read in the background during the predictions
+                                    (default 2, 0 to read the fields sequentially)
+                - pred_batch      : (optional) number of fields predicted in each evaluation of the model (default 1)
+                - infer_traced    : (optional) flag to predict with a traced function instead of the predict function
+                                    of keras (default True)
+                - jit_compile     : (optional) flag to compile the traced function with XLA (default False)
+                - intra_threads   : (optional) threads used inside each operation of tensorflow (default 0, the
+                                    default of tensorflow)
+                - inter_threads   : (optional) threads used to run independent operations of tensorflow (default 0,
+                                    the default of tensorflow)
+                - tfrecord_compression : (optional) compression of the tfrecord files ("": no compression, "ZLIB",
+                                         "GZIP", default "")
+                - tfrecord_mode   : (optional) storage mode of the tfrecord files ("pair": padded input and output
+                                    fields in each file, "snapshot": each field stored once, default "pair")
+                - tfrecord_workers : (optional) number of processes writing the tfrecord files (default 1)
+                - check_hash      : (optional) flag to compare the checksum of the tfrecord files in the check
+                                    (default False)
+                - tfrecord_memory  : (optional) memory available for the processes writing the tfrecord files in GB
+                                     (default 0, no limit)
+                - parse_parallel, deterministic, shuffle_files, data_cache, shuffle_buffer, autotune_ram,
+                  private_threads : (optional) configuration of the input pipeline of the training (see 
+                                    py_bin.py_functions.tfrecord_pipeline.pipeline_config)
                 
         Returns
         -------
@@ -296,6 +352,9 @@ class deep_model():
         # Define packages
         # ---------------------------------------------------------------------------------------------------------------
         import tensorflow as tf
+        from py_bin.py_class.field_cache import field_cache
+        from py_bin.py_functions.tfrecord_pipeline import pipeline_config
+        from py_bin.py_functions.inference import set_threads
         
         # ---------------------------------------------------------------------------------------------------------------
         # Read the input dictionary
@@ -311,6 +370,11 @@ class deep_model():
         self.field_fin       = int(data_in["field_fin"])             # Final field of the training
         self.field_delta     = int(data_in["field_delta"])           # Separation between fields of the model
         self.field_mem       = int(data_in["field_mem"])             # Number of fields stored in memory 
+        if "field_overlap" in data_in.keys():
+            self.field_overlap = float(data_in["field_overlap"])     # fraction of the fields kept in the next window
+            self.field_overlap = np.min([np.max([0,self.field_overlap]),1])
+        else:
+            self.field_overlap = 0.5
         self.epoch_save      = int(data_in["epoch_save"])            # Number of epoch before saving the model
         self.epoch_max       = int(data_in["epoch_max"])             # Number of epoch before refreshing the data
         self.read_model      = bool(data_in["read_model"])           # Flag to create or read the model
@@ -341,6 +405,60 @@ class deep_model():
         self.flag_tfrecord   = bool(data_in["flag_tfrecord"])
         self.save_fields     = bool(data_in["save_fields"])
         self.traintest_index = str(data_in["traintest_index"])
+        if "field_prefetch" in data_in.keys():
+            self.field_prefetch = int(data_in["field_prefetch"])     # number of fields read in the background
+        else:
+            self.field_prefetch = 2
+        if "pred_batch" in data_in.keys():
+            self.pred_batch = max(int(data_in["pred_batch"]),1)      # number of fields predicted together
+        else:
+            self.pred_batch = 1
+        if "infer_traced" in data_in.keys():
+            self.infer_traced = bool(data_in["infer_traced"])        # flag to predict with a traced function
+        else:
+            self.infer_traced = True
+        if "jit_compile" in data_in.keys():
+            self.jit_compile = bool(data_in["jit_compile"])          # flag to compile the function with XLA
+        else:
+            self.jit_compile = False
+        if "intra_threads" in data_in.keys():
+            intra_threads = int(data_in["intra_threads"])            # threads inside each operation
+        else:
+            intra_threads = 0
+        if "inter_threads" in data_in.keys():
+            inter_threads = int(data_in["inter_threads"])            # threads of the independent operations
+        else:
+            inter_threads = 0
+        set_threads(data_in={"intra_threads":intra_threads,"inter_threads":inter_threads})
+        self.infer_function = None
+        if "tfrecord_compression" in data_in.keys():
+            self.tfrecord_compression = str(data_in["tfrecord_compression"]) # compression of the tfrecord files
+        else:
+            self.tfrecord_compression = ""
+        if "tfrecord_mode" in data_in.keys():
+            self.tfrecord_mode = str(data_in["tfrecord_mode"])               # storage mode of the tfrecord files
+        else:
+            self.tfrecord_mode = "pair"
+        if "tfrecord_workers" in data_in.keys():
+            self.tfrecord_workers = int(data_in["tfrecord_workers"])         # processes writing the tfrecord files
+        else:
+            self.tfrecord_workers = 1
+        if "tfrecord_memory" in data_in.keys():
+            self.tfrecord_memory = float(data_in["tfrecord_memory"])         # memory of the processes in GB
+        else:
+            self.tfrecord_memory = 0
+        if "check_hash" in data_in.keys():
+            self.check_hash = bool(data_in["check_hash"])                    # flag to compare the checksums
+        else:
+            self.check_hash = False
+        self.pipeline = pipeline_config(data_in=data_in)                     # configuration of the input pipeline
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Define the cache of the fields. The cache stores the fields between the input and the output field and the
+        # fields read in the background, every field is stored normalized and dimensional.
+        # ---------------------------------------------------------------------------------------------------------------
+        nfield_cache     = 2*(int(np.ceil(self.delta_pred/self.field_delta))+1+self.field_prefetch)
+        self.field_cache = field_cache(data_in={"max_bytes":nfield_cache*3*8*self.shpx*self.shpy*self.shpz})
         
         print("Start the model definition.",flush=True)
         # ---------------------------------------------------------------------------------------------------------------
@@ -535,6 +653,8 @@ class deep_model():
                     self.model = Model(self.inputs, self.outputs)
                     self.model.compile(loss=tf.keras.losses.MeanSquaredError(),optimizer=optimizer)
         self.model.summary()    
+        self.pred_fingerprint = None
+        self.infer_function   = None
         memory_data  = psutil.virtual_memory()
         print('Total RAM (GB): '+str(memory_data[0]/1e9),flush=True)
         print("-"*100,flush=True)
@@ -590,9 +710,9 @@ class deep_model():
         # --------------------------------------------------------------------------------------------------------------
         from py_bin.py_functions.trainvali_data import read_inout_notprepared, data_traintest_tf, read_data_tf
         from py_bin.py_functions.multiworker_checkpoint import write_filepath, remove_workers
-        import tensorflow as tf
         from py_bin.py_remote.read_remote import recursivedelete
         from py_bin.py_functions.read_tfrecord import read_tfrecord
+        from py_bin.py_functions.tfrecord_pipeline import finish_pipeline
         
         # --------------------------------------------------------------------------------------------------------------
         # Modifgy the number of fields loaded in memory and the percentage used for validation to fit the batch and 
@@ -631,6 +751,11 @@ class deep_model():
         # ind_vec : randomized index for the training
         # ii_ini  : initial index of the subset of data
         # ii_fin  : final index of the subset of data
+        # The windows are advanced by the fields not overlapped with the next window. When the data is read from the
+        # velocity files, the overlapped fields of the previous window are kept in memory and only the new fields are
+        # read and normalized.
+        # ii_step   : fields advanced between the windows
+        # data_prev : data of the previous window
         # --------------------------------------------------------------------------------------------------------------
         if self.save_fields and self.read_model:
             ind_vec = self._read_fieldsvec()["ind_vec"]
@@ -642,6 +767,8 @@ class deep_model():
         ii_fin   = ii_ini+self.field_mem
         epochcum = 0
         ind_tfr  = 0    
+        ii_step   = max(int(self.field_mem*(1-self.field_overlap)),1)
+        data_prev = None
         while ii_ini < self.field_fin-self.field_ini-1:
             if ii_fin < self.field_fin-self.field_ini:
                 interval = ind_vec[ii_ini:ii_fin]
@@ -657,7 +784,11 @@ class deep_model():
                 data_trainvali = read_tfrecord(data_in={"tfrecord_folder":self.tfrecord_folder,"interval":interval,
                                                         "test_size":self.test_size,"padding":self.padding,
                                                         "shpx":self.shpx,"shpy":self.shpy,"shpz":self.shpz,
-                                                        "data_type":self.data_type})
+                                                        "data_type":self.data_type,
+                                                        "compression":self.tfrecord_compression,
+                                                        "tfrecord_mode":self.tfrecord_mode,
+                                                        "delta_pred":self.delta_pred,"pipeline":self.pipeline,
+                                                        "check":self.check,"check_hash":self.check_hash})
                 ind_tfr = 0
             else:
                 if self.prep_data:
@@ -673,8 +804,10 @@ class deep_model():
                                       "shpx":self.shpx,"shpy":self.shpy,"shpz":self.shpz,
                                       "dx":self.dx,"dy":self.dy,"dz":self.dz,"data_folder":self.data_folder,
                                       "umean_file":self.umean_file,"unorm_file":self.unorm_file,
-                                      "mean_norm":self.mean_norm,"data_type":data_type}
+                                      "mean_norm":self.mean_norm,"data_type":self.data_type,
+                                      "field_prefetch":self.field_prefetch,"data_prev":data_prev}
                     data_base_mem  = read_inout_notprepared(data_in=data_trainval)
+                    data_prev      = data_base_mem
                     data_tensor    = {"data_X":data_base_mem["data_X"],"data_Y":data_base_mem["data_Y"],
                                       "interval":None,"test_size":self.test_size,"shpx":self.shpx,"shpy":self.shpy,
                                       "shpz":self.shpz,"padding":self.padding,"data_type":self.data_type}
@@ -683,14 +816,12 @@ class deep_model():
             vali_data  = data_trainvali["data_vali"]
             del data_trainvali
             
-            if self.prefetch < 0:
-                self.prefetch = tf.data.AUTOTUNE
-            train_data = train_data.batch(self.batch_size)
-            vali_data  = vali_data.batch(self.batch_size)
-            train_data = train_data.prefetch(self.prefetch)
-            vali_data  = vali_data.prefetch(self.prefetch)
-            train_data = train_data.with_options(self.options)
-            vali_data  = vali_data.with_options(self.options)
+            train_data = finish_pipeline(data_in={"dataset":train_data,"batch_size":self.batch_size,
+                                                  "prefetch":self.prefetch,"options":self.options,
+                                                  "pipeline":self.pipeline})["dataset"]
+            vali_data  = finish_pipeline(data_in={"dataset":vali_data,"batch_size":self.batch_size,
+                                                  "prefetch":self.prefetch,"options":self.options,
+                                                  "pipeline":dict(self.pipeline,shuffle_buffer=0)})["dataset"]
             
             # ----------------------------------------------------------------------------------------------------------
             # Start training. Train during epoch_save epochs and save the results (model and training).
@@ -703,6 +834,8 @@ class deep_model():
                 print('Training... '+str(ii_ini/(self.field_fin-self.field_ini)*100)+'%',flush=True)
                 data_training = self.model.fit(train_data,batch_size=self.batch_size,verbose=2,
                                                epochs=self.epoch_save,validation_data=vali_data) 
+                self.pred_fingerprint = None
+                self.infer_function   = None
                 print('Number of epochs...',flush=True)
                 
                 # ------------------------------------------------------------------------------------------------------
@@ -729,14 +862,68 @@ class deep_model():
                 epoch    += self.epoch_save
                 epochcum += self.epoch_save
                 del data_training
-            ii_ini   = ii_ini+int(self.field_mem/2)
-            ii_fin   = ii_fin+int(self.field_mem/2)
+            ii_ini   = ii_ini+ii_step
+            ii_fin   = ii_fin+ii_step
             ind_tfr += 1
             del train_data, vali_data
             if self.ssh_flag_train:
                 print("Delete folder: "+self.uvw_folder_temp,flush=True)
                 recursivedelete(self.uvw_folder_temp)
             
+    def benchmark_pipeline(self,data_in={"nbatch":100,"nwarmup":5}):
+        """
+        .................................................................................................................
+        # benchmark_pipeline
+        .................................................................................................................
+        Function to measure the throughput of the input pipeline of the training without the model. The pipeline is
+        built as in the training for the first fields loaded in memory. If the throughput of the pipeline is lower
+        than the throughput of the training, the training is limited by the input.
+
+        Parameters
+        ----------
+        data_in : dict, optional
+            Data of the benchmark. The default is {"nbatch":100,"nwarmup":5}.
+            Data:
+                - nbatch  : number of batches measured
+                - nwarmup : number of batches iterated before the measurement
+
+        Returns
+        -------
+        dict
+            Throughput of the pipeline (see py_bin.py_functions.tfrecord_pipeline.benchmark_pipeline)
+
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        # Import packages
+        # --------------------------------------------------------------------------------------------------------------
+        from py_bin.py_functions.read_tfrecord import read_tfrecord
+        from py_bin.py_functions.tfrecord_pipeline import finish_pipeline, benchmark_pipeline
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Read the data
+        # --------------------------------------------------------------------------------------------------------------
+        nbatch  = int(data_in["nbatch"])
+        nwarmup = int(data_in["nwarmup"])
+        if not self.flag_tfrecord:
+            print("The benchmark of the pipeline requires the tfrecord files. Exit calculation!",flush=True)
+            sys.exit()
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Build the pipeline of the training data and measure it
+        # --------------------------------------------------------------------------------------------------------------
+        interval   = np.array(range(self.field_ini,self.field_fin,self.field_delta),dtype='int')[:self.field_mem]
+        train_data = read_tfrecord(data_in={"tfrecord_folder":self.tfrecord_folder,"interval":interval,
+                                            "test_size":self.test_size,"padding":self.padding,"shpx":self.shpx,"shpy":self.shpy,
+                                            "shpz":self.shpz,"data_type":self.data_type,
+                                            "compression":self.tfrecord_compression,
+                                            "tfrecord_mode":self.tfrecord_mode,"delta_pred":self.delta_pred,
+                                            "pipeline":self.pipeline})["data_train"]
+        train_data = finish_pipeline(data_in={"dataset":train_data,"batch_size":self.batch_size,
+                                              "prefetch":self.prefetch,"options":self.options,
+                                              "pipeline":self.pipeline})["dataset"]
+        data_out   = benchmark_pipeline(data_in={"dataset":train_data,"nbatch":nbatch,"nwarmup":nwarmup})
+        return data_out
+            
     def prepare_data(self):
         """
         ................................................................................................................
@@ -764,7 +951,8 @@ class deep_model():
                          "shpz":self.shpz,"dx":self.dx,"dy":self.dy,"dz":self.dz,"data_folder":self.data_folder,
                          "umean_file":self.umean_file,"unorm_file":self.unorm_file,"test_size":self.test_size,
                          "folder_tf":self.uvw_folder_tf,"folderii_tf":self.uvw_folderii_tf,
-                         "data_type":self.data_type,"mean_norm":self.mean_norm}
+                         "data_type":self.data_type,"mean_norm":self.mean_norm,
+                         "field_prefetch":self.field_prefetch}
         prepare_data_tf(data_in=data_trainval)
 
     
@@ -889,18 +1077,125 @@ class deep_model():
                     self.prepare_data()
                     self.field_fin = field_fin
                     
+    def _prefetch_fields(self,data_in={"interval":[],"read_out":True}):
+        """
+        ................................................................................................................
+        # _prefetch_fields
+        ................................................................................................................
+        Function to iterate over the fields of the predictions. The next fields are read in the background while the
+        current field is predicted. The input fields of the predictions already stored are not read.
+        Parameters
+        ----------
+        data_in : dict, dictionary containing the data required for reading the fields
+            DESCRIPTION. The default is {"interval":[],"read_out":True}.
+            Data:
+                - interval : indices of the input fields
+                - read_out : flag to read the output field (velocity fluctuation without normalization)
+                - skip_in  : (optional) indices of the input fields that are not read (None is returned)
+
+        Returns
+        -------
+        generator
+            Fields of each index.
+            Data:
+                - index             : index of the input field
+                - norm_velocity_in  : normalized input field (None for the indices of skip_in)
+                - norm_tensor_in    : channel-last tensor of the normalized input field (None for the indices of
+                                      skip_in)
+                - norm_velocity_out : velocity fluctuation of the output field (only if read_out is True)
+                - time_read         : time for reading the fields
+                - time_norm         : time for normalizing the fields
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        # Import packages
+        # --------------------------------------------------------------------------------------------------------------
+        from py_bin.py_functions.prefetch_fields import prefetch_fields, read_norm_pair
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Read the data
+        # --------------------------------------------------------------------------------------------------------------
+        interval  = np.array(data_in["interval"],dtype="int")
+        read_out  = bool(data_in["read_out"])
+        if "skip_in" in data_in.keys():
+            skip_in = set([int(index_ii) for index_ii in data_in["skip_in"]])
+        else:
+            skip_in = set()
+        data_norm = {"folder":self.uvw_folder,"file":self.uvw_file,"padding":self.padding,"shpx":self.shpx,
+                     "shpy":self.shpy,"shpz":self.shpz,"dx":self.dx,"dy":self.dy,"dz":self.dz,
+                     "data_folder":self.data_folder,"umean_file":self.umean_file,"unorm_file":self.unorm_file,
+                     "delta_pred":self.delta_pred,"data_type":self.data_type,"mean_norm":self.mean_norm,
+                     "norm_out":False,"field_cache":self.field_cache}
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Define the function reading each field
+        # --------------------------------------------------------------------------------------------------------------
+        if read_out:
+            function = read_norm_pair
+        else:
+            function = self._read_field_in
+        data_read = [dict(data_norm,index=int(index_ii),read_in=int(index_ii) not in skip_in) for index_ii in interval]
+        return prefetch_fields(data_in={"function":function,"data_read":data_read,"nprefetch":self.field_prefetch,
+                                        "nworkers":1})
+    
+    def _read_field_in(self,data_in={"index":1000}):
+        """
+        ................................................................................................................
+        # _read_field_in
+        ................................................................................................................
+        Function to read the normalized input field of a prediction.
+        Parameters
+        ----------
+        data_in : dict, dictionary containing the data required for reading the field
+            DESCRIPTION. The default is {"index":1000}.
+            Data:
+                - index   : index of the field, the rest of the keys are the data of read_norm_velocity
+                - read_in : (optional) flag to read the field (default True, None is returned if False)
+
+        Returns
+        -------
+        dict
+            Input field.
+            Data:
+                - index            : index of the input field
+                - norm_velocity_in : normalized input field
+                - norm_tensor_in   : channel-last tensor of the normalized input field
+                - time_read        : time for reading the field
+                - time_norm        : time for normalizing the field
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        # Import packages
+        # --------------------------------------------------------------------------------------------------------------
+        from py_bin.py_functions.read_norm_velocity import read_norm_velocity
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Read the field
+        # --------------------------------------------------------------------------------------------------------------
+        if "read_in" in data_in.keys() and not bool(data_in["read_in"]):
+            data_out = {"index":int(data_in["index"]),"norm_velocity_in":None,"norm_tensor_in":None,"time_read":0,
+                        "time_norm":0}
+            return data_out
+        data_veloc_norm = read_norm_velocity(data_in=data_in)
+        data_out        = {"index":int(data_in["index"]),"norm_velocity_in":data_veloc_norm["norm_velocity"],
+                           "norm_tensor_in":data_veloc_norm["norm_tensor"],"time_read":data_veloc_norm["time_read"],
+                           "time_norm":data_veloc_norm["time_norm"]}
+        return data_out
+
     def pred_field(self,data_in={"index_ii":1000}):
         """
         ................................................................................................................
         # pred_field
         ................................................................................................................
-        Function to use the model to predict the evolution of the flow
+        Function to use the model to predict the evolution of the flow. If the store of the predictions is active, the
+        stored prediction is used and the new predictions are stored.
         Parameters
         ----------
         data_in : dict, dictionary containing the data required for predicting the field
             DESCRIPTION. The default is {"index_ii":1000}.
             Data:
-                - index_ii : Index of the field
+                - index_ii         : Index of the field
+                - norm_velocity_in : (optional) normalized input field if it has already been read
+                - norm_tensor_in   : (optional) channel-last tensor of the normalized input field if it has already
+                                     been read, it is used as the input of the model without copying it
 
         Returns
         -------
@@ -915,42 +1210,50 @@ class deep_model():
         # Import packages
         # --------------------------------------------------------------------------------------------------------------
         from py_bin.py_functions.read_norm_velocity import read_norm_velocity
-        from py_bin.py_functions.norm_velocity import dim_velocity
+        from py_bin.py_functions.prediction_store import stored_index
         
         # --------------------------------------------------------------------------------------------------------------
         # Read the data
         # --------------------------------------------------------------------------------------------------------------
         index_ii = int(data_in["index_ii"])
         
+        # --------------------------------------------------------------------------------------------------------------
+        # Use the store of the predictions without reading the input field
+        # --------------------------------------------------------------------------------------------------------------
+        if self.pred_store != "":
+            if index_ii in stored_index(data_in={"file":self._pred_store_file()["file"]})["index"]:
+                return self.pred_fields(data_in={"norm_tensor_in":[None],"index":[index_ii]})["pred"][0]
+        
         # --------------------------------------------------------------------------------------------------------------
         # Read the input field
         # --------------------------------------------------------------------------------------------------------------
-        field_in         = np.zeros((1,self.shpy,self.shpz+2*self.padding,self.shpx+2*self.padding,3),
-                                    dtype=self.data_type)
-        data_norm_in     = {"folder":self.uvw_folder,"file":self.uvw_file,"padding":self.padding,"shpx":self.shpx,
-                            "shpy":self.shpy,"shpz":self.shpz,"dx":self.dx,"dy":self.dy,"dz":self.dz,
-                            "data_folder":self.data_folder,"umean_file":self.umean_file,
-                            "unorm_file":self.unorm_file,"index":index_ii,
-                            "data_type":self.data_type,"mean_norm":self.mean_norm}
-        data_veloc_norm  = read_norm_velocity(data_in=data_norm_in)
-        norm_velocity_in = data_veloc_norm["norm_velocity"]
-        print("Time for reading the field: "+str(data_veloc_norm["time_read"]),flush=True)
-        print("Time for normalizing the field: "+str(data_veloc_norm["time_norm"]),flush=True)
-        del data_norm_in,data_veloc_norm
-        field_in[0,:,:,:,0] = norm_velocity_in['unorm']
-        field_in[0,:,:,:,1] = norm_velocity_in['vnorm']
-        field_in[0,:,:,:,2] = norm_velocity_in['wnorm']
-        del norm_velocity_in
+        if "norm_tensor_in" in data_in.keys():
+            field_in = data_in["norm_tensor_in"][np.newaxis]
+        elif "norm_velocity_in" in data_in.keys():
+            norm_velocity_in    = data_in["norm_velocity_in"]
+            field_in            = np.zeros((1,self.shpy,self.shpz+2*self.padding,self.shpx+2*self.padding,3),
+                                           dtype=self.data_type)
+            field_in[0,:,:,:,0] = norm_velocity_in['unorm']
+            field_in[0,:,:,:,1] = norm_velocity_in['vnorm']
+            field_in[0,:,:,:,2] = norm_velocity_in['wnorm']
+            del norm_velocity_in
+        else:
+            data_norm_in     = {"folder":self.uvw_folder,"file":self.uvw_file,"padding":self.padding,
+                                "shpx":self.shpx,"shpy":self.shpy,"shpz":self.shpz,"dx":self.dx,"dy":self.dy,
+                                "dz":self.dz,"data_folder":self.data_folder,"umean_file":self.umean_file,
+                                "unorm_file":self.unorm_file,"index":index_ii,"data_type":self.data_type,
+                                "mean_norm":self.mean_norm,"field_cache":self.field_cache}
+            data_veloc_norm  = read_norm_velocity(data_in=data_norm_in)
+            field_in         = data_veloc_norm["norm_tensor"][np.newaxis]
+            print("Time for reading the field: "+str(data_veloc_norm["time_read"]),flush=True)
+            print("Time for normalizing the field: "+str(data_veloc_norm["time_norm"]),flush=True)
+            del data_norm_in,data_veloc_norm
         
         # --------------------------------------------------------------------------------------------------------------
         # Calculate the predicted field
         # --------------------------------------------------------------------------------------------------------------
-        field_pred = self.model.predict(field_in)
+        data_out = self.pred_fields(data_in={"norm_tensor_in":[field_in[0]],"index":[index_ii]})["pred"][0]
         del field_in
-        data_out   = dim_velocity(data_in={"unorm":field_pred[0,:,:,:,0],"vnorm":field_pred[0,:,:,:,1],
-                                           "wnorm":field_pred[0,:,:,:,2],"folder_data":self.data_folder,
-                                           "unorm_file":self.unorm_file,"data_type":self.data_type,
-                                           "mean_norm":self.mean_norm})
         return data_out
 
     def field_error(self,data_in={"index_ii":1000}):
@@ -964,7 +1267,9 @@ class deep_model():
         data_in : dict, dictionary containing the data required for predicting the field
             DESCRIPTION. The default is {"index_ii":1000}.
             Data:
-                - index_ii : Index of the field
+                - index_ii  : Index of the field
+                - data_read : (optional) input and output fields if they have already been read (output of 
+                              read_norm_pair without normalizing the output field)
 
         Returns
         -------
@@ -986,10 +1291,19 @@ class deep_model():
         # --------------------------------------------------------------------------------------------------------------
         index_ii = int(data_in["index_ii"])
         
+        if "data_read" in data_in.keys():
+            data_read = data_in["data_read"]
+        else:
+            data_read = None
+        
         # ----------------------------------------------------------------------------------------------------------
         # Predict the field
         # ----------------------------------------------------------------------------------------------------------
-        dim_pred                = self.pred_field(data_in={"index_ii":index_ii})
+        if data_read is not None:
+            dim_pred            = self.pred_field(data_in={"index_ii":index_ii,
+                                                           "norm_tensor_in":data_read["norm_tensor_in"]})
+        else:
+            dim_pred            = self.pred_field(data_in={"index_ii":index_ii})
         field_out_pred          = np.zeros((self.shpy,self.shpz,self.shpx,3),dtype=self.data_type)
         field_out_pred[:,:,:,0] = dim_pred["uu"]
         field_out_pred[:,:,:,1] = dim_pred["vv"]
@@ -999,15 +1313,18 @@ class deep_model():
         # Read the output file
         # --------------------------------------------------------------------------------------------------------------
         field_out          = np.zeros((self.shpy,self.shpz,self.shpx,3),dtype=self.data_type)
-        data_velocity_out  = {"folder":self.uvw_folder,"file":self.uvw_file,"index":index_ii+self.delta_pred,
-                              "dx":self.dx,"dy":self.dy,"dz":self.dz,"shpx":self.shpx,"shpy":self.shpy,
-                              "shpz":self.shpz,"padding":0,"data_folder":self.data_folder,
-                              "umean_file":self.umean_file}
-        velocity_out       = read_velocity(data_velocity_out)
+        if data_read is not None:
+            velocity_out   = data_read["norm_velocity_out"]
+        else:
+            data_velocity_out = {"folder":self.uvw_folder,"file":self.uvw_file,"index":index_ii+self.delta_pred,
+                                 "dx":self.dx,"dy":self.dy,"dz":self.dz,"shpx":self.shpx,"shpy":self.shpy,
+                                 "shpz":self.shpz,"padding":0,"data_folder":self.data_folder,
+                                 "umean_file":self.umean_file,"field_cache":self.field_cache,"dtype":"float32"}
+            velocity_out      = read_velocity(data_velocity_out)
+            del data_velocity_out
         field_out[:,:,:,0] = velocity_out['uu']
         field_out[:,:,:,1] = velocity_out['vv']
         field_out[:,:,:,2] = velocity_out['ww']
-        del data_velocity_out
         
         # --------------------------------------------------------------------------------------------------------------
         # Calculate the error
@@ -1036,15 +1353,154 @@ class deep_model():
         del velocity_out
         return data_out
                          
-    def pred_error(self):
+    def pred_fields(self,data_in={"norm_tensor_in":[]}):
         """
         ................................................................................................................
-        # pred_error
+        # pred_fields
         ................................................................................................................
-        Function to calculate the error between the predicted field and the expected field.
-        The error is calculated weighting the localerror with the volume of each cell. 
-        The relative error is calculated with respect to the maximum velocity of each wall distance.
-																 
+        Function to use the model to predict the evolution of a batch of fields in a single evaluation of the model.
+        If the store of the predictions is active and the indices of the fields are given, the stored predictions are
+        used and only the rest of the fields are predicted and stored.
+        Parameters
+        ----------
+        data_in : dict, dictionary containing the data required for predicting the fields
+            DESCRIPTION. The default is {"norm_tensor_in":[]}.
+            Data:
+                - norm_tensor_in : list of the channel-last tensors of the normalized input fields (None can be used
+                                   for the fields in the store)
+                - index          : (optional) list of the indices of the input fields to use the store
+
+        Returns
+        -------
+        dict
+            Predicted fields.
+            Data:
+                - pred : list of the predicted velocity fluctuations of each field (uu, vv and ww, see pred_field)
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        # Import packages
+        # --------------------------------------------------------------------------------------------------------------
+        from py_bin.py_functions.norm_velocity import dim_velocity
+        from py_bin.py_functions.prediction_store import read_prediction, write_prediction
+        from py_bin.py_functions.inference import inference_function
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Read the data
+        #   - file_store : file of the store of the predictions (None if the store is not used)
+        # --------------------------------------------------------------------------------------------------------------
+        norm_tensor_in = list(data_in["norm_tensor_in"])
+        if "index" in data_in.keys() and self.pred_store != "":
+            index      = [int(index_ii) for index_ii in data_in["index"]]
+            file_store = self._pred_store_file()["file"]
+        else:
+            index      = None
+            file_store = None
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Read the predictions of the store
+        #   - field_pred : output of the model for each field
+        #   - ind_new    : fields to predict
+        # --------------------------------------------------------------------------------------------------------------
+        field_pred = [None]*len(norm_tensor_in)
+        if file_store is not None:
+            for ii in np.arange(len(norm_tensor_in)):
+                field_pred[ii] = read_prediction(data_in={"file":file_store,"index":index[ii]})["field"]
+        ind_new = [ii for ii in np.arange(len(norm_tensor_in)) if field_pred[ii] is None]
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Calculate the predicted fields. A single field is used as the input of the model without copying it. The
+        # traced function is defined in the first prediction.
+        # --------------------------------------------------------------------------------------------------------------
+        if len(ind_new) > 0:
+            if len(ind_new) == 1:
+                field_in = norm_tensor_in[ind_new[0]][np.newaxis]
+            else:
+                field_in = np.stack([norm_tensor_in[ii] for ii in ind_new],axis=0)
+            if self.infer_traced:
+                if self.infer_function is None:
+                    self.infer_function = inference_function(data_in={"model":self.model,"data_type":self.data_type,
+                                                                      "jit_compile":self.jit_compile})["function"]
+                pred_new = self.infer_function(field_in).numpy()
+            else:
+                pred_new = self.model.predict(field_in,batch_size=len(ind_new))
+            del field_in
+            for jj,ii in enumerate(ind_new):
+                field_pred[ii] = pred_new[jj]
+                if file_store is not None:
+                    write_prediction(data_in={"file":file_store,"index":index[ii],"field":pred_new[jj],
+                                              "fingerprint":self.pred_fingerprint,"delta_pred":self.delta_pred})
+            del pred_new
+        pred     = [dim_velocity(data_in={"unorm":field[:,:,:,0],"vnorm":field[:,:,:,1],"wnorm":field[:,:,:,2],
+                                          "folder_data":self.data_folder,"unorm_file":self.unorm_file,
+                                          "data_type":self.data_type,"mean_norm":self.mean_norm})
+                    for field in field_pred]
+        data_out = {"pred":pred}
+        return data_out
+    
+    def _pred_store_file(self):
+        """
+        ................................................................................................................
+        # _pred_store_file
+        ................................................................................................................
+        Function to define the file of the store of the predictions of the model. The fingerprint of the model is
+        calculated once with the weights, the configuration of the architecture, the database of the fields and the
+        content of the files of the normalization. The fingerprint is calculated again after the model is created or
+        trained.
+
+        Returns
+        -------
+        dict
+            File of the store.
+            Data:
+                - file        : file of the store
+                - fingerprint : fingerprint of the model
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        # Import packages
+        # --------------------------------------------------------------------------------------------------------------
+        from py_bin.py_functions.prediction_store import model_fingerprint, store_file
+        from py_bin.py_functions.tfrecord_manifest import file_checksum
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Calculate the fingerprint. The files of the normalization are identified by their checksum.
+        # --------------------------------------------------------------------------------------------------------------
+        if self.pred_fingerprint is None:
+            config                = {"padding":self.padding,"shpx":self.shpx,"shpy":self.shpy,"shpz":self.shpz,
+                                     "dx":self.dx,"dy":self.dy,"dz":self.dz,"nfil":self.nfil,"stride":self.stride,
+                                     "activation":self.activation,"kernel":self.kernel,"pooling":self.pooling,
+                                     "data_type":self.data_type,"mean_norm":self.mean_norm,
+                                     "uvw_folder":self.uvw_folder,"uvw_file":self.uvw_file,
+                                     "data_folder":self.data_folder,"umean_file":self.umean_file,
+                                     "unorm_file":self.unorm_file}
+            for key in ["umean_file","unorm_file"]:
+                file_norm = self.data_folder+'/'+config[key]
+                if os.path.exists(file_norm):
+                    config[key+"_md5"] = file_checksum(data_in={"file":file_norm,
+                                                                "block_size":16*1024**2})["checksum"]
+            self.pred_fingerprint = model_fingerprint(data_in={"weights":self.model.get_weights(),
+                                                               "config":config})["fingerprint"]
+            print("Fingerprint of the model: "+self.pred_fingerprint,flush=True)
+        file_store = store_file(data_in={"store_folder":self.pred_store,"fingerprint":self.pred_fingerprint,
+                                         "delta_pred":self.delta_pred})["file"]
+        data_out   = {"file":file_store,"fingerprint":self.pred_fingerprint}
+        return data_out
+    
+    def predict_range(self,data_in={"field_ini":1000,"field_fin":7000,"field_delta":1}):
+        """
+        ................................................................................................................
+        # predict_range
+        ................................................................................................................
+        Function to fill the store of the predictions with the fields of a range. The fields already stored are
+        skipped and the rest are predicted in batches of pred_batch fields.
+        Parameters
+        ----------
+        data_in : dict, dictionary containing the range of the fields
+            DESCRIPTION. The default is {"field_ini":1000,"field_fin":7000,"field_delta":1}.
+            Data:
+                - field_ini   : initial field
+                - field_fin   : final field
+                - field_delta : distance between the fields
+
         Returns
         -------
         None.
@@ -1053,70 +1509,101 @@ class deep_model():
         # --------------------------------------------------------------------------------------------------------------
         # Import packages
         # --------------------------------------------------------------------------------------------------------------
-        from py_bin.py_class.flow_field import flow_field
+        from py_bin.py_functions.prediction_store import stored_index
         
-        # --------------------------------------------------------------------------------------------------------------																												
-        # Get the volume of the mesh
         # --------------------------------------------------------------------------------------------------------------
-        Data_flow = {"folder":self.uvw_folder,"file":self.uvw_file,"down_x":self.dx,"down_y":self.dy,
-                     "down_z":self.dz,"L_x":self.L_x,"L_y":self.L_y,"L_z":self.L_z,"rey":self.rey,"utau":self.utau}
-        flowfield = flow_field(data_in=Data_flow)
-        flowfield.shape_tensor()
-        flowfield.flow_grid()
-        vol = flowfield.vol_plus
-        del flowfield, Data_flow
-        
-        # --------------------------------------------------------------------------------------------------------------
-        # Create the array containing the indices of the fields to check
-        # --------------------------------------------------------------------------------------------------------------
-        interval = np.array(range(self.field_ini,self.field_fin,self.field_delta),dtype='int')
-        error_u  = 0
-        error_v  = 0
-        error_w  = 0
-        n_error  = 0
-        
-        for index_ii in interval:
-            data_error = self.field_error(data_in={"index_ii":index_ii,"vol":vol})
-            erru       = np.sum(np.multiply(data_error["err_u"],vol))
-            errv       = np.sum(np.multiply(data_error["err_v"],vol))
-            errw       = np.sum(np.multiply(data_error["err_w"],vol))
-            errvol     = np.sum(vol)
-            error_u   += erru
-            error_v   += errv
-            error_w   += errw
-            n_error   += errvol
-            print("Error u:"+str(erru/errvol*100)+"%",flush=True)
-            print("Error v:"+str(errv/errvol*100)+"%",flush=True)
-            print("Error w:"+str(errw/errvol*100)+"%",flush=True)
-            del erru,errv,errw,errvol,data_error
-            
-        error_u /= n_error
-        error_v /= n_error
-        error_w /= n_error
+        # Read the data
+        # --------------------------------------------------------------------------------------------------------------
+        if self.pred_store == "":
+            print("The store of the predictions is not defined. Exit calculation!",flush=True)
+            sys.exit()
+        field_ini   = int(data_in["field_ini"])
+        field_fin   = int(data_in["field_fin"])
+        field_delta = int(data_in["field_delta"])
+        file_store  = self._pred_store_file()["file"]
+        index_store = stored_index(data_in={"file":file_store})["index"]
+        interval    = np.array([index_ii for index_ii in range(field_ini,field_fin,field_delta)
+                                if index_ii not in index_store],dtype='int')
+        print("Fields to predict: "+str(len(interval))+", stored in: "+file_store,flush=True)
         
-        # ----------------------------------------------------------------------------------------------------------
-        # Save in file
-        # ---------------------------------------------------------------------------------------------------------- 
-        file_error = self.data_folder+'/'+self.error_file                     
-        file_save  = open(file_error, "w+")           
-        content    = str(error_u.tolist())+'\n'
-        file_save.write(content)           
-        content    = str(error_v.tolist())+'\n'
-        file_save.write(content)           
-        content    = str(error_w.tolist())+'\n'
-        file_save.write(content) 
-        file_save.close()
+        # --------------------------------------------------------------------------------------------------------------
+        # Predict the fields in batches
+        # --------------------------------------------------------------------------------------------------------------
+        batch = []
+        for ii,data_read in enumerate(self._prefetch_fields(data_in={"interval":interval,"read_out":False})):
+            print("Time for reading the field: "+str(data_read["time_read"]),flush=True)
+            print("Time for normalizing the field: "+str(data_read["time_norm"]),flush=True)
+            batch.append(data_read)
+            if len(batch) < self.pred_batch and ii < len(interval)-1:
+                continue
+            self.pred_fields(data_in={"norm_tensor_in":[data["norm_tensor_in"] for data in batch],
+                                      "index":[data["index"] for data in batch]})
+            print("Fields stored: "+str([data["index"] for data in batch]),flush=True)
+            batch = []
+                         
+    def benchmark_inference(self,data_in={"nrep":20,"nwarmup":3}):
+        """
+        ................................................................................................................
+        # benchmark_inference
+        ................................................................................................................
+        Function to measure the latency of the prediction of a field with the predict function of keras and with the
+        traced function. The first field of the interval is repeated to build a batch of pred_batch fields.
+        Parameters
+        ----------
+        data_in : dict, dictionary containing the data of the benchmark
+            DESCRIPTION. The default is {"nrep":20,"nwarmup":3}.
+            Data:
+                - nrep    : number of evaluations measured
+                - nwarmup : number of evaluations before the measurement
 
+        Returns
+        -------
+        dict
+            Latency of each function (see py_bin.py_functions.inference.benchmark_inference)
+        """
+        # --------------------------------------------------------------------------------------------------------------
+        # Import packages
+        # --------------------------------------------------------------------------------------------------------------
+        from py_bin.py_functions.inference import inference_function, benchmark_inference
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Read the input field
+        # --------------------------------------------------------------------------------------------------------------
+        data_read = next(self._prefetch_fields(data_in={"interval":[self.field_ini],"read_out":False}))
+        field_in  = np.repeat(data_read["norm_tensor_in"][np.newaxis],self.pred_batch,axis=0)
+        del data_read
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Measure the functions
+        # --------------------------------------------------------------------------------------------------------------
+        functions = {"predict":lambda field: self.model.predict(field,batch_size=field.shape[0],verbose=0),
+                     "traced":inference_function(data_in={"model":self.model,"data_type":self.data_type,
+                                                          "jit_compile":False})["function"]}
+        if self.jit_compile:
+            functions["traced_xla"] = inference_function(data_in={"model":self.model,"data_type":self.data_type,
+                                                                  "jit_compile":True})["function"]
+        data_out = benchmark_inference(data_in={"functions":functions,"field_in":field_in,
+                                                "nrep":int(data_in["nrep"]),"nwarmup":int(data_in["nwarmup"])})
+        return data_out
                          
-    def pred_error_y(self):
+    def pred_stats(self,data_in={"error":True,"error_y":True,"urms":True}):
         """
         ................................................................................................................
-        # pred_error_y
+        # pred_stats
         ................................................................................................................
-        Function to calculate the error between the predicted field and the expected field.
+        Function to evaluate the model once in the fields of the interval and to calculate together the error of the
+        prediction, the error distributed along y+ and the rms of the predicted velocity. The fields are predicted in
+        batches of pred_batch fields while the next fields are read in the background.
         The error is calculated weighting the localerror with the volume of each cell. 
         The relative error is calculated with respect to the maximum velocity of each wall distance.
-        The error is distributed along y+
+        Parameters
+        ----------
+        data_in : dict, dictionary containing the outputs to calculate
+            DESCRIPTION. The default is {"error":True,"error_y":True,"urms":True}.
+            Data:
+                - error   : flag to calculate the error of the prediction (stored in error_file)
+                - error_y : flag to calculate the error along y+ (stored in error_file with the suffix _y)
+                - urms    : flag to calculate the rms of the predictions (stored in urmspred_file)
 																 
         Returns
         -------
@@ -1127,59 +1614,139 @@ class deep_model():
         # Import packages
         # --------------------------------------------------------------------------------------------------------------
         from py_bin.py_class.flow_field import flow_field
+        from py_bin.py_functions.normalization import read_norm
+        from py_bin.py_functions.urms import save_rms
+        from py_bin.py_functions.prediction_store import stored_index
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Read the data
+        # --------------------------------------------------------------------------------------------------------------
+        flag_error   = bool(data_in["error"])
+        flag_error_y = bool(data_in["error_y"])
+        flag_urms    = bool(data_in["urms"])
+        read_out     = flag_error or flag_error_y
         
         # --------------------------------------------------------------------------------------------------------------																												
-        # Get the volume of the mesh
+        # Get the volume of the mesh and the reference velocity of the error
+        #   - uvwref : maximum absolute value of each velocity component
+        # --------------------------------------------------------------------------------------------------------------
+        if read_out:
+            Data_flow = {"folder":self.uvw_folder,"file":self.uvw_file,"down_x":self.dx,"down_y":self.dy,
+                         "down_z":self.dz,"L_x":self.L_x,"L_y":self.L_y,"L_z":self.L_z,"rey":self.rey,
+                         "utau":self.utau}
+            flowfield = flow_field(data_in=Data_flow)
+            flowfield.shape_tensor()
+            flowfield.flow_grid()
+            vol = flowfield.vol_plus
+            del flowfield, Data_flow
+            data_norm = read_norm(data_in={"folder":self.data_folder,"file":self.umax_file})
+            uvwref    = [np.max([abs(data_norm["uumax"]),abs(data_norm["uumin"])]),
+                         np.max([abs(data_norm["vvmax"]),abs(data_norm["vvmin"])]),
+                         np.max([abs(data_norm["wwmax"]),abs(data_norm["wwmin"])])]
+            vol_tot   = np.sum(vol)
+            vol_y     = np.sum(vol,axis=(1,2))
+        
         # --------------------------------------------------------------------------------------------------------------
-        Data_flow = {"folder":self.uvw_folder,"file":self.uvw_file,"down_x":self.dx,"down_y":self.dy,
-                     "down_z":self.dz,"L_x":self.L_x,"L_y":self.L_y,"L_z":self.L_z,"rey":self.rey,"utau":self.utau}
-        flowfield = flow_field(data_in=Data_flow)
-        flowfield.shape_tensor()
-        flowfield.flow_grid()
-        vol = flowfield.vol_plus
-        del flowfield, Data_flow
-        
-        # --------------------------------------------------------------------------------------------------------------
-        # Create the array containing the indices of the fields to check
-        # --------------------------------------------------------------------------------------------------------------
-        interval = np.array(range(self.field_ini,self.field_fin,self.field_delta),dtype='int')
-        error_u  = np.zeros((self.shpy,))
-        error_v  = np.zeros((self.shpy,))
-        error_w  = np.zeros((self.shpy,))
-        n_error  = np.zeros((self.shpy,))
-        
-        for index_ii in interval:
-            data_error = self.field_error(data_in={"index_ii":index_ii,"vol":vol})
-            erru       = np.sum(np.multiply(data_error["err_u"],vol),axis=(1,2))
-            errv       = np.sum(np.multiply(data_error["err_v"],vol),axis=(1,2))
-            errw       = np.sum(np.multiply(data_error["err_w"],vol),axis=(1,2))
-            errvol     = np.sum(vol,axis=(1,2))
-            error_u   += erru
-            error_v   += errv
-            error_w   += errw
-            n_error   += errvol
-            print("Error u:"+str(erru/errvol*100)+"%",flush=True)
-            print("Error v:"+str(errv/errvol*100)+"%",flush=True)
-            print("Error w:"+str(errw/errvol*100)+"%",flush=True)
-        error_u /= n_error
-        error_v /= n_error
-        error_w /= n_error
+        # Create the array containing the indices of the fields and the accumulated values
+        #   - error   : accumulated error of each velocity component
+        #   - error_y : accumulated error of each velocity component along y+
+        #   - n_error : accumulated volume
+        #   - rms_cum : accumulated products of the predicted velocity along y+ (uu, vv, ww, uv, uw, vw)
+        #   - nn_cum  : accumulated number of points of each wall distance
+        # --------------------------------------------------------------------------------------------------------------
+        interval  = np.array(range(self.field_ini,self.field_fin,self.field_delta),dtype='int')
+        if self.pred_store != "":
+            skip_in = stored_index(data_in={"file":self._pred_store_file()["file"]})["index"]
+        else:
+            skip_in = set()
+        error     = np.zeros((3,))
+        error_y   = np.zeros((3,self.shpy))
+        n_error   = 0
+        n_error_y = np.zeros((self.shpy,))
+        rms_cum   = np.zeros((6,self.shpy))
+        nn_cum    = 0
+        
+        # --------------------------------------------------------------------------------------------------------------
+        # Predict the fields in batches. The batch is evaluated when it is full or when the last field is read. The
+        # input fields of the predictions in the store are not read.
+        # --------------------------------------------------------------------------------------------------------------
+        batch = []
+        for ii,data_read in enumerate(self._prefetch_fields(data_in={"interval":interval,"read_out":read_out,
+                                                                     "skip_in":skip_in})):
+            print("Time for reading the field: "+str(data_read["time_read"]),flush=True)
+            print("Time for normalizing the field: "+str(data_read["time_norm"]),flush=True)
+            batch.append(data_read)
+            if len(batch) < self.pred_batch and ii < len(interval)-1:
+                continue
+            pred_batch = self.pred_fields(data_in={"norm_tensor_in":[data["norm_tensor_in"] for data in batch],
+                                                   "index":[data["index"] for data in batch]})
+            for data_batch,dim_pred in zip(batch,pred_batch["pred"]):
+                
+                # ------------------------------------------------------------------------------------------------------
+                # Calculate the error of the field
+                # ------------------------------------------------------------------------------------------------------
+                if read_out:
+                    velocity_out = data_batch["norm_velocity_out"]
+                    err_field    = np.zeros((3,))
+                    for comp,key in enumerate(["uu","vv","ww"]):
+                        errorfun          = abs(np.asarray(velocity_out[key],dtype=self.data_type)-
+                                                np.asarray(dim_pred[key],dtype=self.data_type))/uvwref[comp]
+                        errorfun          = np.multiply(errorfun,vol)
+                        err_field[comp]   = np.sum(errorfun)
+                        error_y[comp,:]  += np.sum(errorfun,axis=(1,2))
+                        del errorfun
+                    error     += err_field
+                    n_error   += vol_tot
+                    n_error_y += vol_y
+                    print("Field "+str(data_batch["index"]),flush=True)
+                    print("Error u:"+str(err_field[0]/vol_tot*100)+"%",flush=True)
+                    print("Error v:"+str(err_field[1]/vol_tot*100)+"%",flush=True)
+                    print("Error w:"+str(err_field[2]/vol_tot*100)+"%",flush=True)
+                    del velocity_out
+                
+                # ------------------------------------------------------------------------------------------------------
+                # Accumulate the products of the predicted velocity
+                # ------------------------------------------------------------------------------------------------------
+                if flag_urms:
+                    uu            = dim_pred["uu"]
+                    vv            = dim_pred["vv"]
+                    ww            = dim_pred["ww"]
+                    rms_cum[0,:] += np.sum(uu**2,axis=(1,2))
+                    rms_cum[1,:] += np.sum(vv**2,axis=(1,2))
+                    rms_cum[2,:] += np.sum(ww**2,axis=(1,2))
+                    rms_cum[3,:] += np.sum(uu*vv,axis=(1,2))
+                    rms_cum[4,:] += np.sum(uu*ww,axis=(1,2))
+                    rms_cum[5,:] += np.sum(vv*ww,axis=(1,2))
+                    nn_cum       += self.shpx*self.shpz
+                    del uu,vv,ww
+            del pred_batch
+            batch = []
         
         # ----------------------------------------------------------------------------------------------------------
         # Save in file
         # ---------------------------------------------------------------------------------------------------------- 
-        file_error = self.data_folder+'/'+self.error_file
-        file_error = file_error.replace(".txt","_y.txt")                     
-        file_save  = open(file_error, "w+")           
-        content    = str(error_u.tolist())+'\n'
-        file_save.write(content)           
-        content    = str(error_v.tolist())+'\n'
-        file_save.write(content)           
-        content    = str(error_w.tolist())+'\n'
-        file_save.write(content) 
-        file_save.close()                       
-          
-    def pred_urms(self):
+        if flag_error:
+            error     /= n_error
+            file_error = self.data_folder+'/'+self.error_file                     
+            file_save  = open(file_error, "w+")
+            for comp in np.arange(3):
+                file_save.write(str(error[comp].tolist())+'\n')
+            file_save.close()
+        if flag_error_y:
+            error_y   /= n_error_y
+            file_error = self.data_folder+'/'+self.error_file
+            file_error = file_error.replace(".txt","_y.txt")                     
+            file_save  = open(file_error, "w+")
+            for comp in np.arange(3):
+                file_save.write(str(error_y[comp,:].tolist())+'\n')
+            file_save.close()
+        if flag_urms:
+            rms_cum /= nn_cum
+            save_rms(data_in={"file":self.urmspred_file,"folder":self.data_folder,"uurms":np.sqrt(rms_cum[0,:]),
+                              "vvrms":np.sqrt(rms_cum[1,:]),"wwrms":np.sqrt(rms_cum[2,:]),"uv":rms_cum[3,:],
+                              "vw":rms_cum[5,:],"uw":rms_cum[4,:]})
+                         
+    def pred_error(self):
         """
         ................................................................................................................
         # pred_error
@@ -1193,59 +1760,38 @@ class deep_model():
         None.
 
         """
-        # --------------------------------------------------------------------------------------------------------------
-        # Import packages
-        # --------------------------------------------------------------------------------------------------------------
-        from py_bin.py_class.flow_field import flow_field
-        from py_bin.py_functions.urms import save_rms
-        
-        # --------------------------------------------------------------------------------------------------------------
-        # Calculate the rms of the predictions
-        # --------------------------------------------------------------------------------------------------------------
-        interval = np.array(range(self.field_ini,self.field_fin,self.field_delta),dtype='int')
-        error_u  = 0
-        error_v  = 0
-        error_w  = 0
-        n_error  = 0
-        
-        for index_ii in interval:
-            pred_vel = self.pred_field(data_in={"index_ii":index_ii})
-            uu       = pred_vel["uu"]
-            vv       = pred_vel["vv"]
-            ww       = pred_vel["ww"]
-            if index_ii == interval[0]:
-                uu_cum   = np.sum(uu**2,axis=(1,2))
-                vv_cum   = np.sum(vv**2,axis=(1,2))
-                ww_cum   = np.sum(ww**2,axis=(1,2))
-                uv_cum   = np.sum(uu*vv,axis=(1,2))
-                uw_cum   = np.sum(uu*ww,axis=(1,2))
-                vw_cum   = np.sum(vv*ww,axis=(1,2))
-                nn_cum   = self.shpx*self.shpz
-            else:
-                uu_cum   += np.sum(uu**2,axis=(1,2))
-                vv_cum   += np.sum(vv**2,axis=(1,2))
-                ww_cum   += np.sum(ww**2,axis=(1,2))
-                uv_cum   += np.sum(uu*vv,axis=(1,2))
-                uw_cum   += np.sum(uu*ww,axis=(1,2))
-                vw_cum   += np.sum(vv*ww,axis=(1,2))
-                nn_cum   += self.shpx*self.shpz
-        uu_cum /= nn_cum
-        vv_cum /= nn_cum
-        ww_cum /= nn_cum
-        uv_cum /= nn_cum
-        uw_cum /= nn_cum
-        vw_cum /= nn_cum
-        uu_rms  = np.sqrt(uu_cum)
-        vv_rms  = np.sqrt(vv_cum)
-        ww_rms  = np.sqrt(ww_cum)
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Save the data
-        # ---------------------------------------------------------------------------------------------------------------
-        save_rms(data_in={"file":self.urmspred_file,"folder":self.data_folder,"uurms":uu_rms,"vvrms":vv_rms,
-                          "wwrms":ww_rms,"uv":uv_cum,"vw":vw_cum,"uw":uw_cum})
-        
-        
+        self.pred_stats(data_in={"error":True,"error_y":False,"urms":False})
+                         
+    def pred_error_y(self):
+        """
+        ................................................................................................................
+        # pred_error_y
+        ................................................................................................................
+        Function to calculate the error between the predicted field and the expected field.
+        The error is calculated weighting the localerror with the volume of each cell. 
+        The relative error is calculated with respect to the maximum velocity of each wall distance.
+        The error is distributed along y+
+																 
+        Returns
+        -------
+        None.
+
+        """
+        self.pred_stats(data_in={"error":False,"error_y":True,"urms":False})
+          
+    def pred_urms(self):
+        """
+        ................................................................................................................
+        # pred_urms
+        ................................................................................................................
+        Function to calculate the rms of the predicted velocity.
+																 
+        Returns
+        -------
+        None.
+
+        """
+        self.pred_stats(data_in={"error":False,"error_y":False,"urms":True})
                 
     def architecture_Unet(self,data_in={"x_in":[],"flag_print":True}):
         """
@@ -1470,14 +2016,18 @@ class deep_model():
         if from_tf_file:
             merge_data(data_in={"base_directory":self.uvw_folder_tf+"/"+self.uvw_folderii_tf,"padding":self.padding,
                                 "shpx":self.shpx,"shpy":self.shpy,"shpz":self.shpz,"data_type":self.data_type,
-                                "datasets":ind_vec,"output_path":self.tfrecord_folder})
+                                "datasets":ind_vec,"output_path":self.tfrecord_folder,
+                                "compression":self.tfrecord_compression})
         else:
             merge_data(data_in={"base_directory":self.uvw_folder,"base_file":self.uvw_file,"padding":self.padding,
                                 "shpx":self.shpx,"shpy":self.shpy,"shpz":self.shpz,"dx":self.dx,"dy":self.dy,
                                 "dz":self.dz,"data_type":self.data_type,"datasets":ind_vec,
                                 "output_path":self.tfrecord_folder,"data_folder":self.data_folder,
                                 "umean_file":self.umean_file,"unorm_file":self.unorm_file,
-                                "mean_norm":self.mean_norm,"delta_pred":self.delta_pred})
+                                "mean_norm":self.mean_norm,"delta_pred":self.delta_pred,
+                                "field_prefetch":self.field_prefetch,"compression":self.tfrecord_compression,
+                                "tfrecord_mode":self.tfrecord_mode,"nworkers":self.tfrecord_workers,
+                                "memory_budget":self.tfrecord_memory})
             
     def _read_fieldsvec(self):
         """
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+-------------------------------------------------------------------------------------------------------------------------
+field_cache.py
+-------------------------------------------------------------------------------------------------------------------------
+Created on Sat Oct 17 09:12:44 2026
+
+@author: Andres Cremades Botella
+
+File to store the fields read by the code in memory. The loops of the code read the field ii as input and the field
+ii+delta_pred as output, so every field is read twice when consecutive indices are evaluated. The cache keeps the last
+fields up to a memory budget and removes the least recently used ones. The cache can be shared by the threads reading
+the fields in the background. The file contains a class:
+    Class:
+        - field_cache: class containing the cache of the fields
+"""
+# -----------------------------------------------------------------------------------------------------------------------
+# Import packages for all the functions
+# -----------------------------------------------------------------------------------------------------------------------
+from collections import OrderedDict
+import threading
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+# Define the class
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+
+class field_cache():
+    """
+    .....................................................................................................................
+    # field_cache: Class to store the fields in memory with a least recently used eviction. The class contains the
+                   following
+    functions:
+        * Functions:
+            - __init__ : initialization function
+            - get      : function to read a field of the cache
+            - put      : function to store a field in the cache
+            - clear    : function to remove all the fields of the cache
+        * Variables:
+            - max_bytes : memory budget of the cache in bytes
+            - nbytes    : memory used by the cache in bytes
+            - fields    : ordered dictionary of the fields, the last one is the most recently used
+            - nhit      : number of fields read from the cache
+            - nmiss     : number of fields not found in the cache
+            - lock      : lock of the cache for the access from several threads
+    .....................................................................................................................
+    """
+    def __init__(self,data_in={"max_bytes":2*1024**3}):
+        """
+        .................................................................................................................
+        # __init__
+        .................................................................................................................
+        Function to initialize the cache
+
+        Parameters
+        ----------
+        data_in : dict, optional
+            Data of the cache. The default is {"max_bytes":2*1024**3}.
+            Data:
+                - max_bytes : memory budget of the cache in bytes
+
+        Returns
+        -------
+        None.
+
+        """
+        self.max_bytes = int(data_in["max_bytes"])
+        self.nbytes    = 0
+        self.fields    = OrderedDict()
+        self.nhit      = 0
+        self.nmiss     = 0
+        self.lock      = threading.Lock()
+
+    def get(self,data_in={"key":None}):
+        """
+        .................................................................................................................
+        # get
+        .................................................................................................................
+        Function to read a field of the cache. The field is marked as the most recently used.
+
+        Parameters
+        ----------
+        data_in : dict, optional
+            Data of the field. The default is {"key":None}.
+            Data:
+                - key : key of the field
+
+        Returns
+        -------
+        dict
+            Stored field (None if the key is not in the cache). The arrays are read-only, they need to be copied
+            before modifying them.
+
+        """
+        key = data_in["key"]
+        with self.lock:
+            if key in self.fields:
+                self.fields.move_to_end(key)
+                self.nhit += 1
+                return self.fields[key]["value"]
+            self.nmiss += 1
+            return None
+
+    def put(self,data_in={"key":None,"value":{}}):
+        """
+        .................................................................................................................
+        # put
+        .................................................................................................................
+        Function to store a field in the cache. The least recently used fields are removed until the memory budget
+        is satisfied. The fields larger than the memory budget are not stored.
+
+        Parameters
+        ----------
+        data_in : dict, optional
+            Data of the field. The default is {"key":None,"value":{}}.
+            Data:
+                - key   : key of the field
+                - value : dictionary of the arrays of the field
+
+        Returns
+        -------
+        None.
+
+        """
+        # ---------------------------------------------------------------------------------------------------------------
+        # Read the data. The arrays are set to read-only to avoid modifying the stored field.
+        #   - nbytes : memory of the field
+        # ---------------------------------------------------------------------------------------------------------------
+        key    = data_in["key"]
+        value  = data_in["value"]
+        nbytes = 0
+        for array in value.values():
+            if isinstance(array,np.ndarray):
+                array.flags.writeable = False
+                nbytes               += array.nbytes
+        if nbytes > self.max_bytes:
+            return
+
+        # ---------------------------------------------------------------------------------------------------------------
+        # Remove the least recently used fields and store the new one
+        # ---------------------------------------------------------------------------------------------------------------
+        with self.lock:
+            if key in self.fields:
+                self.nbytes -= self.fields.pop(key)["nbytes"]
+            while self.fields and self.nbytes+nbytes > self.max_bytes:
+                self.nbytes -= self.fields.popitem(last=False)[1]["nbytes"]
+            self.fields[key] = {"value":value,"nbytes":nbytes}
+            self.nbytes     += nbytes
+
+    def clear(self):
+        """
+        .................................................................................................................
+        # clear
+        .................................................................................................................
+        Function to remove all the fields of the cache
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.lock:
+            self.fields.clear()
+            self.nbytes = 0
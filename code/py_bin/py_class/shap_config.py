@@ -25,10 +25,16 @@ class shap_config():
                                    data...  
             - calc_gradientSHAP  : function to calculate the GradientExplainer. Defines the model and obtains the SHAP
                                    values.
+            - _calculate_gradientshaps_rep : function to calculate the SHAP values of all the translations of a field
+                                             in the same evaluation
+            - _explain_field     : function to evaluate the gradient explainer and report the completeness error
             - write_shap         : function to save the SHAP values in a file.
             - read_shap          : function to read the SHAP values stored in a file
             - gradientSHAP_model : function to define the SHAP model
             - model_base_shap    : function to define the base model for the SHAP without the weights
+            - _update_target     : function to replace the target field of the SHAP model
+            - _new_fields        : function to select the fields whose SHAP values are not calculated
+            - _prefetch_fields   : function to iterate over the fields reading the next fields in the background
             - background         : function to calculate the background of the SHAP values model
             - architecture_Unet  : function for defining the strategy
         * Variables:
@@ -61,10 +67,23 @@ class shap_config():
             - pooling            : size of the poolings
             - delta_pred         : number of fields to advance the predictions
             - nsamples           : number of samples to take to calculate the SHAP values in the gradient explainer
-            - nsamples_max       : maximum number of samples to calculate at the same time in the gradient explainer
+            - nsamples_max       : maximum number of samples of the adaptive sampling in the gradient explainer
+            - shap_tol           : tolerance of the relative standard error of the adaptive sampling
+            - nsamples_check     : number of samples between the convergence checks of the adaptive sampling
+            - conv_nsamples      : number of samples used in each evaluation of the explainer of the current field
+            - conv_error         : relative standard error of each evaluation of the explainer of the current field
+            - batch_rep          : flag for calculating all the repetitions of a field in a single evaluation
+            - quadrature         : quadrature rule of the path integral of the gradients (None: random samples)
+            - nquad              : number of nodes of the quadrature rule
+            - ntarget            : number of target fields stored in the SHAP model
             - shpx               : shape of the tensors in the streamwise direction
             - shpy               : shape of the tensors in the wall-normal direction
             - shpz               : shape of the tensors in the spanwise direction
+            - field_cache        : cache of the normalized fields, the output field of the index ii is reused as
+                                   input field of the index ii+delta_pred
+            - field_prefetch     : number of fields read in the background
+            - intra_threads      : threads used inside each operation of tensorflow
+            - inter_threads      : threads used to run independent operations of tensorflow
             - weights            : weights of the trained model
             - inputs             : inputs for the definition of the model
             - outputs            : outputs for the definition of the model
@@ -72,6 +91,9 @@ class shap_config():
             - strategy           : segmentation strategy of the model used for the SHAP calculation
             - model_train        : model trained for the flow prediction
             - model              : model for the SHAP values calculation
+            - infer_function     : traced inference function of the model for the SHAP values calculation
+            - layer_target       : layer of the SHAP model storing the target field
+            - explainer          : gradient explainer of the SHAP model
     .....................................................................................................................
     """
     def __init__(self,data_in = {"shap_folder":"../../P125_21pi_vu_SHAP_gradient/",
@@ -85,7 +107,9 @@ class shap_config():
                                  "nsamples_max":100,"data_type":"float32","error_file":"error.txt",
                                  "umax_file":"umax_file.txt","urmspred_file":"Urms_pred.txt","mean_norm":False,
                                  "tfrecord_folder":'../../tfrecord/',"nrep_field":None,"shap_batch":1,
-                                 "repeat_exist":False,"flag_model":True,"read_model":True}):
+                                 "repeat_exist":False,"flag_model":True,"read_model":True,
+                                 "batch_rep":False,"quadrature":None,"nquad":16,
+                                 "shap_tol":None,"nsamples_check":10}):
         """
         .................................................................................................................
         # __init__
@@ -107,7 +131,8 @@ class shap_config():
                             "nsamples_max":100,"data_type":"float32","error_file":"error.txt",
                             "umax_file":"umax_file.txt","urmspred_file":"Urms_pred.txt","mean_norm":False,
                             "tfrecord_folder":'../../tfrecord/',"nrep_field":None,"shap_batch":1,"repeat_exist":False,
-                            "flag_model":True,"read_model":True}.
+                            "flag_model":True,"read_model":True,"batch_rep":False,
+                            "quadrature":None,"nquad":16,"shap_tol":None,"nsamples_check":10}.
             Data:
                 - shap_folder     : folder for the shap values
                 - shap_file       : file for the shap values
@@ -138,7 +163,7 @@ class shap_config():
                 - pooling         : size of the poolings
                 - delta_pred      : number of fields to advance the predictions
                 - nsamples        : number of samples to take to calculate the SHAP values in the gradient explainer
-                - nsamples_max    : maximum number of samples to calculate at the same time in the gradient explainer
+                - nsamples_max    : maximum number of samples of the adaptive sampling in the gradient explainer
                 - data_type       : type of data used in the model
                 - error_file      : file to store the prediction errors
                 - umax_file       : file containing maximum and minimum velocities
@@ -152,6 +177,24 @@ class shap_config():
                 - repeat exist    : flag for repeating an existing file (True: recalculate, False: skip)
                 - flag_model      : flag to load a model
                 - read_model      : flag to read the model (True: read the model, False: not read the model)
+                - batch_rep       : flag for calculating all the repetitions of a field in a single evaluation of the 
+                                    explainer (True: stack the translations in a batch, False: one after another).
+                                    Only used by the gradient SHAP, the kernel SHAP requires False
+                - quadrature      : quadrature rule used for integrating the gradients from the background to the 
+                                    field ("gauss": Gauss-Legendre, "trapezoid": trapezoidal rule, None: nsamples
+                                    random points of the expected gradients)
+                - nquad           : number of nodes of the quadrature rule
+                - shap_tol        : tolerance of the relative standard error of the sum of the SHAP values for the
+                                    adaptive sampling. If None, or nsamples_max is 0, nsamples samples are used.
+                                    Otherwise nsamples is the minimum number of samples before the tolerance is
+                                    checked
+                - nsamples_check  : number of samples between the convergence checks of the adaptive sampling
+                - field_prefetch  : (optional) number of fields read in the background while the SHAP values of the
+                                    current field are calculated (default 2, 0 to read the fields sequentially)
+                - intra_threads   : (optional) threads used inside each operation of tensorflow (default 0, the
+                                    default of tensorflow)
+                - inter_threads   : (optional) threads used to run independent operations of tensorflow (default 0,
+                                    the default of tensorflow)
 
         Returns
         -------
@@ -198,7 +241,7 @@ class shap_config():
         self.pooling         = int(data_in["pooling"])           # size of the poolings of the unet
         self.delta_pred      = int(data_in["delta_pred"])        # separation between the fields
         self.nsamples        = int(data_in["nsamples"])          # number of samples to calculate the shap
-        self.nsamples_max    = int(data_in["nsamples_max"])      # maximum number of samples to take at the same time
+        self.nsamples_max    = int(data_in["nsamples_max"])      # maximum number of samples of the adaptive sampling
         self.data_type       = str(data_in["data_type"])         # data type for the tensors of the model
         self.error_file      = str(data_in["error_file"])        # file containing the errors of the predictions
         self.umax_file       = str(data_in["umax_file"])         # file containing the maximum and minimum velocities
@@ -212,12 +255,48 @@ class shap_config():
             self.nrep_field  = int(nrep_field)
         self.shap_batch      = int(data_in["shap_batch"])
         self.print_summary   = True
+        self.flag_shapmodel  = False                             # flag for the SHAP model already defined
+        self.explainer       = None                              # gradient explainer, defined with the model
         self.repeat_exist    = bool(data_in["repeat_exist"])
         self.flag_model      = bool(data_in["flag_model"])
         if "read_model" in data_in.keys():
             read_model       = bool(data_in["read_model"])
         else:
             read_model       = True
+        if "batch_rep" in data_in.keys():
+            self.batch_rep   = bool(data_in["batch_rep"])
+        else:
+            self.batch_rep   = False
+        if "quadrature" in data_in.keys() and data_in["quadrature"] is not None:
+            self.quadrature  = str(data_in["quadrature"])        # quadrature rule of the gradients
+            self.nquad       = int(data_in["nquad"])             # number of nodes of the quadrature
+        else:
+            self.quadrature  = None
+            self.nquad       = 0
+        if "shap_tol" in data_in.keys() and data_in["shap_tol"] is not None and self.nsamples_max > 0:
+            self.shap_tol    = float(data_in["shap_tol"])        # tolerance of the adaptive sampling
+            self.nsamples_check = int(data_in["nsamples_check"]) # samples between the convergence checks
+        else:
+            self.shap_tol    = None
+            self.nsamples_check = 0
+        if "field_prefetch" in data_in.keys():
+            self.field_prefetch = int(data_in["field_prefetch"]) # number of fields read in the background
+        else:
+            self.field_prefetch = 2
+        if "intra_threads" in data_in.keys():
+            self.intra_threads = int(data_in["intra_threads"])   # threads inside each operation
+        else:
+            self.intra_threads = 0
+        if "inter_threads" in data_in.keys():
+            self.inter_threads = int(data_in["inter_threads"])   # threads of the independent operations
+        else:
+            self.inter_threads = 0
+        self.conv_nsamples   = []
+        self.conv_error      = []
+        if self.batch_rep:
+            self.ntarget     = self.nrep_field+1                 # one target field for each translation
+        else:
+            self.ntarget     = 1
         
         # ---------------------------------------------------------------------------------------------------------------
         # Create the model
@@ -237,7 +316,9 @@ class shap_config():
                       "test_size":0,"adapt_batch":False,"prep_data":False,"flag_model":self.flag_model,
                       "flag_central":False,"data_type":self.data_type,"multi_worker":False,"prefetch":1,
                       "mean_norm":self.mean_norm,"check":False,"tfrecord_folder":self.tfrecord_folder,
-                      "flag_tfrecord":False,"save_fields":False,"traintest_index":"-"}
+                      "flag_tfrecord":False,"save_fields":False,"traintest_index":"-",
+                      "field_prefetch":self.field_prefetch,"intra_threads":self.intra_threads,
+                      "inter_threads":self.inter_threads}
         
         # ---------------------------------------------------------------------------------------------------------------
         # Define the model
@@ -251,6 +332,7 @@ class shap_config():
         self.shpx              = Unet.shpx
         self.shpy              = Unet.shpy
         self.shpz              = Unet.shpz
+        self.field_cache       = Unet.field_cache
         if self.flag_model:
             self.strategy          = Unet.strategy
             self.architecture_Unet = Unet.architecture_Unet
@@ -269,11 +351,12 @@ class shap_config():
             Data to read the field and apply the transformation. The default is {"uu":[],"vv":[],"ww":[],
                                                                                  "x0":0,"z0":0}.
             Data: 
-                - uu : field in the streamwise direction
-                - vv : field in the wall-normal direction
-                - ww : field in the spanwise direction
-                - x0 : position to start in the streamwise direction
-                - z0 : position to start in the spanwise direction
+                - uu       : field in the streamwise direction
+                - vv       : field in the wall-normal direction
+                - ww       : field in the spanwise direction
+                - x0       : position to start in the streamwise direction
+                - z0       : position to start in the spanwise direction
+                - flag_pad : flag to apply the padding
 
         Returns
         -------
@@ -287,62 +370,26 @@ class shap_config():
         # ---------------------------------------------------------------------------------------------------------------
         # Import packages
         # ---------------------------------------------------------------------------------------------------------------
-        from py_bin.py_functions.padding_field import padding_field
+        from py_bin.py_functions.periodic_domain import shift_pad
         
         # ---------------------------------------------------------------------------------------------------------------
         # Read the data
         # ---------------------------------------------------------------------------------------------------------------
-        uu       = np.array(data_in["uu"],dtype=self.data_type)
-        vv       = np.array(data_in["vv"],dtype=self.data_type)
-        ww       = np.array(data_in["ww"],dtype=self.data_type)
+        uu       = np.asarray(data_in["uu"],dtype=self.data_type)
+        vv       = np.asarray(data_in["vv"],dtype=self.data_type)
+        ww       = np.asarray(data_in["ww"],dtype=self.data_type)
         x0       = int(data_in["x0"])
         z0       = int(data_in["z0"])
         flag_pad = bool(data_in["flag_pad"])
+        padding  = self.padding if flag_pad else 0
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Create the matrix of the whole domain
+        # Locate the positions x0,z0 of the original fields in the index 0,padding,padding and apply the padding. The
+        # displacement and the padding are a single gather of the periodic nodes.
         # ---------------------------------------------------------------------------------------------------------------
-        field_uu = np.zeros((self.shpy,self.shpz,self.shpx),dtype=self.data_type) 
-        field_vv = np.zeros((self.shpy,self.shpz,self.shpx),dtype=self.data_type)
-        field_ww = np.zeros((self.shpy,self.shpz,self.shpx),dtype=self.data_type)
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Locate in the index 0,padding,padding without the positions x0,y0,z0 of the original fields
-        # ---------------------------------------------------------------------------------------------------------------
-        # Area D: after x0, z0
-        # ---------------------------------------------------------------------------------------------------------------
-        field_uu[:,:self.shpz-z0,:self.shpx-x0] = uu[:,z0:,x0:] 
-        field_vv[:,:self.shpz-z0,:self.shpx-x0] = vv[:,z0:,x0:] 
-        field_ww[:,:self.shpz-z0,:self.shpx-x0] = ww[:,z0:,x0:] 
-        # ---------------------------------------------------------------------------------------------------------------
-        # Area A: before x0, z0
-        # ---------------------------------------------------------------------------------------------------------------
-        field_uu[:,self.shpz-z0:,self.shpx-x0:] = uu[:,:z0,:x0] 
-        field_vv[:,self.shpz-z0:,self.shpx-x0:] = vv[:,:z0,:x0] 
-        field_ww[:,self.shpz-z0:,self.shpx-x0:] = ww[:,:z0,:x0] 
-        # ---------------------------------------------------------------------------------------------------------------
-        # Area B: after x0, before z0
-        # ---------------------------------------------------------------------------------------------------------------
-        field_uu[:,self.shpz-z0:,:self.shpx-x0] = uu[:,:z0,x0:] 
-        field_vv[:,self.shpz-z0:,:self.shpx-x0] = vv[:,:z0,x0:] 
-        field_ww[:,self.shpz-z0:,:self.shpx-x0] = ww[:,:z0,x0:] 
-        # ---------------------------------------------------------------------------------------------------------------
-        # Area C: before x0, after z0
-        # ---------------------------------------------------------------------------------------------------------------
-        field_uu[:,:self.shpz-z0,self.shpx-x0:] = uu[:,z0:,:x0] 
-        field_vv[:,:self.shpz-z0,self.shpx-x0:] = vv[:,z0:,:x0] 
-        field_ww[:,:self.shpz-z0,self.shpx-x0:] = ww[:,z0:,:x0]  
-        
-        if flag_pad:
-            # ---------------------------------------------------------------------------------------------------------------
-            # Apply the padding
-            # ---------------------------------------------------------------------------------------------------------------
-            field_uu = padding_field(data_in={"field":field_uu,"shpx":self.shpx,"shpy":self.shpy,
-                                                  "shpz":self.shpz,"padding":self.padding})["field"]
-            field_vv = padding_field(data_in={"field":field_vv,"shpx":self.shpx,"shpy":self.shpy,
-                                                  "shpz":self.shpz,"padding":self.padding})["field"]
-            field_ww = padding_field(data_in={"field":field_ww,"shpx":self.shpx,"shpy":self.shpy,
-                                                  "shpz":self.shpz,"padding":self.padding})["field"]
+        field_uu = shift_pad(data_in={"field":uu,"x0":x0,"z0":z0,"padding":padding})["field"]
+        field_vv = shift_pad(data_in={"field":vv,"x0":x0,"z0":z0,"padding":padding})["field"]
+        field_ww = shift_pad(data_in={"field":ww,"x0":x0,"z0":z0,"padding":padding})["field"]
         
         # ---------------------------------------------------------------------------------------------------------------
         # Save the output
@@ -379,57 +426,26 @@ class shap_config():
                 - shap_w : field in the spanwise direction
         """
         
+        # ---------------------------------------------------------------------------------------------------------------
+        # Import packages
+        # ---------------------------------------------------------------------------------------------------------------
+        from py_bin.py_functions.periodic_domain import unshift_unpad
+        
         # ---------------------------------------------------------------------------------------------------------------
         # Read the data
         # ---------------------------------------------------------------------------------------------------------------
-        shap_u = np.array(data_in["shap_u"],dtype=self.data_type)
-        shap_v = np.array(data_in["shap_v"],dtype=self.data_type)
-        shap_w = np.array(data_in["shap_w"],dtype=self.data_type)
+        shap_u = np.asarray(data_in["shap_u"],dtype=self.data_type)
+        shap_v = np.asarray(data_in["shap_v"],dtype=self.data_type)
+        shap_w = np.asarray(data_in["shap_w"],dtype=self.data_type)
         x0     = int(data_in["x0"])
         z0     = int(data_in["z0"])
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Restore the transformation of the shap fields
-        # ---------------------------------------------------------------------------------------------------------------
-        shap_field_u = np.zeros((self.shpy,self.shpz,self.shpx))
-        shap_field_v = np.zeros((self.shpy,self.shpz,self.shpx))
-        shap_field_w = np.zeros((self.shpy,self.shpz,self.shpx))
+        # Restore the transformation of the shap fields: delete the padding and move the position 0 to x0,z0
         # ---------------------------------------------------------------------------------------------------------------
-        # Area D: after x0, z0
-        # ---------------------------------------------------------------------------------------------------------------
-        shap_field_u[:,z0:,x0:] = shap_u[:,self.padding:self.padding+self.shpz-z0,
-                                         self.padding:self.padding+self.shpx-x0]
-        shap_field_v[:,z0:,x0:] = shap_v[:,self.padding:self.padding+self.shpz-z0,
-                                         self.padding:self.padding+self.shpx-x0]
-        shap_field_w[:,z0:,x0:] = shap_w[:,self.padding:self.padding+self.shpz-z0,
-                                         self.padding:self.padding+self.shpx-x0]
-        # ---------------------------------------------------------------------------------------------------------------
-        # Area A: before x0, z0
-        # ---------------------------------------------------------------------------------------------------------------
-        shap_field_u[:,:z0,:x0] = shap_u[:,self.padding+self.shpz-z0:-self.padding,
-                                         self.padding+self.shpx-x0:-self.padding]
-        shap_field_v[:,:z0,:x0] = shap_v[:,self.padding+self.shpz-z0:-self.padding,
-                                         self.padding+self.shpx-x0:-self.padding]
-        shap_field_w[:,:z0,:x0] = shap_w[:,self.padding+self.shpz-z0:-self.padding,
-                                         self.padding+self.shpx-x0:-self.padding] 
-        # ---------------------------------------------------------------------------------------------------------------
-        # Area B: after x0, before z0
-        # ---------------------------------------------------------------------------------------------------------------
-        shap_field_u[:,:z0,x0:] = shap_u[:,self.padding+self.shpz-z0:-self.padding,
-                                         self.padding:self.padding+self.shpx-x0]
-        shap_field_v[:,:z0,x0:] = shap_v[:,self.padding+self.shpz-z0:-self.padding,
-                                         self.padding:self.padding+self.shpx-x0]
-        shap_field_w[:,:z0,x0:] = shap_w[:,self.padding+self.shpz-z0:-self.padding,
-                                         self.padding:self.padding+self.shpx-x0]
-        # ---------------------------------------------------------------------------------------------------------------
-        # Area C: before x0, after z0
-        # ---------------------------------------------------------------------------------------------------------------
-        shap_field_u[:,z0:,:x0] = shap_u[:,self.padding:self.padding+self.shpz-z0,
-                                         self.padding+self.shpx-x0:-self.padding]
-        shap_field_v[:,z0:,:x0] = shap_v[:,self.padding:self.padding+self.shpz-z0,
-                                         self.padding+self.shpx-x0:-self.padding]
-        shap_field_w[:,z0:,:x0] = shap_w[:,self.padding:self.padding+self.shpz-z0,
-                                         self.padding+self.shpx-x0:-self.padding] 
+        shap_field_u = unshift_unpad(data_in={"field":shap_u,"x0":x0,"z0":z0,"padding":self.padding})["field"]
+        shap_field_v = unshift_unpad(data_in={"field":shap_v,"x0":x0,"z0":z0,"padding":self.padding})["field"]
+        shap_field_w = unshift_unpad(data_in={"field":shap_w,"x0":x0,"z0":z0,"padding":self.padding})["field"]
         
         # ---------------------------------------------------------------------------------------------------------------
         # Create the output
@@ -437,7 +453,7 @@ class shap_config():
         data_out = {"shap_u":shap_field_u,"shap_v":shap_field_v,"shap_w":shap_field_w}
         return data_out
       
-    def _calculate_gradientshaps(self,data_in={"norm_velocity_in":[],"norm_velocity_out":[],"x0":0,"z0":0}):
+    def _calculate_gradientshaps(self,data_in={"norm_tensor_in":[],"norm_tensor_out":[],"x0":0,"z0":0}):
         """
         .................................................................................................................
         # _calculate_gradientshaps: Function to calculate the SHAP values for a certain field and location
@@ -446,12 +462,13 @@ class shap_config():
         Parameters
         ----------
         data_in : dict, optional
-            Data to calculate the shap values. The default is {"index_ii":0,"x0":0,"z0":0}.
+            Data to calculate the shap values. The default is {"norm_tensor_in":[],"norm_tensor_out":[],"x0":0,
+                                                               "z0":0}.
             Data: 
-                - norm_velocity_in  : input field
-                - norm_velocity_out : output field
-                - x0                : position to start in the streamwise direction
-                - z0                : position to start in the spanwise direction
+                - norm_tensor_in  : channel-last tensor of the input field without padding
+                - norm_tensor_out : channel-last tensor of the output field
+                - x0              : position to start in the streamwise direction
+                - z0              : position to start in the spanwise direction
 
         Returns
         -------
@@ -467,51 +484,38 @@ class shap_config():
         # The shap package is imported from an edited folder to save the memory required for calculating the mean values
         # when the number of fields is too high.
         # ---------------------------------------------------------------------------------------------------------------
-        from py_bin.py_functions.read_norm_velocity import read_norm_velocity
+        from py_bin.py_functions.periodic_domain import shift_pad
         from py_bin.py_packages import shap
         
         # ---------------------------------------------------------------------------------------------------------------
         # Read the data
         # ---------------------------------------------------------------------------------------------------------------
-        norm_velocity_in  = data_in["norm_velocity_in"]
-        norm_velocity_out = data_in["norm_velocity_out"]
-        x0                = int(data_in["x0"])
-        z0                = int(data_in["z0"])
-        
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Apply the transformations
-        # ---------------------------------------------------------------------------------------------------------------
-        field_in             = np.zeros((1,self.shpy,self.shpz+2*self.padding,self.shpx+2*self.padding,3), 
-                                        dtype=self.data_type)    
-        field_transformed_in = self._movenpad(data_in={"uu":norm_velocity_in['unorm'],"vv":norm_velocity_in['vnorm'],
-                                                       "ww":norm_velocity_in['wnorm'],"x0":x0,"z0":z0,
-                                                       "flag_pad":True})
-        field_in[0,:,:,:,0]  = field_transformed_in["uu"]
-        field_in[0,:,:,:,1]  = field_transformed_in["vv"]
-        field_in[0,:,:,:,2]  = field_transformed_in["ww"]
-        del norm_velocity_in,field_transformed_in
+        norm_tensor_in  = data_in["norm_tensor_in"]
+        norm_tensor_out = data_in["norm_tensor_out"]
+        x0              = int(data_in["x0"])
+        z0              = int(data_in["z0"])
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Apply the transformations
+        # Apply the transformations. The translation and the padding of the three components are written directly in
+        # the input and the output tensors of the model.
         # ---------------------------------------------------------------------------------------------------------------
-        field_out             = np.zeros((1,self.shpy,self.shpz,self.shpx,3),dtype=self.data_type)
-        field_transformed_out = self._movenpad(data_in={"uu":norm_velocity_out['unorm'],"vv":norm_velocity_out['vnorm'],
-                                                        "ww":norm_velocity_out['wnorm'],"x0":x0,"z0":z0,
-                                                        "flag_pad":False})
-        field_out[0,:,:,:,0]  = field_transformed_out['uu']
-        field_out[0,:,:,:,1]  = field_transformed_out['vv']
-        field_out[0,:,:,:,2]  = field_transformed_out['ww']
-        del norm_velocity_out,field_transformed_out
+        field_in  = np.empty((1,self.shpy,self.shpz+2*self.padding,self.shpx+2*self.padding,3),dtype=self.data_type)
+        field_out = np.empty((1,self.shpy,self.shpz,self.shpx,3),dtype=self.data_type)
+        shift_pad(data_in={"field":norm_tensor_in,"x0":x0,"z0":z0,"padding":self.padding,"out":field_in[0]})
+        shift_pad(data_in={"field":norm_tensor_out,"x0":x0,"z0":z0,"padding":0,"out":field_out[0]})
+        del norm_tensor_in,norm_tensor_out
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Define the gradient explainer model. This model needs to be updated for each file because the tensor of
-        # the output needs to be updated with each file.
+        # Update the target field of the gradient explainer model. The model and the explainer are defined only once,
+        # the output field of each file is stored in a variable of the model.
         # ---------------------------------------------------------------------------------------------------------------
-        self.gradientSHAP_model(data_in={"field_out":field_out})
+        if self.explainer is None:
+            self.gradientSHAP_model()
+            self.explainer = shap.GradientExplainer(self.model,self.backmat,batch_size=self.shap_batch)
+        self._update_target(data_in={"field_out":field_out})
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Define the explainer and calculate the SHAP values
+        # Calculate the SHAP values
         #     - explainer     : definition of the Gradient Explainer
         #     - shap_values   : SHAP values of the field
         #     - shap_values_u : SHAP values of the component of u
@@ -519,8 +523,7 @@ class shap_config():
         #     - shap_values_w : SHAP values of the component of w
         # ---------------------------------------------------------------------------------------------------------------
         print(self.model(self.backmat),flush=True)
-        explainer     = shap.GradientExplainer(self.model,self.backmat,batch_size=self.shap_batch)            
-        shap_values   = explainer.shap_values(field_in,nsamples=self.nsamples)#,nsamplesmax=self.nsamples_max) 
+        shap_values   = self._explain_field(data_in={"field_in":field_in,"joint_inputs":False})["shap_values"]
         print(shap_values.shape,flush=True)
         shap_values_u = shap_values[0,:,:,:,0]
         shap_values_v = shap_values[0,:,:,:,1]
@@ -544,65 +547,203 @@ class shap_config():
         data_out = {"shap_u":shap_valreco_u,"shap_v":shap_valreco_v,"shap_w":shap_valreco_w}
         return data_out
     
-    def _calculate_kernelshaps(self,data_in={"norm_velocity_in":[],"norm_velocity_out":[]}):
+    def _calculate_gradientshaps_rep(self,data_in={"norm_tensor_in":[],"norm_tensor_out":[],"x0":[],"z0":[]}):
         """
         .................................................................................................................
-        # _calculate_kernelshaps: Function to calculate the SHAP values for a certain field and location
+        # _calculate_gradientshaps_rep: Function to calculate the SHAP values for all the translations of a field. The
+                                        translated fields are stacked in a batch and evaluated by the explainer at the
+                                        same time.
         .................................................................................................................
         
         Parameters
         ----------
         data_in : dict, optional
-            Data to calculate the shap values. The default is {"norm_velocity_in":[],"norm_velocity_out":[]}.
+            Data to calculate the shap values. The default is {"norm_tensor_in":[],"norm_tensor_out":[],"x0":[],
+                                                               "z0":[]}.
             Data: 
-                - norm_velocity_in  : input field
-                - norm_velocity_out : output field
+                - norm_tensor_in  : channel-last tensor of the input field without padding
+                - norm_tensor_out : channel-last tensor of the output field
+                - x0              : positions to start in the streamwise direction for each translation
+                - z0              : positions to start in the spanwise direction for each translation
 
         Returns
         -------
         dict
-            Shap values of the structures
+            Shap values in all the directions averaged for all the translations
             Data:
-                - shap : shap of the structures
+                - shap_u : field in the streamwise direction
+                - shap_v : field in the wall-normal direction
+                - shap_w : field in the spanwise direction
         """        
         # ---------------------------------------------------------------------------------------------------------------
         # Import packages
-        # The shap package is imported from an edited folder to save the memory required for calculating the mean values
-        # when the number of fields is too high.
         # ---------------------------------------------------------------------------------------------------------------
-        from py_bin.py_functions.read_norm_velocity import read_norm_velocity
+        from py_bin.py_functions.periodic_domain import shift_pad
         from py_bin.py_packages import shap
         
         # ---------------------------------------------------------------------------------------------------------------
         # Read the data
         # ---------------------------------------------------------------------------------------------------------------
-        norm_velocity_in                       = data_in["norm_velocity_in"]
-        norm_velocity_out                      = data_in["norm_velocity_out"]        
+        norm_tensor_in  = data_in["norm_tensor_in"]
+        norm_tensor_out = data_in["norm_tensor_out"]
+        x0              = np.array(data_in["x0"],dtype="int")
+        z0              = np.array(data_in["z0"],dtype="int")
+        nrep            = len(x0)
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Apply the transformations
+        # Stack the translated input and output fields. Each translation is written directly in its position of the
+        # batch.
+        # ---------------------------------------------------------------------------------------------------------------
+        field_in  = np.empty((nrep,self.shpy,self.shpz+2*self.padding,self.shpx+2*self.padding,3),dtype=self.data_type)
+        field_out = np.empty((nrep,self.shpy,self.shpz,self.shpx,3),dtype=self.data_type)
+        for ii_rep in np.arange(nrep):
+            shift_pad(data_in={"field":norm_tensor_in,"x0":x0[ii_rep],"z0":z0[ii_rep],"padding":self.padding,
+                               "out":field_in[ii_rep]})
+            shift_pad(data_in={"field":norm_tensor_out,"x0":x0[ii_rep],"z0":z0[ii_rep],"padding":0,
+                               "out":field_out[ii_rep]})
+        del norm_tensor_in,norm_tensor_out
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Update the target fields of the gradient explainer model. Each translation is compared with its own target
+        # ---------------------------------------------------------------------------------------------------------------
+        if self.explainer is None:
+            self.gradientSHAP_model()
+            self.explainer = shap.GradientExplainer(self.model,self.backmat,batch_size=self.shap_batch)
+        self._update_target(data_in={"field_out":field_out})
+        del field_out
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Calculate the SHAP values of all the translations. The samples of all the translations share the batches of
+        # the explainer.
+        # ---------------------------------------------------------------------------------------------------------------
+        print(self.model(np.repeat(self.backmat,nrep,axis=0)),flush=True)
+        shap_values = self._explain_field(data_in={"field_in":field_in,"joint_inputs":True})["shap_values"]
+        print(shap_values.shape,flush=True)
+        del field_in
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Recover the original position of the shap values and average the translations. The node (z,x) of the 
+        # original field is the node ((z-z0)%shpz,(x-x0)%shpx) of each translated field without padding. The advanced
+        # indexing returns the dimensions (translation,z,x,y,component).
+        # ---------------------------------------------------------------------------------------------------------------
+        shap_values  = shap_values[:,:,self.padding:self.padding+self.shpz,self.padding:self.padding+self.shpx,:]
+        index_rep    = np.arange(nrep).reshape(-1,1,1)
+        index_z      = np.mod(np.arange(self.shpz).reshape(1,-1,1)-z0.reshape(-1,1,1),self.shpz)
+        index_x      = np.mod(np.arange(self.shpx).reshape(1,1,-1)-x0.reshape(-1,1,1),self.shpx)
+        shap_mean    = np.mean(shap_values[index_rep,:,index_z,index_x,:],axis=0).transpose((2,0,1,3))
+        print(np.mean(shap_mean,axis=(0,1,2)),flush=True)
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Store the output data
+        # ---------------------------------------------------------------------------------------------------------------
+        data_out = {"shap_u":shap_mean[:,:,:,0],"shap_v":shap_mean[:,:,:,1],"shap_w":shap_mean[:,:,:,2]}
+        return data_out
+    
+    def _explain_field(self,data_in={"field_in":[],"joint_inputs":False}):
+        """
+        .................................................................................................................
+        # _explain_field: Function to evaluate the gradient explainer in the input fields. If a quadrature rule is 
+                          selected, the completeness error of the attributions is printed. Otherwise the number of 
+                          samples and the standard error of the sampling are stored for the output file.
+        .................................................................................................................
+        
+        Parameters
+        ----------
+        data_in : dict, optional
+            Data to evaluate the explainer. The default is {"field_in":[],"joint_inputs":False}.
+            Data: 
+                - field_in     : input fields of the model
+                - joint_inputs : flag for evaluating all the input fields in the same batches
+
+        Returns
+        -------
+        dict
+            Shap values of the input fields
+            Data:
+                - shap_values : SHAP values of the input fields
+        """
+        # ---------------------------------------------------------------------------------------------------------------
+        # Read the data
+        # ---------------------------------------------------------------------------------------------------------------
+        field_in     = data_in["field_in"]
+        joint_inputs = bool(data_in["joint_inputs"])
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Calculate the SHAP values with the expected gradients or with the quadrature rule
+        # ---------------------------------------------------------------------------------------------------------------
+        if self.quadrature is None:
+            shap_values = self.explainer.shap_values(field_in,nsamples=self.nsamples,joint_inputs=joint_inputs,
+                                                     nsamples_max=self.nsamples_max,tolerance=self.shap_tol,
+                                                     check_every=self.nsamples_check)
+            # -----------------------------------------------------------------------------------------------------------
+            # Store the number of samples and the relative standard error of the sum of the SHAP values
+            # -----------------------------------------------------------------------------------------------------------
+            self.conv_nsamples.extend(self.explainer.explainer.nsamples_done[:,0].tolist())
+            self.conv_error.extend(self.explainer.explainer.sample_error[:,0].tolist())
+            print("Number of samples: "+str(self.explainer.explainer.nsamples_done[:,0]),flush=True)
+            print("Relative standard error of the sampling: "+str(self.explainer.explainer.sample_error[:,0]),
+                  flush=True)
+        else:
+            shap_values = self.explainer.shap_values(field_in,nsamples=self.nquad,joint_inputs=joint_inputs,
+                                                     quadrature=self.quadrature)
+            # -----------------------------------------------------------------------------------------------------------
+            # Completeness: the sum of the SHAP values must be equal to the difference between the output of the model
+            # in the field and in the background
+            # -----------------------------------------------------------------------------------------------------------
+            completeness_delta = self.explainer.explainer.completeness_delta[:,0]
+            completeness_error = self.explainer.explainer.completeness_error[:,0]
+            print("Output difference field-background: "+str(completeness_delta),flush=True)
+            print("Completeness error of the quadrature: "+str(completeness_error),flush=True)
+            print("Relative completeness error: "+str(completeness_error/completeness_delta),flush=True)
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Store the output data
+        # ---------------------------------------------------------------------------------------------------------------
+        data_out = {"shap_values":shap_values}
+        return data_out
+    
+    def _calculate_kernelshaps(self,data_in={"norm_tensor_in":[],"norm_tensor_out":[]}):
+        """
+        .................................................................................................................
+        # _calculate_kernelshaps: Function to calculate the SHAP values for a certain field and location
+        .................................................................................................................
+        
+        Parameters
+        ----------
+        data_in : dict, optional
+            Data to calculate the shap values. The default is {"norm_tensor_in":[],"norm_tensor_out":[]}.
+            Data: 
+                - norm_tensor_in  : channel-last tensor of the input field with padding
+                - norm_tensor_out : channel-last tensor of the output field
+
+        Returns
+        -------
+        dict
+            Shap values of the structures
+            Data:
+                - shap : shap of the structures
+        """        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Import packages
+        # The shap package is imported from an edited folder to save the memory required for calculating the mean values
+        # when the number of fields is too high.
         # ---------------------------------------------------------------------------------------------------------------
-        field_in             = np.zeros((1,self.shpy,self.shpz+2*self.padding,self.shpx+2*self.padding,3), 
-                                        dtype=self.data_type)    
-        field_in[0,:,:,:,0]  = norm_velocity_in['unorm']
-        field_in[0,:,:,:,1]  = norm_velocity_in['vnorm']
-        field_in[0,:,:,:,2]  = norm_velocity_in['wnorm']
-        del norm_velocity_in
+        from py_bin.py_packages import shap
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Apply the transformations
+        # Read the data. The normalized fields are channel-last tensors of the data type, they are used as the input
+        # and the output of the model without copying them.
         # ---------------------------------------------------------------------------------------------------------------
-        field_out             = np.zeros((1,self.shpy,self.shpz,self.shpx,3),dtype=self.data_type)
-        field_out[0,:,:,:,0]  = norm_velocity_out['unorm']
-        field_out[0,:,:,:,1]  = norm_velocity_out['vnorm']
-        field_out[0,:,:,:,2]  = norm_velocity_out['wnorm']
-        del norm_velocity_out
+        field_in  = data_in["norm_tensor_in"][np.newaxis]
+        field_out = data_in["norm_tensor_out"][np.newaxis]
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Define the gradient explainer model. This model needs to be updated for each file because the tensor of
-        # the output needs to be updated with each file.
+        # Update the target field of the model. The model is defined only once, the output field of each file is
+        # stored in a variable of the model.
         # ---------------------------------------------------------------------------------------------------------------
-        self.gradientSHAP_model(data_in={"field_out":field_out})
+        if not self.flag_shapmodel:
+            self.gradientSHAP_model()
+        self._update_target(data_in={"field_out":field_out})
         
         # ---------------------------------------------------------------------------------------------------------------
         # Define functions
@@ -652,7 +793,7 @@ class shap_config():
                     print("Calculation "+str(ii)+" of "+str(lm),flush=True)
                 zii         = zs[ii]
                 model_input = mask_dom(zii)
-                mse[ii,0]   = self.model(model_input)
+                mse[ii,0]   = self.infer_function(model_input)
             return mse
         
         def mask_dom(zs):
@@ -739,6 +880,75 @@ class shap_config():
         data_out = {"file_shap":file_shap}
         return data_out
     
+    def _new_fields(self):
+        """
+        .................................................................................................................
+        # _new_fields
+        .................................................................................................................
+        Function to select the fields whose SHAP values need to be calculated. The existing files are skipped if the
+        calculation is not repeated.
+
+        Returns
+        -------
+        dict
+            Fields to calculate.
+            Data:
+                - interval : indices of the fields
+
+        """
+        interval = []
+        for index_ii in range(self.field_ini,self.field_fin,self.field_delta):
+            file_shap  = self._file_name(data_in={"index_ii":index_ii})["file_shap"]
+            exist_file = bool(len(glob(file_shap)))
+            if exist_file and not self.repeat_exist:
+                print("Existing field: "+str(index_ii),flush=True)
+            else:
+                print("New field: "+str(index_ii),flush=True)
+                interval.append(index_ii)
+        data_out = {"interval":interval}
+        return data_out
+    
+    def _prefetch_fields(self,data_in={"interval":[],"padding":0}):
+        """
+        .................................................................................................................
+        # _prefetch_fields
+        .................................................................................................................
+        Function to iterate over the input and the output fields. The fields of the next indices are read in the
+        background.
+
+        Parameters
+        ----------
+        data_in : dict, optional
+            Data of the fields. The default is {"interval":[],"padding":0}.
+            Data:
+                - interval : indices of the input fields
+                - padding  : padding of the input fields
+
+        Returns
+        -------
+        generator
+            Input and output fields of each index (output of read_norm_pair).
+
+        """
+        # ---------------------------------------------------------------------------------------------------------------
+        # Import packages
+        # ---------------------------------------------------------------------------------------------------------------
+        from py_bin.py_functions.prefetch_fields import prefetch_fields, read_norm_pair
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Read the data
+        # ---------------------------------------------------------------------------------------------------------------
+        interval  = data_in["interval"]
+        padding   = int(data_in["padding"])
+        data_norm = {"folder":self.uvw_folder,"file":self.uvw_file,"padding":padding,"shpx":self.shpx,
+                     "shpy":self.shpy,"shpz":self.shpz,"dx":self.dx,"dy":self.dy,"dz":self.dz,
+                     "data_folder":self.data_folder,"umean_file":self.umean_file,"unorm_file":self.unorm_file,
+                     "delta_pred":self.delta_pred,"data_type":self.data_type,"mean_norm":self.mean_norm,
+                     "norm_out":True,"field_cache":self.field_cache}
+        data_read = [dict(data_norm,index=int(index_ii)) for index_ii in interval]
+        return prefetch_fields(data_in={"function":read_norm_pair,"data_read":data_read,
+                                        "nprefetch":self.field_prefetch,"nworkers":1})
+    
     def calc_gradientSHAP(self):
         """
         .................................................................................................................
@@ -754,8 +964,8 @@ class shap_config():
         # ---------------------------------------------------------------------------------------------------------------
         # Import packages
         # ---------------------------------------------------------------------------------------------------------------
-        from py_bin.py_functions.read_norm_velocity import read_norm_velocity
         from py_bin.py_functions.padding_field import padding_field
+        from py_bin.py_packages import shap
         
         # ---------------------------------------------------------------------------------------------------------------
         # Calculate the background values
@@ -763,80 +973,77 @@ class shap_config():
         self.background()
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Calculate the SHAP values of all the flow fields
+        # Define the SHAP model and the explainer. They are reused for all the fields and repetitions, only the target
+        # field is updated.
         # ---------------------------------------------------------------------------------------------------------------
-        interval = range(self.field_ini,self.field_fin,self.field_delta)
-        for index_ii in interval:
-            
-            # -----------------------------------------------------------------------------------------------------------
-            # Check if the file has already been calculated
-            # -----------------------------------------------------------------------------------------------------------
-            file_shap = self._file_name(data_in={"index_ii":index_ii})["file_shap"]
-            exist_file    = bool(len(glob(file_shap)))
-            if exist_file and not self.repeat_exist:
-                print("Existing field",flush=True)
-                continue
-            else:
-                print("New field",flush=True)
-            
+        self.gradientSHAP_model()
+        self.explainer = shap.GradientExplainer(self.model,self.backmat,batch_size=self.shap_batch)
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Calculate the SHAP values of all the flow fields. The input and output fields of the next indices are read
+        # in the background while the SHAP values of the current field are calculated.
+        # ---------------------------------------------------------------------------------------------------------------
+        interval = self._new_fields()["interval"]
+        for data_read in self._prefetch_fields(data_in={"interval":interval,"padding":0}):
+            index_ii = data_read["index"]
             print("-"*100,flush=True)
             print('Calculating the SHAP for field: '+str(index_ii),flush=True)
-            # -----------------------------------------------------------------------------------------------------------
-            # Read the input field 
-            # -----------------------------------------------------------------------------------------------------------   
-            data_norm_in     = {"folder":self.uvw_folder,"file":self.uvw_file,"padding":0,"shpx":self.shpx,
-                                "shpy":self.shpy,"shpz":self.shpz,"dx":self.dx,"dy":self.dy,"dz":self.dz,
-                                "data_folder":self.data_folder,"umean_file":self.umean_file,
-                                "unorm_file":self.unorm_file,"index":index_ii,"data_type":self.data_type,
-                                "mean_norm":self.mean_norm}
-            data_veloc_norm  = read_norm_velocity(data_in=data_norm_in)
-            norm_velocity_in = data_veloc_norm["norm_velocity"]
-            print("Time for reading the field: "+str(data_veloc_norm["time_read"]),flush=True)
-            print("Time for normalizing the field: "+str(data_veloc_norm["time_norm"]),flush=True)
-            del data_norm_in,data_veloc_norm
+            self.conv_nsamples = []
+            self.conv_error    = []
             
             # -----------------------------------------------------------------------------------------------------------
-            # Read the output field 
+            # Read the input and the output fields
             # -----------------------------------------------------------------------------------------------------------
-            data_norm_out     = {"folder":self.uvw_folder,"file":self.uvw_file,"padding":0,"shpx":self.shpx,
-                                 "shpy":self.shpy,"shpz":self.shpz,"dx":self.dx,"dy":self.dy,"dz":self.dz,
-                                 "data_folder":self.data_folder,"umean_file":self.umean_file,
-                                 "unorm_file":self.unorm_file,"index":index_ii+self.delta_pred,
-                                 "data_type":self.data_type,"mean_norm":self.mean_norm}
-            data_veloc_norm   = read_norm_velocity(data_in=data_norm_out)
-            norm_velocity_out = data_veloc_norm["norm_velocity"]
-            print("Time for reading the field: "+str(data_veloc_norm["time_read"]),flush=True)
-            print("Time for normalizing the field: "+str(data_veloc_norm["time_norm"]),flush=True)
-            del data_norm_out,data_veloc_norm
+            norm_tensor_in  = data_read["norm_tensor_in"]
+            norm_tensor_out = data_read["norm_tensor_out"]
+            print("Time for reading the fields: "+str(data_read["time_read"]),flush=True)
+            print("Time for normalizing the fields: "+str(data_read["time_norm"]),flush=True)
+            del data_read
         
             
             # -----------------------------------------------------------------------------------------------------------
             # Calculate the SHAP values
             # -----------------------------------------------------------------------------------------------------------
-            shap_values   = self._calculate_gradientshaps(data_in={"norm_velocity_in":norm_velocity_in,
-                                                           "norm_velocity_out":norm_velocity_out,
-                                                           "x0":0,"z0":0})
-            shap_values_u = shap_values["shap_u"]
-            shap_values_v = shap_values["shap_v"]
-            shap_values_w = shap_values["shap_w"]
-            if self.nrep_field > 0:
-                for ii_rep in np.arange(self.nrep_field):
-                    print("Repetition:"+str(ii_rep)+"/"+str(self.nrep_field),flush=True)
-                    x0             = int(np.round((self.shpx-1)*np.random.rand()))
-                    z0             = int(np.round((self.shpz-1)*np.random.rand()))
-                    shap_values    = self._calculate_gradientshaps(data_in={"norm_velocity_in":norm_velocity_in,
-                                                                            "norm_velocity_out":norm_velocity_out,
-                                                                            "x0":x0,"z0":z0})
-                    shap_values_u += shap_values["shap_u"]
-                    shap_values_v += shap_values["shap_v"]
-                    shap_values_w += shap_values["shap_w"]
-            
-            # -----------------------------------------------------------------------------------------------------------
-            # Calculate the mean value of the SHAP
-            # -----------------------------------------------------------------------------------------------------------
-            shap_values_u /= self.nrep_field+1
-            shap_values_v /= self.nrep_field+1
-            shap_values_w /= self.nrep_field+1
+            if self.batch_rep:
+                # -------------------------------------------------------------------------------------------------------
+                # All the translations are evaluated together, the first one is the original position of the field.
+                # The SHAP values are returned averaged
+                # -------------------------------------------------------------------------------------------------------
+                x0_rep        = np.zeros((self.nrep_field+1,),dtype="int")
+                z0_rep        = np.zeros((self.nrep_field+1,),dtype="int")
+                x0_rep[1:]    = np.round((self.shpx-1)*np.random.rand(self.nrep_field)).astype("int")
+                z0_rep[1:]    = np.round((self.shpz-1)*np.random.rand(self.nrep_field)).astype("int")
+                shap_values   = self._calculate_gradientshaps_rep(data_in={"norm_tensor_in":norm_tensor_in,
+                                                                           "norm_tensor_out":norm_tensor_out,
+                                                                           "x0":x0_rep,"z0":z0_rep})
+                shap_values_u = shap_values["shap_u"]
+                shap_values_v = shap_values["shap_v"]
+                shap_values_w = shap_values["shap_w"]
+            else:
+                shap_values   = self._calculate_gradientshaps(data_in={"norm_tensor_in":norm_tensor_in,
+                                                                       "norm_tensor_out":norm_tensor_out,
+                                                               "x0":0,"z0":0})
+                shap_values_u = shap_values["shap_u"]
+                shap_values_v = shap_values["shap_v"]
+                shap_values_w = shap_values["shap_w"]
+                if self.nrep_field > 0:
+                    for ii_rep in np.arange(self.nrep_field):
+                        print("Repetition:"+str(ii_rep)+"/"+str(self.nrep_field),flush=True)
+                        x0             = int(np.round((self.shpx-1)*np.random.rand()))
+                        z0             = int(np.round((self.shpz-1)*np.random.rand()))
+                        shap_values    = self._calculate_gradientshaps(data_in={"norm_tensor_in":norm_tensor_in,
+                                                                                "norm_tensor_out":norm_tensor_out,
+                                                                                "x0":x0,"z0":z0})
+                        shap_values_u += shap_values["shap_u"]
+                        shap_values_v += shap_values["shap_v"]
+                        shap_values_w += shap_values["shap_w"]
+                
+                # -------------------------------------------------------------------------------------------------------
+                # Calculate the mean value of the SHAP
+                # -------------------------------------------------------------------------------------------------------
+                shap_values_u /= self.nrep_field+1
+                shap_values_v /= self.nrep_field+1
+                shap_values_w /= self.nrep_field+1
             
             if self.padding>0:
                 # ---------------------------------------------------------------------------------------------------------------
@@ -884,9 +1091,18 @@ class shap_config():
         # ---------------------------------------------------------------------------------------------------------------
         # Import packages
         # ---------------------------------------------------------------------------------------------------------------
-        from py_bin.py_functions.read_norm_velocity import read_norm_velocity
         from py_bin.py_functions.padding_field import padding_field
         import importlib
+        import sys
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # The kernel explainer evaluates a single field in each call of the model, while the model defined with the
+        # repetitions in a batch stores one target field for each repetition
+        # ---------------------------------------------------------------------------------------------------------------
+        if self.batch_rep:
+            print("The kernel SHAP evaluates a single field in each call of the model, the batch of repetitions "+
+                  "(batch_rep) is not compatible. Set batch_rep to False. Exit calculation!",flush=True)
+            sys.exit()
         
         # ---------------------------------------------------------------------------------------------------------------
         # Read information
@@ -906,11 +1122,17 @@ class shap_config():
         # ---------------------------------------------------------------------------------------------------------------
         self.background()
         
+        # ---------------------------------------------------------------------------------------------------------------
+        # Define the SHAP model. It is reused for all the fields, only the target field is updated.
+        # ---------------------------------------------------------------------------------------------------------------
+        self.gradientSHAP_model()
+        
         # ---------------------------------------------------------------------------------------------------------------
         # Calculate the SHAP values of all the flow fields
         # ---------------------------------------------------------------------------------------------------------------
-        interval = range(self.field_ini,self.field_fin,self.field_delta)
-        for index_ii in interval:
+        interval = self._new_fields()["interval"]
+        for data_read in self._prefetch_fields(data_in={"interval":interval,"padding":self.padding}):
+            index_ii = data_read["index"]
             
             # -----------------------------------------------------------------------------------------------------------
             # Load the structures module
@@ -935,54 +1157,23 @@ class shap_config():
             self.segmentation[self.segmentation==-1] = self.struc_num
             self.index_filtered                      = segment_struc.structures.filt_index
             
-            # -----------------------------------------------------------------------------------------------------------
-            # Check if the file has already been calculated
-            # -----------------------------------------------------------------------------------------------------------
-            file_shap     = self._file_name(data_in={"index_ii":index_ii})["file_shap"]
-            exist_file    = bool(len(glob(file_shap)))
-            if exist_file and not self.repeat_exist:
-                print("Existing field",flush=True)
-                continue
-            else:
-                print("New field",flush=True)
-            
             print("-"*100,flush=True)
             print('Calculating the SHAP for field: '+str(index_ii),flush=True)
             # -----------------------------------------------------------------------------------------------------------
-            # Read the input field 
-            # -----------------------------------------------------------------------------------------------------------   
-            data_norm_in     = {"folder":self.uvw_folder,"file":self.uvw_file,"padding":self.padding,"shpx":self.shpx,
-                                "shpy":self.shpy,"shpz":self.shpz,"dx":self.dx,"dy":self.dy,"dz":self.dz,
-                                "data_folder":self.data_folder,"umean_file":self.umean_file,
-                                "unorm_file":self.unorm_file,"index":index_ii,"data_type":self.data_type,
-                                "mean_norm":self.mean_norm}
-            data_veloc_norm  = read_norm_velocity(data_in=data_norm_in)
-            norm_velocity_in = data_veloc_norm["norm_velocity"]
-            print("Time for reading the field: "+str(data_veloc_norm["time_read"]),flush=True)
-            print("Time for normalizing the field: "+str(data_veloc_norm["time_norm"]),flush=True)
-            del data_norm_in,data_veloc_norm
-            
-            # -----------------------------------------------------------------------------------------------------------
-            # Read the output field 
+            # Read the input and the output fields
             # -----------------------------------------------------------------------------------------------------------
-            data_norm_out     = {"folder":self.uvw_folder,"file":self.uvw_file,"padding":0,"shpx":self.shpx,
-                                 "shpy":self.shpy,"shpz":self.shpz,"dx":self.dx,"dy":self.dy,"dz":self.dz,
-                                 "data_folder":self.data_folder,"umean_file":self.umean_file,
-                                 "unorm_file":self.unorm_file,"index":index_ii+self.delta_pred,
-                                 "data_type":self.data_type,"mean_norm":self.mean_norm}
-            data_veloc_norm   = read_norm_velocity(data_in=data_norm_out)
-            norm_velocity_out = data_veloc_norm["norm_velocity"]
-            print("Time for reading the field: "+str(data_veloc_norm["time_read"]),flush=True)
-            print("Time for normalizing the field: "+str(data_veloc_norm["time_norm"]),flush=True)
-            del data_norm_out,data_veloc_norm
+            norm_tensor_in  = data_read["norm_tensor_in"]
+            norm_tensor_out = data_read["norm_tensor_out"]
+            print("Time for reading the fields: "+str(data_read["time_read"]),flush=True)
+            print("Time for normalizing the fields: "+str(data_read["time_norm"]),flush=True)
+            del data_read
         
             
             # -----------------------------------------------------------------------------------------------------------
             # Calculate the SHAP values
             # -----------------------------------------------------------------------------------------------------------
-            shap_values   = self._calculate_kernelshaps(data_in={"norm_velocity_in":norm_velocity_in,
-                                                                 "norm_velocity_out":norm_velocity_out
-                                                                 })["shap"]
+            shap_values   = self._calculate_kernelshaps(data_in={"norm_tensor_in":norm_tensor_in,
+                                                                 "norm_tensor_out":norm_tensor_out})["shap"]
             
             # -----------------------------------------------------------------------------------------------------------
             # Save the SHAP values
@@ -1045,6 +1236,12 @@ class shap_config():
         hf.create_dataset('SHAP_u',data=shap_values_u)
         hf.create_dataset('SHAP_v',data=shap_values_v)
         hf.create_dataset('SHAP_w',data=shap_values_w)
+        if len(self.conv_nsamples) > 0:
+            # -----------------------------------------------------------------------------------------------------------
+            # Number of samples and relative standard error of each evaluation of the explainer (one per translation)
+            # -----------------------------------------------------------------------------------------------------------
+            hf.create_dataset('nsamples',data=np.array(self.conv_nsamples,dtype='int'))
+            hf.create_dataset('sample_error',data=np.array(self.conv_error,dtype='float'))
         hf.close()
         
                                           
@@ -1198,20 +1395,21 @@ class shap_config():
         data_out = {"SHAP":shap_values,"index_filtered":index_filtered}
         return data_out
         
-    def gradientSHAP_model(self,data_in={"field_out":[]}):
+    def gradientSHAP_model(self,data_in={"field_out":None}):
         """
         .................................................................................................................
         # gradientSHAP_model
         .................................................................................................................
-        Function to define the gradientSHAP model
+        Function to define the gradientSHAP model. The model is only defined the first time the function is called,
+        the following calls only update the target field.
 
         Parameters
         ----------
         data_in : dict, optional
             data for the shap model.
-            The default is {"field_out":[]}.
+            The default is {"field_out":None}.
             Data:
-                - field_out : ouput field taken from dataset
+                - field_out : ouput field taken from dataset. If None the target field is not updated
 
         Returns
         -------
@@ -1226,31 +1424,43 @@ class shap_config():
         from tensorflow.keras import Model
         from tensorflow.keras.optimizers import RMSprop
         import psutil
+        from py_bin.py_functions.inference import inference_function
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Create the model. The weights of the target layer are appended to the weights of the trained model. The
+        # evaluations of the kernel explainer use the traced function of the model, the target field is a variable
+        # of the model, so the function is traced once for all the fields.
+        # ---------------------------------------------------------------------------------------------------------------
+        if not self.flag_shapmodel:
+            with self.strategy.scope(): 
+                self.model_base_shap()
+                optimizer      = RMSprop() 
+                self.model     = Model(self.inputs, self.outputs)
+                weights_target = self.model.get_weights()[len(self.weights):]
+                self.model.set_weights(self.weights+weights_target)
+                self.model.compile(loss=tf.keras.losses.MeanSquaredError(),optimizer=optimizer)
+            self.infer_function = inference_function(data_in={"model":self.model,"data_type":self.data_type,
+                                                              "jit_compile":False})["function"]
+            self.flag_shapmodel = True
+            if self.print_summary:
+                self.model.summary()  
+                self.print_summary = False
+                memory_data = psutil.virtual_memory()
+                print('Total RAM (GB): '+str(memory_data[0]/1e9),flush=True)
+            print("-"*100,flush=True)
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Create the model
+        # Update the target field
         # ---------------------------------------------------------------------------------------------------------------
-        with self.strategy.scope(): 
-            self.model_base_shap(data_in=data_in)
-            optimizer  = RMSprop() 
-            self.model = Model(self.inputs, self.outputs)
-            self.model.set_weights(self.weights)
-            self.model.compile(loss=tf.keras.losses.MeanSquaredError(),optimizer=optimizer)
-        if self.print_summary:
-            self.model.summary()  
-            self.print_summary = False
-            memory_data = psutil.virtual_memory()
-            print('Total RAM (GB): '+str(memory_data[0]/1e9),flush=True)
-        print("-"*100,flush=True)
+        if data_in["field_out"] is not None:
+            self._update_target(data_in=data_in)
         
-        
-                
-    def model_base_shap(self,data_in={"field_out":[]}):
+    def _update_target(self,data_in={"field_out":[]}):
         """
         .................................................................................................................
-        # model_base_shap
+        # _update_target
         .................................................................................................................
-        Function to define the model used for the problem
+        Function to replace the target field stored in the SHAP model without redefining the model
 
         Parameters
         ----------
@@ -1264,21 +1474,67 @@ class shap_config():
         -------
         None.
 
+        """
+        # ---------------------------------------------------------------------------------------------------------------
+        # Read data
+        # ---------------------------------------------------------------------------------------------------------------
+        field_out = np.array(data_in["field_out"],dtype="float32")
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Assign the field to the variable of the target layer
+        # ---------------------------------------------------------------------------------------------------------------
+        self.layer_target.set_weights([field_out.reshape(self.layer_target.shape_target)])
+        
+                
+    def model_base_shap(self):
+        """
+        .................................................................................................................
+        # model_base_shap
+        .................................................................................................................
+        Function to define the model used for the problem. The target field is stored in a non-trainable variable of 
+        the last layer, so the model does not need to be redefined for each field.
+
+        Returns
+        -------
+        None.
+
         """
         # -------------------------------------------------------------------------------------------------------------
         # Define the required packages
         # -------------------------------------------------------------------------------------------------------------
-        from tensorflow.keras.layers import Input
+        from tensorflow.keras.layers import Input, Layer
         from tensorflow.math import subtract, multiply, reduce_mean
-        from tensorflow import reshape, constant, cast, math, float32    
-        # from tensorflow.keras.layers import Input,subtract,multiply,GlobalAveragePooling3D,add #Layer,
-        # # from tensorflow.math import subtract, multiply, reduce_mean
-        # from tensorflow import reshape, constant, cast, math, float32
+        from tensorflow import reshape, constant, cast, math, float32, shape, concat, expand_dims
         
         # -------------------------------------------------------------------------------------------------------------
-        # Read data
+        # Define the layer calculating the error of the prediction with respect to the target field
         # -------------------------------------------------------------------------------------------------------------
-        field_out = constant(data_in["field_out"])
+        class CustomLayer_msetarget(Layer):
+            """
+            .............................................................................................................
+            # CustomLayer_msetarget: layer calculating the scaled mean squared error of the prediction. The target 
+                                     fields are a non-trainable weight of the layer. When several targets are stored
+                                     the batch is ordered by target and each target is compared with its own block of
+                                     predictions.
+            .............................................................................................................
+            """
+            def __init__(self,shape_target,**kwargs):
+                super().__init__(**kwargs)
+                self.shape_target = tuple(shape_target)
+                
+            def build(self,input_shape):
+                self.field_out = self.add_weight(name="field_out",shape=self.shape_target,dtype=float32,
+                                                 initializer="zeros",trainable=False)
+                super().build(input_shape)
+                
+            def call(self,inputs):
+                x_out     = cast(inputs,dtype=float32)
+                x_out     = reshape(x_out,concat([[self.shape_target[0],-1],shape(x_out)[1:]],axis=0))
+                outsubs   = subtract(x_out,expand_dims(self.field_out,axis=1))
+                outsubs2  = multiply(outsubs,outsubs)
+                out_mse   = reduce_mean(outsubs2,axis=(2,3,4,5))
+                scale_ctn = cast(constant(1e4),dtype=out_mse.dtype)
+                return math.scalar_mul(scale_ctn,reshape(out_mse,[-1]))
         
         # -------------------------------------------------------------------------------------------------------------
         # The dimensions of the input field are selected from the size of the fields, adding the padding
@@ -1292,87 +1548,12 @@ class shap_config():
         # -------------------------------------------------------------------------------------------------------------
         # Define the input and the output of the model
         # -------------------------------------------------------------------------------------------------------------
-        self.inputs  = Input(shape=shp,dtype=self.data_type)
-        x_in         = self.inputs
-        x_out        = self.architecture_Unet(data_in={"x_in":x_in,"flag_print":self.print_summary})["x_out"]
-        x_out        = cast(x_out,dtype=float32)
-        field_out    = cast(field_out,dtype=x_out.dtype)
-        outsubs      = subtract(x_out,field_out)
-        outsubs2     = multiply(outsubs,outsubs)
-        out_mse      = reduce_mean(outsubs2,keepdims=True,axis=(1,2,3,4))
-        scale_ctn    = cast(constant(1e4),dtype=out_mse.dtype)
-        out_mse      = math.scalar_mul(scale_ctn,reshape(out_mse,[-1]))
-        self.outputs = out_mse
-        # try:
-        # outsubs      = subtract([x_out,field_out],dtype=float32)
-        # outsubs2     = multiply([outsubs,outsubs])
-        # out_mse_comp = GlobalAveragePooling3D()(outsubs2)
-        # out_mse      = add([add([out_mse_comp[:,0],out_mse_comp[:,1]]),out_mse_comp[:,2]])
-        # except:
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     # Define the layers so tensorflow latest versions can operate
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     # Define the cast function
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     def custom_cast(x_tf,dtype=float32):
-        #         return cast(x_tf,dtype=dtype)
-        #     class CustomLayer_cast(Layer):
-        #         def call(self,inputs,dtype=float32):
-        #             return custom_cast(inputs,dtype=dtype)
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     # Define the subtract function
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     def custom_subtract(x_tf,y_tf):
-        #         return subtract(x_tf,y_tf)
-        #     class CustomLayer_subtract(Layer):
-        #         def call(self,inputs):
-        #             x_in,y_in = inputs
-        #             return custom_subtract(x_in,y_in)
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     # Define the multiply function
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     def custom_multiply(x_tf,y_tf):
-        #         return multiply(x_tf,y_tf)
-        #     class CustomLayer_multiply(Layer):
-        #         def call(self,inputs):
-        #             x_in,y_in = inputs
-        #             return custom_multiply(x_in,y_in)
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     # Define the reducemean function
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     def custom_reducemean(x_tf):
-        #         return reduce_mean(x_tf,keepdims=True,axis=(1,2,3,4))
-        #     class CustomLayer_reducemean(Layer):
-        #         def call(self,inputs):
-        #             return custom_reducemean(inputs)
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     # Define the reshape function
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     def custom_reshape(x_tf):
-        #         return reshape(x_tf,[-1])
-        #     class CustomLayer_reshape(Layer):
-        #         def call(self,inputs):
-        #             return custom_reshape(inputs)
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     # Define the scalar multiplication function
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     def custom_scalar_mul(scalar_tf,tensor_tf):
-        #         return math.scalar_mul(scalar_tf,tensor_tf)
-        #     class CustomLayer_scalar_mul(Layer):
-        #         def call(self,inputs):
-        #             scalar_in,tensor_in = inputs
-        #             return custom_scalar_mul(scalar_in,tensor_in)
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     # Operate the model
-        #     # ---------------------------------------------------------------------------------------------------------
-        #     x_out     = CustomLayer_cast()(x_out)
-        #     field_out = CustomLayer_cast()(field_out)
-        #     outsubs   = CustomLayer_subtract()([x_out,field_out])
-        #     outsubs2  = CustomLayer_multiply()([outsubs,outsubs])
-        #     out_mse   = CustomLayer_reducemean()(outsubs2)
-        #     scale_ctn = CustomLayer_cast()(constant(1e4),dtype=out_mse.dtype)
-        #     out_mse   = CustomLayer_scalar_mul()([scale_ctn,CustomLayer_reshape()(out_mse)])
-        self.outputs = out_mse
+        self.inputs       = Input(shape=shp,dtype=self.data_type)
+        x_in              = self.inputs
+        x_out             = self.architecture_Unet(data_in={"x_in":x_in,"flag_print":self.print_summary})["x_out"]
+        self.layer_target = CustomLayer_msetarget((self.ntarget,self.shpy,self.shpz,self.shpx,3),
+                                                  dtype="float32")
+        self.outputs      = self.layer_target(x_out)
         
         
     def background(self):
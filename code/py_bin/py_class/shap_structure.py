@@ -31,6 +31,7 @@ class shap_structure():
     # shap_structure: Class of the SHAP value coherent structures.
         * Functions:
             - __init__ : initialization function
+            - calculate_intensity: calculate the intensity of the field and its reference for the percolation
             - calculate_matstruc : calculate the matrix containing the nodes included in the transverse Reynolds stress
                                    structures.
             - segment_struc      : calculates the segmentation of the domain based on the transverse Reynolds stress
@@ -178,6 +179,7 @@ class shap_structure():
         # Store total volume
         # ---------------------------------------------------------------------------------------------------------------
         self.voltot_plus = flowfield.voltot_plus
+        self.mesh_vol    = flowfield.vol_plus
         
         # ---------------------------------------------------------------------------------------------------------------
         # Calculate the shape of the fields
@@ -205,16 +207,21 @@ class shap_structure():
         self.field_v = shap_data["SHAP_v"][:,self.padding:-self.padding,self.padding:-self.padding]
         self.field_w = shap_data["SHAP_w"][:,self.padding:-self.padding,self.padding:-self.padding]
         
-    def calculate_matstruc(self):
-        """        
+    def calculate_intensity(self):
+        """
         .................................................................................................................
-        # calculate_matstruc
+        # calculate_intensity
         .................................................................................................................
-        Function to calculate the matrix of the nodes belonging a structure
+        Function to calculate the intensity of the field and the reference intensity of the percolation. The nodes
+        with an intensity larger than the percolation index times the reference belong to a structure
 
         Returns
         -------
-        None.
+        dict
+            Intensity of the field
+            Data:
+                - field     : magnitude of the SHAP values
+                - field_rms : magnitude of the RMS of the SHAP values
 
         """
         # ---------------------------------------------------------------------------------------------------------------
@@ -232,10 +239,29 @@ class shap_structure():
         # Calculate the product of the velocty fluctuation and the product of the RMS velocity.
         # Then obtain the matrix containing the points belonging to the structures
         # ---------------------------------------------------------------------------------------------------------------
-        shap_xyz       = np.sqrt(self.field_u**2+self.field_v**2+self.field_w**2)
-        shap_rms       = np.sqrt(data_SHAPrms["SHAP_urms"]**2+data_SHAPrms["SHAP_vrms"]**2+
-                                 data_SHAPrms["SHAP_wrms"]**2).reshape(-1,1,1)
-        self.mat_struc = np.array(np.heaviside(shap_xyz-self.Hperc*shap_rms,0),dtype='bool')
+        shap_xyz = np.sqrt(self.field_u**2+self.field_v**2+self.field_w**2)
+        shap_rms = np.sqrt(data_SHAPrms["SHAP_urms"]**2+data_SHAPrms["SHAP_vrms"]**2+
+                           data_SHAPrms["SHAP_wrms"]**2).reshape(-1,1,1)
+        data_out = {"field":shap_xyz,"field_rms":shap_rms}
+        return data_out
+
+    def calculate_matstruc(self):
+        """
+        .................................................................................................................
+        # calculate_matstruc
+        .................................................................................................................
+        Function to calculate the matrix of the nodes belonging a structure
+
+        Returns
+        -------
+        None.
+
+        """
+        # ---------------------------------------------------------------------------------------------------------------
+        # Obtain the matrix containing the points belonging to the structures
+        # ---------------------------------------------------------------------------------------------------------------
+        data_int       = self.calculate_intensity()
+        self.mat_struc = np.array(np.heaviside(data_int["field"]-self.Hperc*data_int["field_rms"],0),dtype='bool')
     
     def segment_struc(self):
         """       
@@ -275,10 +301,7 @@ class shap_structure():
         self.structures = structures(data_in=data_struc)
         self.structures.separate_structures()
         self.structures.physicalproperties_structures()
-        self.structures.detect_quadrant()
-        self.structures.segmentation()
-        self.structures.structure_u1u2()
-        self.structures.structure_k123()
+        self.structures.classify_structures(data_in={"flag_quadrant":True})
     
     def save_struc(self):
         """
@@ -33,6 +33,7 @@ class shap_structure():
     # shap_structure: Class of the SHAP value coherent structures.
         * Functions:
             - __init__ : initialization function
+            - calculate_intensity: calculate the intensity of the field and its reference for the percolation
             - calculate_matstruc : calculate the matrix containing the nodes included in the transverse Reynolds stress
                                    structures.
             - segment_struc      : calculates the segmentation of the domain based on the transverse Reynolds stress
@@ -187,6 +188,7 @@ class shap_structure():
         # Store total volume
         # ---------------------------------------------------------------------------------------------------------------
         self.voltot_plus = flowfield.voltot_plus
+        self.mesh_vol    = flowfield.vol_plus
         
         # ---------------------------------------------------------------------------------------------------------------
         # Calculate the shape of the fields
@@ -241,16 +243,25 @@ class shap_structure():
         self.vel_v     = data_vel["vv"]
         self.vel_w     = data_vel["ww"]
         
-    def calculate_matstruc(self):
-        """        
+    def calculate_intensity(self):
+        """
         .................................................................................................................
-        # calculate_matstruc
+        # calculate_intensity
         .................................................................................................................
-        Function to calculate the matrix of the nodes belonging a structure a matrix is calculated for each component
+        Function to calculate the intensity of the field and the reference intensity of the percolation. The nodes
+        with an intensity larger than the percolation index times the reference belong to a structure
 
         Returns
         -------
-        None.
+        dict
+            Intensity of the field
+            Data:
+                - field_u     : negative streamwise SHAP value
+                - field_rms_u : RMS of the streamwise SHAP value
+                - field_v     : absolute value of the wall-normal SHAP value
+                - field_rms_v : RMS of the wall-normal SHAP value
+                - field_w     : negative spanwise SHAP value
+                - field_rms_w : RMS of the spanwise SHAP value
 
         """
         # ---------------------------------------------------------------------------------------------------------------
@@ -268,12 +279,33 @@ class shap_structure():
         # Calculate the product of the velocty fluctuation and the product of the RMS velocity.
         # Then obtain the matrix containing the points belonging to the structures
         # ---------------------------------------------------------------------------------------------------------------
-        self.mat_struc_u = np.array(np.heaviside(-self.field_u-self.Hpercu*
-                                                 data_SHAPrms["SHAP_urms"].reshape(-1,1,1),0),dtype='bool')
-        self.mat_struc_v = np.array(np.heaviside(abs(self.field_v)-self.Hpercv*
-                                                 data_SHAPrms["SHAP_vrms"].reshape(-1,1,1),0),dtype='bool')
-        self.mat_struc_w = np.array(np.heaviside(-self.field_w-self.Hpercw*
-                                                 data_SHAPrms["SHAP_wrms"].reshape(-1,1,1),0),dtype='bool')
+        data_out = {"field_u":-self.field_u,"field_rms_u":data_SHAPrms["SHAP_urms"].reshape(-1,1,1),
+                    "field_v":abs(self.field_v),"field_rms_v":data_SHAPrms["SHAP_vrms"].reshape(-1,1,1),
+                    "field_w":-self.field_w,"field_rms_w":data_SHAPrms["SHAP_wrms"].reshape(-1,1,1)}
+        return data_out
+
+    def calculate_matstruc(self):
+        """
+        .................................................................................................................
+        # calculate_matstruc
+        .................................................................................................................
+        Function to calculate the matrix of the nodes belonging a structure a matrix is calculated for each component
+
+        Returns
+        -------
+        None.
+
+        """
+        # ---------------------------------------------------------------------------------------------------------------
+        # Obtain the matrix containing the points belonging to the structures
+        # ---------------------------------------------------------------------------------------------------------------
+        data_int         = self.calculate_intensity()
+        self.mat_struc_u = np.array(np.heaviside(data_int["field_u"]-self.Hpercu*data_int["field_rms_u"],0),
+                                    dtype='bool')
+        self.mat_struc_v = np.array(np.heaviside(data_int["field_v"]-self.Hpercv*data_int["field_rms_v"],0),
+                                    dtype='bool')
+        self.mat_struc_w = np.array(np.heaviside(data_int["field_w"]-self.Hpercw*data_int["field_rms_w"],0),
+                                    dtype='bool')
     
     def segment_struc(self):
         """       
@@ -304,10 +336,7 @@ class shap_structure():
         self.structures_u = structures(data_in=data_struc_u)
         self.structures_u.separate_structures()
         self.structures_u.physicalproperties_structures()
-        self.structures_u.detect_quadrant()
-        self.structures_u.segmentation()
-        self.structures_u.structure_u1u2()
-        self.structures_u.structure_k123()
+        self.structures_u.classify_structures(data_in={"flag_quadrant":True})
         data_struc_v      = {"mat_struc":self.mat_struc_v,"field_1":self.vel_u,"field_2":self.vel_v,
                              "field_3":self.vel_w,"flag_sign":False,"uvw_folder":self.uvw_folder,
                              "uvw_file":self.uvw_file,"dx":self.down_x,"dy":self.down_y,"dz":self.down_z,
@@ -317,10 +346,7 @@ class shap_structure():
         self.structures_v = structures(data_in=data_struc_v)
         self.structures_v.separate_structures()
         self.structures_v.physicalproperties_structures()
-        self.structures_v.detect_quadrant()
-        self.structures_v.segmentation()
-        self.structures_v.structure_u1u2()
-        self.structures_v.structure_k123()
+        self.structures_v.classify_structures(data_in={"flag_quadrant":True})
         data_struc_w      = {"mat_struc":self.mat_struc_w,"field_1":self.vel_u,"field_2":self.vel_v,
                              "field_3":self.vel_w,"flag_sign":False,"uvw_folder":self.uvw_folder,
                              "uvw_file":self.uvw_file,"dx":self.down_x,"dy":self.down_y,"dz":self.down_z,
@@ -330,10 +356,7 @@ class shap_structure():
         self.structures_w = structures(data_in=data_struc_w)
         self.structures_w.separate_structures()
         self.structures_w.physicalproperties_structures()
-        self.structures_w.detect_quadrant()
-        self.structures_w.segmentation()
-        self.structures_w.structure_u1u2()
-        self.structures_w.structure_k123()
+        self.structures_w.classify_structures(data_in={"flag_quadrant":True})
     
     def save_struc(self):
         """
@@ -754,10 +777,7 @@ class shap_structure():
         self.structures_Q100 = structures(data_in=data_struc_Q100)
         self.structures_Q100.separate_structures()
         self.structures_Q100.physicalproperties_structures()
-        self.structures_Q100.detect_quadrant()
-        self.structures_Q100.segmentation()
-        self.structures_Q100.structure_u1u2()
-        self.structures_Q100.structure_k123()
+        self.structures_Q100.classify_structures(data_in={"flag_quadrant":True})
         max_struc_Q100       = int(np.max(self.structures_Q100.mat_segment))
         self.shap_Q100       = np.zeros((max_struc_Q100,))
         for nn  in np.arange(max_struc_Q100-1):
@@ -777,10 +797,7 @@ class shap_structure():
         self.structures_Q001 = structures(data_in=data_struc_Q001)
         self.structures_Q001.separate_structures()
         self.structures_Q001.physicalproperties_structures()
-        self.structures_Q001.detect_quadrant()
-        self.structures_Q001.segmentation()
-        self.structures_Q001.structure_u1u2()
-        self.structures_Q001.structure_k123()
+        self.structures_Q001.classify_structures(data_in={"flag_quadrant":True})
         max_struc_Q001       = int(np.max(self.structures_Q001.mat_segment))
         self.shap_Q001       = np.zeros((max_struc_Q001,))
         for nn  in np.arange(max_struc_Q001-1):
@@ -800,10 +817,7 @@ class shap_structure():
         self.structures_Q010 = structures(data_in=data_struc_Q010)
         self.structures_Q010.separate_structures()
         self.structures_Q010.physicalproperties_structures()
-        self.structures_Q010.detect_quadrant()
-        self.structures_Q010.segmentation()
-        self.structures_Q010.structure_u1u2()
-        self.structures_Q010.structure_k123()
+        self.structures_Q010.classify_structures(data_in={"flag_quadrant":True})
         max_struc_Q010       = int(np.max(self.structures_Q010.mat_segment))
         self.shap_Q010       = np.zeros((max_struc_Q010,))
         for nn  in np.arange(max_struc_Q010-1):
@@ -823,10 +837,7 @@ class shap_structure():
         self.structures_Q020 = structures(data_in=data_struc_Q020)
         self.structures_Q020.separate_structures()
         self.structures_Q020.physicalproperties_structures()
-        self.structures_Q020.detect_quadrant()
-        self.structures_Q020.segmentation()
-        self.structures_Q020.structure_u1u2()
-        self.structures_Q020.structure_k123()
+        self.structures_Q020.classify_structures(data_in={"flag_quadrant":True})
         max_struc_Q020       = int(np.max(self.structures_Q020.mat_segment))
         self.shap_Q020       = np.zeros((max_struc_Q020,))
         for nn  in np.arange(max_struc_Q020-1):
@@ -846,10 +857,7 @@ class shap_structure():
         self.structures_Q101 = structures(data_in=data_struc_Q101)
         self.structures_Q101.separate_structures()
         self.structures_Q101.physicalproperties_structures()
-        self.structures_Q101.detect_quadrant()
-        self.structures_Q101.segmentation()
-        self.structures_Q101.structure_u1u2()
-        self.structures_Q101.structure_k123()
+        self.structures_Q101.classify_structures(data_in={"flag_quadrant":True})
         max_struc_Q101       = int(np.max(self.structures_Q101.mat_segment))
         self.shap_Q101       = np.zeros((max_struc_Q101,))
         for nn  in np.arange(max_struc_Q101-1):
@@ -869,10 +877,7 @@ class shap_structure():
         self.structures_Q110 = structures(data_in=data_struc_Q110)
         self.structures_Q110.separate_structures()
         self.structures_Q110.physicalproperties_structures()
-        self.structures_Q110.detect_quadrant()
-        self.structures_Q110.segmentation()
-        self.structures_Q110.structure_u1u2()
-        self.structures_Q110.structure_k123()
+        self.structures_Q110.classify_structures(data_in={"flag_quadrant":True})
         max_struc_Q110       = int(np.max(self.structures_Q110.mat_segment))
         self.shap_Q110       = np.zeros((max_struc_Q110,))
         for nn  in np.arange(max_struc_Q110-1):
@@ -892,10 +897,7 @@ class shap_structure():
         self.structures_Q120 = structures(data_in=data_struc_Q120)
         self.structures_Q120.separate_structures()
         self.structures_Q120.physicalproperties_structures()
-        self.structures_Q120.detect_quadrant()
-        self.structures_Q120.segmentation()
-        self.structures_Q120.structure_u1u2()
-        self.structures_Q120.structure_k123()
+        self.structures_Q120.classify_structures(data_in={"flag_quadrant":True})
         max_struc_Q120       = int(np.max(self.structures_Q120.mat_segment))
         self.shap_Q120       = np.zeros((max_struc_Q120,))
         for nn  in np.arange(max_struc_Q120-1):
@@ -915,10 +917,7 @@ class shap_structure():
         self.structures_Q011 = structures(data_in=data_struc_Q011)
         self.structures_Q011.separate_structures()
         self.structures_Q011.physicalproperties_structures()
-        self.structures_Q011.detect_quadrant()
-        self.structures_Q011.segmentation()
-        self.structures_Q011.structure_u1u2()
-        self.structures_Q011.structure_k123()
+        self.structures_Q011.classify_structures(data_in={"flag_quadrant":True})
         max_struc_Q011       = int(np.max(self.structures_Q011.mat_segment))
         self.shap_Q011       = np.zeros((max_struc_Q011,))
         for nn  in np.arange(max_struc_Q011-1):
@@ -938,10 +937,7 @@ class shap_structure():
         self.structures_Q021 = structures(data_in=data_struc_Q021)
         self.structures_Q021.separate_structures()
         self.structures_Q021.physicalproperties_structures()
-        self.structures_Q021.detect_quadrant()
-        self.structures_Q021.segmentation()
-        self.structures_Q021.structure_u1u2()
-        self.structures_Q021.structure_k123()
+        self.structures_Q021.classify_structures(data_in={"flag_quadrant":True})
         max_struc_Q021       = int(np.max(self.structures_Q021.mat_segment))
         self.shap_Q021       = np.zeros((max_struc_Q021,))
         for nn  in np.arange(max_struc_Q021-1):
@@ -961,10 +957,7 @@ class shap_structure():
         self.structures_Q111 = structures(data_in=data_struc_Q111)
         self.structures_Q111.separate_structures()
         self.structures_Q111.physicalproperties_structures()
-        self.structures_Q111.detect_quadrant()
-        self.structures_Q111.segmentation()
-        self.structures_Q111.structure_u1u2()
-        self.structures_Q111.structure_k123()
+        self.structures_Q111.classify_structures(data_in={"flag_quadrant":True})
         max_struc_Q111       = int(np.max(self.structures_Q111.mat_segment))
         self.shap_Q111       = np.zeros((max_struc_Q111,))
         for nn  in np.arange(max_struc_Q111-1):
@@ -984,10 +977,7 @@ class shap_structure():
         self.structures_Q121 = structures(data_in=data_struc_Q121)
         self.structures_Q121.separate_structures()
         self.structures_Q121.physicalproperties_structures()
-        self.structures_Q121.detect_quadrant()
-        self.structures_Q121.segmentation()
-        self.structures_Q121.structure_u1u2()
-        self.structures_Q121.structure_k123()
+        self.structures_Q121.classify_structures(data_in={"flag_quadrant":True})
         max_struc_Q121       = int(np.max(self.structures_Q121.mat_segment))
         self.shap_Q121       = np.zeros((max_struc_Q121,))
         for nn  in np.arange(max_struc_Q121-1):
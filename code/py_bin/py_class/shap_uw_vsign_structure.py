@@ -32,6 +32,7 @@ class shap_structure():
     # shap_structure: Class of the SHAP value coherent structures.
         * Functions:
             - __init__ : initialization function
+            - calculate_intensity: calculate the intensity of the field and its reference for the percolation
             - calculate_matstruc : calculate the matrix containing the nodes included in the transverse Reynolds stress
                                    structures.
             - segment_struc      : calculates the segmentation of the domain based on the transverse Reynolds stress
@@ -183,6 +184,7 @@ class shap_structure():
         # Store total volume
         # ---------------------------------------------------------------------------------------------------------------
         self.voltot_plus = flowfield.voltot_plus
+        self.mesh_vol    = flowfield.vol_plus
         
         # ---------------------------------------------------------------------------------------------------------------
         # Calculate the shape of the fields
@@ -237,16 +239,22 @@ class shap_structure():
         self.vel_v     = data_vel["vv"]
         self.vel_w     = data_vel["ww"]
         
-    def calculate_matstruc(self):
-        """        
+    def calculate_intensity(self):
+        """
         .................................................................................................................
-        # calculate_matstruc
+        # calculate_intensity
         .................................................................................................................
-        Function to calculate the matrix of the nodes belonging a structure
+        Function to calculate the intensity of the field and the reference intensity of the percolation. The nodes
+        with an intensity larger than the percolation index times the reference belong to a structure
 
         Returns
         -------
-        None.
+        dict
+            Intensity of the field
+            Data:
+                - field_1   : magnitude of the negative streamwise and spanwise SHAP for negative wall-normal SHAP
+                - field_2   : magnitude of the negative streamwise and spanwise SHAP for positive wall-normal SHAP
+                - field_rms : magnitude of the RMS of the streamwise and spanwise SHAP values
 
         """
         # ---------------------------------------------------------------------------------------------------------------
@@ -269,14 +277,29 @@ class shap_structure():
         shap_xyz_1       = np.sqrt(field_u**2+field_w**2)*np.heaviside(-np.sign(self.field_v),1)
         shap_xyz_2       = np.sqrt(field_u**2+field_w**2)*np.heaviside(np.sign(self.field_v),0)
         shap_rms         = np.sqrt(data_SHAPrms["SHAP_urms"]**2+data_SHAPrms["SHAP_wrms"]**2).reshape(-1,1,1)
-        
+        data_out         = {"field_1":shap_xyz_1,"field_2":shap_xyz_2,"field_rms":shap_rms}
+        return data_out
+
+    def calculate_matstruc(self):
+        """
+        .................................................................................................................
+        # calculate_matstruc
+        .................................................................................................................
+        Function to calculate the matrix of the nodes belonging a structure
+
+        Returns
+        -------
+        None.
+
+        """
         # ---------------------------------------------------------------------------------------------------------------
-        # Two matrices are calculated:
+        # Obtain the matrix containing the points belonging to the structures. Two matrices are calculated:
         #     - self.mat_struc_1 : shap streaks of positive phi_v
         #     - self.mat_struc_2 : shap streaks of negative phi_v
         # ---------------------------------------------------------------------------------------------------------------
-        self.mat_struc_1 = np.array(np.heaviside(shap_xyz_1-self.Hperc*shap_rms,0),dtype='bool')
-        self.mat_struc_2 = np.array(np.heaviside(shap_xyz_2-self.Hperc*shap_rms,0),dtype='bool')
+        data_int         = self.calculate_intensity()
+        self.mat_struc_1 = np.array(np.heaviside(data_int["field_1"]-self.Hperc*data_int["field_rms"],0),dtype='bool')
+        self.mat_struc_2 = np.array(np.heaviside(data_int["field_2"]-self.Hperc*data_int["field_rms"],0),dtype='bool')
     
     def segment_struc(self):
         """       
@@ -316,9 +339,7 @@ class shap_structure():
         self.structures_1 = structures(data_in=data_struc_1)
         self.structures_1.separate_structures()
         self.structures_1.physicalproperties_structures()
-        self.structures_1.segmentation()
-        self.structures_1.structure_u1u2()
-        self.structures_1.structure_k123()
+        self.structures_1.classify_structures(data_in={"flag_quadrant":False})
         data_struc_2      = {"mat_struc":self.mat_struc_2,"field_1":self.vel_u,"field_2":self.vel_v,
                              "field_3":self.vel_w,"flag_sign":False,"uvw_folder":self.uvw_folder,
                              "uvw_file":self.uvw_file,"dx":self.down_x,"dy":self.down_y,"dz":self.down_z,
@@ -328,9 +349,7 @@ class shap_structure():
         self.structures_2 = structures(data_in=data_struc_2)
         self.structures_2.separate_structures()
         self.structures_2.physicalproperties_structures()
-        self.structures_2.segmentation()
-        self.structures_2.structure_u1u2()
-        self.structures_2.structure_k123()
+        self.structures_2.classify_structures(data_in={"flag_quadrant":False})
     
     def save_struc(self):
         """
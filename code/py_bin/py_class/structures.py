@@ -30,11 +30,15 @@ class structures():
             - __init__                      : initialization of the class
             - separate_structures           : function for obtaining the nodes of each structure
             - physicalproperties_structures : function for defining the physical properties of the coherent structures
+            - _periodic_properties          : function for calculating the size and the center of gravity of the
+                                              structures in the periodic directions
             - detect_quadrant               : function for detecting the quadrant of the structures
             - segmentation                  : function to generate a segmentation mask according with the structures
             - structure_u1u2                : function to calculate the product of the field in the dimensions 1 and 2
                                               of the flow field for each structure
-            - structure_shap                : function for calculating the total SHAP of the structure
+            - structure_k123                : function to calculate the energy of the field for each structure
+            - classify_structures           : function to calculate the quadrant, the segmentation and the fractions
+                                              of the product and the energy of the fields of the structures
         * Variables:
             - mat_struc            : matrix of the grid-points contained in a structure (1 if contained, 
                                                                                          0 if not contained)
@@ -64,6 +68,9 @@ class structures():
             - shpy                 : shape of the tensors in the wall-normal direction
             - shpz                 : shape of the tensors in the spanwise direction
             - nodes                : list containing the grid-points of each coherent structure
+            - mat_label            : matrix with the index of the structure of each node (0 if not contained)
+            - points               : nodes of all the structures, the nodes of each structure are contiguous
+            - label_node           : index of the structure of each node of points
             - dim_x                : size of the structure in the streamwise direction
             - dim_y                : size of the structure in the wall-normal direction
             - dim_z                : size of the structure in the spanwise direction
@@ -195,115 +202,28 @@ class structures():
 
         """
         # ---------------------------------------------------------------------------------------------------------------
-        # Define the size of the matrix
-        #   - ny : number of points in y direction
-        #   - nz : number of points in z direction
-        #   - nx : number of points in x direction 
-        # ---------------------------------------------------------------------------------------------------------------
-        ny,nz,nx        = self.mat_struc.shape
-        mat_struc_copy  = self.mat_struc.copy()
-        copy2           = mat_struc_copy.copy()
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Create a matrix to evaluate the connectivity-1 in all the directions
+        # Import packages
         # ---------------------------------------------------------------------------------------------------------------
-        dirs = np.array([[-1,0,0],[0,-1,0],[0,0,-1],[1,0,0],[0,1,0],[0,0,1]])
+        from py_bin.py_functions.label_structures import label_structures
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Calculate the connectivity
-        # - list_waiting : list with the nodes that have been detected in the structure and their connectivity has to
-        #                  be evaluated
-        # - self.nodes   : list of the nodes contained in each structure
-        # ---------------------------------------------------------------------------------------------------------------
-        list_waiting    = []
-        self.nodes      = []
-        
+        # Label the connected nodes (connectivity-1 in all the directions). The walls bound the wall-normal direction
+        # and the streamwise and spanwise directions are periodic. If the structures have to be divided by the signs
+        # of the fields, only the nodes with the same signs are connected.
+        #   - self.mat_label  : matrix with the index of the structure of each node (starting in 1, 0 if not contained)
+        #   - self.nodes      : list of the nodes contained in each structure
+        #   - self.points     : nodes of all the structures, the nodes of each structure are contiguous
+        #   - self.label_node : index of the structure of each node of points
         # ---------------------------------------------------------------------------------------------------------------
-        # Check all the points in the domain discarding those with absence of structure
-        # For the points containing the structure check all the adjacent nodes
-        # Apply simetries and avoid walls
-        # Repeat for the connected nodes
-        # ---------------------------------------------------------------------------------------------------------------
-        for ind_y in np.arange(ny):
-            for ind_z in np.arange(nz):
-                for ind_x in np.arange(nx):
-                    if mat_struc_copy[ind_y,ind_z,ind_x] == 0:
-                        continue
-                    else:
-                        # -----------------------------------------------------------------------------------------------
-                        # Add the index of the nodes
-                        #   - list_struc : list of nodes of a structure
-                        # Delete the value of the point in the reference matrix (avoid calculating it twice)
-                        #   - First      : flag to specify if it is the first node of a structure
-                        # -----------------------------------------------------------------------------------------------
-                        ind_yzx                           = [ind_y,ind_z,ind_x]
-                        list_struc                        = [np.array(ind_yzx,dtype='int')]
-                        mat_struc_copy[ind_y,ind_z,ind_x] = 0
-                        first                             = True
-                        # -----------------------------------------------------------------------------------------------
-                        # If the node is the first of the structure or is connected to the structure,
-                        # check the adjacent nodes
-                        # -----------------------------------------------------------------------------------------------
-                        while len(list_waiting)>0 or first:
-                            if first:
-                                # ---------------------------------------------------------------------------------------
-                                # Specify that the first node of the structure has been used
-                                # ---------------------------------------------------------------------------------------
-                                first = False
-                                if self.flag_sign:
-                                    signini_1 = self.sign_1[ind_yzx[0],ind_yzx[1],ind_yzx[2]]
-                                    signini_2 = self.sign_2[ind_yzx[0],ind_yzx[1],ind_yzx[2]]
-                            else:
-                                # ---------------------------------------------------------------------------------------
-                                # Take the first node of the waiting list and remove it from the list
-                                # ---------------------------------------------------------------------------------------
-                                ind_yzx      = list_waiting[0]
-                                list_waiting = list_waiting[1:]
-                            # -------------------------------------------------------------------------------------------
-                            # Define all the possible nodes in contact and apply symmetries to those nodes
-                            #   - if the direction z is in the node -1 or nz switch to nz-1 or 0
-                            #   - if the direction x is in the node -1 or nx switch to nx-1 or 0
-                            # -------------------------------------------------------------------------------------------
-                            dir_ind                     = ind_yzx+dirs
-                            dir_ind[dir_ind[:,1]==-1,1] = nz-1
-                            dir_ind[dir_ind[:,2]==-1,2] = nx-1
-                            dir_ind[dir_ind[:,1]==nz,1] = 0
-                            dir_ind[dir_ind[:,2]==nx,2] = 0
-                            for dir_ii in dir_ind:
-                                # ---------------------------------------------------------------------------------------
-                                # Avoid the position of the walls
-                                # ---------------------------------------------------------------------------------------
-                                if dir_ii[0] > -1 and dir_ii[0] < ny:
-                                    # -----------------------------------------------------------------------------------
-                                    # If the connected point is a structure, save it in list_struc and remove it from
-                                    # the reference matrix
-                                    # Add the node to the waiting list to evaluate the connections from its position
-                                    # -----------------------------------------------------------------------------------
-                                    if mat_struc_copy[dir_ii[0],dir_ii[1],dir_ii[2]] == 1:
-                                        # -------------------------------------------------------------------------------
-                                        # If the structure has to be divided by the signs of the velocity check the 
-                                        # signs
-                                        # -------------------------------------------------------------------------------
-                                        if self.flag_sign:
-                                            sign1 = self.sign_1[dir_ii[0],dir_ii[1],dir_ii[2]]
-                                            sign2 = self.sign_2[dir_ii[0],dir_ii[1],dir_ii[2]]
-                                            if signini_1 == sign1 and signini_2 == sign2:
-                                                flag_connect = True
-                                            else:
-                                                flag_connect = False
-                                        else:
-                                            flag_connect = True
-                                        if flag_connect:
-                                            list_struc.append(dir_ii)
-                                            mat_struc_copy[dir_ii[0],dir_ii[1],dir_ii[2]]  = 0
-                                            list_waiting.append(dir_ii)
-                    # ---------------------------------------------------------------------------------------------------
-                    # Append the list of nodes to the list of structures
-                    # ---------------------------------------------------------------------------------------------------
-                    self.nodes.append(np.array(list_struc).T)
-        
-                
-            
+        if self.flag_sign:
+            data_label = {"mat_struc":self.mat_struc,"sign_1":self.sign_1,"sign_2":self.sign_2}
+        else:
+            data_label = {"mat_struc":self.mat_struc,"sign_1":None,"sign_2":None}
+        data_struc      = label_structures(data_in=data_label)
+        self.mat_label  = data_struc["mat_label"]
+        self.nodes      = data_struc["nodes"]
+        self.points     = data_struc["points"]
+        self.label_node = data_struc["label_node"]
 
     def physicalproperties_structures(self):
         """
@@ -320,258 +240,166 @@ class structures():
         # ---------------------------------------------------------------------------------------------------------------
         # Create the information of the structures
         # ---------------------------------------------------------------------------------------------------------------
-        self.dim_x   = np.zeros((len(self.nodes),),dtype="float") # size of the structure in the streamwise direction
-        self.dim_y   = np.zeros((len(self.nodes),),dtype="float") # size of the structure in the wall-normal direction
-        self.dim_z   = np.zeros((len(self.nodes),),dtype="float") # size of the structure in the spanwise direction
-        self.ymin    = np.zeros((len(self.nodes),),dtype="float") # minimum wall distance of the structure
-        self.ymax    = np.zeros((len(self.nodes),),dtype="float") # maximum wall distance of the structure
-        self.boxvol  = np.zeros((len(self.nodes),),dtype="float") # volume of the box containing the structure
-        self.vol     = np.zeros((len(self.nodes),),dtype="float") # volume of the structure
-        self.cg_x    = np.zeros((len(self.nodes),),dtype="float") # position of the center of gravity in x
-        self.cg_z    = np.zeros((len(self.nodes),),dtype="float") # position of the center of gravity in z
-        self.cg_y    = np.zeros((len(self.nodes),),dtype="float") # position of the center of gravity in y
-        self.cg_xbox = np.zeros((len(self.nodes),),dtype="float") # position of the center of gravity of the box in x
-        self.cg_zbox = np.zeros((len(self.nodes),),dtype="float") # position of the center of gravity of the box in z
-        self.cg_ybox = np.zeros((len(self.nodes),),dtype="float") # position of the center of gravity of the box in y
-        self.inv_chn = np.zeros((len(self.nodes),),dtype="bool")  # flag for knowing if the structure is inverted
+        nstruc       = len(self.nodes)
+        self.dim_x   = np.zeros((nstruc,),dtype="float") # size of the structure in the streamwise direction
+        self.dim_y   = np.zeros((nstruc,),dtype="float") # size of the structure in the wall-normal direction
+        self.dim_z   = np.zeros((nstruc,),dtype="float") # size of the structure in the spanwise direction
+        self.ymin    = np.zeros((nstruc,),dtype="float") # minimum wall distance of the structure
+        self.ymax    = np.zeros((nstruc,),dtype="float") # maximum wall distance of the structure
+        self.boxvol  = np.zeros((nstruc,),dtype="float") # volume of the box containing the structure
+        self.vol     = np.zeros((nstruc,),dtype="float") # volume of the structure
+        self.cg_x    = np.zeros((nstruc,),dtype="float") # position of the center of gravity in x
+        self.cg_z    = np.zeros((nstruc,),dtype="float") # position of the center of gravity in z
+        self.cg_y    = np.zeros((nstruc,),dtype="float") # position of the center of gravity in y
+        self.cg_xbox = np.zeros((nstruc,),dtype="float") # position of the center of gravity of the box in x
+        self.cg_zbox = np.zeros((nstruc,),dtype="float") # position of the center of gravity of the box in z
+        self.cg_ybox = np.zeros((nstruc,),dtype="float") # position of the center of gravity of the box in y
+        self.inv_chn = np.zeros((nstruc,),dtype="bool")  # flag for knowing if the structure is inverted
+        if nstruc == 0:
+            return
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Calculate the physical properties for every structure
-        #     - nn           : index of the structure
-        #     - struc_points : nodes of the structure
-        #     - ymin         : minimum y position of the structure
-        #     - ymax         : maximum y position of the structure
-        #     - dim_y        : dimension in y
-        #     - x_sort       : nodes in x sorted
-        #     - z_sort       : nodes in z sorted
-        #     - dim_x        : dimensions of the structure in the streamwise position
-        #     - dim_z        : dimensions of the structure in the spanwise position
-        # ---------------------------------------------------------------------------------------------------------------
-        for nn  in np.arange(len(self.nodes)):
-            struc_points     = self.nodes[nn].astype('int')
-            ymin             = self.y_h_plus[int(np.min(struc_points[0,:]))]
-            ymax             = self.y_h_plus[int(np.max(struc_points[0,:]))]
-            dim_y            = np.abs(ymax-ymin)
-            x_sort           = np.sort(struc_points[2,:])
-            z_sort           = np.sort(struc_points[1,:])
-            self.cg_xbox[nn] = np.floor(np.mean(x_sort))
-            self.cg_zbox[nn] = np.floor(np.mean(z_sort))
-            self.cg_ybox[nn] = np.floor(np.mean(struc_points[0,:])) 
-            
-            # -----------------------------------------------------------------------------------------------------------
-            # Evaluate the center of gravity of the structures
-            # -----------------------------------------------------------------------------------------------------------
-            cg_y = 0
-            for nn2 in np.arange(len(self.nodes[nn][0,:])):
-                self.cg_x[nn] += self.grid_dx_plus*struc_points[2,nn2]*self.grid_vol_plus[struc_points[0,nn2],
-                                                                                          struc_points[1,nn2],
-                                                                                          struc_points[2,nn2]]
-                self.cg_z[nn] += self.grid_dz_plus*struc_points[1,nn2]*self.grid_vol_plus[struc_points[0,nn2],
-                                                                                          struc_points[1,nn2],
-                                                                                          struc_points[2,nn2]]
-                cg_y          += self.y_h_plus[struc_points[0,nn2]]*self.grid_vol_plus[struc_points[0,nn2],
-                                                                                       struc_points[1,nn2],
-                                                                                       struc_points[2,nn2]]
-                self.vol[nn]  += self.grid_vol_plus[struc_points[0,nn2],struc_points[1,nn2],struc_points[2,nn2]]
-            self.cg_x[nn] /= self.vol[nn]
-            self.cg_z[nn] /= self.vol[nn]
-            cg_y          /= self.vol[nn]
-                            
-            # -----------------------------------------------------------------------------------------------------------
-            # Calculate the dimension of each structure in the streamwise and the spanwise dimensions
-            # -----------------------------------------------------------------------------------------------------------
-            dim_x = self.grid_dx_plus*(np.max(x_sort)-np.min(x_sort))
-            dim_z = self.grid_dz_plus*(np.max(z_sort)-np.min(z_sort)) 
-            
-            # -----------------------------------------------------------------------------------------------------------
-            # Check if the structure is crossing the symmetry planes x and z
-            #     - flag_x : flag which determines if a structure is crossing the symmetry plane in x
-            #     - flag_z : flag which determines if a structure is crossing the symmetry plane in z
-            # -----------------------------------------------------------------------------------------------------------
-            flag_x = bool(np.count_nonzero(x_sort==self.shpx-1)>=1 and np.count_nonzero(x_sort==0)>=1)
-            flag_z = bool(np.count_nonzero(z_sort==self.shpz-1)>=1 and np.count_nonzero(z_sort==0)>=1)
-            
-            # -----------------------------------------------------------------------------------------------------------
-            # If the structure is crossing the x plane
-            # -----------------------------------------------------------------------------------------------------------
-            if flag_x:
-                
-                # -------------------------------------------------------------------------------------------------------
-                # Take the indices of the structure that are conected through the symmetry plane. 
-                # 1. Take the unique indices in the x direction
-                # 2. Create a vector of increasing indices with the same length as previous one
-                # 3. Check if some of the indices mismatch
-                # 4. Take the indices of the nodes that mismatch
-                #     - x_uni     : vector of the unique indices of the nodes of the structure
-                #     - com_cross : comparison of x_uni with a vector of increasing indices
-                #     - ind_sym   : index of the positions of x_uni that are located on the other side of the symmetry
-                # -------------------------------------------------------------------------------------------------------
-                x_uni     = np.unique(x_sort)
-                com_cross = x_uni==np.arange(len(x_uni))
-                ind_sym   = np.where(com_cross==0)[0] 
-                
-                # -------------------------------------------------------------------------------------------------------
-                # Check if the structure is crossing the symmetry plane and divided
-                # -------------------------------------------------------------------------------------------------------
-                if not len(ind_sym) == 0:
-                    
-                    # ---------------------------------------------------------------------------------------------------
-                    # Calculate the size of the structure in the streamwise direction
-                    # The minimum value is the minimum of the last part of structure and the maximum is the 
-                    # maximum of the first structure.
-                    #     - xmin_sym : minimum index of the part of the structure which is on the other side of the
-                    #                  symmetry
-                    #     - xmax_sym : maximum index of the structure once it has crossed the symmetry
-                    #     - dx_sym   : size in number of nodes of the structure crossing the symmetry in the x direction
-                    #     - dim_x    : size of the structructure crossing the symmetry in the x direction
-                    # ---------------------------------------------------------------------------------------------------
-                    xmin     = x_uni[ind_sym[0]]
-                    xmax     = self.shpx+x_uni[ind_sym[0]-1]
-                    dx_sym   = xmax-xmin
-                    dim_x    = self.grid_dx_plus*dx_sym
-                    
-                    # ---------------------------------------------------------------------------------------------------
-                    # Move the indices of the first part of the structure to the other side of the symmetry
-                    #     - x_sort_sym  : indices of the structure once all the nodes have been moved along the 
-                    #                     symmetry
-                    #     - index_first : indices of the sorted nodes that are located in the first part of the 
-                    #                     structure
-                    # ---------------------------------------------------------------------------------------------------
-                    x_sort_sym              = x_sort.copy()
-                    index_first             = x_sort_sym<=x_uni[ind_sym[0]-1]
-                    x_sort_sym[index_first] = x_sort_sym[index_first]+self.shpx
-                    
-                    # ---------------------------------------------------------------------------------------------------
-                    # Calculate the center of gravity of the box of the structure in the streamwise direction with the 
-                    # nodes that have been converted
-                    # ---------------------------------------------------------------------------------------------------
-                    self.cg_xbox[nn] = np.mod(np.floor(np.mean(x_sort_sym)),self.shpx)
-                    
-                    # ---------------------------------------------------------------------------------------------------
-                    # Take the indices of the nodes contained in the structure in the x dimensions
-                    #     - xind_nodes        : nodes of the structure transformed along the symmetry
-                    #     - index_nodes_first : indices of the nodes belonging to the first part of the structure
-                    # ---------------------------------------------------------------------------------------------------
-                    xind_nodes                    = struc_points[2,:].copy()
-                    index_nodes_first             = xind_nodes<=x_uni[ind_sym[0]-1]
-                    xind_nodes[index_nodes_first] = xind_nodes[index_nodes_first]+self.shpx
-                    
-                    # ---------------------------------------------------------------------------------------------------
-                    # Calculate the center of gravity of the structure.
-                    # If the center of gravity of the structure is outside the channel move it inside
-                    #     - nn2 : index of the node contained in the structure
-                    #     - nn  : index of the structure
-                    # ---------------------------------------------------------------------------------------------------
-                    self.cg_x[nn] = 0
-                    for nn2 in np.arange(len(self.nodes[nn][0,:])):
-                        self.cg_x[nn] += self.grid_dx_plus*xind_nodes[nn2]*self.grid_vol_plus[struc_points[0,nn2],
-                                                                                              struc_points[1,nn2],
-                                                                                              struc_points[2,nn2]]
-                    self.cg_x[nn] /= self.vol[nn]
-                    if self.cg_x[nn] > self.grid_dx_plus*self.shpx:
-                        self.cg_x[nn] -= self.grid_dx_plus*self.shpx
-                        
-            # -----------------------------------------------------------------------------------------------------------
-            # If the structure is crossing the z plane
-            # -----------------------------------------------------------------------------------------------------------
-            if flag_z:
-                
-                # -------------------------------------------------------------------------------------------------------
-                # Take the indices of the structure that are conected through the symmetry plane. 
-                # 1. Take the unique indices in the z direction
-                # 2. Create a vector of increasing indices with the same length as previous one
-                # 3. Check if some of the indices mismatch
-                # 4. Take the indices of the nodes that mismatch
-                #     - z_uni     : vector of the unique indices of the nodes of the structure
-                #     - com_cross : comparison of z_uni with a vector of increasing indices
-                #     - ind_sym   : index of the positions of z_uni that are located on the other side of the symmetry
-                # -------------------------------------------------------------------------------------------------------
-                z_uni     = np.unique(z_sort)
-                com_cross = z_uni==np.arange(len(z_uni))
-                ind_sym   = np.where(com_cross==0)[0]  
-                
-                # -------------------------------------------------------------------------------------------------------
-                # Check if the structure is crossing the symmetry plane and divided
-                # -------------------------------------------------------------------------------------------------------
-                if not len(ind_sym) == 0:
-                    
-                    # ---------------------------------------------------------------------------------------------------
-                    # Calculate the size of the structure in the spanwise direction
-                    # The minimum value is the minimum of the last part of structure and the maximum is the 
-                    # maximum of the first structure.
-                    #     - zmin_sym : minimum index of the part of the structure which is on the other side of the
-                    #                  symmetry
-                    #     - zmax_sym : maximum index of the structure once it has crossed the symmetry
-                    #     - dz_sym   : size in number of nodes of the structure crossing the symmetry in the z direction
-                    #     - dim_z    : size of the structructure crossing the symmetry in the z direction
-                    # ---------------------------------------------------------------------------------------------------
-                    zmin     = z_uni[ind_sym[0]]
-                    zmax     = self.shpz+z_uni[ind_sym[0]-1]
-                    dz_sym   = zmax-zmin
-                    dim_z    = self.grid_dz_plus*dz_sym
-                    
-                    # ---------------------------------------------------------------------------------------------------
-                    # Move the indices of the first part of the structure to the other side of the symmetry
-                    #     - z_sort_sym  : indices of the structure once all the nodes have been moved along the
-                    #                     symmetry
-                    #     - index_first : indices of the sorted nodes that are located in the first part of the 
-                    #                     structure
-                    # ---------------------------------------------------------------------------------------------------
-                    z_sort_sym              = z_sort.copy()
-                    index_first             = z_sort_sym<=z_uni[ind_sym[0]-1]
-                    z_sort_sym[index_first] = z_sort_sym[index_first]+self.shpz
-                    
-                    # ---------------------------------------------------------------------------------------------------
-                    # Calculate the center of gravity of the box of the structure in the spanwise direction with the 
-                    # nodes that have been converted
-                    # ---------------------------------------------------------------------------------------------------
-                    self.cg_zbox[nn] = np.mod(np.floor(np.mean(z_sort_sym)),self.shpz)
-                    
-                    # ---------------------------------------------------------------------------------------------------
-                    # Take the indices of the nodes contained in the structure in the z dimensions
-                    #     - zind_nodes        : nodes of the structure transformed along the symmetry
-                    #     - index_nodes_first : indices of the nodes belonging to the first part of the structure
-                    # ---------------------------------------------------------------------------------------------------
-                    zind_nodes                    = struc_points[1,:].copy()
-                    index_nodes_first             = zind_nodes<=z_uni[ind_sym[0]-1]
-                    zind_nodes[index_nodes_first] = zind_nodes[index_nodes_first]+self.shpz
-                    
-                    # ---------------------------------------------------------------------------------------------------
-                    # Calculate the center of gravity of the structure.
-                    # If the center of gravity of the structure is outside the channel move it inside
-                    #     - nn2 : index of the node contained in the structure
-                    #     - nn  : index of the structure
-                    # ---------------------------------------------------------------------------------------------------
-                    self.cg_z[nn] = 0
-                    for nn2 in np.arange(len(self.nodes[nn][0,:])):
-                        self.cg_z[nn] += self.grid_dz_plus*zind_nodes[nn2]*self.grid_vol_plus[struc_points[0,nn2],
-                                                                                    struc_points[1,nn2],
-                                                                                    struc_points[2,nn2]]
-                    self.cg_z[nn] /= self.vol[nn]
-                    if self.cg_z[nn] > self.grid_dz_plus*self.shpz:
-                        self.cg_z[nn] -= self.grid_dz_plus*self.shpz
-                        
-            
-            # -----------------------------------------------------------------------------------------------------------
-            # Select the ymin, ymax and cg_y in the correct semichannel
-            # -----------------------------------------------------------------------------------------------------------
-            if cg_y <= 0:
-                self.ymin[nn]    = self.rey+ymin
-                self.ymax[nn]    = self.rey+ymax
-                self.cg_y[nn]    = self.rey+cg_y
-                self.inv_chn[nn] = False
-            else:
-                self.ymin[nn]    = self.rey-ymax
-                self.ymax[nn]    = self.rey-ymin
-                self.cg_y[nn]    = self.rey-cg_y
-                self.inv_chn[nn] = True
-            # -----------------------------------------------------------------------------------------------------------
-            # Store the dimensions of the structures and the volume of the box of each structure
-            # -----------------------------------------------------------------------------------------------------------
-            self.dim_x[nn]  = dim_x
-            self.dim_z[nn]  = dim_z
-            self.dim_y[nn]  = dim_y
-            self.boxvol[nn] = dim_y*dim_x*dim_z
+        # The nodes of each structure are contiguous, then the reductions are calculated for all the structures at
+        # once using the label of each node
+        #     - label_node   : index of the structure of each node
+        #     - struc_points : nodes of all the structures
+        #     - count_struc  : number of nodes of each structure
+        #     - offset_struc : position of the first node of each structure
+        #     - vol_node     : volume of each node
+        # ---------------------------------------------------------------------------------------------------------------
+        label_node   = self.label_node
+        struc_points = self.points
+        count_struc  = np.bincount(label_node,minlength=nstruc)
+        offset_struc = np.concatenate(([0],np.cumsum(count_struc)[:-1]))
+        vol_node     = self.grid_vol_plus[struc_points[0,:],struc_points[1,:],struc_points[2,:]]
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Calculate the volume, the extension in y and the center of gravity in y of the structures
+        #     - ymin  : minimum y position of the structure
+        #     - ymax  : maximum y position of the structure
+        #     - dim_y : dimension in y
+        #     - cg_y  : center of gravity in y
+        # ---------------------------------------------------------------------------------------------------------------
+        self.vol     = np.bincount(label_node,weights=vol_node,minlength=nstruc)
+        ymin         = self.y_h_plus[np.minimum.reduceat(struc_points[0,:],offset_struc)]
+        ymax         = self.y_h_plus[np.maximum.reduceat(struc_points[0,:],offset_struc)]
+        dim_y        = np.abs(ymax-ymin)
+        cg_y         = np.bincount(label_node,weights=self.y_h_plus[struc_points[0,:]]*vol_node,minlength=nstruc)
+        cg_y        /= self.vol
+        self.cg_ybox = np.floor(np.bincount(label_node,weights=struc_points[0,:],minlength=nstruc)/count_struc)
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Calculate the dimensions and the centers of gravity in the streamwise and the spanwise directions, taking
+        # into account the structures crossing the symmetry planes x and z
+        # ---------------------------------------------------------------------------------------------------------------
+        data_x       = self._periodic_properties(data_in={"coord":struc_points[2,:],"label_node":label_node,
+                                                          "count_struc":count_struc,"offset_struc":offset_struc,
+                                                          "vol_node":vol_node,"vol":self.vol,"shp":self.shpx,
+                                                          "grid_d":self.grid_dx_plus})
+        data_z       = self._periodic_properties(data_in={"coord":struc_points[1,:],"label_node":label_node,
+                                                          "count_struc":count_struc,"offset_struc":offset_struc,
+                                                          "vol_node":vol_node,"vol":self.vol,"shp":self.shpz,
+                                                          "grid_d":self.grid_dz_plus})
+        self.cg_x    = data_x["cg"]
+        self.cg_xbox = data_x["cg_box"]
+        self.cg_z    = data_z["cg"]
+        self.cg_zbox = data_z["cg_box"]
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Select the ymin, ymax and cg_y in the correct semichannel
+        # ---------------------------------------------------------------------------------------------------------------
+        self.inv_chn = cg_y > 0
+        self.ymin    = np.where(self.inv_chn,self.rey-ymax,self.rey+ymin)
+        self.ymax    = np.where(self.inv_chn,self.rey-ymin,self.rey+ymax)
+        self.cg_y    = np.where(self.inv_chn,self.rey-cg_y,self.rey+cg_y)
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Store the dimensions of the structures and the volume of the box of each structure
+        # ---------------------------------------------------------------------------------------------------------------
+        self.dim_x  = data_x["dim"]
+        self.dim_z  = data_z["dim"]
+        self.dim_y  = dim_y
+        self.boxvol = self.dim_y*self.dim_x*self.dim_z
+        
+    def _periodic_properties(self,data_in={"coord":[],"label_node":[],"count_struc":[],"offset_struc":[],
+                                           "vol_node":[],"vol":[],"shp":1,"grid_d":1}):
+        """
+        .................................................................................................................
+        # _periodic_properties
+        .................................................................................................................
+        Function to calculate the size and the centers of gravity of the structures in a periodic direction. If a
+        structure crosses the symmetry plane and is divided, the first part of the structure is moved to the other
+        side of the symmetry plane.
+
+        Parameters
+        ----------
+        data_in : dict, optional
+            Data of the nodes of the structures.
+            The default is {"coord":[],"label_node":[],"count_struc":[],"offset_struc":[],"vol_node":[],"vol":[],
+                            "shp":1,"grid_d":1}.
+            Data:
+                - coord        : index of the nodes in the periodic direction
+                - label_node   : index of the structure of each node
+                - count_struc  : number of nodes of each structure
+                - offset_struc : position of the first node of each structure
+                - vol_node     : volume of each node
+                - vol          : volume of each structure
+                - shp          : shape of the tensors in the periodic direction
+                - grid_d       : size of the mesh elements in the periodic direction
+
+        Returns
+        -------
+        dict
+            Properties of the structures in the periodic direction
+            Data:
+                - dim    : size of the structures
+                - cg     : position of the center of gravity
+                - cg_box : position of the center of gravity of the box
+
+        """
+        # ---------------------------------------------------------------------------------------------------------------
+        # Read the data
+        # ---------------------------------------------------------------------------------------------------------------
+        coord        = np.array(data_in["coord"],dtype="int")
+        label_node   = np.array(data_in["label_node"],dtype="int")
+        count_struc  = np.array(data_in["count_struc"],dtype="int")
+        offset_struc = np.array(data_in["offset_struc"],dtype="int")
+        vol_node     = np.array(data_in["vol_node"],dtype="float")
+        vol          = np.array(data_in["vol"],dtype="float")
+        shp          = int(data_in["shp"])
+        grid_d       = float(data_in["grid_d"])
+        nstruc       = len(count_struc)
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Check if the structure is crossing the symmetry plane and divided
+        #     - occupied : matrix defining the planes occupied by each structure
+        #     - flag_sym : flag which determines if a structure is crossing the symmetry plane and divided, it uses 
+        #                  the first and the last planes but not all of them
+        #     - last_sym : last plane of the first part of the structure (the part which is connected to the plane 0)
+        # ---------------------------------------------------------------------------------------------------------------
+        occupied                   = np.zeros((nstruc,shp),dtype="bool")
+        occupied[label_node,coord] = True
+        flag_sym                   = occupied[:,0] & occupied[:,-1] & ~np.all(occupied,axis=1)
+        last_sym                   = np.where(flag_sym,np.argmin(occupied,axis=1)-1,-1)
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Move the indices of the first part of the structures to the other side of the symmetry
+        #     - coord_sym : indices of the nodes once all the nodes have been moved along the symmetry
+        # ---------------------------------------------------------------------------------------------------------------
+        coord_sym = coord.copy()
+        coord_sym[coord<=last_sym[label_node]] += shp
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Calculate the size of the structure, the center of gravity of the box and the center of gravity.
+        # If the center of gravity of the structure is outside the channel move it inside
+        # ---------------------------------------------------------------------------------------------------------------
+        dim        = grid_d*(np.maximum.reduceat(coord_sym,offset_struc)-np.minimum.reduceat(coord_sym,offset_struc))
+        cg_box     = np.mod(np.floor(np.bincount(label_node,weights=coord_sym,minlength=nstruc)/count_struc),shp)
+        cg         = np.bincount(label_node,weights=grid_d*coord_sym*vol_node,minlength=nstruc)/vol
+        cg_out     = flag_sym & (cg > grid_d*shp)
+        cg[cg_out] = cg[cg_out]-grid_d*shp
+        data_out   = {"dim":dim,"cg":cg,"cg_box":cg_box}
+        return data_out
                                 
     def detect_quadrant(self):
         """
@@ -586,77 +414,43 @@ class structures():
 
         """
         # ---------------------------------------------------------------------------------------------------------------
-        # Define the matrix of the events and the event of every structure
-        #     - mat_event : matrix of the events of each nodes
-        #     - event     : event of each structure
+        # Get the value of the fields in the dimensions 1 and 2 of the nodes of all the structures. If the quadrants
+        # are symmetric the second dimension is inverted for the structures of the upper semichannel
+        #     - struc_points : indices of the nodes of the structures
+        #     - field_1      : value of the dimension 1 of the field in the nodes
+        #     - field_2      : value of the dimension 2 of the field in the nodes
+        # ---------------------------------------------------------------------------------------------------------------
+        nstruc       = len(self.nodes)
+        struc_points = self.points
+        field_1      = self.field_1[struc_points[0,:],struc_points[1,:],struc_points[2,:]]
+        field_2      = self.field_2[struc_points[0,:],struc_points[1,:],struc_points[2,:]]
+        if self.sym_quad:
+            field_2 = np.where(self.inv_chn[self.label_node],-field_2,field_2)
+        
         # ---------------------------------------------------------------------------------------------------------------
-        self.mat_event = np.zeros((self.shpy,self.shpz,self.shpx))
-        self.event     = np.zeros((len(self.nodes),))
+        # Calculate the volume of the nodes and add it to the quadrant of each structure
+        #     - vol_nod  : volume of each node
+        #     - quadrant : quadrant of each node (-1 if any of the fields is zero)
+        #     - voltot   : total volume occupied by each quadrant in a structure
+        # ---------------------------------------------------------------------------------------------------------------
+        vol_nod  = np.sqrt(field_1**2+field_2**2)*self.grid_vol_plus[struc_points[0,:],
+                                                                     struc_points[1,:],
+                                                                     struc_points[2,:]]
+        quadrant = np.select([(field_1>0)&(field_2>0),(field_1<0)&(field_2>0),(field_1<0)&(field_2<0),
+                              (field_1>0)&(field_2<0)],[0,1,2,3],default=-1)
+        in_quad  = quadrant >= 0
+        voltot   = np.bincount(4*self.label_node[in_quad]+quadrant[in_quad],weights=vol_nod[in_quad],
+                               minlength=4*nstruc).reshape(nstruc,4)
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Evaluate the characteristics for each structure
-        #     - struc_points : indices of the nodes of a structure
-        #     - voltot       : total volume occupied by each quadrant in a structure
-        #     - nn           : index of the structure
+        # Choose the event with the higher associated volume and generate the matrix associating each node with its
+        # event using the labels of the structures
+        #     - event_label : event of each label (0 for the nodes without structure)
         # ---------------------------------------------------------------------------------------------------------------
-        for nn  in np.arange(len(self.nodes)):
-            struc_points = self.nodes[nn]
-            voltot       = np.zeros((4,))
-            
-            # -----------------------------------------------------------------------------------------------------------
-            # Evaluate each node of the structure
-            #     - nn_node : index of the node
-            # -----------------------------------------------------------------------------------------------------------
-            for nn_node in np.arange(len(struc_points[0,:])):
-                
-                # -------------------------------------------------------------------------------------------------------
-                # Get the value of the fields in the dimensions 1 and 2 of the node
-                #     - field_1 : value of the dimension 1 of the field in the node
-                #     - field_2 : value of the dimension 2 of the field in the node
-                # -------------------------------------------------------------------------------------------------------
-                field_1 = self.field_1[struc_points[0,nn_node],struc_points[1,nn_node],struc_points[2,nn_node]]
-                if self.sym_quad:
-                    if self.inv_chn[nn]:
-                        field_2 = -self.field_2[struc_points[0,nn_node],struc_points[1,nn_node],struc_points[2,nn_node]]
-                    else:
-                        field_2 = self.field_2[struc_points[0,nn_node],struc_points[1,nn_node],struc_points[2,nn_node]]
-                else:
-                    field_2 = self.field_2[struc_points[0,nn_node],struc_points[1,nn_node],struc_points[2,nn_node]]
-                
-                # -------------------------------------------------------------------------------------------------------
-                # Calculate the volume of the node and add it to the corresponding index of the voltot vector
-                # -------------------------------------------------------------------------------------------------------
-                vol_nod = np.sqrt(field_1**2+field_2**2)*self.grid_vol_plus[struc_points[0,nn_node],
-                                                                            struc_points[1,nn_node],
-                                                                            struc_points[2,nn_node]]
-                if field_1 > 0 and field_2 > 0:
-                    voltot[0] += vol_nod
-                elif field_1 < 0 and field_2 > 0:
-                    voltot[1] += vol_nod
-                elif field_1 < 0 and field_2 < 0:
-                    voltot[2] += vol_nod
-                elif field_1 > 0 and field_2 < 0:
-                    voltot[3] += vol_nod
-            
-            # -----------------------------------------------------------------------------------------------------------
-            # Choose the event with the higher associated volume
-            # -----------------------------------------------------------------------------------------------------------
-            max_event = np.argmax(voltot)
-            if max_event == 0:
-                self.event[nn] = 1
-            elif max_event == 1:
-                self.event[nn] = 2
-            elif max_event == 2:
-                self.event[nn] = 3
-            elif max_event == 3:
-                self.event[nn] = 4
-                
-            # -----------------------------------------------------------------------------------------------------------
-            # Generate the matrix associating each node with its event
-            #     - nn_node : index of the node
-            # -----------------------------------------------------------------------------------------------------------
-            for nn_node in np.arange(len(struc_points[0,:])):
-                self.mat_event[struc_points[0,nn_node],struc_points[1,nn_node],struc_points[2,nn_node]] = self.event[nn]
+        self.event      = np.array(np.argmax(voltot,axis=1)+1,dtype="float")
+        event_label     = np.zeros((nstruc+1,))
+        event_label[1:] = self.event
+        self.mat_event  = event_label[self.mat_label]
                                                
     def segmentation(self):
         """
@@ -671,43 +465,24 @@ class structures():
 
         """        
         # ---------------------------------------------------------------------------------------------------------------
-        # Define the segmentation of the domain with and without filtering the structures
-        # ---------------------------------------------------------------------------------------------------------------
-        self.mat_segment          = np.zeros((self.shpy,self.shpz,self.shpx))
-        self.mat_segment_filtered = np.zeros((self.shpy,self.shpz,self.shpx))
+        # Define the segmentation of the domain with and without filtering the structures. The structures smaller than
+        # the filter volume are removed and the rest are renumbered with a lookup table
+        #     - nstruc         : number of structures
+        #     - flag_filter    : flag for the structures larger than the filter volume
+        #     - filtered_label : index of each structure after filtering the small ones (0 if filtered)
+        # ---------------------------------------------------------------------------------------------------------------
+        nstruc                    = len(self.nodes)
+        flag_filter               = self.vol > self.filvol
+        filtered_label            = np.zeros((nstruc+1,))
+        filtered_label[1:]        = np.cumsum(flag_filter)*flag_filter
+        self.mat_segment          = np.array(self.mat_label,dtype="float")
+        self.mat_segment_filtered = filtered_label[self.mat_label]
         
         # ---------------------------------------------------------------------------------------------------------------
-        # Evaluate for all the structures
-        #     - point_struc : grid points of each structure
-        #     - nn          : index of the structure
-        #     - nn_node     : index of the point of the structure
-        #     - nn2         : index of the structure after filtering the small ones
-        #     - nn3         : index of the structures that have been filtered
-        # ---------------------------------------------------------------------------------------------------------------
-        nn2 = 0
-        nn3 = 0  
-        if len(self.nodes) > 0:
-            for nn  in np.arange(len(self.nodes)):
-                point_struc = self.nodes[nn]
-                for nn_node in np.arange(len(point_struc[0,:])):
-                    self.mat_segment[point_struc[0,nn_node],point_struc[1,nn_node],point_struc[2,nn_node]] = nn+1
-                    if self.vol[nn] > self.filvol:
-                        self.mat_segment_filtered[point_struc[0,nn_node],
-                                                  point_struc[1,nn_node],
-                                                  point_struc[2,nn_node]] = nn2+1
-                        
-                # -----------------------------------------------------------------------------------------------------------
-                # Advance the index of larger and smaller structures depending on the structure
-                # -----------------------------------------------------------------------------------------------------------
-                if self.vol[nn] > self.filvol:
-                    nn2 += 1
-                else:
-                    nn3 += 1
-                
-            # ---------------------------------------------------------------------------------------------------------------
-            # Define the percentage of filtered structures
-            # ---------------------------------------------------------------------------------------------------------------
-            self.filtstr_sum = nn3/(nn2+nn3)
+        # Define the percentage of filtered structures
+        # ---------------------------------------------------------------------------------------------------------------
+        if nstruc > 0:
+            self.filtstr_sum = np.count_nonzero(~flag_filter)/nstruc
         else:
             self.filtstr_sum = 0
         print('Percentage of filtered structures: '+str(self.filtstr_sum*100)+'%',flush=True)
@@ -725,21 +500,22 @@ class structures():
 
         """    
         # ---------------------------------------------------------------------------------------------------------------
-        # For every structure sum all products of the fields 1 and 2 of the nodes of the structure
-        #     - nn       : index of the structure
-        #     - nodes_nn : indices of the nodes of the structure nn
-        #     - u1u2     : product of the fields 1 and 2 in each structure
-        #     - absu1u2  : absolute value of the product of the fields 1 and 2
-        #     - u1u2tot  : total value of the product of the fields 1 and 2 in all the nodes
-        # ---------------------------------------------------------------------------------------------------------------
-        max_struc = int(np.max(self.mat_segment))
-        self.u1u2 = np.zeros((max_struc,))
-        absu1u2   = np.abs(np.multiply(self.field_1,self.field_2))
-        u1u2tot   = np.sum(absu1u2)
-        for nn  in np.arange(max_struc-1):
-            nodes_nn = np.where(self.mat_segment==nn+1)
-            for ii in np.arange(len(nodes_nn[0])):
-                self.u1u2[nn] += absu1u2[nodes_nn[0][ii],nodes_nn[1][ii],nodes_nn[2][ii]]/u1u2tot
+        # For every structure sum all products of the fields 1 and 2 of the nodes of the structure. The sum is 
+        # evaluated up to the structure max_struc-1
+        #     - max_struc  : number of structures of the segmentation
+        #     - flag_label : nodes of the evaluated structures
+        #     - u1u2       : product of the fields 1 and 2 in each structure
+        #     - absu1u2    : absolute value of the product of the fields 1 and 2
+        #     - u1u2tot    : total value of the product of the fields 1 and 2 in all the nodes
+        # ---------------------------------------------------------------------------------------------------------------
+        max_struc    = int(np.max(self.mat_segment))
+        absu1u2      = np.abs(np.multiply(self.field_1,self.field_2))
+        u1u2tot      = np.sum(absu1u2)
+        flag_label   = self.label_node < max_struc-1
+        struc_points = self.points[:,flag_label]
+        self.u1u2    = np.bincount(self.label_node[flag_label],
+                                   weights=absu1u2[struc_points[0,:],struc_points[1,:],struc_points[2,:]]/u1u2tot,
+                                   minlength=max_struc)
                 
                                         
     def structure_k123(self):
@@ -755,18 +531,48 @@ class structures():
 
         """    
         # ---------------------------------------------------------------------------------------------------------------
-        # For every structure sum all products of the fields 1, 2 and 3 of the nodes of the structure
-        #     - nn       : index of the structure
-        #     - nodes_nn : indices of the nodes of the structure nn
-        #     - k123     : product energy of the fields 1, 2 and 3 in each structure
-        #     - k123_tot : total value of the energy of the fields 1, 2 and 3 in all the nodes
-        # ---------------------------------------------------------------------------------------------------------------
-        max_struc = int(np.max(self.mat_segment))
-        self.k123 = np.zeros((max_struc,))
-        k123      = np.sqrt(self.field_1**2+self.field_2**2+self.field_3**2)
-        k123_tot  = np.sum(k123)
-        for nn  in np.arange(max_struc-1):
-            nodes_nn = np.where(self.mat_segment==nn+1)
-            for ii in np.arange(len(nodes_nn[0])):
-                self.k123[nn] += k123[nodes_nn[0][ii],nodes_nn[1][ii],nodes_nn[2][ii]]/k123_tot
+        # For every structure sum all products of the fields 1, 2 and 3 of the nodes of the structure. The sum is 
+        # evaluated up to the structure max_struc-1
+        #     - max_struc  : number of structures of the segmentation
+        #     - flag_label : nodes of the evaluated structures
+        #     - k123       : product energy of the fields 1, 2 and 3 in each structure
+        #     - k123_tot   : total value of the energy of the fields 1, 2 and 3 in all the nodes
+        # ---------------------------------------------------------------------------------------------------------------
+        max_struc    = int(np.max(self.mat_segment))
+        k123         = np.sqrt(self.field_1**2+self.field_2**2+self.field_3**2)
+        k123_tot     = np.sum(k123)
+        flag_label   = self.label_node < max_struc-1
+        struc_points = self.points[:,flag_label]
+        self.k123    = np.bincount(self.label_node[flag_label],
+                                   weights=k123[struc_points[0,:],struc_points[1,:],struc_points[2,:]]/k123_tot,
+                                   minlength=max_struc)
+        
+    def classify_structures(self,data_in={"flag_quadrant":True}):
+        """
+        .................................................................................................................
+        # classify_structures
+        .................................................................................................................
+        Function to calculate, after the physical properties, the quadrant of the structures, the segmentation and the
+        fractions of the product and the energy of the fields. All the calculations are grouped reductions over the
+        labels of the nodes.
+
+        Parameters
+        ----------
+        data_in : dict, optional
+            Data for the classification of the structures.
+            The default is {"flag_quadrant":True}.
+            Data:
+                - flag_quadrant : flag to calculate the quadrant of the structures
+
+        Returns
+        -------
+        None.
+
+        """
+        flag_quadrant = bool(data_in["flag_quadrant"])
+        if flag_quadrant:
+            self.detect_quadrant()
+        self.segmentation()
+        self.structure_u1u2()
+        self.structure_k123()
             
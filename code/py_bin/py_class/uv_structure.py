@@ -31,6 +31,7 @@ class uv_structure():
     # uv_structure: Class of the Reynolds stress coherent structures.
         * Functions:
             - __init__ : initialization function
+            - calculate_intensity: calculate the intensity of the field and its reference for the percolation
             - calculate_matstruc : calculate the matrix containing the nodes included in the transverse Reynolds stress
                                    structures.
             - segment_struc      : calculates the segmentation of the domain based on the transverse Reynolds stress
@@ -196,16 +197,21 @@ class uv_structure():
             self.field_v   = np.zeros((self.shpy,self.shpz,self.shpx))
             self.field_w   = np.zeros((self.shpy,self.shpz,self.shpx))
         
-    def calculate_matstruc(self):
-        """        
+    def calculate_intensity(self):
+        """
         .................................................................................................................
-        # calculate_matstruc
+        # calculate_intensity
         .................................................................................................................
-        Function to calculate the matrix of the nodes belonging a structure
+        Function to calculate the intensity of the field and the reference intensity of the percolation. The nodes
+        with an intensity larger than the percolation index times the reference belong to a structure
 
         Returns
         -------
-        None.
+        dict
+            Intensity of the field
+            Data:
+                - field     : absolute value of the product of the velocity fluctuations
+                - field_rms : product of the RMS velocities
 
         """
         # ---------------------------------------------------------------------------------------------------------------
@@ -221,12 +227,30 @@ class uv_structure():
         
         # ---------------------------------------------------------------------------------------------------------------
         # Calculate the product of the velocty fluctuation and the product of the RMS velocity.
-        # Then obtain the matrix containing the points belonging to the structures
         # ---------------------------------------------------------------------------------------------------------------
-        uv_xyz         = abs(np.multiply(self.field_u,self.field_v))
-        uv_rms         = np.multiply(data_urms["uurms"],data_urms["vvrms"]).reshape(-1,1,1)
-        self.mat_struc = np.array(np.heaviside(uv_xyz-self.Hperc*uv_rms,0),dtype='bool')
-    
+        uv_xyz   = abs(np.multiply(self.field_u,self.field_v))
+        uv_rms   = np.multiply(data_urms["uurms"],data_urms["vvrms"]).reshape(-1,1,1)
+        data_out = {"field":uv_xyz,"field_rms":uv_rms}
+        return data_out
+
+    def calculate_matstruc(self):
+        """
+        .................................................................................................................
+        # calculate_matstruc
+        .................................................................................................................
+        Function to calculate the matrix of the nodes belonging a structure
+
+        Returns
+        -------
+        None.
+
+        """
+        # ---------------------------------------------------------------------------------------------------------------
+        # Obtain the matrix containing the points belonging to the structures
+        # ---------------------------------------------------------------------------------------------------------------
+        data_int       = self.calculate_intensity()
+        self.mat_struc = np.array(np.heaviside(data_int["field"]-self.Hperc*data_int["field_rms"],0),dtype='bool')
+
     def segment_struc(self):
         """       
         .................................................................................................................
@@ -256,10 +280,7 @@ class uv_structure():
         self.structures = structures(data_in=data_struc)
         self.structures.separate_structures()
         self.structures.physicalproperties_structures()
-        self.structures.detect_quadrant()
-        self.structures.segmentation()
-        self.structures.structure_u1u2()
-        self.structures.structure_k123()
+        self.structures.classify_structures(data_in={"flag_quadrant":True})
     
     def save_struc(self):
         """
@@ -697,19 +718,40 @@ class uv_structure():
         self.save_struc()
         
     def detect_quadrant(self):
-        max_struc  = np.max(self.structures.mat_segment)
-        self.event = np.zeros(max_struc)
-        for index_struc in np.arange(max_struc):
-            grid_struc  = self.structures.mat_segment==index_struc+1
-            struc_signu = np.sum(np.multiply(np.sign(self.field_u[grid_struc]),self.mesh_vol[grid_struc]))
-            struc_signv = np.sum(np.multiply(np.sign(self.field_v[grid_struc]),self.mesh_vol[grid_struc]))
-            if struc_signu >= 0 and struc_signv >= 0:
-                type_struc = 1
-            elif struc_signu <= 0 and struc_signv >= 0:
-                type_struc = 2
-            elif struc_signu <= 0 and struc_signv <= 0:
-                type_struc = 3
-            elif struc_signu >= 0 and struc_signv <= 0:
-                type_struc = 4
-            self.event[index_struc] = type_struc
+        """
+        .................................................................................................................
+        # detect_quadrant
+        .................................................................................................................
+        Function to calculate the quadrant of each structure using the sign of the velocities weighted with the volume
+        of the nodes
+
+        Returns
+        -------
+        None.
+
+        """
+        # ---------------------------------------------------------------------------------------------------------------
+        # Sum the signs of the velocities of the nodes of each structure using the labels of the segmentation
+        #     - max_struc   : number of structures
+        #     - label_node  : index of the structure of each node of the domain (-1 if not contained)
+        #     - flag_struc  : nodes contained in a structure
+        #     - struc_signu : volume weighted sign of the streamwise velocity of each structure
+        #     - struc_signv : volume weighted sign of the wall-normal velocity of each structure
+        # ---------------------------------------------------------------------------------------------------------------
+        max_struc   = int(np.max(self.structures.mat_segment))
+        label_node  = np.array(self.structures.mat_segment,dtype="int").reshape(-1)-1
+        flag_struc  = label_node >= 0
+        struc_signu = np.bincount(label_node[flag_struc],
+                                  weights=np.multiply(np.sign(self.field_u),self.mesh_vol).reshape(-1)[flag_struc],
+                                  minlength=max_struc)
+        struc_signv = np.bincount(label_node[flag_struc],
+                                  weights=np.multiply(np.sign(self.field_v),self.mesh_vol).reshape(-1)[flag_struc],
+                                  minlength=max_struc)
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Select the type of the structure
+        # ---------------------------------------------------------------------------------------------------------------
+        self.event = np.select([(struc_signu>=0)&(struc_signv>=0),(struc_signu<=0)&(struc_signv>=0),
+                                (struc_signu<=0)&(struc_signv<=0),(struc_signu>=0)&(struc_signv<=0)],
+                               [1,2,3,4]).astype("float")
         
\ No newline at end of file
@@ -0,0 +1,611 @@
+# -*- coding: utf-8 -*-
+"""
+-------------------------------------------------------------------------------------------------------------------------
+flow_statistics.py
+-------------------------------------------------------------------------------------------------------------------------
+Created on Fri Oct 16 09:12:40 2026
+
+@author: Andres Cremades Botella
+
+File to calculate the statistics of the flow fields (mean, rms and normalization) in a single pass of the fields. The
+statistics are accumulated in the wall-normal planes using the mergeable algorithm of Welford and Chan: each field is
+reduced to the mean and the centered moments of its planes and the partial statistics are combined correcting the
+moments with the difference of the means. The partial statistics of different groups of fields can be merged in any
+order. The extremes of the uv and uw stresses depend on the final mean velocity, they are calculated in a second pass
+of the fields. The file contains the following functions:
+    Functions:
+        - snapshot_statistics : function to calculate the partial statistics of a velocity field
+        - field_statistics    : function to read a velocity field and calculate its partial statistics
+        - merge_statistics    : function to merge two partial statistics
+        - snapshot_extremes   : function to calculate the extremes of the uv and uw stresses of a velocity field
+        - field_extremes      : function to read a velocity field and calculate the extremes of its uv and uw stresses
+        - finalize_statistics : function to calculate the mean, rms and normalization from the partial statistics
+        - calc_statistics     : function to calculate the statistics of a range of fields
+"""
+
+# -----------------------------------------------------------------------------------------------------------------------
+# Import packages for all the functions
+# -----------------------------------------------------------------------------------------------------------------------
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+# Define the functions
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+
+def snapshot_statistics(data_in={"UU":[],"VV":[],"WW":[],"dx":1,"dy":1,"dz":1}):
+    """
+    .....................................................................................................................
+    # snapshot_statistics: Function to calculate the partial statistics of a velocity field. The mean velocity is
+                           calculated in the complete field, the rest of statistics in the downsampled field.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the velocity field.
+        The default is {"UU":[],"VV":[],"WW":[],"dx":1,"dy":1,"dz":1}.
+        Data:
+            - UU : streamwise velocity
+            - VV : wall-normal velocity
+            - WW : spanwise velocity
+            - dx : downsampling in x
+            - dy : downsampling in y
+            - dz : downsampling in z
+
+    Returns
+    -------
+    dict
+        Partial statistics of the field, all of them are functions of the wall-normal distance.
+        Data:
+            - nn_full     : number of gridpoints of the planes of the complete field
+            - mean_u_full : mean streamwise velocity of the planes of the complete field
+            - mean_v_full : mean wall-normal velocity of the planes of the complete field
+            - mean_w_full : mean spanwise velocity of the planes of the complete field
+            - nn          : number of gridpoints of the downsampled planes
+            - mean_u      : mean streamwise velocity of the downsampled planes
+            - mean_v      : mean wall-normal velocity of the downsampled planes
+            - mean_w      : mean spanwise velocity of the downsampled planes
+            - m2_u        : sum of the squared deviation of the streamwise velocity from its mean
+            - m2_v        : sum of the squared deviation of the wall-normal velocity from its mean
+            - m2_w        : sum of the squared deviation of the spanwise velocity from its mean
+            - c_uv        : sum of the product of the deviations of the streamwise and wall-normal velocities
+            - c_vw        : sum of the product of the deviations of the wall-normal and spanwise velocities
+            - c_uw        : sum of the product of the deviations of the streamwise and spanwise velocities
+            - s1_uv       : sum of the deviation of the streamwise velocity multiplied by the squared wall-normal
+                            velocity
+            - s2_uv       : sum of the squared deviation of the streamwise velocity multiplied by the squared
+                            wall-normal velocity
+            - s1_uw       : sum of the deviation of the streamwise velocity multiplied by the squared spanwise
+                            velocity
+            - s2_uw       : sum of the squared deviation of the streamwise velocity multiplied by the squared spanwise
+                            velocity
+            - s_vw2       : sum of the squared vw stress
+            - max_u       : maximum streamwise velocity
+            - min_u       : minimum streamwise velocity
+            - max_v       : maximum wall-normal velocity
+            - min_v       : minimum wall-normal velocity
+            - max_w       : maximum spanwise velocity
+            - min_w       : minimum spanwise velocity
+            - max_vw      : maximum vw stress
+            - min_vw      : minimum vw stress
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    UU = np.array(data_in["UU"],dtype="float") # streamwise velocity
+    VV = np.array(data_in["VV"],dtype="float") # wall-normal velocity
+    WW = np.array(data_in["WW"],dtype="float") # spanwise velocity
+    dx = int(data_in["dx"])                    # downsampling in x
+    dy = int(data_in["dy"])                    # downsampling in y
+    dz = int(data_in["dz"])                    # downsampling in z
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Calculate the mean velocity of the complete field
+    # -------------------------------------------------------------------------------------------------------------------
+    nn_full     = np.ones((UU.shape[0],))*UU.shape[1]*UU.shape[2]
+    mean_u_full = np.mean(UU,axis=(1,2))
+    mean_v_full = np.mean(VV,axis=(1,2))
+    mean_w_full = np.mean(WW,axis=(1,2))
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Calculate the centered moments of the downsampled field
+    #   - uu,vv,ww : downsampled velocity
+    #   - xu,xv,xw : deviation of the velocity from the mean of the plane
+    # -------------------------------------------------------------------------------------------------------------------
+    uu     = UU[::dy,::dz,::dx]
+    vv     = VV[::dy,::dz,::dx]
+    ww     = WW[::dy,::dz,::dx]
+    nn     = np.ones((uu.shape[0],))*uu.shape[1]*uu.shape[2]
+    mean_u = np.mean(uu,axis=(1,2))
+    mean_v = np.mean(vv,axis=(1,2))
+    mean_w = np.mean(ww,axis=(1,2))
+    xu     = uu-mean_u.reshape(-1,1,1)
+    xv     = vv-mean_v.reshape(-1,1,1)
+    xw     = ww-mean_w.reshape(-1,1,1)
+    vv2    = np.multiply(vv,vv)
+    ww2    = np.multiply(ww,ww)
+    vw     = np.multiply(vv,ww)
+    data_out = {"nn_full":nn_full,"mean_u_full":mean_u_full,"mean_v_full":mean_v_full,"mean_w_full":mean_w_full,
+                "nn":nn,"mean_u":mean_u,"mean_v":mean_v,"mean_w":mean_w,
+                "m2_u":np.sum(np.multiply(xu,xu),axis=(1,2)),"m2_v":np.sum(np.multiply(xv,xv),axis=(1,2)),
+                "m2_w":np.sum(np.multiply(xw,xw),axis=(1,2)),"c_uv":np.sum(np.multiply(xu,xv),axis=(1,2)),
+                "c_vw":np.sum(np.multiply(xv,xw),axis=(1,2)),"c_uw":np.sum(np.multiply(xu,xw),axis=(1,2)),
+                "s1_uv":np.sum(np.multiply(xu,vv2),axis=(1,2)),"s2_uv":np.sum(np.multiply(xu*xu,vv2),axis=(1,2)),
+                "s1_uw":np.sum(np.multiply(xu,ww2),axis=(1,2)),"s2_uw":np.sum(np.multiply(xu*xu,ww2),axis=(1,2)),
+                "s_vw2":np.sum(np.multiply(vw,vw),axis=(1,2)),
+                "max_u":np.max(uu,axis=(1,2)),"min_u":np.min(uu,axis=(1,2)),
+                "max_v":np.max(vv,axis=(1,2)),"min_v":np.min(vv,axis=(1,2)),
+                "max_w":np.max(ww,axis=(1,2)),"min_w":np.min(ww,axis=(1,2)),
+                "max_vw":np.max(vw,axis=(1,2)),"min_vw":np.min(vw,axis=(1,2))}
+    return data_out
+
+
+def field_statistics(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,
+                               "dx":1,"dy":1,"dz":1}):
+    """
+    .....................................................................................................................
+    # field_statistics: Function to read a velocity field and calculate its partial statistics
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the field.
+        The default is {"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,
+                        "dx":1,"dy":1,"dz":1}.
+        Data:
+            - folder : folder of the velocity data
+            - file   : file of the velocity data
+            - index  : index of the field
+            - dx     : downsampling in x
+            - dy     : downsampling in y
+            - dz     : downsampling in z
+
+    Returns
+    -------
+    dict
+        Partial statistics of the field, the keys are the ones of the function snapshot_statistics.
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Import packages
+    # -------------------------------------------------------------------------------------------------------------------
+    import h5py
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the field and calculate the statistics
+    # -------------------------------------------------------------------------------------------------------------------
+    file_ii  = (str(data_in["folder"])+'/'+str(data_in["file"])).replace("$INDEX$",str(int(data_in["index"])))
+    print('Statistics calculation:'+str(file_ii),flush=True)
+    file_r   = h5py.File(file_ii,'r')
+    data_out = snapshot_statistics(data_in={"UU":np.array(file_r['u']),"VV":np.array(file_r['v']),
+                                            "WW":np.array(file_r['w']),"dx":data_in["dx"],"dy":data_in["dy"],
+                                            "dz":data_in["dz"]})
+    file_r.close()
+    return data_out
+
+
+def merge_statistics(data_in={"partial_1":None,"partial_2":None}):
+    """
+    .....................................................................................................................
+    # merge_statistics: Function to merge two partial statistics. The centered moments of each partial statistics are
+                        moved to the mean of the merged statistics before adding them.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the partial statistics.
+        The default is {"partial_1":None,"partial_2":None}.
+        Data:
+            - partial_1 : first partial statistics (None if empty)
+            - partial_2 : second partial statistics (None if empty)
+
+    Returns
+    -------
+    dict
+        Merged statistics, the keys are the ones of the function snapshot_statistics.
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    stats_1 = data_in["partial_1"] # first partial statistics
+    stats_2 = data_in["partial_2"] # second partial statistics
+    if stats_1 is None:
+        return stats_2
+    if stats_2 is None:
+        return stats_1
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Merge the mean velocity of the complete field
+    # -------------------------------------------------------------------------------------------------------------------
+    nn_1     = stats_1["nn_full"]
+    nn_2     = stats_2["nn_full"]
+    nn_full  = nn_1+nn_2
+    data_out = {"nn_full":nn_full}
+    for key in ["mean_u_full","mean_v_full","mean_w_full"]:
+        data_out[key] = stats_1[key]+(stats_2[key]-stats_1[key])*nn_2/nn_full
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Merge the moments of the downsampled field
+    #   - delta_* : difference between the mean of the second and the first statistics
+    #   - fact_nn : weight of the correction of the centered moments
+    # -------------------------------------------------------------------------------------------------------------------
+    nn_1    = stats_1["nn"]
+    nn_2    = stats_2["nn"]
+    nn      = nn_1+nn_2
+    fact_nn = nn_1*nn_2/nn
+    delta_u = stats_2["mean_u"]-stats_1["mean_u"]
+    delta_v = stats_2["mean_v"]-stats_1["mean_v"]
+    delta_w = stats_2["mean_w"]-stats_1["mean_w"]
+    data_out["nn"]     = nn
+    data_out["mean_u"] = stats_1["mean_u"]+delta_u*nn_2/nn
+    data_out["mean_v"] = stats_1["mean_v"]+delta_v*nn_2/nn
+    data_out["mean_w"] = stats_1["mean_w"]+delta_w*nn_2/nn
+    data_out["m2_u"]   = stats_1["m2_u"]+stats_2["m2_u"]+delta_u*delta_u*fact_nn
+    data_out["m2_v"]   = stats_1["m2_v"]+stats_2["m2_v"]+delta_v*delta_v*fact_nn
+    data_out["m2_w"]   = stats_1["m2_w"]+stats_2["m2_w"]+delta_w*delta_w*fact_nn
+    data_out["c_uv"]   = stats_1["c_uv"]+stats_2["c_uv"]+delta_u*delta_v*fact_nn
+    data_out["c_vw"]   = stats_1["c_vw"]+stats_2["c_vw"]+delta_v*delta_w*fact_nn
+    data_out["c_uw"]   = stats_1["c_uw"]+stats_2["c_uw"]+delta_u*delta_w*fact_nn
+    data_out["s_vw2"]  = stats_1["s_vw2"]+stats_2["s_vw2"]
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Merge the sums of the deviation of the streamwise velocity multiplied by the squared wall-normal and spanwise
+    # velocities. The deviation of each partial statistics is moved to the merged mean:
+    #   - shift   : difference between the merged mean and the mean of the partial statistics
+    #   - sum_sq  : sum of the squared velocity of the partial statistics
+    # -------------------------------------------------------------------------------------------------------------------
+    for comp in ["v","w"]:
+        s1_key = "s1_u"+comp
+        s2_key = "s2_u"+comp
+        data_out[s1_key] = 0
+        data_out[s2_key] = 0
+        for stats in [stats_1,stats_2]:
+            shift             = data_out["mean_u"]-stats["mean_u"]
+            sum_sq            = stats["m2_"+comp]+stats["nn"]*stats["mean_"+comp]**2
+            data_out[s1_key] += stats[s1_key]-shift*sum_sq
+            data_out[s2_key] += stats[s2_key]-2*shift*stats[s1_key]+shift**2*sum_sq
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Merge the extremes
+    # -------------------------------------------------------------------------------------------------------------------
+    for comp in ["u","v","w","vw"]:
+        data_out["max_"+comp] = np.maximum(stats_1["max_"+comp],stats_2["max_"+comp])
+        data_out["min_"+comp] = np.minimum(stats_1["min_"+comp],stats_2["min_"+comp])
+    return data_out
+
+
+def snapshot_extremes(data_in={"UU":[],"VV":[],"WW":[],"dx":1,"dy":1,"dz":1,"UUmean":[]}):
+    """
+    .....................................................................................................................
+    # snapshot_extremes: Function to calculate the extremes of the uv and uw stresses of a velocity field. The
+                         streamwise fluctuations are calculated with the mean velocity of all the fields, as in the
+                         function calc_norm.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the velocity field.
+        The default is {"UU":[],"VV":[],"WW":[],"dx":1,"dy":1,"dz":1,"UUmean":[]}.
+        Data:
+            - UU     : streamwise velocity
+            - VV     : wall-normal velocity
+            - WW     : spanwise velocity
+            - dx     : downsampling in x
+            - dy     : downsampling in y
+            - dz     : downsampling in z
+            - UUmean : streamwise mean velocity of the downsampled planes
+
+    Returns
+    -------
+    dict
+        Extremes of the stresses of the field, all of them are functions of the wall-normal distance.
+        Data:
+            - uv_max : maximum uv stress
+            - uv_min : minimum uv stress
+            - uw_max : maximum uw stress
+            - uw_min : minimum uw stress
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    dx     = int(data_in["dx"])                                        # downsampling in x
+    dy     = int(data_in["dy"])                                        # downsampling in y
+    dz     = int(data_in["dz"])                                        # downsampling in z
+    uu     = np.array(data_in["UU"],dtype="float")[::dy,::dz,::dx]     # downsampled streamwise velocity
+    vv     = np.array(data_in["VV"],dtype="float")[::dy,::dz,::dx]     # downsampled wall-normal velocity
+    ww     = np.array(data_in["WW"],dtype="float")[::dy,::dz,::dx]     # downsampled spanwise velocity
+    UUmean = np.array(data_in["UUmean"],dtype="float").reshape(-1,1,1) # streamwise mean velocity
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Calculate the extremes of the stresses
+    # -------------------------------------------------------------------------------------------------------------------
+    uu       = uu-UUmean
+    uv       = np.multiply(uu,vv)
+    uw       = np.multiply(uu,ww)
+    data_out = {"uv_max":np.max(uv,axis=(1,2)),"uv_min":np.min(uv,axis=(1,2)),
+                "uw_max":np.max(uw,axis=(1,2)),"uw_min":np.min(uw,axis=(1,2))}
+    return data_out
+
+
+def field_extremes(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,
+                             "dx":1,"dy":1,"dz":1,"UUmean":[]}):
+    """
+    .....................................................................................................................
+    # field_extremes: Function to read a velocity field and calculate the extremes of its uv and uw stresses
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the field.
+        The default is {"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,
+                        "dx":1,"dy":1,"dz":1,"UUmean":[]}.
+        Data:
+            - folder : folder of the velocity data
+            - file   : file of the velocity data
+            - index  : index of the field
+            - dx     : downsampling in x
+            - dy     : downsampling in y
+            - dz     : downsampling in z
+            - UUmean : streamwise mean velocity of the downsampled planes
+
+    Returns
+    -------
+    dict
+        Extremes of the stresses of the field, the keys are the ones of the function snapshot_extremes.
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Import packages
+    # -------------------------------------------------------------------------------------------------------------------
+    import h5py
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the field and calculate the extremes
+    # -------------------------------------------------------------------------------------------------------------------
+    file_ii  = (str(data_in["folder"])+'/'+str(data_in["file"])).replace("$INDEX$",str(int(data_in["index"])))
+    print('Extremes calculation:'+str(file_ii),flush=True)
+    file_r   = h5py.File(file_ii,'r')
+    data_out = snapshot_extremes(data_in={"UU":np.array(file_r['u']),"VV":np.array(file_r['v']),
+                                          "WW":np.array(file_r['w']),"dx":data_in["dx"],"dy":data_in["dy"],
+                                          "dz":data_in["dz"],"UUmean":data_in["UUmean"]})
+    file_r.close()
+    return data_out
+
+
+def finalize_statistics(data_in={"stats":None,"extremes":None,"dy":1}):
+    """
+    .....................................................................................................................
+    # finalize_statistics: Function to calculate the mean, rms and normalization from the partial statistics. The
+                           fluctuations of the streamwise velocity are defined relative to the mean velocity of the
+                           complete field, as in the functions calc_rms and calc_norm.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the statistics.
+        The default is {"stats":None,"extremes":None,"dy":1}.
+        Data:
+            - stats    : merged statistics of all the fields
+            - extremes : merged extremes of the uv and uw stresses of all the fields
+            - dy       : downsampling in y
+
+    Returns
+    -------
+    dict
+        Statistics of the flow.
+        Data:
+            - UUmean : streamwise mean velocity as a function of the wall-normal distance
+            - VVmean : wall-normal mean velocity as a function of the wall-normal distance
+            - WWmean : spanwise mean velocity as a function of the wall-normal distance
+            - uurms  : rms of the streamwise velocity as a function of the wall-normal distance
+            - vvrms  : rms of the wall-normal velocity as a function of the wall-normal distance
+            - wwrms  : rms of the spanwise velocity as a function of the wall-normal distance
+            - uv     : mean uv stress as a function of the wall-normal distance
+            - vw     : mean vw stress as a function of the wall-normal distance
+            - uw     : mean uw stress as a function of the wall-normal distance
+            - norm   : maximum and minimum values of the velocity and the stresses (keys of normalization.py)
+            - norm_normaldist : mean and standard deviation of the velocity and the stresses (keys of
+                                normalization_normaldist.py)
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    stats    = data_in["stats"]    # merged statistics
+    extremes = data_in["extremes"] # merged extremes of the stresses
+    dy       = int(data_in["dy"])  # downsampling in y
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Mean velocity
+    #   - UUmean_dy : mean streamwise velocity in the downsampled planes
+    #   - delta_u   : mean of the streamwise velocity fluctuations in the downsampled planes
+    # -------------------------------------------------------------------------------------------------------------------
+    UUmean    = stats["mean_u_full"]
+    VVmean    = stats["mean_v_full"]
+    WWmean    = stats["mean_w_full"]
+    UUmean_dy = UUmean[::dy]
+    nn        = stats["nn"]
+    delta_u   = stats["mean_u"]-UUmean_dy
+    mean_v    = stats["mean_v"]
+    mean_w    = stats["mean_w"]
+    sum_v2    = stats["m2_v"]+nn*mean_v**2
+    sum_w2    = stats["m2_w"]+nn*mean_w**2
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Sums of the velocity fluctuations and the stresses in the planes. The streamwise fluctuation is the deviation from
+    # the mean of the downsampled planes plus delta_u, the rest of the components are not centered.
+    # -------------------------------------------------------------------------------------------------------------------
+    sum_uu  = nn*delta_u
+    sum_vv  = nn*mean_v
+    sum_ww  = nn*mean_w
+    sum_uu2 = stats["m2_u"]+nn*delta_u**2
+    sum_vv2 = sum_v2
+    sum_ww2 = sum_w2
+    sum_uv  = stats["c_uv"]+nn*delta_u*mean_v
+    sum_vw  = stats["c_vw"]+nn*mean_v*mean_w
+    sum_uw  = stats["c_uw"]+nn*delta_u*mean_w
+    sum_uv2 = stats["s2_uv"]+2*delta_u*stats["s1_uv"]+delta_u**2*sum_v2
+    sum_vw2 = stats["s_vw2"]
+    sum_uw2 = stats["s2_uw"]+2*delta_u*stats["s1_uw"]+delta_u**2*sum_w2
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # RMS of the velocity
+    # -------------------------------------------------------------------------------------------------------------------
+    uurms = np.sqrt(np.divide(sum_uu2,nn))
+    vvrms = np.sqrt(np.divide(sum_vv2,nn))
+    wwrms = np.sqrt(np.divide(sum_ww2,nn))
+    uv    = np.divide(sum_uv,nn)
+    vw    = np.divide(sum_vw,nn)
+    uw    = np.divide(sum_uw,nn)
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Normalization using the maximum and the minimum
+    # -------------------------------------------------------------------------------------------------------------------
+    norm = {"uumax":np.max(stats["max_u"]-UUmean_dy),"vvmax":np.max(stats["max_v"]),"wwmax":np.max(stats["max_w"]),
+            "uumin":np.min(stats["min_u"]-UUmean_dy),"vvmin":np.min(stats["min_v"]),"wwmin":np.min(stats["min_w"]),
+            "uvmax":np.max(extremes["uv_max"]),"vwmax":np.max(stats["max_vw"]),"uwmax":np.max(extremes["uw_max"]),
+            "uvmin":np.min(extremes["uv_min"]),"vwmin":np.min(stats["min_vw"]),"uwmin":np.min(extremes["uw_min"])}
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Normalization using the mean and the standard deviation
+    # -------------------------------------------------------------------------------------------------------------------
+    nn_cum = np.sum(nn)
+    uumean = np.sum(sum_uu)/nn_cum
+    vvmean = np.sum(sum_vv)/nn_cum
+    wwmean = np.sum(sum_ww)/nn_cum
+    uvmean = np.sum(sum_uv)/nn_cum
+    vwmean = np.sum(sum_vw)/nn_cum
+    uwmean = np.sum(sum_uw)/nn_cum
+    norm_normaldist = {"uumean":uumean,"vvmean":vvmean,"wwmean":wwmean,
+                       "uustd":np.sqrt(np.sum(sum_uu2)/nn_cum-uumean**2),
+                       "vvstd":np.sqrt(np.sum(sum_vv2)/nn_cum-vvmean**2),
+                       "wwstd":np.sqrt(np.sum(sum_ww2)/nn_cum-wwmean**2),
+                       "uvmean":uvmean,"vwmean":vwmean,"uwmean":uwmean,
+                       "uvstd":np.sqrt(np.sum(sum_uv2)/nn_cum-uvmean**2),
+                       "vwstd":np.sqrt(np.sum(sum_vw2)/nn_cum-vwmean**2),
+                       "uwstd":np.sqrt(np.sum(sum_uw2)/nn_cum-uwmean**2)}
+    data_out = {"UUmean":UUmean,"VVmean":VVmean,"WWmean":WWmean,"uurms":uurms,"vvrms":vvrms,"wwrms":wwrms,
+                "uv":uv,"vw":vw,"uw":uw,"norm":norm,"norm_normaldist":norm_normaldist}
+    return data_out
+
+
+def calc_statistics(data_in={"field_ini":1000,"field_fin":9999,"folder":"../../P125_21pi_vu",
+                             "file":"P125_21pi_vu.$INDEX$.h5.uvw","save_file":True,"data_folder":"Data",
+                             "umean_file":"Umean.txt","urms_file":"Urms.txt","unorm_file":"norm.txt",
+                             "dx":1,"dy":1,"dz":1,"mean_norm":False}):
+    """
+    .....................................................................................................................
+    # calc_statistics: Function to calculate the mean, rms and normalization of a range of fields. The statistics are
+                       calculated in a single pass, the extremes of the uv and uw stresses in a second pass with the
+                       final mean velocity. The function produces the files of calc_Umean, calc_rms and calc_norm.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data for the calculation of the statistics.
+        The default is {"field_ini":1000,"field_fin":9999,"folder":"../../P125_21pi_vu",
+                        "file":"P125_21pi_vu.$INDEX$.h5.uvw","save_file":True,"data_folder":"Data",
+                        "umean_file":"Umean.txt","urms_file":"Urms.txt","unorm_file":"norm.txt",
+                        "dx":1,"dy":1,"dz":1,"mean_norm":False}.
+        Data:
+            - field_ini   : index of the initial field
+            - field_fin   : index of the final field
+            - folder      : folder of the velocity data
+            - file        : file of the velocity data
+            - save_file   : flag to save the statistics in files
+            - data_folder : folder to store the calculated data
+            - umean_file  : file of the mean velocity
+            - urms_file   : file of the rms of the velocity
+            - unorm_file  : file of the normalization
+            - dx          : downsampling in x
+            - dy          : downsampling in y
+            - dz          : downsampling in z
+            - mean_norm   : flag to save the normalization using the mean and standard deviation
+            - nworkers    : (optional) number of processes
+            - chunk_size  : (optional) number of fields of each chunk
+            - chk_folder  : (optional) folder to store the partial statistics of the chunks to resume the calculation
+
+    Returns
+    -------
+    dict
+        Statistics of the flow, only returned if the files are not saved. The keys are the ones of the function
+        finalize_statistics.
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Import packages
+    # -------------------------------------------------------------------------------------------------------------------
+    from py_bin.py_functions.umean import save_Umean
+    from py_bin.py_functions.urms import save_rms
+    from py_bin.py_functions.parallel_statistics import calc_parallel,merge_partials
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    field_ini   = int(data_in["field_ini"])   # index of the initial field
+    field_fin   = int(data_in["field_fin"])   # index of the final field
+    folder      = str(data_in["folder"])      # folder of the velocity data
+    file        = str(data_in["file"])        # file of the velocity data
+    save_file   = bool(data_in["save_file"])  # flag to save the statistics
+    data_folder = str(data_in["data_folder"]) # folder of the calculated data
+    umean_file  = str(data_in["umean_file"])  # file of the mean velocity
+    urms_file   = str(data_in["urms_file"])   # file of the rms of the velocity
+    unorm_file  = str(data_in["unorm_file"])  # file of the normalization
+    dx          = int(data_in["dx"])          # downsampling in x
+    dy          = int(data_in["dy"])          # downsampling in y
+    dz          = int(data_in["dz"])          # downsampling in z
+    mean_norm   = bool(data_in["mean_norm"])  # flag to normalize with the mean and the standard deviation
+    if "nworkers" in data_in.keys():
+        nworkers   = int(data_in["nworkers"])   # number of processes
+        chunk_size = int(data_in["chunk_size"]) # number of fields of each chunk
+        chk_folder = data_in["chk_folder"]      # folder of the partial statistics of the chunks
+    else:
+        nworkers   = 1
+        chunk_size = 0
+        chk_folder = None
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Accumulate the statistics of the fields. The fields are divided in chunks calculated in parallel, the statistics
+    # of each chunk are stored in the checkpoint folder.
+    # -------------------------------------------------------------------------------------------------------------------
+    data_partial = {"folder":folder,"file":file,"dx":dx,"dy":dy,"dz":dz}
+    stats        = calc_parallel(data_in={"function":field_statistics,"merge":merge_statistics,
+                                          "data_partial":data_partial,"field_ini":field_ini,"field_fin":field_fin,
+                                          "field_delta":1,"nworkers":nworkers,"chunk_size":chunk_size,
+                                          "chk_folder":chk_folder,"chk_name":"statistics"})
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Accumulate the extremes of the uv and uw stresses with the mean velocity of all the fields
+    # -------------------------------------------------------------------------------------------------------------------
+    data_partial = {"folder":folder,"file":file,"dx":dx,"dy":dy,"dz":dz,"UUmean":stats["mean_u_full"][::dy]}
+    extremes     = calc_parallel(data_in={"function":field_extremes,"merge":merge_partials,
+                                          "data_partial":data_partial,"field_ini":field_ini,"field_fin":field_fin,
+                                          "field_delta":1,"nworkers":nworkers,"chunk_size":chunk_size,
+                                          "chk_folder":chk_folder,"chk_name":"extremes"})
+    data_stats   = finalize_statistics(data_in={"stats":stats,"extremes":extremes,"dy":dy})
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Save the statistics in files or return them
+    # -------------------------------------------------------------------------------------------------------------------
+    if save_file:
+        save_Umean(data_in={"folder":data_folder,"file":umean_file,"UUmean":data_stats["UUmean"],
+                            "VVmean":data_stats["VVmean"],"WWmean":data_stats["WWmean"]})
+        save_rms(data_in={"folder":data_folder,"file":urms_file,"uurms":data_stats["uurms"],
+                          "vvrms":data_stats["vvrms"],"wwrms":data_stats["wwrms"],"uv":data_stats["uv"],
+                          "vw":data_stats["vw"],"uw":data_stats["uw"]})
+        if mean_norm:
+            from py_bin.py_functions.normalization_normaldist import save_norm
+            data_norm = data_stats["norm_normaldist"]
+        else:
+            from py_bin.py_functions.normalization import save_norm
+            data_norm = data_stats["norm"]
+        data_norm_save           = data_norm.copy()
+        data_norm_save["folder"] = data_folder
+        data_norm_save["file"]   = unorm_file
+        save_norm(data_in=data_norm_save)
+    else:
+        return data_stats
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+-------------------------------------------------------------------------------------------------------------------------
+inference.py
+-------------------------------------------------------------------------------------------------------------------------
+Created on Sat Oct 17 23:27:41 2026
+
+@author: Andres Cremades Botella
+
+File containing the inference of the models without the predict loop of keras. The predict function of keras builds
+the data adapter and the callbacks in every call, which is a visible part of the time of a single field in the
+evaluations on CPU. The model is evaluated in a tf.function with a fixed input signature, traced once and optionally
+compiled with XLA. The file contains the following functions:
+    Functions:
+        - set_threads         : function to define the threads of the operations of tensorflow
+        - inference_function  : function to define the traced inference function of a model
+        - benchmark_inference : function to measure the latency of the inference functions
+"""
+# -----------------------------------------------------------------------------------------------------------------------
+# Import packages for all the functions
+# -----------------------------------------------------------------------------------------------------------------------
+import tensorflow as tf
+import numpy as np
+import time
+
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+# Define the functions
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+
+def set_threads(data_in={"intra_threads":0,"inter_threads":0}):
+    """
+    .....................................................................................................................
+    # set_threads: Function to define the threads of the operations of tensorflow. The threads can only be defined
+                   before tensorflow is initialized, otherwise the default threads are kept.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Threads of tensorflow.
+        The default is {"intra_threads":0,"inter_threads":0}.
+        Data:
+            - intra_threads : threads used inside each operation (0 for the default of tensorflow)
+            - inter_threads : threads used to run independent operations (0 for the default of tensorflow)
+
+    Returns
+    -------
+    None.
+
+    """
+    intra_threads = int(data_in["intra_threads"])
+    inter_threads = int(data_in["inter_threads"])
+    try:
+        if intra_threads > 0:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_threads)
+        if inter_threads > 0:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_threads)
+    except RuntimeError as error:
+        print("The threads of tensorflow cannot be modified after its initialization: "+str(error),flush=True)
+    print("Threads of tensorflow (intra, inter): "+str(tf.config.threading.get_intra_op_parallelism_threads())+
+          ", "+str(tf.config.threading.get_inter_op_parallelism_threads()),flush=True)
+
+
+def inference_function(data_in={"model":None,"data_type":"float32","jit_compile":False}):
+    """
+    .....................................................................................................................
+    # inference_function: Function to define the traced inference function of a model. The input signature has a free
+                          batch dimension and the shape of the input of the model, so the function is traced once for
+                          any number of fields.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the model.
+        The default is {"model":None,"data_type":"float32","jit_compile":False}.
+        Data:
+            - model       : keras model
+            - data_type   : type of the input fields (float32, float16)
+            - jit_compile : flag to compile the function with XLA
+
+    Returns
+    -------
+    dict
+        Inference function.
+        Data:
+            - function : function returning the output of the model for a batch of input fields
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    model       = data_in["model"]
+    data_type   = str(data_in["data_type"])
+    jit_compile = bool(data_in["jit_compile"])
+    dtype_model = model.inputs[0].dtype
+    signature   = [tf.TensorSpec(shape=(None,)+tuple(model.input_shape[1:]),dtype=data_type)]
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Define the function
+    # -------------------------------------------------------------------------------------------------------------------
+    @tf.function(input_signature=signature,jit_compile=jit_compile)
+    def function(field_in):
+        return model(tf.cast(field_in,dtype_model),training=False)
+    data_out = {"function":function}
+    return data_out
+
+
+def benchmark_inference(data_in={"functions":{},"field_in":[],"nrep":20,"nwarmup":3}):
+    """
+    .....................................................................................................................
+    # benchmark_inference: Function to measure the latency of the inference functions. Each function is evaluated
+                           nwarmup times before the measurement, so the tracing and the compilation are not measured.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the benchmark.
+        The default is {"functions":{},"field_in":[],"nrep":20,"nwarmup":3}.
+        Data:
+            - functions : dictionary of the functions to measure, each one receives the batch of input fields and
+                          returns the output of the model
+            - field_in  : batch of input fields
+            - nrep      : number of evaluations measured
+            - nwarmup   : number of evaluations before the measurement
+
+    Returns
+    -------
+    dict
+        Latency of each function.
+        Data:
+            - <name> : dictionary with the mean, the minimum and the standard deviation of the time per field in
+                       seconds ("mean", "min", "std")
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    functions = data_in["functions"]
+    field_in  = data_in["field_in"]
+    nrep      = int(data_in["nrep"])
+    nwarmup   = int(data_in["nwarmup"])
+    nfield    = int(field_in.shape[0])
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Measure the functions. The output is converted to an array to wait for the end of the evaluation.
+    # -------------------------------------------------------------------------------------------------------------------
+    data_out = {}
+    print("-"*100,flush=True)
+    for name,function in functions.items():
+        for ii in range(nwarmup):
+            np.asarray(function(field_in))
+        time_rep = np.zeros((nrep,))
+        for ii in range(nrep):
+            tstart       = time.time()
+            np.asarray(function(field_in))
+            time_rep[ii] = (time.time()-tstart)/nfield
+        data_out[name] = {"mean":np.mean(time_rep),"min":np.min(time_rep),"std":np.std(time_rep)}
+        print("Inference "+name+": "+str(data_out[name]["mean"]*1e3)+" ms per field (min "+
+              str(data_out[name]["min"]*1e3)+" ms, std "+str(data_out[name]["std"]*1e3)+" ms)",flush=True)
+    print("-"*100,flush=True)
+    return data_out
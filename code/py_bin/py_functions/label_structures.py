@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""
+-------------------------------------------------------------------------------------------------------------------------
+label_structures.py
+-------------------------------------------------------------------------------------------------------------------------
+Created on Mon Oct 12 10:21:37 2026
+
+@author: Andres Cremades Botella
+
+File to label the connected regions of a matrix of structures. The labelling uses a union-find over the flattened grid
+evaluated with array operations: the trees are hooked by the minimum root and compressed by pointer jumping until all
+the connections of the grid share the same root. The file contains the following functions:
+    Functions:
+        - connectivity_edges : function to define the connections between the nodes of the structures
+        - union_find_roots   : function to calculate the root of each node of the grid
+        - neighbour_edges    : function to define the connections of a set of nodes with the active nodes of the grid
+        - find_roots         : function to calculate the root of a set of nodes
+        - union_roots        : function to join the trees of a set of connections
+        - label_structures   : function to label the connected structures of the grid
+"""
+# -----------------------------------------------------------------------------------------------------------------------
+# Import packages for all the functions
+# -----------------------------------------------------------------------------------------------------------------------
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+# Define the functions
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+
+def connectivity_edges(data_in={"mat_struc":[],"sign_1":None,"sign_2":None}):
+    """
+    .....................................................................................................................
+    # connectivity_edges: Function to define the connections (connectivity-1) between the nodes of the structures. The
+                          wall-normal direction (axis 0) is bounded by the walls, the spanwise (axis 1) and the
+                          streamwise (axis 2) directions are periodic.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the matrix of the structures.
+        The default is {"mat_struc":[],"sign_1":None,"sign_2":None}.
+        Data:
+            - mat_struc : matrix of the grid-points contained in a structure (1 if contained, 0 if not contained)
+            - sign_1    : sign of the field in the component 1. If it is not None only the nodes with the same sign
+                          are connected
+            - sign_2    : sign of the field in the component 2
+
+    Returns
+    -------
+    dict
+        Connections of the grid
+        Data:
+            - node_a : flattened index of the first node of each connection
+            - node_b : flattened index of the second node of each connection
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    #   - index : flattened index of the nodes of the grid
+    # -------------------------------------------------------------------------------------------------------------------
+    mat_struc = np.array(data_in["mat_struc"],dtype="bool")
+    sign_1    = data_in["sign_1"]
+    sign_2    = data_in["sign_2"]
+    index     = np.arange(mat_struc.size).reshape(mat_struc.shape)
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Evaluate the connections in the positive direction of each axis. The connection in the negative direction is
+    # the same connection of the previous node.
+    #   - Wall-normal direction: the last plane is not connected (walls)
+    #   - Spanwise and streamwise directions: the last plane is connected with the first plane (periodicity)
+    # -------------------------------------------------------------------------------------------------------------------
+    node_a = []
+    node_b = []
+    for axis in np.arange(3):
+        if axis == 0:
+            index_a = index[:-1,:,:]
+            index_b = index[1:,:,:]
+            connect = mat_struc[:-1,:,:] & mat_struc[1:,:,:]
+            if sign_1 is not None:
+                connect &= (sign_1[:-1,:,:] == sign_1[1:,:,:]) & (sign_2[:-1,:,:] == sign_2[1:,:,:])
+        else:
+            index_a = index
+            index_b = np.roll(index,-1,axis=axis)
+            connect = mat_struc & np.roll(mat_struc,-1,axis=axis)
+            if sign_1 is not None:
+                connect &= (sign_1 == np.roll(sign_1,-1,axis=axis)) & (sign_2 == np.roll(sign_2,-1,axis=axis))
+        node_a.append(index_a[connect])
+        node_b.append(index_b[connect])
+    data_out = {"node_a":np.concatenate(node_a),"node_b":np.concatenate(node_b)}
+    return data_out
+
+
+def union_find_roots(data_in={"nnodes":0,"node_a":[],"node_b":[],"root":None}):
+    """
+    .....................................................................................................................
+    # union_find_roots: Function to calculate the root of each node of the grid. Each tree is hooked to the root with
+                        the minimum index, then the root of each node is the first node of its structure in the
+                        flattened order of the grid.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the connections.
+        The default is {"nnodes":0,"node_a":[],"node_b":[],"root":None}.
+        Data:
+            - nnodes : number of nodes of the grid
+            - node_a : flattened index of the first node of each connection
+            - node_b : flattened index of the second node of each connection
+            - root   : (optional) roots of a previous union-find, the connections are added to its structures
+
+    Returns
+    -------
+    dict
+        Roots of the nodes
+        Data:
+            - root : index of the root of each node of the grid
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    nnodes = int(data_in["nnodes"])
+    node_a = np.array(data_in["node_a"],dtype="int")
+    node_b = np.array(data_in["node_b"],dtype="int")
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Iterate the union-find until all the connections share the root
+    #   - root    : parent of each node, at the end of every iteration the parent is the root of the tree
+    #   - root_a  : root of the first node of the connections
+    #   - root_b  : root of the second node of the connections
+    #   - join    : connections between different trees
+    #   - root_lo : minimum root of the connection
+    #   - root_hi : maximum root of the connection, it is hooked to the minimum one
+    # -------------------------------------------------------------------------------------------------------------------
+    if "root" in data_in.keys() and data_in["root"] is not None:
+        root = np.array(data_in["root"],dtype="int")
+    else:
+        root = np.arange(nnodes)
+    while True:
+        # ---------------------------------------------------------------------------------------------------------------
+        # Compress the trees using pointer jumping
+        # ---------------------------------------------------------------------------------------------------------------
+        while True:
+            root_jump = root[root]
+            if np.array_equal(root_jump,root):
+                break
+            root = root_jump
+        root_a = root[node_a]
+        root_b = root[node_b]
+        join   = root_a != root_b
+        if not np.any(join):
+            break
+        root_a  = root_a[join]
+        root_b  = root_b[join]
+        node_a  = node_a[join]
+        node_b  = node_b[join]
+        root_lo = np.minimum(root_a,root_b)
+        root_hi = np.maximum(root_a,root_b)
+        np.minimum.at(root,root_hi,root_lo)
+    data_out = {"root":root}
+    return data_out
+
+
+def neighbour_edges(data_in={"nodes":[],"active":[],"shape":(1,1,1)}):
+    """
+    .....................................................................................................................
+    # neighbour_edges: Function to define the connections (connectivity-1) of a set of nodes with the active nodes of
+                       the grid. The neighbours are calculated only for the given nodes with the same boundaries of
+                       connectivity_edges: the wall-normal direction (axis 0) is bounded by the walls, the spanwise
+                       (axis 1) and the streamwise (axis 2) directions are periodic.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the nodes.
+        The default is {"nodes":[],"active":[],"shape":(1,1,1)}.
+        Data:
+            - nodes  : flattened index of the nodes
+            - active : flattened flag of the active nodes of the grid
+            - shape  : shape of the grid
+
+    Returns
+    -------
+    dict
+        Connections of the nodes
+        Data:
+            - node_a : flattened index of the node of each connection
+            - node_b : flattened index of the active neighbour of each connection
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    nodes  = np.array(data_in["nodes"],dtype="int")
+    active = data_in["active"]
+    shape  = tuple(data_in["shape"])
+    yy,zz,xx = np.unravel_index(nodes,shape)
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Evaluate the neighbours in both directions of each axis
+    # -------------------------------------------------------------------------------------------------------------------
+    node_a = []
+    node_b = []
+    for dy,dz,dx in [(-1,0,0),(1,0,0),(0,-1,0),(0,1,0),(0,0,-1),(0,0,1)]:
+        yy_b    = yy+dy
+        inside  = (yy_b >= 0) & (yy_b < shape[0])
+        index_b = np.ravel_multi_index((yy_b[inside],(zz[inside]+dz)%shape[1],(xx[inside]+dx)%shape[2]),shape)
+        connect = active[index_b]
+        node_a.append(nodes[inside][connect])
+        node_b.append(index_b[connect])
+    data_out = {"node_a":np.concatenate(node_a),"node_b":np.concatenate(node_b)}
+    return data_out
+
+
+def find_roots(data_in={"root":[],"nodes":[]}):
+    """
+    .....................................................................................................................
+    # find_roots: Function to calculate the root of a set of nodes. The parents are followed by pointer jumping only
+                  for the given nodes and the path of the nodes is compressed in the array of the roots.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the nodes.
+        The default is {"root":[],"nodes":[]}.
+        Data:
+            - root  : parent of each node of the grid (modified in place)
+            - nodes : flattened index of the nodes
+
+    Returns
+    -------
+    dict
+        Roots of the nodes
+        Data:
+            - root_nodes : root of each node
+
+    """
+    root       = data_in["root"]
+    nodes      = np.array(data_in["nodes"],dtype="int")
+    root_nodes = root[nodes]
+    while True:
+        root_jump = root[root_nodes]
+        if np.array_equal(root_jump,root_nodes):
+            break
+        root_nodes = root_jump
+    root[nodes] = root_nodes
+    data_out    = {"root_nodes":root_nodes}
+    return data_out
+
+
+def union_roots(data_in={"root":[],"node_a":[],"node_b":[]}):
+    """
+    .....................................................................................................................
+    # union_roots: Function to join the trees of a set of connections. Each tree is hooked to the root with the
+                   minimum index as in union_find_roots, but only the nodes of the connections are evaluated, so the
+                   cost depends on the number of connections and not on the size of the grid.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the connections.
+        The default is {"root":[],"node_a":[],"node_b":[]}.
+        Data:
+            - root   : parent of each node of the grid (modified in place)
+            - node_a : flattened index of the first node of each connection
+            - node_b : flattened index of the second node of each connection
+
+    Returns
+    -------
+    dict
+        Roots of the nodes
+        Data:
+            - root : parent of each node of the grid, the nodes of the connections point to their root
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    root   = data_in["root"]
+    node_a = np.array(data_in["node_a"],dtype="int")
+    node_b = np.array(data_in["node_b"],dtype="int")
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Iterate the hooking until all the connections share the root
+    # -------------------------------------------------------------------------------------------------------------------
+    while len(node_a) > 0:
+        root_a  = find_roots(data_in={"root":root,"nodes":node_a})["root_nodes"]
+        root_b  = find_roots(data_in={"root":root,"nodes":node_b})["root_nodes"]
+        join    = root_a != root_b
+        if not np.any(join):
+            break
+        node_a  = node_a[join]
+        node_b  = node_b[join]
+        root_lo = np.minimum(root_a[join],root_b[join])
+        root_hi = np.maximum(root_a[join],root_b[join])
+        np.minimum.at(root,root_hi,root_lo)
+    data_out = {"root":root}
+    return data_out
+
+
+def label_structures(data_in={"mat_struc":[],"sign_1":None,"sign_2":None}):
+    """
+    .....................................................................................................................
+    # label_structures: Function to label the connected structures of the grid. The structures are numbered by their
+                        first node in the order (y,z,x) of the grid and the nodes of each structure are sorted in the
+                        same order.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the matrix of the structures.
+        The default is {"mat_struc":[],"sign_1":None,"sign_2":None}.
+        Data:
+            - mat_struc : matrix of the grid-points contained in a structure (1 if contained, 0 if not contained)
+            - sign_1    : sign of the field in the component 1. If it is not None only the nodes with the same sign
+                          are connected
+            - sign_2    : sign of the field in the component 2
+
+    Returns
+    -------
+    dict
+        Labels of the structures
+        Data:
+            - mat_label  : matrix with the index of the structure of each node (starting in 1, 0 if not contained)
+            - nodes      : list containing the grid-points of each coherent structure
+            - nstruc     : number of structures
+            - points     : indices (y,z,x) of the nodes of all the structures, the nodes of each structure are
+                           contiguous
+            - label_node : index of the structure of each node of points (starting in 0)
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    mat_struc = np.array(data_in["mat_struc"],dtype="bool")
+    sign_1    = data_in["sign_1"]
+    sign_2    = data_in["sign_2"]
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Calculate the root of every node
+    # -------------------------------------------------------------------------------------------------------------------
+    data_edges = connectivity_edges(data_in={"mat_struc":mat_struc,"sign_1":sign_1,"sign_2":sign_2})
+    root       = union_find_roots(data_in={"nnodes":mat_struc.size,"node_a":data_edges["node_a"],
+                                           "node_b":data_edges["node_b"]})["root"]
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Number the structures
+    #   - index_struc : flattened index of the nodes contained in a structure (sorted)
+    #   - root_struc  : root of the nodes contained in a structure
+    #   - label_struc : index of the structure of each node (starting in 0)
+    #   - count_struc : number of nodes of each structure
+    # -------------------------------------------------------------------------------------------------------------------
+    index_struc               = np.flatnonzero(mat_struc)
+    root_struc                = root[index_struc]
+    _,label_struc,count_struc = np.unique(root_struc,return_inverse=True,return_counts=True)
+    label_struc               = label_struc.reshape(-1)
+    mat_label                 = np.zeros(mat_struc.size,dtype="int")
+    mat_label[index_struc]    = label_struc+1
+    mat_label                 = mat_label.reshape(mat_struc.shape)
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Separate the nodes of each structure
+    #   - order_struc : order of the nodes grouping the structures (the stable sort keeps the order of the grid)
+    #   - points      : indices (y,z,x) of the sorted nodes
+    # -------------------------------------------------------------------------------------------------------------------
+    order_struc = np.argsort(label_struc,kind="stable")
+    points      = np.array(np.unravel_index(index_struc[order_struc],mat_struc.shape),dtype="int")
+    nodes       = np.split(points,np.cumsum(count_struc)[:-1],axis=1) if len(count_struc) > 0 else []
+    data_out    = {"mat_label":mat_label,"nodes":nodes,"nstruc":len(count_struc),"points":points,
+                   "label_node":label_struc[order_struc]}
+    return data_out
@@ -23,6 +23,7 @@ import tensorflow as tf
 import os
 import numpy as np
 from tqdm import tqdm
+from py_bin.py_functions.tfrecord_format import serialize_example, compression_type
 
 def load_datasets(data_in={"file":'/tfrecord/merged_vali_data/dataset_0000.tfrecord',
                            "elem_spec":[]}):
@@ -65,46 +66,6 @@ def load_datasets(data_in={"file":'/tfrecord/merged_vali_data/dataset_0000.tfrec
     data_out = {"loaddata":loaddata}
     return data_out
 
-def serialize_example(data_in={"feature":[],"label":[]}):
-    """
-    .....................................................................................................................
-    # _serialize_example: Create a tf.train.Example message ready to be written to a file.
-    .....................................................................................................................
-    Parameters
-    ----------
-    data_in : dict, optional
-        data containing the input information.
-        The default is {"feature":[],"label":[]}.
-        Data:
-            - feature : features of the tfrecord
-            - label   : name of the tfrecord
-    
-    Returns
-    -------
-    dict
-        Structure containing mapped example
-        Data:
-            - example : Structure containing mapped example
-    """
-    # -------------------------------------------------------------------------------------------------------------------
-    # Read the data
-    # -------------------------------------------------------------------------------------------------------------------
-    feature = data_in["feature"]
-    label   = data_in["label"]
-    
-    # -------------------------------------------------------------------------------------------------------------------
-    # Create a dictionary mapping the feature name to the tf.train.Example-compatible data type.
-    # -------------------------------------------------------------------------------------------------------------------
-    feature = {'feature': tf.train.Feature(float_list=tf.train.FloatList(value=feature.flatten())),
-               'label': tf.train.Feature(float_list=tf.train.FloatList(value=label.flatten()))}
-
-    # -------------------------------------------------------------------------------------------------------------------
-    # Create a Features message using tf.train.Example.
-    # -------------------------------------------------------------------------------------------------------------------
-    example_proto = tf.train.Example(features=tf.train.Features(feature=feature))
-    data_out      = {"example":example_proto.SerializeToString()}
-    return data_out
-
 def write_tfrecord(data_in={"output_path":'/tfrecord/merged_vali_data/dataset_0000.tfrecord',"dataset":[]}):
     """
     ---------------------------------------------------------------------------------------------------------------------
@@ -116,8 +77,9 @@ def write_tfrecord(data_in={"output_path":'/tfrecord/merged_vali_data/dataset_00
         DESCRIPTION. The default is {"file_path":'/tfrecord/merged_vali_data/dataset_0000.tfrecord',
                                      "dataset":[]}.
         Data:
-            - file      : path to the file to write
-            - dataset   : Data to save
+            - file        : path to the file to write
+            - dataset     : Data to save
+            - compression : (optional) compression of the file ("": no compression, "ZLIB", "GZIP")
 
     Returns
     -------
@@ -126,7 +88,12 @@ def write_tfrecord(data_in={"output_path":'/tfrecord/merged_vali_data/dataset_00
     """
     output_path = str(data_in["output_path"])
     dataset     = data_in["dataset"]
-    with tf.io.TFRecordWriter(output_path) as writer:
+    if "compression" in data_in.keys():
+        compression = compression_type(data_in={"compression":data_in["compression"]})["compression"]
+    else:
+        compression = ""
+    options     = tf.io.TFRecordOptions(compression_type=compression)
+    with tf.io.TFRecordWriter(output_path,options=options) as writer:
         for features, labels in tqdm(dataset, desc=f"Writing {output_path}"):
             data_serialize = {"feature":features.numpy(),"label":labels.numpy()}
             example = serialize_example(data_in=data_serialize)["example"]
@@ -146,6 +113,12 @@ def create_tfrecords(data_in={"output_directory":'/tfrecord/merged_vali_data/',
         DESCRIPTION. The default is {"output_directory":'/tfrecord/merged_vali_data/',
                                      "base_directory":"../../P125_21pi_vu_tf_float32/",
                                      "datasets":[],"elem_spec":[]}.
+        Data:
+            - output_directory : directory to store the tfrecord files
+            - base_directory   : path of the files to store in the output directory
+            - datasets         : indices of the fields to read
+            - elem_spec        : specification of the elements of the dataset
+            - compression      : (optional) compression of the tfrecord files ("": no compression, "ZLIB", "GZIP")
 
     Returns
     -------
@@ -160,6 +133,10 @@ def create_tfrecords(data_in={"output_directory":'/tfrecord/merged_vali_data/',
     datasets         = np.array(data_in["datasets"],dtype="int")
     elem_spec        = data_in["elem_spec"]
     num_datasets     = len(datasets)
+    if "compression" in data_in.keys():
+        compression = str(data_in["compression"])
+    else:
+        compression = ""
     
     # -------------------------------------------------------------------------------------------------------------------
     # Get the list of dataset files
@@ -180,7 +157,7 @@ def create_tfrecords(data_in={"output_directory":'/tfrecord/merged_vali_data/',
         index       = int(file.split('.')[-1])
         dataset     = load_datasets(dataset_in)["loaddata"]
         output_path = os.path.join(output_directory, f'dataset_{index}.tfrecord')
-        data_write  = {"output_path":output_path,"dataset":dataset}
+        data_write  = {"output_path":output_path,"dataset":dataset,"compression":compression}
         write_tfrecord(data_in=data_write)
         print(f"Dataset {idx} written to {output_path}",flush=True)
     
@@ -208,6 +185,7 @@ def merge_data(data_in={"base_directory":"../../P125_21pi_vu/","padding":15,"shp
             - data_type      : type of data of the folder
             - datasets       : number of fields to read
             - output_path    : path to store the file
+            - compression    : (optional) compression of the tfrecord files ("": no compression, "ZLIB", "GZIP")
   
     Returns
     -------
@@ -243,6 +221,8 @@ def merge_data(data_in={"base_directory":"../../P125_21pi_vu/","padding":15,"shp
     # -------------------------------------------------------------------------------------------------------------------
     data_tfrecords = {"output_directory":output_path,"base_directory":base_directory,"datasets":datasets,
                       "elem_spec":elem_spec}
+    if "compression" in data_in.keys():
+        data_tfrecords["compression"] = str(data_in["compression"])
     create_tfrecords(data_in=data_tfrecords)
 
 
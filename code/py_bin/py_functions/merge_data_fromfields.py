@@ -22,7 +22,15 @@ import sys
 import tensorflow as tf
 import os
 import numpy as np
+import multiprocessing
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
+from py_bin.py_functions.tfrecord_format import serialize_example, serialize_snapshot, compression_type
+from py_bin.py_class.field_cache import field_cache
+from py_bin.py_functions.prefetch_fields import prefetch_fields, read_norm_pair
+from py_bin.py_functions.read_norm_velocity import read_norm_velocity
+from py_bin.py_functions.tfrecord_manifest import add_manifest, read_manifest, merge_manifest, write_header
+from py_bin.py_functions.tfrecord_manifest import file_checksum
 
 def create_datasets(data_in={"folder":"../../P125_21pi_vu/","file":'P125_21pi_vu.1000.h5.uvw',"elem_spec":[],
                              "padding":15,"shpx":1,"shpy":1,"shpz":1,"dx":1,"dy":1,"dz":1,"data_folder":"Data",
@@ -61,6 +69,9 @@ def create_datasets(data_in={"folder":"../../P125_21pi_vu/","file":'P125_21pi_vu
                                                                                         False: normalization 
                                                                                         between minimum and maximum)
             - delta_pred  : number of fields to advance in the predictions
+            - field_cache : (optional) cache of the normalized fields (py_bin.py_class.field_cache)
+            - data_read   : (optional) input and output fields if they have already been read (output of
+                            read_norm_pair)
     
     Returns
     -------
@@ -69,11 +80,6 @@ def create_datasets(data_in={"folder":"../../P125_21pi_vu/","file":'P125_21pi_vu
         Data:
             - data_XY : input and output data
     """
-    # -------------------------------------------------------------------------------------------------------------------
-    # Import modules
-    # -------------------------------------------------------------------------------------------------------------------
-    from py_bin.py_functions.read_norm_velocity import read_norm_velocity
-    
     # -------------------------------------------------------------------------------------------------------------------
     # Read data
     # -------------------------------------------------------------------------------------------------------------------
@@ -94,94 +100,38 @@ def create_datasets(data_in={"folder":"../../P125_21pi_vu/","file":'P125_21pi_vu
     index       = int(data_in["index"])
     delta_pred  = int(data_in["delta_pred"])
     data_type   = str(data_in["data_type"])
+    if "field_cache" in data_in.keys():
+        field_cache = data_in["field_cache"]
+    else:
+        field_cache = None
+    if "data_read" in data_in.keys():
+        data_read   = data_in["data_read"]
+    else:
+        data_read   = None
     version_tf  = np.array(tf.__version__.split('.'),dtype="int")
-    data_X      = np.zeros((1,shpy,shpz+2*padding,shpx+2*padding,3),dtype=data_type)
-    data_Y      = np.zeros((1,shpy,shpz,shpx,3),dtype=data_type)
-    
-    # ---------------------------------------------------------------------------------------------------------------
-    # Read the input field
-    # ---------------------------------------------------------------------------------------------------------------
-    data_norm_X     = {"folder":folder,"file":file,"padding":padding,"shpx":shpx,
-                       "shpy":shpy,"shpz":shpz,"dx":dx,"dy":dy,"dz":dz,"data_folder":data_folder,
-                       "umean_file":umean_file,"unorm_file":unorm_file,"index":index,"data_type":data_type,
-                       "mean_norm":mean_norm}
-    data_veloc_norm = read_norm_velocity(data_in=data_norm_X)
-    norm_velocity_X = data_veloc_norm["norm_velocity"]
-    print("Time for reading the field: "+str(data_veloc_norm["time_read"]),flush=True)
-    print("Time for normalizing the field: "+str(data_veloc_norm["time_norm"]),flush=True)
-    del data_norm_X,data_veloc_norm
-    
-    # ---------------------------------------------------------------------------------------------------------------
-    # Read the output field
-    # ---------------------------------------------------------------------------------------------------------------
-    data_norm_Y     = {"folder":folder,"file":file,"padding":0,"shpx":shpx,
-                       "shpy":shpy,"shpz":shpz,"dx":dx,"dy":dy,"dz":dz,"data_folder":data_folder,
-                       "umean_file":umean_file,"unorm_file":unorm_file,"index":index+delta_pred,
-                       "data_type":data_type,"mean_norm":mean_norm}
-    data_veloc_norm = read_norm_velocity(data_in=data_norm_Y)
-    norm_velocity_Y = data_veloc_norm["norm_velocity"]
-    print("Time for reading the field: "+str(data_veloc_norm["time_read"]),flush=True)
-    print("Time for normalizing the field: "+str(data_veloc_norm["time_norm"]),flush=True)
-    del data_norm_Y,data_veloc_norm
-    print("-"*100,flush=True)
     
     # ---------------------------------------------------------------------------------------------------------------
-    # Store the input and output data
+    # Read the input and the output fields if they have not been read. The normalized fields are channel-last
+    # tensors of the data type, they are used as the input and output data without copying them
     # ---------------------------------------------------------------------------------------------------------------
-    data_X[0,:,:,:,0] = norm_velocity_X['unorm']
-    data_X[0,:,:,:,1] = norm_velocity_X['vnorm']
-    data_X[0,:,:,:,2] = norm_velocity_X['wnorm']
-    del norm_velocity_X
-    data_Y[0,:,:,:,0] = norm_velocity_Y['unorm']
-    data_Y[0,:,:,:,1] = norm_velocity_Y['vnorm']
-    data_Y[0,:,:,:,2] = norm_velocity_Y['wnorm']
-    del norm_velocity_Y
+    if data_read is None:
+        data_read   = read_norm_pair(data_in={"folder":folder,"file":file,"padding":padding,"shpx":shpx,
+                                              "shpy":shpy,"shpz":shpz,"dx":dx,"dy":dy,"dz":dz,
+                                              "data_folder":data_folder,"umean_file":umean_file,
+                                              "unorm_file":unorm_file,"index":index,"delta_pred":delta_pred,
+                                              "data_type":data_type,"mean_norm":mean_norm,"norm_out":True,
+                                              "field_cache":field_cache})
+    data_X = data_read["norm_tensor_in"][np.newaxis]
+    data_Y = data_read["norm_tensor_out"][np.newaxis]
+    print("Time for reading the fields: "+str(data_read["time_read"]),flush=True)
+    print("Time for normalizing the fields: "+str(data_read["time_norm"]),flush=True)
+    del data_read
     print("-"*100,flush=True)
     
     data_XY = tf.data.Dataset.from_tensor_slices((data_X,data_Y))
     data_out = {"data_XY":data_XY}
     return data_out
 
-def serialize_example(data_in={"feature":[],"label":[]}):
-    """
-    .....................................................................................................................
-    # _serialize_example: Create a tf.train.Example message ready to be written to a file.
-    .....................................................................................................................
-    Parameters
-    ----------
-    data_in : dict, optional
-        data containing the input information.
-        The default is {"feature":[],"label":[]}.
-        Data:
-            - feature : features of the tfrecord
-            - label   : name of the tfrecord
-    
-    Returns
-    -------
-    dict
-        Structure containing mapped example
-        Data:
-            - example : Structure containing mapped example
-    """
-    # -------------------------------------------------------------------------------------------------------------------
-    # Read the data
-    # -------------------------------------------------------------------------------------------------------------------
-    feature = data_in["feature"]
-    label   = data_in["label"]
-    
-    # -------------------------------------------------------------------------------------------------------------------
-    # Create a dictionary mapping the feature name to the tf.train.Example-compatible data type.
-    # -------------------------------------------------------------------------------------------------------------------
-    feature = {'feature': tf.train.Feature(float_list=tf.train.FloatList(value=feature.flatten())),
-               'label': tf.train.Feature(float_list=tf.train.FloatList(value=label.flatten()))}
-
-    # -------------------------------------------------------------------------------------------------------------------
-    # Create a Features message using tf.train.Example.
-    # -------------------------------------------------------------------------------------------------------------------
-    example_proto = tf.train.Example(features=tf.train.Features(feature=feature))
-    data_out      = {"example":example_proto.SerializeToString()}
-    return data_out
-
 def write_tfrecord(data_in={"output_path":'/tfrecord/merged_vali_data/dataset_0000.tfrecord',"dataset":[]}):
     """
     ---------------------------------------------------------------------------------------------------------------------
@@ -193,8 +143,9 @@ def write_tfrecord(data_in={"output_path":'/tfrecord/merged_vali_data/dataset_00
         DESCRIPTION. The default is {"file_path":'/tfrecord/merged_vali_data/dataset_0000.tfrecord',
                                      "dataset":[]}.
         Data:
-            - file      : path to the file to write
-            - dataset   : Data to save
+            - file        : path to the file to write
+            - dataset     : Data to save
+            - compression : (optional) compression of the file ("": no compression, "ZLIB", "GZIP")
 
     Returns
     -------
@@ -203,16 +154,59 @@ def write_tfrecord(data_in={"output_path":'/tfrecord/merged_vali_data/dataset_00
     """
     output_path = str(data_in["output_path"])
     dataset     = data_in["dataset"]
-    with tf.io.TFRecordWriter(output_path) as writer:
+    if "compression" in data_in.keys():
+        compression = compression_type(data_in={"compression":data_in["compression"]})["compression"]
+    else:
+        compression = ""
+    options     = tf.io.TFRecordOptions(compression_type=compression)
+    with tf.io.TFRecordWriter(output_path,options=options) as writer:
         for features, labels in tqdm(dataset, desc=f"Writing {output_path}"):
             data_serialize = {"feature":features.numpy(),"label":labels.numpy()}
             example        = serialize_example(data_in=data_serialize)["example"]
             writer.write(example)
     
 
+def write_examples(data_in={"output_path":'/tfrecord/dataset_0000.tfrecord',"examples":[],"compression":"",
+                            "manifest_file":None}):
+    """
+    ---------------------------------------------------------------------------------------------------------------------
+    # write_examples : Writes serialized examples to a TFRecord file. The file is written with a temporal name and
+                       renamed, so an interrupted writing does not leave a corrupted file. The finished file is added to
+                       the manifest with its size, number of records and checksum.
+    ---------------------------------------------------------------------------------------------------------------------
+    Parameters
+    ----------
+    data_in : dict, optional
+        The default is {"output_path":'/tfrecord/dataset_0000.tfrecord',"examples":[],"compression":"",
+                        "manifest_file":None}.
+        Data:
+            - output_path   : path to the file to write
+            - examples      : serialized examples
+            - compression   : compression of the file ("": no compression, "ZLIB", "GZIP")
+            - manifest_file : file of the manifest of the finished files (None to avoid the manifest)
+
+    Returns
+    -------
+    None.
+
+    """
+    output_path   = str(data_in["output_path"])
+    examples      = data_in["examples"]
+    compression   = compression_type(data_in={"compression":data_in["compression"]})["compression"]
+    manifest_file = data_in["manifest_file"]
+    options       = tf.io.TFRecordOptions(compression_type=compression)
+    file_tmp      = output_path+".tmp"
+    with tf.io.TFRecordWriter(file_tmp,options=options) as writer:
+        for example in examples:
+            writer.write(example)
+    os.replace(file_tmp,output_path)
+    if manifest_file is not None:
+        add_manifest(data_in={"manifest_file":manifest_file,"file":output_path,"nrecord":len(examples)})
+    
+
 def create_tfrecords(data_in={"output_directory":'/tfrecord/',"base_directory":"../../P125_21pi_vu_tf_float32/",
-                              "base_file":"P125_21pi_vu.$INDEX$.h5.uvw","datasets":[],"elem_spec":[],"shpx":1,
-                              "shpy":1,"shpz":1,"dx":1,"dy":1,"dz":1,"padding":15,"data_type":"float32",
+                              "base_file":"P125_21pi_vu.$INDEX$.h5.uvw","datasets":[],"shpx":1,"shpy":1,
+                              "shpz":1,"dx":1,"dy":1,"dz":1,"padding":15,"data_type":"float32",
                               "data_folder":"Data","umean_file":"umean.txt","unorm_file":"norm.txt","mean_norm":False,
                               "delta_pred":1}):
     """
@@ -223,8 +217,8 @@ def create_tfrecords(data_in={"output_directory":'/tfrecord/',"base_directory":"
     ----------
     data_in : TYPE, optional
         DESCRIPTION. The default is {"output_directory":'/tfrecord/',"base_directory":"../../P125_21pi_vu_tf_float32/",
-                                     "base_file":"P125_21pi_vu.$INDEX$.h5.uvw","datasets":[],"elem_spec":[],"shpx":1,
-                                     "shpy":1,"shpz":1,"dx":1,"dy":1,"dz":1,"padding":15,"data_type":"float32",
+                                     "base_file":"P125_21pi_vu.$INDEX$.h5.uvw","datasets":[],"shpx":1,"shpy":1,
+                                     "shpz":1,"dx":1,"dy":1,"dz":1,"padding":15,"data_type":"float32",
                                      "data_folder":"Data","umean_file":"umean.txt","unorm_file":"norm.txt",
                                      "mean_norm":False,"delta_pred":1}.
         Data:
@@ -232,7 +226,6 @@ def create_tfrecords(data_in={"output_directory":'/tfrecord/',"base_directory":"
             - base_directory   : directory of the files to store in the output directory
             - base_file        : name of the files stored in the base_directory
             - datasets         : indices of the fields to read
-            - elem_spec        : specification of the elements of the dataset
             - shpx             : shape in the streamwise direction
             - shpy             : shape in the wall-normal direction
             - shpz             : shape in the spanwise direction
@@ -249,6 +242,9 @@ def create_tfrecords(data_in={"output_directory":'/tfrecord/',"base_directory":"
                                                                                              False: normalization 
                                                                                              between minimum and maximum)
             - delta_pred       : number of fields to advance in the predictions
+            - field_prefetch   : (optional) number of fields read in the background (default 2)
+            - compression      : (optional) compression of the tfrecord files ("": no compression, "ZLIB", "GZIP")
+            - manifest_file    : (optional) file of the manifest of the finished files (default None)
 
     Returns
     -------
@@ -262,7 +258,6 @@ def create_tfrecords(data_in={"output_directory":'/tfrecord/',"base_directory":"
     base_directory   = str(data_in["base_directory"])
     base_file        = str(data_in["base_file"])
     datasets         = np.array(data_in["datasets"],dtype="int")
-    elem_spec        = data_in["elem_spec"]
     shpx             = int(data_in["shpx"])
     shpy             = int(data_in["shpy"])
     shpz             = int(data_in["shpz"])
@@ -285,27 +280,164 @@ def create_tfrecords(data_in={"output_directory":'/tfrecord/',"base_directory":"
         os.makedirs(output_directory)
     
     # -------------------------------------------------------------------------------------------------------------------
-    # Process each dataset file one by one and write the tfrecords
+    # Define the cache of the normalized fields. The output field of the index ii is the input field of the index
+    # ii+delta_pred, the cache stores the fields between them and the fields read in the background to read and
+    # normalize every field once.
+    #   - field_step   : minimum separation between the fields of the datasets
+    #   - nfield_cache : number of fields stored in the cache
     # -------------------------------------------------------------------------------------------------------------------
-    for idx in np.arange(len(datasets)):
-        # ---------------------------------------------------------------------------------------------------------------
-        # Create the data to load to the tfrecords
-        # ---------------------------------------------------------------------------------------------------------------
+    if "field_prefetch" in data_in.keys():
+        field_prefetch = int(data_in["field_prefetch"])
+    else:
+        field_prefetch = 2
+    if "compression" in data_in.keys():
+        compression = str(data_in["compression"])
+    else:
+        compression = ""
+    if "manifest_file" in data_in.keys():
+        manifest_file = data_in["manifest_file"]
+    else:
+        manifest_file = None
+    field_step   = np.diff(np.unique(datasets))
+    field_step   = int(np.min(field_step)) if len(field_step) > 0 else 1
+    nfield_cache = 2*(int(np.ceil(delta_pred/field_step))+1+field_prefetch)
+    cache        = field_cache(data_in={"max_bytes":nfield_cache*3*np.dtype(data_type).itemsize*shpx*shpy*shpz})
+    data_norm    = {"folder":base_directory,"file":base_file,"padding":padding,"shpx":shpx,"shpy":shpy,"shpz":shpz,
+                    "dx":dx,"dy":dy,"dz":dz,"data_folder":data_folder,"umean_file":umean_file,
+                    "unorm_file":unorm_file,"delta_pred":delta_pred,"data_type":data_type,"mean_norm":mean_norm,
+                    "norm_out":True,"field_cache":cache}
+    data_read    = [dict(data_norm,index=int(index)) for index in datasets]
+    fields_read  = prefetch_fields(data_in={"function":read_norm_pair,"data_read":data_read,
+                                            "nprefetch":field_prefetch,"nworkers":1})
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Process each dataset file one by one and write the tfrecords. The normalized tensors are serialized directly.
+    # -------------------------------------------------------------------------------------------------------------------
+    for idx,data_read in zip(np.arange(len(datasets)),fields_read):
         index       = int(datasets[idx])
-        dataset_in  = {"folder":base_directory,"file":base_file,"elem_spec":elem_spec,"shpx":shpx,"shpy":shpy,
-                       "shpz":shpz,"dx":dx,"dy":dy,"dz":dz,"padding":padding,"data_type":data_type,
-                       "data_folder":data_folder,"umean_file":umean_file,"unorm_file":unorm_file,"mean_norm":mean_norm,
-                       "index":index,"delta_pred":delta_pred}
-        dataset     = create_datasets(dataset_in)["data_XY"]
-        # ---------------------------------------------------------------------------------------------------------------
-        # Create the tfrecords
-        # ---------------------------------------------------------------------------------------------------------------
+        print("Time for reading the fields: "+str(data_read["time_read"]),flush=True)
+        print("Time for normalizing the fields: "+str(data_read["time_norm"]),flush=True)
+        example     = serialize_example(data_in={"feature":data_read["norm_tensor_in"],
+                                                 "label":data_read["norm_tensor_out"]})["example"]
+        del data_read
         output_path = os.path.join(output_directory, f'dataset_{index}.tfrecord')
-        data_write  = {"output_path":output_path,"dataset":dataset}
-        write_tfrecord(data_in=data_write)
+        write_examples(data_in={"output_path":output_path,"examples":[example],"compression":compression,
+                                "manifest_file":manifest_file})
         print(f"Dataset {idx} written to {output_path}",flush=True)
     
 
+def create_snapshots(data_in={"output_directory":'/tfrecord/',"base_directory":"../../P125_21pi_vu/",
+                              "base_file":"P125_21pi_vu.$INDEX$.h5.uvw","datasets":[],"shpx":1,"shpy":1,"shpz":1,
+                              "dx":1,"dy":1,"dz":1,"data_type":"float32","data_folder":"Data",
+                              "umean_file":"umean.txt","unorm_file":"norm.txt","mean_norm":False,"delta_pred":1}):
+    """
+    ---------------------------------------------------------------------------------------------------------------------
+    # create_snapshots : Function to create the tfrecords of the snapshots. Each normalized field is stored once without
+                         padding in the file snapshot_<index>.tfrecord. The input and the output fields of the training
+                         are paired and padded when the files are read.
+    ---------------------------------------------------------------------------------------------------------------------
+    Parameters
+    ----------
+    data_in : TYPE, optional
+        DESCRIPTION. The default is {"output_directory":'/tfrecord/',"base_directory":"../../P125_21pi_vu/",
+                                     "base_file":"P125_21pi_vu.$INDEX$.h5.uvw","datasets":[],"shpx":1,"shpy":1,
+                                     "shpz":1,"dx":1,"dy":1,"dz":1,"data_type":"float32","data_folder":"Data",
+                                     "umean_file":"umean.txt","unorm_file":"norm.txt","mean_norm":False,
+                                     "delta_pred":1}.
+        Data:
+            - output_directory : directory to store the tfrecord files
+            - base_directory   : directory of the flow fields
+            - base_file        : name of the flow fields
+            - datasets         : indices of the input fields, the fields datasets+delta_pred are also stored
+            - shpx             : shape in the streamwise direction
+            - shpy             : shape in the wall-normal direction
+            - shpz             : shape in the spanwise direction
+            - dx               : downsampling in the streamwise direction
+            - dy               : downsampling in the wall-normal direction
+            - dz               : downsampling in the spanwise direction
+            - data_type        : type of data used (float32,float16)
+            - data_folder      : folder to store the data of the model
+            - umean_file       : file storing the mean velocity
+            - unorm_file       : file storing the normalization
+            - mean_norm        : flag for choosing between standarization and normalization (True: standarization with
+                                                                                             mean and standard deviation,
+                                                                                             False: normalization 
+                                                                                             between minimum and maximum)
+            - delta_pred       : number of fields to advance in the predictions
+            - field_prefetch   : (optional) number of fields read in the background (default 2)
+            - compression      : (optional) compression of the tfrecord files ("": no compression, "ZLIB", "GZIP")
+            - manifest_file    : (optional) file of the manifest of the finished files (default None)
+            - snapshot_index   : (optional) indices of the stored fields (default datasets and datasets+delta_pred)
+
+    Returns
+    -------
+    None.
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read data
+    # -------------------------------------------------------------------------------------------------------------------
+    output_directory = str(data_in["output_directory"])
+    base_directory   = str(data_in["base_directory"])
+    base_file        = str(data_in["base_file"])
+    datasets         = np.array(data_in["datasets"],dtype="int")
+    shpx             = int(data_in["shpx"])
+    shpy             = int(data_in["shpy"])
+    shpz             = int(data_in["shpz"])
+    dx               = int(data_in["dx"])
+    dy               = int(data_in["dy"])
+    dz               = int(data_in["dz"])
+    data_folder      = str(data_in["data_folder"])
+    umean_file       = str(data_in["umean_file"])
+    unorm_file       = str(data_in["unorm_file"])
+    mean_norm        = bool(data_in["mean_norm"])
+    delta_pred       = int(data_in["delta_pred"])
+    data_type        = str(data_in["data_type"])
+    if "field_prefetch" in data_in.keys():
+        field_prefetch = int(data_in["field_prefetch"])
+    else:
+        field_prefetch = 2
+    if "compression" in data_in.keys():
+        compression = compression_type(data_in={"compression":data_in["compression"]})["compression"]
+    else:
+        compression = ""
+    if "manifest_file" in data_in.keys():
+        manifest_file = data_in["manifest_file"]
+    else:
+        manifest_file = None
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Create output directory if it does not exist
+    # -------------------------------------------------------------------------------------------------------------------
+    if not os.path.exists(output_directory):
+        os.makedirs(output_directory)
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Define the fields to store. Every field used as input or as output is read, normalized and stored once.
+    #   - index_snap : indices of the stored fields
+    # -------------------------------------------------------------------------------------------------------------------
+    if "snapshot_index" in data_in.keys():
+        index_snap = np.array(data_in["snapshot_index"],dtype="int")
+    else:
+        index_snap = np.unique(np.concatenate((datasets,datasets+delta_pred)))
+    data_norm   = {"folder":base_directory,"file":base_file,"padding":0,"shpx":shpx,"shpy":shpy,"shpz":shpz,
+                   "dx":dx,"dy":dy,"dz":dz,"data_folder":data_folder,"umean_file":umean_file,
+                   "unorm_file":unorm_file,"data_type":data_type,"mean_norm":mean_norm,"field_cache":None}
+    data_read   = [dict(data_norm,index=int(index)) for index in index_snap]
+    fields_read = prefetch_fields(data_in={"function":read_norm_velocity,"data_read":data_read,
+                                           "nprefetch":field_prefetch,"nworkers":1})
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Write the tfrecords
+    # -------------------------------------------------------------------------------------------------------------------
+    for index,data_field in zip(index_snap,fields_read):
+        output_path = os.path.join(output_directory,f'snapshot_{index}.tfrecord')
+        example     = serialize_snapshot(data_in={"field":data_field["norm_tensor"],"index":index})["example"]
+        write_examples(data_in={"output_path":output_path,"examples":[example],"compression":compression,
+                                "manifest_file":manifest_file})
+        print(f"Snapshot {index} written to {output_path}",flush=True)
+    
+
 def merge_data(data_in={"base_directory":"../../P125_21pi_vu_tf_float32/","base_file":"P125_21pi_vu.$INDEX$.h5.uvw",
                         "padding":15,"shpx":1,"shpy":1,"shpz":1,"dx":1,"dy":1,"dz":1,"data_type":"float32",
                         "datasets":[],"output_path":'/tfrecord/merged_vali_data/',"data_folder":"Data",
@@ -313,7 +445,8 @@ def merge_data(data_in={"base_directory":"../../P125_21pi_vu_tf_float32/","base_
     """
     .....................................................................................................................
     # merge_data: Function for reading the training and validation data in the tensorflow format for proper usage of 
-                  Berzelius.
+                  Berzelius. The files are written by a pool of processes and the files finished in a previous
+                  calculation are skipped using the manifest of the output folder.
     .....................................................................................................................
     Parameters
     ----------
@@ -342,6 +475,14 @@ def merge_data(data_in={"base_directory":"../../P125_21pi_vu_tf_float32/","base_
                                                                             deviation, False: normalize between 
                                                                             minimum and maximum)
             - delta_pred     : number of files to advance the predictions
+            - field_prefetch : (optional) number of fields read in the background (default 2)
+            - compression    : (optional) compression of the tfrecord files ("": no compression, "ZLIB", "GZIP")
+            - tfrecord_mode  : (optional) storage mode of the tfrecord files ("pair": padded input and output fields
+                                                                              in each file, "snapshot": each field 
+                                                                              stored once, default "pair")
+            - nworkers       : (optional) number of processes writing the tfrecord files (default 1)
+            - memory_budget  : (optional) memory available for the processes in GB, the number of processes is
+                               reduced to fit it (default 0, no limit)
   
     Returns
     -------
@@ -367,26 +508,113 @@ def merge_data(data_in={"base_directory":"../../P125_21pi_vu_tf_float32/","base_
     unorm_file     = str(data_in["unorm_file"])
     mean_norm      = bool(data_in["mean_norm"])
     delta_pred     = int(data_in["delta_pred"])
-    if data_type == "float32":
-        dtype = tf.float32
-    elif data_type == "float16":
-        dtype = tf.float16
-    else:
+    if data_type not in ["float32","float16"]:
         print("Exit the calculation due to invalid data type.",flush=True)
         sys.exit()
+    if "tfrecord_mode" in data_in.keys():
+        tfrecord_mode = str(data_in["tfrecord_mode"])
+    else:
+        tfrecord_mode = "pair"
+    if "nworkers" in data_in.keys():
+        nworkers = int(data_in["nworkers"])
+    else:
+        nworkers = 1
+    if "memory_budget" in data_in.keys():
+        memory_budget = float(data_in["memory_budget"])
+    else:
+        memory_budget = 0
+    if "field_prefetch" in data_in.keys():
+        field_prefetch = int(data_in["field_prefetch"])
+    else:
+        field_prefetch = 2
     
     # -------------------------------------------------------------------------------------------------------------------
-    # Define your element spec here based on the data structure
+    # Define the parameters of the generation of the files. The parameters are stored in the header of the manifest and
+    # the files generated with different parameters are written again. The normalization is identified by the checksum
+    # of its files.
     # -------------------------------------------------------------------------------------------------------------------
-    elem_spec = (tf.TensorSpec(shape=(shpy,shpz+2*padding,shpx+2*padding,3),dtype=dtype),
-                 tf.TensorSpec(shape=(shpy,shpz,shpx,3),dtype=dtype))
+    if "compression" in data_in.keys():
+        compression = str(data_in["compression"])
+    else:
+        compression = ""
+    params = {"base_directory":base_directory,"base_file":base_file,"padding":padding,"shpx":shpx,"shpy":shpy,
+              "shpz":shpz,"dx":dx,"dy":dy,"dz":dz,"data_type":data_type,"mean_norm":mean_norm,
+              "delta_pred":delta_pred,"tfrecord_mode":tfrecord_mode,"compression":compression}
+    for key,file_norm in [("umean_file",umean_file),("unorm_file",unorm_file)]:
+        file_norm   = os.path.join(data_folder,file_norm)
+        params[key] = os.path.basename(file_norm)
+        if os.path.exists(file_norm):
+            params[key+"_md5"] = file_checksum(data_in={"file":file_norm,"block_size":16*1024**2})["checksum"]
     
     # -------------------------------------------------------------------------------------------------------------------
-    # Create the tfrecords
+    # Define the files to write and skip the files of the manifest. The files of the manifest have been finished in a
+    # previous calculation with the same parameters.
+    #   - index_file : indices of the files (input fields in the pair mode, all the fields in the snapshot mode)
+    #   - pending    : indices of the files to write
+    # -------------------------------------------------------------------------------------------------------------------
+    if tfrecord_mode == "pair":
+        index_file  = np.unique(datasets)
+        name_file   = "dataset_"
+        function    = create_tfrecords
+    elif tfrecord_mode == "snapshot":
+        index_file  = np.unique(np.concatenate((datasets,datasets+delta_pred)))
+        name_file   = "snapshot_"
+        function    = create_snapshots
+    else:
+        print("Exit the calculation due to invalid tfrecord mode: "+tfrecord_mode,flush=True)
+        sys.exit()
+    data_done  = read_manifest(data_in={"output_directory":output_path,"params":params})
+    files_done = data_done["files"]
+    pending    = np.array([index for index in index_file if name_file+str(index)+".tfrecord" not in files_done],
+                          dtype="int")
+    if data_done["nskip"] > 0:
+        print("Manifests generated with different parameters: "+str(data_done["nskip"])+
+              ", their files are written again",flush=True)
+    print("Tfrecord files finished: "+str(len(index_file)-len(pending))+" of "+str(len(index_file)),flush=True)
+    if len(pending) == 0:
+        merge_manifest(data_in={"output_directory":output_path,"params":params})
+        return
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Limit the number of workers to the memory budget. Each worker stores the cache of the normalized fields, the
+    # fields read in the background and the velocity read in float32.
+    #   - field_step    : minimum separation between the fields to write
+    #   - nbytes_field  : memory of a normalized field with padding
+    #   - nbytes_worker : memory of a worker
+    # -------------------------------------------------------------------------------------------------------------------
+    field_step    = np.diff(pending)
+    field_step    = int(np.min(field_step)) if len(field_step) > 0 else 1
+    nbytes_field  = 3*8*shpy*(shpz+2*padding)*(shpx+2*padding)
+    nbytes_worker = nbytes_field*2*(int(np.ceil(delta_pred/field_step))+2+field_prefetch)
+    if memory_budget > 0:
+        nworkers = min(nworkers,max(int(memory_budget*1024**3//nbytes_worker),1))
+    nworkers = max(min(nworkers,len(pending)),1)
+    print("Workers writing the tfrecord files: "+str(nworkers),flush=True)
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Create the tfrecords. Each worker writes a set of consecutive fields, so the cache of the fields is reused, and
+    # stores its own manifest with the parameters in the header. The manifests are merged at the end. The processes are
+    # started with spawn, as the forked processes would inherit the state of tensorflow of the main process.
     # -------------------------------------------------------------------------------------------------------------------
     data_tfrecords = {"output_directory":output_path,"base_directory":base_directory,"base_file":base_file,
-                      "datasets":datasets,"elem_spec":elem_spec,"shpx":shpx,"shpy":shpy,"shpz":shpz,"dx":dx,"dy":dy,
-                      "dz":dz,"padding":padding,"data_type":data_type,"data_folder":data_folder,"umean_file":umean_file,
-                      "unorm_file":unorm_file,"mean_norm":mean_norm,"delta_pred":delta_pred}
-    create_tfrecords(data_in=data_tfrecords)
-
+                      "shpx":shpx,"shpy":shpy,"shpz":shpz,"dx":dx,"dy":dy,"dz":dz,"padding":padding,
+                      "data_type":data_type,"data_folder":data_folder,"umean_file":umean_file,"unorm_file":unorm_file,
+                      "mean_norm":mean_norm,"delta_pred":delta_pred,"field_prefetch":field_prefetch}
+    if "compression" in data_in.keys():
+        data_tfrecords["compression"] = compression
+    data_worker = []
+    for ii,chunk in enumerate(np.array_split(pending,nworkers)):
+        data_ii = dict(data_tfrecords,datasets=chunk,
+                       manifest_file=os.path.join(output_path,"manifest_"+str(os.getpid())+"_"+str(ii)+".txt"))
+        if tfrecord_mode == "snapshot":
+            data_ii["snapshot_index"] = chunk
+        write_header(data_in={"manifest_file":data_ii["manifest_file"],"params":params})
+        data_worker.append(data_ii)
+    if nworkers > 1:
+        with ProcessPoolExecutor(max_workers=nworkers,mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(function,data_in=data_ii) for data_ii in data_worker]
+            for future in futures:
+                future.result()
+    else:
+        function(data_in=data_worker[0])
+    merge_manifest(data_in={"output_directory":output_path,"params":params})
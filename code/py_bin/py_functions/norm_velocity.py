@@ -8,17 +8,22 @@ Created on Fri Mar 22 11:59:50 2024
 @author:  Andres Cremades Botella
 
 File to normalize the velocity fields. The normalization generates values between 0 and 1 using the minimum and the 
-maximum of the velocity values. The file contains the following functions:
+maximum of the velocity values. The normalization is evaluated in place in the type of the model data. The file
+contains the following functions:
     Functions:
-        - norm_velocity : function for normalize the velocity
-        - dim_velocity  : function for dimensionalize the velocity
+        - read_norm_param      : function for reading the normalization constants of the velocity
+        - norm_velocity        : function for normalize the velocity
+        - norm_velocity_tensor : function for normalize the velocity in a channel-last tensor
+        - dim_velocity         : function for dimensionalize the velocity
 """
 
 # -----------------------------------------------------------------------------------------------------------------------
 # Import packages for all the functions
 # -----------------------------------------------------------------------------------------------------------------------
 import sys
+import os
 import numpy as np
+from functools import lru_cache
 
 # -----------------------------------------------------------------------------------------------------------------------
 # -----------------------------------------------------------------------------------------------------------------------
@@ -26,6 +31,89 @@ import numpy as np
 # -----------------------------------------------------------------------------------------------------------------------
 # -----------------------------------------------------------------------------------------------------------------------
 
+@lru_cache(maxsize=8)
+def _norm_param(file_norm,mean_norm,mtime):
+    """
+    .....................................................................................................................
+    # _norm_param: Function to read the normalization constants of a file. The constants are stored by lru_cache for
+                   each modification time of the file.
+    .....................................................................................................................
+    Parameters
+    ----------
+    file_norm : str
+        Path of the normalization file.
+    mean_norm : bool
+        Flag for normalizing with the mean.
+    mtime : float
+        Modification time of the file.
+
+    Returns
+    -------
+    tuple
+        Offset and scale of the streamwise, wall-normal and spanwise velocities.
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # import packages
+    # -------------------------------------------------------------------------------------------------------------------
+    if mean_norm:
+        from py_bin.py_functions.normalization_normaldist import read_norm
+    else:
+        from py_bin.py_functions.normalization import read_norm
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the normalization parameters
+    # -------------------------------------------------------------------------------------------------------------------
+    norm_param = read_norm({"folder":os.path.dirname(file_norm),"file":os.path.basename(file_norm)})
+    if mean_norm:
+        offset = (float(norm_param["uumean"]),float(norm_param["vvmean"]),float(norm_param["wwmean"]))
+        scale  = (float(norm_param["uustd"]),float(norm_param["vvstd"]),float(norm_param["wwstd"]))
+    else:
+        offset = (float(norm_param["uumin"]),float(norm_param["vvmin"]),float(norm_param["wwmin"]))
+        scale  = (float(norm_param["uumax"])-float(norm_param["uumin"]),
+                  float(norm_param["vvmax"])-float(norm_param["vvmin"]),
+                  float(norm_param["wwmax"])-float(norm_param["wwmin"]))
+    return offset,scale
+
+
+def read_norm_param(data_in={"folder_data":"Data","unorm_file":"norm.txt","mean_norm":False}):
+    """
+    .....................................................................................................................
+    # read_norm_param: function for reading the normalization constants of the velocity. The file is parsed only once
+                       while it is not modified.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the normalization file.
+        The default is {"folder_data":"Data","unorm_file":"norm.txt","mean_norm":False}.
+        Data:
+            - folder_data : path to the folder containing the normalization
+            - unorm_file  : file with the normalization values
+            - mean_norm   : choose normalizing with the mean
+
+    Returns
+    -------
+    data_out : dict
+        Normalization constants, the normalized velocity is (velocity-offset)/scale
+        Data:
+            - offset : offset of the streamwise, wall-normal and spanwise velocities
+            - scale  : scale of the streamwise, wall-normal and spanwise velocities
+
+    """
+    folder_data = str(data_in["folder_data"])                  # folder of the generated data
+    unorm_file  = str(data_in["unorm_file"])                   # file of the normalization data
+    mean_norm   = bool(data_in["mean_norm"])
+    file_norm   = folder_data+'/'+unorm_file
+    try:
+        offset,scale = _norm_param(file_norm,mean_norm,os.path.getmtime(file_norm))
+    except:
+        print('Normalization file could not be located. Calculation is stopped...',flush=True)
+        sys.exit()
+    data_out = {"offset":offset,"scale":scale}
+    return data_out
+
+
 def norm_velocity(data_in={"uu":[],"vv":[],"ww":[],"folder_data":"Data","unorm_file":"norm.txt","data_type":"float32",
                            "mean_norm":False}):
     """
@@ -57,21 +145,69 @@ def norm_velocity(data_in={"uu":[],"vv":[],"ww":[],"folder_data":"Data","unorm_f
 
     """    
     # -------------------------------------------------------------------------------------------------------------------
-    # The normalization of the velocity fluctuations is generated in float format
+    # Check datatype
     # -------------------------------------------------------------------------------------------------------------------
-    uu        = np.array(data_in["uu"],dtype="float")               # velocity fluctuation in the streamwise direction.
-    vv        = np.array(data_in["vv"],dtype="float")               # velocity fluctuation in the wall-normal direction.
-    ww        = np.array(data_in["ww"],dtype="float")               # velocity fluctuation in the spanwise direction.
-    mean_norm = bool(data_in["mean_norm"])
+    if "data_type" in data_in.keys():
+        data_type = str(data_in["data_type"])                       # definition of the data type.
+        if not (data_type=="float32" or data_type=="float16"):
+            data_type = "float32"
+    else:
+        print("[trainvali_data.py:data_traintest_tf] Data type needs to be selected.")
+        sys.exit()
     
     # -------------------------------------------------------------------------------------------------------------------
-    # import packages
+    # Read the normalization parameters
     # -------------------------------------------------------------------------------------------------------------------
-    if mean_norm:
-        from py_bin.py_functions.normalization_normaldist import read_norm
-    else:
-        from py_bin.py_functions.normalization import read_norm
-        
+    norm_param = read_norm_param(data_in={"folder_data":data_in["folder_data"],"unorm_file":data_in["unorm_file"],
+                                          "mean_norm":data_in["mean_norm"]})
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Define the normalized fields in the data type. The offset is subtracted while the velocity is written in the
+    # array of the data type and the scale is applied in place
+    # -------------------------------------------------------------------------------------------------------------------
+    data_out = {}
+    for ii,key_in,key_out in [(0,"uu","unorm"),(1,"vv","vnorm"),(2,"ww","wnorm")]:
+        velocity = np.asarray(data_in[key_in])
+        norm     = np.empty(velocity.shape,dtype=data_type)
+        np.subtract(velocity,norm_param["offset"][ii],out=norm,casting="same_kind")
+        np.divide(norm,norm_param["scale"][ii],out=norm)
+        data_out[key_out] = norm
+    return data_out
+
+
+def norm_velocity_tensor(data_in={"uu":[],"vv":[],"ww":[],"folder_data":"Data","unorm_file":"norm.txt",
+                                  "data_type":"float32","mean_norm":False,"out":None}):
+    """
+    .....................................................................................................................
+    # norm_velocity_tensor: function for normalize the velocity in a channel-last tensor. The velocity components are
+                            written in the channels 0, 1 and 2 of the tensor and the normalization is applied in place,
+                            without intermediate arrays in float64.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data for the normalization of the velocity.
+        The default is {"uu":[],"vv":[],"ww":[],"folder_data":"Data","unorm_file":"norm.txt",
+                        "data_type":"float32","mean_norm":False,"out":None}.
+        Data:
+            - uu          : streamwise velocity
+            - vv          : wall-normal velocity
+            - ww          : spanwise velocity
+            - folder_data : path to the folder containing the normalization
+            - unorm_file  : file with the normalization values
+            - data_type   : type of the data (float32,float16...)
+            - mean_norm   : choose normalizing with the mean
+            - out         : (optional) tensor to write the normalized velocity, shape (shape of uu,3) and the
+                            data type. It is allocated if it is not provided
+
+    Returns
+    -------
+    data_out : dict
+        Normalized velocity
+        Data:
+            - norm_tensor : tensor of the normalized velocity, the last axis is the velocity component
+
+    """
     # -------------------------------------------------------------------------------------------------------------------
     # Check datatype
     # -------------------------------------------------------------------------------------------------------------------
@@ -84,49 +220,29 @@ def norm_velocity(data_in={"uu":[],"vv":[],"ww":[],"folder_data":"Data","unorm_f
         sys.exit()
     
     # -------------------------------------------------------------------------------------------------------------------
-    # Read the normalization parameters
+    # Read the data
+    #   - velocity : velocity components to normalize
     # -------------------------------------------------------------------------------------------------------------------
-    folder_data    = str(data_in["folder_data"])               # folder of the generated data
-    unorm_file     = str(data_in["unorm_file"])                # file of the normalization data
-    unorm_data     = {"folder":folder_data,"file":unorm_file}
-    try:
-        norm_param = read_norm(unorm_data)
-    except:
-        print('Normalization file could not be located. Calculation is stopped...',flush=True)
-        sys.exit()
-    
-    if mean_norm:
-        uumean = float(norm_param["uumean"])
-        vvmean = float(norm_param["vvmean"])
-        wwmean = float(norm_param["wwmean"])
-        uustd  = float(norm_param["uustd"])
-        vvstd  = float(norm_param["vvstd"])
-        wwstd  = float(norm_param["wwstd"])
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Define the normalized fields using float 16 format
-        # ---------------------------------------------------------------------------------------------------------------
-        unorm    = np.array((uu-uumean)/(uustd),dtype=data_type)
-        vnorm    = np.array((vv-vvmean)/(vvstd),dtype=data_type)
-        wnorm    = np.array((ww-wwmean)/(wwstd),dtype=data_type)
+    velocity = [np.asarray(data_in["uu"]),np.asarray(data_in["vv"]),np.asarray(data_in["ww"])]
+    if "out" in data_in.keys() and data_in["out"] is not None:
+        out = data_in["out"]                                        # tensor of the normalized velocity
     else:
-        uumax = float(norm_param["uumax"])
-        vvmax = float(norm_param["vvmax"])
-        wwmax = float(norm_param["wwmax"])
-        uumin = float(norm_param["uumin"])
-        vvmin = float(norm_param["vvmin"])
-        wwmin = float(norm_param["wwmin"])
-        print(uumax)
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Define the normalized fields using float 16 format
-        # ---------------------------------------------------------------------------------------------------------------
-        unorm    = np.array((uu-uumin)/(uumax-uumin),dtype=data_type)
-        vnorm    = np.array((vv-vvmin)/(vvmax-vvmin),dtype=data_type)
-        wnorm    = np.array((ww-wwmin)/(wwmax-wwmin),dtype=data_type)
-    data_out = {"unorm":unorm,"vnorm":vnorm,"wnorm":wnorm}
+        out = np.empty(velocity[0].shape+(3,),dtype=data_type)
+    norm_param = read_norm_param(data_in={"folder_data":data_in["folder_data"],"unorm_file":data_in["unorm_file"],
+                                          "mean_norm":data_in["mean_norm"]})
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Normalize each component in its channel: the offset is subtracted while the velocity is written in the tensor
+    # and the scale is applied in place
+    # -------------------------------------------------------------------------------------------------------------------
+    for ii in np.arange(3):
+        channel = out[...,ii]
+        np.subtract(velocity[ii],norm_param["offset"][ii],out=channel,casting="same_kind")
+        np.divide(channel,norm_param["scale"][ii],out=channel)
+    data_out = {"norm_tensor":out}
     return data_out
 
+
 def dim_velocity(data_in={"unorm":[],"vnorm":[],"wnorm":[],"folder_data":"Data","unorm_file":"norm.txt",
                           "data_type":"float32","mean_norm":False}):
     """
@@ -168,58 +284,20 @@ def dim_velocity(data_in={"unorm":[],"vnorm":[],"wnorm":[],"folder_data":"Data",
     else:
         print("[trainvali_data.py:data_traintest_tf] Data type needs to be selected.")
         sys.exit()
-    uu_norm   = np.array(data_in["unorm"],dtype=data_type)      # velocity fluctuation in the streamwise direction.
-    vv_norm   = np.array(data_in["vnorm"],dtype=data_type)      # velocity fluctuation in the wall-normal direction.
-    ww_norm   = np.array(data_in["wnorm"],dtype=data_type)      # velocity fluctuation in the spanwise direction.
-    mean_norm = bool(data_in["mean_norm"])
     
     # -------------------------------------------------------------------------------------------------------------------
-    # import packages
+    # Read the normalization parameters
     # -------------------------------------------------------------------------------------------------------------------
-    if mean_norm:
-        from py_bin.py_functions.normalization_normaldist import read_norm
-    else:
-        from py_bin.py_functions.normalization import read_norm
+    norm_param = read_norm_param(data_in={"folder_data":data_in["folder_data"],"unorm_file":data_in["unorm_file"],
+                                          "mean_norm":data_in["mean_norm"]})
     
     # -------------------------------------------------------------------------------------------------------------------
-    # Read the normalization parameters, use the float 16 format
+    # Define the dimensional fields in the data type
     # -------------------------------------------------------------------------------------------------------------------
-    folder_data    = str(data_in["folder_data"])                # folder of the generated data
-    unorm_file     = str(data_in["unorm_file"])                 # file of the normalization data
-    unorm_data     = {"folder":folder_data,"file":unorm_file}
-    try:
-        norm_param = read_norm(unorm_data)
-    except:
-        print('Normalization file could not be located. Calculation is stopped...',flush=True)
-        sys.exit()
-    
-    if mean_norm:
-        uumean = norm_param["uumean"]
-        vvmean = norm_param["vvmean"]
-        wwmean = norm_param["wwmean"]
-        uustd  = norm_param["uustd"]
-        vvstd  = norm_param["vvstd"]
-        wwstd  = norm_param["wwstd"]
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Define the normalized fields using float 16 format
-        # ---------------------------------------------------------------------------------------------------------------
-        uu = np.array(uu_norm*(uustd)+uumean,dtype=data_type)
-        vv = np.array(vv_norm*(vvstd)+vvmean,dtype=data_type)
-        ww = np.array(ww_norm*(wwstd)+wwmean,dtype=data_type)
-    else:
-        uumax = norm_param["uumax"]
-        vvmax = norm_param["vvmax"]
-        wwmax = norm_param["wwmax"]
-        uumin = norm_param["uumin"]
-        vvmin = norm_param["vvmin"]
-        wwmin = norm_param["wwmin"]
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Define the normalized fields using float 16 format
-        # ---------------------------------------------------------------------------------------------------------------
-        uu = np.array(uu_norm*(uumax-uumin)+uumin,dtype=data_type)
-        vv = np.array(vv_norm*(vvmax-vvmin)+vvmin,dtype=data_type)
-        ww = np.array(ww_norm*(wwmax-wwmin)+wwmin,dtype=data_type)
-    data_out = {"uu":uu,"vv":vv,"ww":ww}
+    data_out = {}
+    for ii,key_in,key_out in [(0,"unorm","uu"),(1,"vnorm","vv"),(2,"wnorm","ww")]:
+        velocity = np.array(data_in[key_in],dtype=data_type)
+        np.multiply(velocity,norm_param["scale"][ii],out=velocity)
+        np.add(velocity,norm_param["offset"][ii],out=velocity)
+        data_out[key_out] = velocity
     return data_out
@@ -11,9 +11,10 @@ File to create the normalization values for the velocity fields. The normalizati
 values following a normal distribution centered in 0 and with a standard deviation of 1. The file contains
 the following functions:
     Functions:
-        - save_norm : function for saving the normalization to a file
-        - read_norm : function for reading the normalization file
-        - calc_norm : function for calculating the normalization
+        - save_norm  : function for saving the normalization to a file
+        - read_norm  : function for reading the normalization file
+        - field_norm : function for calculating the normalization values of a field
+        - calc_norm  : function for calculating the normalization
 """
 
 # ---------------------------------------------------------------------------------------------------------------------
@@ -171,6 +172,83 @@ def read_norm(data_in={"folder":"Data","file":"norm.txt"}):
     return data_out
 
                
+def field_norm(data_in={"data_folder":"Data","umean_file":"Umean.txt","folder":"../../P125_21pi_vu",
+                         "file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,"dx":1,"dy":1,"dz":1,"shpx":192,
+                         "shpy":201,"shpz":96}):
+    """
+    .....................................................................................................................
+    # field_norm: function to calculate the sums of the velocity and the stresses of a field
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the field.
+        The default is {"data_folder":"Data","umean_file":"Umean.txt","folder":"../../P125_21pi_vu",
+                        "file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,"dx":1,"dy":1,"dz":1,"shpx":192,
+                        "shpy":201,"shpz":96}.
+        Data:
+            - data_folder : folder to store the data calculated by the code
+            - umean_file  : file of the mean velocity
+            - folder      : folder of the velocity data
+            - file        : file of the velocity data without index
+            - index       : index of the field
+            - dx          : downsampling of x direction
+            - dy          : downsampling of y direction
+            - dz          : downsampling of z direction
+            - shpx        : shape of the tensor in x
+            - shpy        : shape of the tensor in y
+            - shpz        : shape of the tensor in z
+
+    Returns
+    -------
+    dict
+        Sums of the velocity and the stresses of the field.
+        Data:
+            - uu_cum  : sum of the streamwise velocity
+            - vv_cum  : sum of the wall-normal velocity
+            - ww_cum  : sum of the spanwise velocity
+            - uu2_cum : sum of the squared streamwise velocity
+            - vv2_cum : sum of the squared wall-normal velocity
+            - ww2_cum : sum of the squared spanwise velocity
+            - uv_cum  : sum of the uv stress
+            - vw_cum  : sum of the vw stress
+            - uw_cum  : sum of the uw stress
+            - uv2_cum : sum of the squared uv stress
+            - vw2_cum : sum of the squared vw stress
+            - uw2_cum : sum of the squared uw stress
+            - nn_cum  : number of gridpoints
+    """
+    # -----------------------------------------------------------------------------------------------------------------
+    # Import packages
+    # -----------------------------------------------------------------------------------------------------------------
+    from py_bin.py_functions.read_velocity import read_velocity
+    
+    # -----------------------------------------------------------------------------------------------------------------
+    # Read the velocity fluctuations of the field
+    # -----------------------------------------------------------------------------------------------------------------
+    data_velocity      = {"folder":data_in["folder"],"file":data_in["file"],"index":data_in["index"],
+                          "dx":data_in["dx"],"dy":data_in["dy"],"dz":data_in["dz"],"shpx":data_in["shpx"],
+                          "shpy":data_in["shpy"],"shpz":data_in["shpz"],"padding":0,
+                          "data_folder":data_in["data_folder"],"umean_file":data_in["umean_file"]}
+    data_read_velocity = read_velocity(data_velocity)
+    shpx  = int(data_in["shpx"])
+    shpy  = int(data_in["shpy"])
+    shpz  = int(data_in["shpz"])
+    uu_i0 = np.array(data_read_velocity['uu'],dtype='float')
+    vv_i0 = np.array(data_read_velocity['vv'],dtype='float')
+    ww_i0 = np.array(data_read_velocity['ww'],dtype='float')
+    uv_i0 = np.multiply(uu_i0,vv_i0)
+    vw_i0 = np.multiply(vv_i0,ww_i0)
+    uw_i0 = np.multiply(uu_i0,ww_i0)
+    data_out = {"uu_cum":np.sum(uu_i0),"vv_cum":np.sum(vv_i0),"ww_cum":np.sum(ww_i0),
+                "uu2_cum":np.sum(np.multiply(uu_i0,uu_i0)),"vv2_cum":np.sum(np.multiply(vv_i0,vv_i0)),
+                "ww2_cum":np.sum(np.multiply(ww_i0,ww_i0)),"uv_cum":np.sum(uv_i0),"vw_cum":np.sum(vw_i0),
+                "uw_cum":np.sum(uw_i0),"uv2_cum":np.sum(np.multiply(uv_i0,uv_i0)),
+                "vw2_cum":np.sum(np.multiply(vw_i0,vw_i0)),"uw2_cum":np.sum(np.multiply(uw_i0,uw_i0)),
+                "nn_cum":shpx*shpy*shpz}
+    return data_out
+
+               
 def calc_norm(data_in={"field_ini":1000,"field_fin":9999,"data_folder":"Data","umean_file":"Umean.txt",
                        "dx":1,"dy":1,"dz":1,"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw",
                        "shpx":192,"shpy":201,"shpz":96,"save_file":True,"unorm_file":"norm.txt"}):
@@ -201,6 +279,9 @@ def calc_norm(data_in={"field_ini":1000,"field_fin":9999,"data_folder":"Data","u
             - shpz        : shape of the tensor in z
             - save_file   : flag to save the normalization in a file
             - unorm_file  : file of the normalization data
+            - nworkers    : (optional) number of processes
+            - chunk_size  : (optional) number of fields of each chunk
+            - chk_folder  : (optional) folder to store the partial values of the chunks to resume the calculation
             
 
     Returns
@@ -224,7 +305,7 @@ def calc_norm(data_in={"field_ini":1000,"field_fin":9999,"data_folder":"Data","u
     # -----------------------------------------------------------------------------------------------------------------
     # Import packages
     # -----------------------------------------------------------------------------------------------------------------
-    from py_bin.py_functions.read_velocity import read_velocity
+    from py_bin.py_functions.parallel_statistics import calc_parallel,merge_partials
     
     # -----------------------------------------------------------------------------------------------------------------
     # Read the data
@@ -243,50 +324,38 @@ def calc_norm(data_in={"field_ini":1000,"field_fin":9999,"data_folder":"Data","u
     shpz        = int(data_in["shpz"])        # shape in the z direction
     save_file   = bool(data_in["save_file"])  # flag to decide if the normalization must be save in a file
     unorm_file  = str(data_in["unorm_file"])  # file to save the normalization
+    if "nworkers" in data_in.keys():
+        nworkers   = int(data_in["nworkers"])   # number of processes
+        chunk_size = int(data_in["chunk_size"]) # number of fields of each chunk
+        chk_folder = data_in["chk_folder"]      # folder of the partial values of the chunks
+    else:
+        nworkers   = 1
+        chunk_size = 0
+        chk_folder = None
     
     # -----------------------------------------------------------------------------------------------------------------
-    # In the loop
-    #   - ii : index of the file that we are reading
+    # Calculate the values of the fields. The fields are divided in chunks calculated in parallel, the values of each
+    # chunk are stored in the checkpoint folder.
     # -----------------------------------------------------------------------------------------------------------------
-    for ii in range(field_ini,field_fin):
-        data_velocity      = {"folder":folder,"file":file,"index":ii,"dx":dx,"dy":dy,"dz":dz,"shpx":shpx,
-                              "shpy":shpy,"shpz":shpz,"padding":0,"data_folder":data_folder,
-                              "umean_file":umean_file}            
-        data_read_velocity = read_velocity(data_velocity)
-        uu_i0 = np.array(data_read_velocity['uu'],dtype='float')
-        vv_i0 = np.array(data_read_velocity['vv'],dtype='float')
-        ww_i0 = np.array(data_read_velocity['ww'],dtype='float')
-        uv_i0 = np.multiply(uu_i0,vv_i0)
-        vw_i0 = np.multiply(vv_i0,ww_i0)
-        uw_i0 = np.multiply(uu_i0,ww_i0)
-        if ii == field_ini:
-            uu_cum  = np.sum(uu_i0)
-            vv_cum  = np.sum(vv_i0)
-            ww_cum  = np.sum(ww_i0)
-            uu2_cum = np.sum(np.multiply(uu_i0,uu_i0))
-            vv2_cum = np.sum(np.multiply(vv_i0,vv_i0))
-            ww2_cum = np.sum(np.multiply(ww_i0,ww_i0))
-            uv_cum  = np.sum(uv_i0)
-            vw_cum  = np.sum(vw_i0)
-            uw_cum  = np.sum(uw_i0)
-            uv2_cum = np.sum(np.multiply(uv_i0,uv_i0))
-            vw2_cum = np.sum(np.multiply(vw_i0,vw_i0))
-            uw2_cum = np.sum(np.multiply(uw_i0,uw_i0))
-            nn_cum  = shpx*shpy*shpz
-        else:
-            uu_cum  += np.sum(uu_i0)
-            vv_cum  += np.sum(vv_i0)
-            ww_cum  += np.sum(ww_i0)
-            uu2_cum += np.sum(np.multiply(uu_i0,uu_i0))
-            vv2_cum += np.sum(np.multiply(vv_i0,vv_i0))
-            ww2_cum += np.sum(np.multiply(ww_i0,ww_i0))
-            uv_cum  += np.sum(uv_i0)
-            vw_cum  += np.sum(vw_i0)
-            uw_cum  += np.sum(uw_i0)
-            uv2_cum += np.sum(np.multiply(uv_i0,uv_i0))
-            vw2_cum += np.sum(np.multiply(vw_i0,vw_i0))
-            uw2_cum += np.sum(np.multiply(uw_i0,uw_i0))
-            nn_cum  += shpx*shpy*shpz
+    data_partial = {"data_folder":data_folder,"umean_file":umean_file,"folder":folder,"file":file,"dx":dx,"dy":dy,
+                    "dz":dz,"shpx":shpx,"shpy":shpy,"shpz":shpz}
+    data_cum     = calc_parallel(data_in={"function":field_norm,"merge":merge_partials,"data_partial":data_partial,
+                                          "field_ini":field_ini,"field_fin":field_fin,"field_delta":1,
+                                          "nworkers":nworkers,"chunk_size":chunk_size,"chk_folder":chk_folder,
+                                          "chk_name":"norm_normaldist"})
+    uu_cum       = data_cum["uu_cum"]
+    vv_cum       = data_cum["vv_cum"]
+    ww_cum       = data_cum["ww_cum"]
+    uu2_cum      = data_cum["uu2_cum"]
+    vv2_cum      = data_cum["vv2_cum"]
+    ww2_cum      = data_cum["ww2_cum"]
+    uv_cum       = data_cum["uv_cum"]
+    vw_cum       = data_cum["vw_cum"]
+    uw_cum       = data_cum["uw_cum"]
+    uv2_cum      = data_cum["uv2_cum"]
+    vw2_cum      = data_cum["vw2_cum"]
+    uw2_cum      = data_cum["uw2_cum"]
+    nn_cum       = data_cum["nn_cum"]
     
     uumean  = uu_cum/nn_cum
     vvmean  = vv_cum/nn_cum
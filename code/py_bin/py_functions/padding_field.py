@@ -39,6 +39,7 @@ def padding_field(data_in={"field":[],"shpx":196,"shpy":201,"shpz":96,"padding":
             - shpy        : shape in y of the tensors
             - shpz        : shape in z of the tensors
             - padding     : padding of the fields
+            - out         : (optional) array to write the field with padding
     Returns
     -------
     dict
@@ -50,29 +51,27 @@ def padding_field(data_in={"field":[],"shpx":196,"shpy":201,"shpz":96,"padding":
     # -------------------------------------------------------------------------------------------------------------------
     # Import packages
     # -------------------------------------------------------------------------------------------------------------------
-    import h5py
-    from py_bin.py_functions.umean import read_Umean
+    from py_bin.py_functions.periodic_domain import shift_pad
     
     # -------------------------------------------------------------------------------------------------------------------
     # Read the data
     # -------------------------------------------------------------------------------------------------------------------
-    field         = np.array(data_in["field"])
+    field         = np.asarray(data_in["field"])
     shpx          = int(data_in["shpx"])        # shape of the tensors in the x direction
     shpy          = int(data_in["shpy"])        # shape of the tensors in the y direction
     shpz          = int(data_in["shpz"])        # shape of the tensors in the z direction
     padding       = int(data_in["padding"])     # padding of the fields
+    if "out" in data_in.keys():
+        out = data_in["out"]                    # array to write the field with padding
+    else:
+        out = None
         
     # -------------------------------------------------------------------------------------------------------------------
     # Apply the padding if necessary. The padding takes the variable padding to add that number of nodes in both sizes
     # of the channel in the streamwise and the spanwise directions. The idea is to preserve the periodicity of the 
-    # channel
+    # channel. The padding is a gather of the periodic nodes in a new array with the type of the field.
     # -------------------------------------------------------------------------------------------------------------------
-    field_pad = np.zeros((shpy,shpz+2*padding,shpx+2*padding))
-    field_pad[:,padding:-padding,padding:-padding] = field.copy()
-    field_pad[:,:padding,padding:-padding]         = field[:,-padding:,:]
-    field_pad[:,-padding:,padding:-padding]        = field[:,:padding,:]
-    field_pad[:,:,:padding]                        = field_pad[:,:,-2*padding:-padding]
-    field_pad[:,:,-padding:]                       = field_pad[:,:,padding:2*padding]
-    field                                          = field_pad.copy()
+    field       = shift_pad(data_in={"field":field.reshape(shpy,shpz,shpx),"x0":0,"z0":0,"padding":padding,
+                                     "out":out})["field"]
     data_output = {"field":field}
     return data_output
\ No newline at end of file
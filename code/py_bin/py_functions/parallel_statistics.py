@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+-------------------------------------------------------------------------------------------------------------------------
+parallel_statistics.py
+-------------------------------------------------------------------------------------------------------------------------
+Created on Fri Oct 16 16:05:12 2026
+
+@author: Andres Cremades Botella
+
+File to calculate the statistics of a range of fields in parallel. The range of fields is divided in chunks and the
+partial statistics of each chunk are calculated in a pool of processes. Each partial statistics is stored in the
+checkpoint folder once it is finished, so an interrupted calculation reads the completed chunks and only calculates the
+remaining ones. The checkpoints are removed once all the chunks are merged. The partial statistics are merged in the
+order of the fields. The file contains the following functions:
+    Functions:
+        - chunk_fields   : function to divide the range of fields in chunks
+        - files_state    : function to read the size and the modification time of the input files of a chunk
+        - merge_partials : function to merge two partial statistics defined by sums, maximums and minimums
+        - calc_chunk     : function to calculate the partial statistics of a chunk of fields
+        - calc_parallel  : function to calculate the partial statistics of a range of fields in parallel
+"""
+
+# -----------------------------------------------------------------------------------------------------------------------
+# Import packages for all the functions
+# -----------------------------------------------------------------------------------------------------------------------
+import numpy as np
+import os
+import pickle
+import hashlib
+
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+# Define the functions
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+
+def chunk_fields(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"chunk_size":0}):
+    """
+    .....................................................................................................................
+    # chunk_fields: Function to divide the range of fields in chunks
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the range of fields.
+        The default is {"field_ini":1000,"field_fin":9999,"field_delta":1,"chunk_size":0}.
+        Data:
+            - field_ini   : index of the initial field
+            - field_fin   : index of the final field
+            - field_delta : separation between the fields
+            - chunk_size  : number of fields of each chunk (0 to use a single chunk)
+
+    Returns
+    -------
+    dict
+        Chunks of the range.
+        Data:
+            - chunks : list of the indices of the fields of each chunk
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    field_ini   = int(data_in["field_ini"])   # index of the initial field
+    field_fin   = int(data_in["field_fin"])   # index of the final field
+    field_delta = int(data_in["field_delta"]) # separation between the fields
+    chunk_size  = int(data_in["chunk_size"])  # number of fields of each chunk
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Divide the fields
+    # -------------------------------------------------------------------------------------------------------------------
+    index = list(range(field_ini,field_fin,field_delta))
+    if chunk_size <= 0:
+        chunk_size = max(len(index),1)
+    chunks   = [index[ii:ii+chunk_size] for ii in range(0,len(index),chunk_size)]
+    data_out = {"chunks":chunks}
+    return data_out
+
+
+def files_state(data_in={"data_partial":{},"index":[]}):
+    """
+    .....................................................................................................................
+    # files_state: Function to read the size and the modification time of the input files of a chunk. The files are
+                   the fields defined by the keys "folder" and "file" of the data of the partial statistics and the
+                   files of the data folder defined by the keys ending with "_file". The missing files are not
+                   included.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the chunk.
+        The default is {"data_partial":{},"index":[]}.
+        Data:
+            - data_partial : data of the function of the partial statistics
+            - index        : indices of the fields of the chunk
+
+    Returns
+    -------
+    dict
+        State of the input files.
+        Data:
+            - state : list of the name, the size and the modification time of the existing input files
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    data_partial = data_in["data_partial"] # data of the function of the partial statistics
+    index        = data_in["index"]        # indices of the fields of the chunk
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Define the input files
+    # -------------------------------------------------------------------------------------------------------------------
+    files = []
+    if "folder" in data_partial.keys() and "file" in data_partial.keys():
+        file_complete = str(data_partial["folder"])+'/'+str(data_partial["file"])
+        files        += [file_complete.replace("$INDEX$",str(int(ii))) for ii in index]
+    if "data_folder" in data_partial.keys():
+        files        += [str(data_partial["data_folder"])+'/'+str(data_partial[key])
+                         for key in sorted(data_partial.keys()) if key.endswith("_file")]
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the state of the files
+    # -------------------------------------------------------------------------------------------------------------------
+    state = []
+    for file in files:
+        if os.path.exists(file):
+            file_stat = os.stat(file)
+            state.append((file,file_stat.st_size,file_stat.st_mtime_ns))
+    data_out = {"state":state}
+    return data_out
+
+
+def merge_partials(data_in={"partial_1":None,"partial_2":None}):
+    """
+    .....................................................................................................................
+    # merge_partials: Function to merge two partial statistics. The keys ending with "max" are merged with the maximum,
+                      the keys ending with "min" with the minimum and the rest of the keys are added.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the partial statistics.
+        The default is {"partial_1":None,"partial_2":None}.
+        Data:
+            - partial_1 : first partial statistics (None if empty)
+            - partial_2 : second partial statistics (None if empty)
+
+    Returns
+    -------
+    dict
+        Merged statistics.
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    partial_1 = data_in["partial_1"] # first partial statistics
+    partial_2 = data_in["partial_2"] # second partial statistics
+    if partial_1 is None:
+        return partial_2
+    if partial_2 is None:
+        return partial_1
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Merge the statistics
+    # -------------------------------------------------------------------------------------------------------------------
+    data_out = {}
+    for key in partial_1.keys():
+        if key.endswith("max"):
+            data_out[key] = np.maximum(partial_1[key],partial_2[key])
+        elif key.endswith("min"):
+            data_out[key] = np.minimum(partial_1[key],partial_2[key])
+        else:
+            data_out[key] = partial_1[key]+partial_2[key]
+    return data_out
+
+
+def calc_chunk(data_in={"function":None,"merge":None,"data_partial":{},"index":[],"file_chk":None}):
+    """
+    .....................................................................................................................
+    # calc_chunk: Function to calculate the partial statistics of a chunk of fields. The statistics are stored in the
+                  checkpoint file when the chunk is finished.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the chunk.
+        The default is {"function":None,"merge":None,"data_partial":{},"index":[],"file_chk":None}.
+        Data:
+            - function     : function calculating the partial statistics of a field. The function receives the
+                             dictionary data_partial including the key "index" and returns None if the field is skipped
+            - merge        : function merging two partial statistics
+            - data_partial : data of the function of the partial statistics
+            - index        : indices of the fields of the chunk
+            - file_chk     : checkpoint file of the chunk (None to avoid storing the chunk)
+
+    Returns
+    -------
+    dict
+        Partial statistics of the chunk (None if all the fields are skipped).
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    function     = data_in["function"]     # function of the partial statistics of a field
+    merge        = data_in["merge"]        # function to merge the partial statistics
+    data_partial = data_in["data_partial"] # data of the function of the partial statistics
+    index        = data_in["index"]        # indices of the fields of the chunk
+    file_chk     = data_in["file_chk"]     # checkpoint file
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Accumulate the statistics of the fields
+    # -------------------------------------------------------------------------------------------------------------------
+    partial = None
+    for ii in index:
+        data_field          = data_partial.copy()
+        data_field["index"] = ii
+        partial_ii          = function(data_in=data_field)
+        partial             = merge(data_in={"partial_1":partial,"partial_2":partial_ii})
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Store the checkpoint. The file is written with a temporal name and renamed, so an interrupted writing does not
+    # leave a corrupted checkpoint
+    # -------------------------------------------------------------------------------------------------------------------
+    if file_chk is not None:
+        file_tmp = file_chk+".tmp"
+        with open(file_tmp,"wb") as file_save:
+            pickle.dump(partial,file_save)
+        os.replace(file_tmp,file_chk)
+    return partial
+
+
+def calc_parallel(data_in={"function":None,"merge":merge_partials,"data_partial":{},"field_ini":1000,
+                           "field_fin":9999,"field_delta":1,"nworkers":1,"chunk_size":0,"chk_folder":None,
+                           "chk_name":"stats"}):
+    """
+    .....................................................................................................................
+    # calc_parallel: Function to calculate the partial statistics of a range of fields in parallel. The chunks stored
+                     in the checkpoint folder are read instead of calculated. The checkpoints are removed after the
+                     merge of all the chunks.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the calculation.
+        The default is {"function":None,"merge":merge_partials,"data_partial":{},"field_ini":1000,
+                        "field_fin":9999,"field_delta":1,"nworkers":1,"chunk_size":0,"chk_folder":None,
+                        "chk_name":"stats"}.
+        Data:
+            - function     : function calculating the partial statistics of a field (defined in a module to be
+                             used by the pool of processes)
+            - merge        : function merging two partial statistics
+            - data_partial : data of the function of the partial statistics
+            - field_ini    : index of the initial field
+            - field_fin    : index of the final field
+            - field_delta  : separation between the fields
+            - nworkers     : number of processes
+            - chunk_size   : number of fields of each chunk (0 to use a single chunk)
+            - chk_folder   : folder to store the partial statistics of the chunks (None to avoid storing them)
+            - chk_name     : name of the files of the partial statistics
+
+    Returns
+    -------
+    dict
+        Merged statistics of all the fields.
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Import packages
+    # -------------------------------------------------------------------------------------------------------------------
+    from concurrent.futures import ProcessPoolExecutor
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    function     = data_in["function"]         # function of the partial statistics of a field
+    merge        = data_in["merge"]            # function to merge the partial statistics
+    data_partial = data_in["data_partial"]     # data of the function of the partial statistics
+    field_ini    = int(data_in["field_ini"])   # index of the initial field
+    field_fin    = int(data_in["field_fin"])   # index of the final field
+    field_delta  = int(data_in["field_delta"]) # separation between the fields
+    nworkers     = int(data_in["nworkers"])    # number of processes
+    chunk_size   = int(data_in["chunk_size"])  # number of fields of each chunk
+    chk_folder   = data_in["chk_folder"]       # folder of the checkpoints
+    chk_name     = str(data_in["chk_name"])    # name of the checkpoints
+    chunks       = chunk_fields(data_in={"field_ini":field_ini,"field_fin":field_fin,"field_delta":field_delta,
+                                         "chunk_size":chunk_size})["chunks"]
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Define the checkpoint files. The name contains a hash of the data of the partial statistics and of the size and
+    # the modification time of the input files of the chunk, so the checkpoints of a calculation with different data or
+    # with modified fields are not used
+    #   - data_hash  : hash of the data of the partial statistics
+    #   - chunk_hash : hash of the data and of the input files of each chunk
+    #   - file_chk   : checkpoint file of each chunk
+    # -------------------------------------------------------------------------------------------------------------------
+    if chk_folder is not None:
+        os.makedirs(chk_folder,exist_ok=True)
+        data_hash = hashlib.md5()
+        for key in sorted(data_partial.keys()):
+            value = data_partial[key]
+            if isinstance(value,np.ndarray):
+                value = value.tolist()
+            data_hash.update((str(key)+":"+str(value)+";").encode())
+        file_chk  = []
+        for chunk in chunks:
+            chunk_hash = data_hash.copy()
+            state      = files_state(data_in={"data_partial":data_partial,"index":chunk})["state"]
+            chunk_hash.update(str(state).encode())
+            file_chk.append(chk_folder+'/'+chk_name+'_'+chunk_hash.hexdigest()[:12]+'_'+str(chunk[0])+'_'+
+                            str(chunk[-1])+'.pkl')
+    else:
+        file_chk  = [None for chunk in chunks]
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the finished chunks and calculate the rest
+    #   - partials : partial statistics of each chunk
+    #   - pending  : chunks that need to be calculated
+    # -------------------------------------------------------------------------------------------------------------------
+    partials = [None for chunk in chunks]
+    pending  = []
+    for ii in range(len(chunks)):
+        if file_chk[ii] is not None and os.path.exists(file_chk[ii]):
+            print('Reading checkpoint:'+file_chk[ii],flush=True)
+            with open(file_chk[ii],"rb") as file_read:
+                partials[ii] = pickle.load(file_read)
+        else:
+            pending.append(ii)
+    data_chunk = [{"function":function,"merge":merge,"data_partial":data_partial,"index":chunks[ii],
+                   "file_chk":file_chk[ii]} for ii in pending]
+    if nworkers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(nworkers,len(pending))) as executor:
+            futures = [executor.submit(calc_chunk,data_in=data_ii) for data_ii in data_chunk]
+            for ii,future in zip(pending,futures):
+                partials[ii] = future.result()
+    else:
+        for ii,data_ii in zip(pending,data_chunk):
+            partials[ii] = calc_chunk(data_in=data_ii)
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Merge the chunks in the order of the fields
+    # -------------------------------------------------------------------------------------------------------------------
+    data_out = None
+    for partial in partials:
+        data_out = merge(data_in={"partial_1":data_out,"partial_2":partial})
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Remove the checkpoints of the finished calculation
+    # -------------------------------------------------------------------------------------------------------------------
+    for file in file_chk:
+        if file is not None and os.path.exists(file):
+            os.remove(file)
+    return data_out
@@ -9,8 +9,17 @@ Created on Wed May 15 11:58:23 2024
 
 File containing the function to percolate the structures. The file contains the following functions:
     Functions:
-        - percolation      : function for calculating the percolation
-        - save_percolation : function to save the percolation
+        - percolation_sweep         : function for calculating the percolation of a field for all the indices
+        - save_percolation          : function to save the percolation
+        - read_percolation          : function to read the percolation
+        - percolation               : function for calculating the percolation
+        - save_percolation_uvw      : function to save the percolation of the components u, v and w
+        - read_percolation_uvw      : function to read the percolation of the components u, v and w
+        - percolation_uvw           : function for calculating the percolation of the components u, v and w
+        - save_percolation_uw_vsign : function to save the percolation of the structures divided by the sign of v
+        - read_percolation_uw_vsign : function to read the percolation of the structures divided by the sign of v
+        - percolation_uw_vsign      : function for calculating the percolation of the structures divided by the
+                                      sign of v
 """
 # -----------------------------------------------------------------------------------------------------------------------
 # Import packages
@@ -18,6 +27,129 @@ File containing the function to percolate the structures. The file contains the
 import numpy as np
 
 
+def percolation_sweep(data_in={"field":[],"field_rms":[],"Hvec":[],"mesh_vol":[],"filvol":2.7e4}):
+    """
+    .....................................................................................................................
+    # percolation_sweep: Function for calculating the percolation of a field for all the percolation indices in a
+                         single sweep. The nodes are sorted once by field/field_rms and added from the largest to the
+                         smallest percolation index. Only the connections of the new nodes are joined in the
+                         union-find and the volumes of the structures are updated for the joined roots, so the cost of
+                         each index depends on the number of new nodes and not on the size of the field.
+    .....................................................................................................................
+
+    Parameters
+    ----------
+    data_in : dict, optional
+        DESCRIPTION. The default is {"field":[],"field_rms":[],"Hvec":[],"mesh_vol":[],"filvol":2.7e4}.
+        Data:
+            - field     : intensity of the field
+            - field_rms : reference intensity of the field, a node belongs to a structure if field>Hperc*field_rms
+            - Hvec      : percolation indices
+            - mesh_vol  : volume of the grid points
+            - filvol    : volume for filtering the structures
+
+    Returns
+    -------
+    dict
+        Structure containing the information of the percolations
+        Data:
+            - nstruc : number of structures larger than the filter volume for each percolation index
+            - Vstruc : volume of the largest structures respect to the volume of the structures
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Import packages
+    # -------------------------------------------------------------------------------------------------------------------
+    from py_bin.py_functions.label_structures import neighbour_edges,find_roots,union_roots
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    field     = np.array(data_in["field"])
+    field_rms = np.broadcast_to(np.array(data_in["field_rms"]),field.shape)
+    Hvec      = np.array(data_in["Hvec"],dtype="float")
+    filvol    = float(data_in["filvol"])
+    mesh_vol  = np.broadcast_to(np.array(data_in["mesh_vol"],dtype="float"),field.shape).reshape(-1)
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Sort the nodes by the percolation index at which they join the structures. A node belongs to the structures of
+    # the index H if field/field_rms>H, the nodes without a defined ratio never belong to the structures.
+    #     - ratio       : percolation index of each node
+    #     - order       : nodes sorted from the largest to the smallest ratio
+    #     - ratio_order : negative of the sorted ratio (increasing)
+    # -------------------------------------------------------------------------------------------------------------------
+    with np.errstate(divide="ignore",invalid="ignore"):
+        ratio = np.divide(field,field_rms).reshape(-1)
+    ratio[np.isnan(ratio)] = -np.inf
+    order       = np.argsort(-ratio,kind="stable")
+    ratio_order = -ratio[order]
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Evaluate the percolation indices from the largest to the smallest. The structures of an index contain the
+    # structures of the larger indices, then only the connections of the new nodes are added to the union-find.
+    #     - root     : parent of each node of the grid
+    #     - vol_root : volume of the structure of each root
+    #     - active   : nodes of the structures
+    #     - nactive  : number of nodes of the structures
+    #     - vol_tot  : volume of all the structures
+    #     - nbig     : number of structures larger than the filter
+    #     - vol_max  : volume of the largest structure (the structures only grow when the index decreases)
+    #     - new_node : nodes added in the index
+    #     - root_old : roots of the structures joined by the new nodes before the union
+    #     - root_new : roots of the joined structures after the union
+    # -------------------------------------------------------------------------------------------------------------------
+    nstruc   = np.zeros((len(Hvec),))
+    Vstruc   = np.zeros((len(Hvec),))
+    root     = np.arange(field.size)
+    vol_root = np.zeros((field.size,))
+    active   = np.zeros((field.size,),dtype="bool")
+    nactive  = 0
+    vol_tot  = 0
+    nbig     = 0
+    vol_max  = 0
+    for index in np.argsort(Hvec)[::-1]:
+        nfin               = max(int(np.searchsorted(ratio_order,-Hvec[index],side="left")),nactive)
+        new_node           = order[nactive:nfin]
+        nactive            = nfin
+        active[new_node]   = True
+        vol_root[new_node] = mesh_vol[new_node]
+        vol_tot           += np.sum(vol_root[new_node])
+        nbig              += np.count_nonzero(vol_root[new_node]>filvol)
+        if len(new_node) > 0:
+            vol_max = max(vol_max,np.max(vol_root[new_node]))
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Join the structures connected by the new nodes and accumulate their volumes in the new roots
+        # ---------------------------------------------------------------------------------------------------------------
+        data_edges = neighbour_edges(data_in={"nodes":new_node,"active":active,"shape":field.shape})
+        if len(data_edges["node_a"]) > 0:
+            root_old = np.unique(np.concatenate((find_roots(data_in={"root":root,
+                                                                     "nodes":data_edges["node_a"]})["root_nodes"],
+                                                 find_roots(data_in={"root":root,
+                                                                     "nodes":data_edges["node_b"]})["root_nodes"])))
+            nbig    -= np.count_nonzero(vol_root[root_old]>filvol)
+            union_roots(data_in={"root":root,"node_a":data_edges["node_a"],"node_b":data_edges["node_b"]})
+            root_new,index_new = np.unique(find_roots(data_in={"root":root,"nodes":root_old})["root_nodes"],
+                                           return_inverse=True)
+            vol_new            = np.bincount(index_new.reshape(-1),weights=vol_root[root_old],
+                                             minlength=len(root_new))
+            vol_root[root_old] = 0
+            vol_root[root_new] = vol_new
+            nbig              += np.count_nonzero(vol_new>filvol)
+            vol_max            = max(vol_max,np.max(vol_new))
+        
+        # ---------------------------------------------------------------------------------------------------------------
+        # Calculate the number of structures larger than the filter and the volume of the largest structure
+        # ---------------------------------------------------------------------------------------------------------------
+        nstruc[index] = nbig
+        if nstruc[index] > 0:
+            Vstruc[index] = vol_max/vol_tot
+        else:
+            Vstruc[index] = 0
+    data_out = {"nstruc":nstruc,"Vstruc":Vstruc}
+    return data_out
+
+
 def save_percolation(data_in={"nstruc":[],"Vstruc":[],"H_perc":[],"perc_file":"perc_uv.txt","folder":"data"}):
     """
     .....................................................................................................................
@@ -163,29 +295,21 @@ def percolation(data_in={"Hmin":0.1,"Hmax":10,"Hnum":100,"data_struc":[],"save_d
     Hvec     = 10**Hexp_vec
     
     # -------------------------------------------------------------------------------------------------------------------
-    # Calculate the percolation of the field
+    # Calculate the percolation of the field. The field is read once and the structures of all
+    # the percolation indices are calculated in a single sweep
     # -------------------------------------------------------------------------------------------------------------------
-    nstruc   = np.zeros((Hnum,))
-    Vstruc   = np.zeros((Hnum,))
+    data_struc["Hperc"] = Hvec[0]
+    uv_struc            = coherent_structure(data_in=data_struc)
+    data_int            = uv_struc.calculate_intensity()
+    data_sweep          = percolation_sweep(data_in={"field":data_int["field"],"field_rms":data_int["field_rms"],
+                                                     "Hvec":Hvec,"mesh_vol":uv_struc.mesh_vol,"filvol":filvol})
+    nstruc              = data_sweep["nstruc"]
+    Vstruc              = data_sweep["Vstruc"]
     for index in np.arange(Hnum):
-        # ---------------------------------------------------------------------------------------------------------------
-        # Create the class for the structure
-        # ---------------------------------------------------------------------------------------------------------------
-        data_struc["Hperc"] = Hvec[index]
-        uv_struc            = coherent_structure(data_in=data_struc)
-        print("-"*100,flush=True)
-        print("Calculating the percolation for H="+str(Hvec[index])+"...",flush=True)
-        uv_struc.calculate_matstruc()
-        uv_struc.segment_struc()
-        nstruc_val    = len(uv_struc.structures.vol[uv_struc.structures.vol>filvol])
-        if nstruc_val > 0:
-            vol_val   = np.max(uv_struc.structures.vol[uv_struc.structures.vol>filvol])/np.sum(uv_struc.structures.vol)
-        else:
-            vol_val   = 0
-        nstruc[index] = nstruc_val
-        Vstruc[index] = vol_val
-        print("Number of structures:"+str(nstruc_val),flush=True)
         print("-"*100,flush=True)
+        print("Percolation for H="+str(Hvec[index]),flush=True)
+        print("Number of structures:"+str(int(nstruc[index])),flush=True)
+    print("-"*100,flush=True)
     nstruc  /= np.max(nstruc)
     
     # -------------------------------------------------------------------------------------------------------------------
@@ -371,52 +495,31 @@ def percolation_uvw(data_in={"Hmin":0.1,"Hmax":10,"Hnum":100,"data_struc":[],"sa
     Hvec     = 10**Hexp_vec
     
     # -------------------------------------------------------------------------------------------------------------------
-    # Calculate the percolation of the field
-    # -------------------------------------------------------------------------------------------------------------------
-    nstruc_u   = np.zeros((Hnum,))
-    Vstruc_u   = np.zeros((Hnum,))
-    nstruc_v   = np.zeros((Hnum,))
-    Vstruc_v   = np.zeros((Hnum,))
-    nstruc_w   = np.zeros((Hnum,))
-    Vstruc_w   = np.zeros((Hnum,))
+    # Calculate the percolation of the field. The field is read once and the structures of all
+    # the percolation indices are calculated in a single sweep for each component
+    # -------------------------------------------------------------------------------------------------------------------
+    data_struc["Hperc"] = Hvec[0]
+    uvw_struc           = coherent_structure(data_in=data_struc)
+    data_int            = uvw_struc.calculate_intensity()
+    data_sweep_u        = percolation_sweep(data_in={"field":data_int["field_u"],"field_rms":data_int["field_rms_u"],
+                                                     "Hvec":Hvec,"mesh_vol":uvw_struc.mesh_vol,"filvol":filvol})
+    data_sweep_v        = percolation_sweep(data_in={"field":data_int["field_v"],"field_rms":data_int["field_rms_v"],
+                                                     "Hvec":Hvec,"mesh_vol":uvw_struc.mesh_vol,"filvol":filvol})
+    data_sweep_w        = percolation_sweep(data_in={"field":data_int["field_w"],"field_rms":data_int["field_rms_w"],
+                                                     "Hvec":Hvec,"mesh_vol":uvw_struc.mesh_vol,"filvol":filvol})
+    nstruc_u            = data_sweep_u["nstruc"]
+    Vstruc_u            = data_sweep_u["Vstruc"]
+    nstruc_v            = data_sweep_v["nstruc"]
+    Vstruc_v            = data_sweep_v["Vstruc"]
+    nstruc_w            = data_sweep_w["nstruc"]
+    Vstruc_w            = data_sweep_w["Vstruc"]
     for index in np.arange(Hnum):
-        # ---------------------------------------------------------------------------------------------------------------
-        # Create the class for the structure
-        # ---------------------------------------------------------------------------------------------------------------
-        data_struc["Hperc"] = Hvec[index]
-        uvw_struc           = coherent_structure(data_in=data_struc)
-        print("-"*100,flush=True)
-        print("Calculating the percolation for H="+str(Hvec[index])+"...",flush=True)
-        uvw_struc.calculate_matstruc()
-        uvw_struc.segment_struc()
-        nstruc_u_val    = len(uvw_struc.structures_u.vol[uvw_struc.structures_u.vol>filvol])
-        nstruc_v_val    = len(uvw_struc.structures_v.vol[uvw_struc.structures_v.vol>filvol])
-        nstruc_w_val    = len(uvw_struc.structures_w.vol[uvw_struc.structures_w.vol>filvol])
-        if nstruc_u_val > 0:
-            vol_u_val   = np.max(uvw_struc.structures_u.vol[uvw_struc.structures_u.vol
-                                                            >filvol])/np.sum(uvw_struc.structures_u.vol)
-        else:
-            vol_u_val   = 0
-        if nstruc_v_val > 0:
-            vol_v_val   = np.max(uvw_struc.structures_v.vol[uvw_struc.structures_v.vol
-                                                            >filvol])/np.sum(uvw_struc.structures_v.vol)
-        else:
-            vol_v_val   = 0
-        if nstruc_w_val > 0:
-            vol_w_val   = np.max(uvw_struc.structures_w.vol[uvw_struc.structures_w.vol
-                                                            >filvol])/np.sum(uvw_struc.structures_w.vol)
-        else:
-            vol_w_val   = 0
-        nstruc_u[index] = nstruc_u_val
-        Vstruc_u[index] = vol_u_val
-        nstruc_v[index] = nstruc_v_val
-        Vstruc_v[index] = vol_v_val
-        nstruc_w[index] = nstruc_w_val
-        Vstruc_w[index] = vol_w_val
-        print("Number of structures u:"+str(nstruc_u_val),flush=True)
-        print("Number of structures v:"+str(nstruc_v_val),flush=True)
-        print("Number of structures w:"+str(nstruc_w_val),flush=True)
         print("-"*100,flush=True)
+        print("Percolation for H="+str(Hvec[index]),flush=True)
+        print("Number of structures u:"+str(int(nstruc_u[index])),flush=True)
+        print("Number of structures v:"+str(int(nstruc_v[index])),flush=True)
+        print("Number of structures w:"+str(int(nstruc_w[index])),flush=True)
+    print("-"*100,flush=True)
     nstruc_u  /= np.max(nstruc_u)
     nstruc_v  /= np.max(nstruc_v)
     nstruc_w  /= np.max(nstruc_w)
@@ -595,41 +698,26 @@ def percolation_uw_vsign(data_in={"Hmin":0.1,"Hmax":10,"Hnum":100,"data_struc":[
     Hvec     = 10**Hexp_vec
     
     # -------------------------------------------------------------------------------------------------------------------
-    # Calculate the percolation of the field
-    # -------------------------------------------------------------------------------------------------------------------
-    nstruc_1   = np.zeros((Hnum,))
-    Vstruc_1   = np.zeros((Hnum,))
-    nstruc_2   = np.zeros((Hnum,))
-    Vstruc_2   = np.zeros((Hnum,))
+    # Calculate the percolation of the field. The field is read once and the structures of all
+    # the percolation indices are calculated in a single sweep for each sign of the wall-normal component
+    # -------------------------------------------------------------------------------------------------------------------
+    data_struc["Hperc"] = Hvec[0]
+    uvw_struc           = coherent_structure(data_in=data_struc)
+    data_int            = uvw_struc.calculate_intensity()
+    data_sweep_1        = percolation_sweep(data_in={"field":data_int["field_1"],"field_rms":data_int["field_rms"],
+                                                     "Hvec":Hvec,"mesh_vol":uvw_struc.mesh_vol,"filvol":filvol})
+    data_sweep_2        = percolation_sweep(data_in={"field":data_int["field_2"],"field_rms":data_int["field_rms"],
+                                                     "Hvec":Hvec,"mesh_vol":uvw_struc.mesh_vol,"filvol":filvol})
+    nstruc_1            = data_sweep_1["nstruc"]
+    Vstruc_1            = data_sweep_1["Vstruc"]
+    nstruc_2            = data_sweep_2["nstruc"]
+    Vstruc_2            = data_sweep_2["Vstruc"]
     for index in np.arange(Hnum):
-        # ---------------------------------------------------------------------------------------------------------------
-        # Create the class for the structure
-        # ---------------------------------------------------------------------------------------------------------------
-        data_struc["Hperc"] = Hvec[index]
-        uvw_struc           = coherent_structure(data_in=data_struc)
-        print("-"*100,flush=True)
-        print("Calculating the percolation for H="+str(Hvec[index])+"...",flush=True)
-        uvw_struc.calculate_matstruc()
-        uvw_struc.segment_struc()
-        nstruc_1_val    = len(uvw_struc.structures_1.vol[uvw_struc.structures_1.vol>filvol])
-        nstruc_2_val    = len(uvw_struc.structures_2.vol[uvw_struc.structures_2.vol>filvol])
-        if nstruc_1_val > 0:
-            vol_1_val   = np.max(uvw_struc.structures_1.vol[uvw_struc.structures_1.vol
-                                                            >filvol])/np.sum(uvw_struc.structures_1.vol)
-        else:
-            vol_1_val   = 0
-        if nstruc_2_val > 0:
-            vol_2_val   = np.max(uvw_struc.structures_2.vol[uvw_struc.structures_2.vol
-                                                            >filvol])/np.sum(uvw_struc.structures_2.vol)
-        else:
-            vol_2_val   = 0
-        nstruc_1[index] = nstruc_1_val
-        Vstruc_1[index] = vol_1_val
-        nstruc_2[index] = nstruc_2_val
-        Vstruc_2[index] = vol_2_val
-        print("Number of structures 1:"+str(nstruc_1_val),flush=True)
-        print("Number of structures 2:"+str(nstruc_2_val),flush=True)
         print("-"*100,flush=True)
+        print("Percolation for H="+str(Hvec[index]),flush=True)
+        print("Number of structures 1:"+str(int(nstruc_1[index])),flush=True)
+        print("Number of structures 2:"+str(int(nstruc_2[index])),flush=True)
+    print("-"*100,flush=True)
     nstruc_1  /= np.max(nstruc_1)
     nstruc_2  /= np.max(nstruc_2)
     
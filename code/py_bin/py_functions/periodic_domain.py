@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+-------------------------------------------------------------------------------------------------------------------------
+periodic_domain.py
+-------------------------------------------------------------------------------------------------------------------------
+Created on Sat Oct 17 15:02:26 2026
+
+@author: Andres Cremades Botella
+
+File to move and pad the fields in the periodic directions of the channel (spanwise and streamwise). The displacement
+and the padding of a field are evaluated as a single gather of the nodes of the field using an index map. The index
+maps depend only on the shape of the field, the displacement and the padding, so they are stored for the next fields.
+The output keeps the type of the field and can be written in an array provided by the caller. The file contains the
+following functions:
+    Functions:
+        - periodic_index : function to calculate the index map of the displacement and the padding
+        - shift_pad      : function to move the field to a position and apply the padding
+        - unshift_unpad  : function to delete the padding and move the field back to the original position
+"""
+# -----------------------------------------------------------------------------------------------------------------------
+# Import packages for all the functions
+# -----------------------------------------------------------------------------------------------------------------------
+import numpy as np
+from functools import lru_cache
+
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+# Define the functions
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+
+@lru_cache(maxsize=64)
+def _index_map(shpz,shpx,x0,z0,padding,inverse):
+    """
+    .....................................................................................................................
+    # _index_map: Function to calculate the flattened index map of the plane (z,x). The maps are stored by lru_cache.
+    .....................................................................................................................
+    Parameters
+    ----------
+    shpz : int
+        Shape of the field without padding in z.
+    shpx : int
+        Shape of the field without padding in x.
+    x0 : int
+        Position of the origin in the streamwise direction.
+    z0 : int
+        Position of the origin in the spanwise direction.
+    padding : int
+        Padding of the field.
+    inverse : bool
+        Flag to calculate the map of the inverse transformation.
+
+    Returns
+    -------
+    numpy.ndarray
+        Index map (read-only).
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Calculate the index of the nodes in each direction
+    #   - Direct: the node (j,i) of the output is the node (j-padding+z0,i-padding+x0) of the field
+    #   - Inverse: the node (j,i) of the output is the node (padding+j-z0,padding+i-x0) of the padded field
+    # -------------------------------------------------------------------------------------------------------------------
+    if inverse:
+        index_z = padding+np.mod(np.arange(shpz)-z0,shpz)
+        index_x = padding+np.mod(np.arange(shpx)-x0,shpx)
+        shpx_in = shpx+2*padding
+    else:
+        index_z = np.mod(np.arange(-padding,shpz+padding)+z0,shpz)
+        index_x = np.mod(np.arange(-padding,shpx+padding)+x0,shpx)
+        shpx_in = shpx
+    index_map                 = index_z.reshape(-1,1)*shpx_in+index_x.reshape(1,-1)
+    index_map.flags.writeable = False
+    return index_map
+
+
+def periodic_index(data_in={"shpz":96,"shpx":196,"x0":0,"z0":0,"padding":15,"inverse":False}):
+    """
+    .....................................................................................................................
+    # periodic_index: Function to calculate the index map of the displacement and the padding. The index map contains
+                      the flattened index (z,x) of the input field for every node (z,x) of the output field.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the transformation.
+        The default is {"shpz":96,"shpx":196,"x0":0,"z0":0,"padding":15,"inverse":False}.
+        Data:
+            - shpz    : shape of the field without padding in z
+            - shpx    : shape of the field without padding in x
+            - x0      : position of the origin in the streamwise direction
+            - z0      : position of the origin in the spanwise direction
+            - padding : padding of the field
+            - inverse : flag to calculate the map of the inverse transformation
+
+    Returns
+    -------
+    dict
+        Index map.
+        Data:
+            - index_map : flattened index of the input field for each node of the output (read-only)
+
+    """
+    index_map = _index_map(int(data_in["shpz"]),int(data_in["shpx"]),int(data_in["x0"]),int(data_in["z0"]),
+                           int(data_in["padding"]),bool(data_in["inverse"]))
+    data_out  = {"index_map":index_map}
+    return data_out
+
+
+def shift_pad(data_in={"field":[],"x0":0,"z0":0,"padding":15,"out":None}):
+    """
+    .....................................................................................................................
+    # shift_pad: Function to move the field to a position and apply the padding. The node (x0,z0) of the field is
+                 located in the first node of the domain and the padding adds the periodic nodes at both sides of the
+                 spanwise and streamwise directions.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the field.
+        The default is {"field":[],"x0":0,"z0":0,"padding":15,"out":None}.
+        Data:
+            - field   : field without padding (y,z,x), the trailing axes (components) are kept
+            - x0      : position of the origin in the streamwise direction
+            - z0      : position of the origin in the spanwise direction
+            - padding : padding of the field
+            - out     : (optional) array to write the output, shape (y,z+2*padding,x+2*padding) and the type of
+                        the field
+
+    Returns
+    -------
+    dict
+        Transformed field.
+        Data:
+            - field : field after the displacement and the padding
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    field   = np.asarray(data_in["field"])  # field without padding
+    x0      = int(data_in["x0"])            # position of the origin in x
+    z0      = int(data_in["z0"])            # position of the origin in z
+    padding = int(data_in["padding"])       # padding of the field
+    if "out" in data_in.keys():
+        out = data_in["out"]                # array to write the output
+    else:
+        out = None
+    shpy,shpz,shpx = field.shape[:3]
+    shpc           = field.shape[3:]
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Gather the nodes of the output. The indices of the map are always inside the field, the mode clip avoids the
+    # intermediate buffer used by numpy to check them.
+    # -------------------------------------------------------------------------------------------------------------------
+    index_map = _index_map(shpz,shpx,x0,z0,padding,False)
+    if out is None:
+        out = np.empty((shpy,)+index_map.shape+shpc,dtype=field.dtype)
+    np.take(field.reshape((shpy,shpz*shpx)+shpc),index_map,axis=1,out=out,mode="clip")
+    data_out = {"field":out}
+    return data_out
+
+
+def unshift_unpad(data_in={"field":[],"x0":0,"z0":0,"padding":15,"out":None}):
+    """
+    .....................................................................................................................
+    # unshift_unpad: Function to delete the padding and move the field back to the original position. It is the
+                     inverse of shift_pad.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the field.
+        The default is {"field":[],"x0":0,"z0":0,"padding":15,"out":None}.
+        Data:
+            - field   : field with padding (y,z+2*padding,x+2*padding), the trailing axes (components) are kept
+            - x0      : position of the origin in the streamwise direction
+            - z0      : position of the origin in the spanwise direction
+            - padding : padding of the field
+            - out     : (optional) array to write the output, shape (y,z,x) and the type of the field
+
+    Returns
+    -------
+    dict
+        Transformed field.
+        Data:
+            - field : field in the original position without padding
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    field   = np.asarray(data_in["field"])  # field with padding
+    x0      = int(data_in["x0"])            # position of the origin in x
+    z0      = int(data_in["z0"])            # position of the origin in z
+    padding = int(data_in["padding"])       # padding of the field
+    if "out" in data_in.keys():
+        out = data_in["out"]                # array to write the output
+    else:
+        out = None
+    shpy  = field.shape[0]
+    shpz  = field.shape[1]-2*padding
+    shpx  = field.shape[2]-2*padding
+    shpc  = field.shape[3:]
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Gather the nodes of the output. The indices of the map are always inside the field, the mode clip avoids the
+    # intermediate buffer used by numpy to check them.
+    # -------------------------------------------------------------------------------------------------------------------
+    index_map = _index_map(shpz,shpx,x0,z0,padding,True)
+    if out is None:
+        out = np.empty((shpy,shpz,shpx)+shpc,dtype=field.dtype)
+    np.take(field.reshape((shpy,(shpz+2*padding)*(shpx+2*padding))+shpc),index_map,axis=1,out=out,mode="clip")
+    data_out = {"field":out}
+    return data_out
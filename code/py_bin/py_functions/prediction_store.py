@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+-------------------------------------------------------------------------------------------------------------------------
+prediction_store.py
+-------------------------------------------------------------------------------------------------------------------------
+Created on Sat Oct 17 22:14:36 2026
+
+@author: Andres Cremades Botella
+
+File containing the store of the predictions of the model. The predictions are stored in hdf5 files, one for each
+model and distance between the input and the output fields. The model is identified by a fingerprint calculated with
+the weights and the configuration of the architecture, so a retrained model or a different normalization do not use
+the predictions of the previous one. Each prediction is the output of the model (normalized velocity) stored in
+float32 in a compressed dataset with a chunk per wall-normal plane. The file contains the following functions:
+    Functions:
+        - model_fingerprint : function to calculate the fingerprint of a model
+        - store_file        : function to define the file of the store of a model
+        - stored_index      : function to read the indices of the fields stored
+        - read_prediction   : function to read a prediction from the store
+        - write_prediction  : function to write a prediction in the store
+"""
+# -----------------------------------------------------------------------------------------------------------------------
+# Import packages for all the functions
+# -----------------------------------------------------------------------------------------------------------------------
+import os
+import json
+import hashlib
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+# Define the functions
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+
+def model_fingerprint(data_in={"weights":[],"config":{}}):
+    """
+    .....................................................................................................................
+    # model_fingerprint: Function to calculate the fingerprint of a model. The md5 hash contains the bytes of every
+                         weight and the configuration of the architecture.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the model.
+        The default is {"weights":[],"config":{}}.
+        Data:
+            - weights : list of the weights of the model
+            - config  : dictionary of the configuration of the architecture and of the normalization
+
+    Returns
+    -------
+    dict
+        Fingerprint of the model.
+        Data:
+            - fingerprint : fingerprint of the model
+
+    """
+    md5 = hashlib.md5()
+    for weight in data_in["weights"]:
+        weight = np.ascontiguousarray(weight)
+        md5.update(str(weight.shape).encode())
+        md5.update(str(weight.dtype).encode())
+        md5.update(weight.tobytes())
+    md5.update(json.dumps(data_in["config"],sort_keys=True,default=str).encode())
+    data_out = {"fingerprint":md5.hexdigest()[:16]}
+    return data_out
+
+
+def store_file(data_in={"store_folder":"../results/pred_store/","fingerprint":"0","delta_pred":1}):
+    """
+    .....................................................................................................................
+    # store_file: Function to define the file of the store of a model and create its folder
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the store.
+        The default is {"store_folder":"../results/pred_store/","fingerprint":"0","delta_pred":1}.
+        Data:
+            - store_folder : folder of the store
+            - fingerprint  : fingerprint of the model
+            - delta_pred   : distance between the input and the output fields
+
+    Returns
+    -------
+    dict
+        File of the store.
+        Data:
+            - file : file of the store
+
+    """
+    store_folder = str(data_in["store_folder"])
+    fingerprint  = str(data_in["fingerprint"])
+    delta_pred   = int(data_in["delta_pred"])
+    os.makedirs(store_folder,exist_ok=True)
+    data_out     = {"file":os.path.join(store_folder,"pred_"+fingerprint+"_delta"+str(delta_pred)+".h5")}
+    return data_out
+
+
+def stored_index(data_in={"file":"pred.h5"}):
+    """
+    .....................................................................................................................
+    # stored_index: Function to read the indices of the fields stored
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the store.
+        The default is {"file":"pred.h5"}.
+        Data:
+            - file : file of the store
+
+    Returns
+    -------
+    dict
+        Fields of the store.
+        Data:
+            - index : set of the indices of the input fields stored
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Import packages
+    # -------------------------------------------------------------------------------------------------------------------
+    from h5py import File
+
+    file  = str(data_in["file"])
+    index = set()
+    if os.path.exists(file):
+        with File(file,"r") as hf:
+            index = set([int(key.split("_")[-1]) for key in hf.keys() if key.startswith("field_")])
+    data_out = {"index":index}
+    return data_out
+
+
+def read_prediction(data_in={"file":"pred.h5","index":1000}):
+    """
+    .....................................................................................................................
+    # read_prediction: Function to read a prediction from the store
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the prediction.
+        The default is {"file":"pred.h5","index":1000}.
+        Data:
+            - file  : file of the store
+            - index : index of the input field
+
+    Returns
+    -------
+    dict
+        Prediction.
+        Data:
+            - field : output of the model with shape (shpy,shpz,shpx,3) (None if it is not stored)
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Import packages
+    # -------------------------------------------------------------------------------------------------------------------
+    from h5py import File
+
+    file  = str(data_in["file"])
+    key   = "field_"+str(int(data_in["index"]))
+    field = None
+    if os.path.exists(file):
+        with File(file,"r") as hf:
+            if key in hf.keys():
+                field = hf[key][...]
+    data_out = {"field":field}
+    return data_out
+
+
+def write_prediction(data_in={"file":"pred.h5","index":1000,"field":[],"fingerprint":"0","delta_pred":1}):
+    """
+    .....................................................................................................................
+    # write_prediction: Function to write a prediction in the store. A prediction already stored is replaced.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the prediction.
+        The default is {"file":"pred.h5","index":1000,"field":[],"fingerprint":"0","delta_pred":1}.
+        Data:
+            - file        : file of the store
+            - index       : index of the input field
+            - field       : output of the model with shape (shpy,shpz,shpx,3)
+            - fingerprint : fingerprint of the model
+            - delta_pred  : distance between the input and the output fields
+
+    Returns
+    -------
+    None.
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Import packages
+    # -------------------------------------------------------------------------------------------------------------------
+    from h5py import File
+
+    file  = str(data_in["file"])
+    key   = "field_"+str(int(data_in["index"]))
+    field = np.asarray(data_in["field"],dtype="float32")
+    with File(file,"a") as hf:
+        hf.attrs["fingerprint"] = str(data_in["fingerprint"])
+        hf.attrs["delta_pred"]  = int(data_in["delta_pred"])
+        if key in hf.keys():
+            del hf[key]
+        hf.create_dataset(key,data=field,chunks=(1,)+field.shape[1:],compression="gzip",compression_opts=4,
+                          shuffle=True)
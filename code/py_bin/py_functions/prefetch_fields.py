@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+-------------------------------------------------------------------------------------------------------------------------
+prefetch_fields.py
+-------------------------------------------------------------------------------------------------------------------------
+Created on Sat Oct 17 11:40:03 2026
+
+@author: Andres Cremades Botella
+
+File to read the fields in the background while the current field is evaluated. The loops of the code read, evaluate
+and save each field sequentially, so the processor waits during the reading of the files. The reading of the next
+fields is executed in a pool of threads and the fields are returned in order. The number of fields read in advance is
+bounded to limit the memory. The file contains the following functions:
+    Functions:
+        - prefetch_fields : function to iterate over the fields reading the next fields in the background
+        - read_norm_pair  : function to read the input and the output fields of a prediction
+        - read_struc_pair : function to read the structures of two coherent structure classes of a field
+"""
+# -----------------------------------------------------------------------------------------------------------------------
+# Import packages for all the functions
+# -----------------------------------------------------------------------------------------------------------------------
+import time
+from collections import deque
+
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+# Define the functions
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+
+def prefetch_fields(data_in={"function":None,"data_read":[],"nprefetch":2,"nworkers":1}):
+    """
+    .....................................................................................................................
+    # prefetch_fields: Function to iterate over the fields reading the next fields in the background. The function is
+                       a generator returning the output of the reading function of each field in the order of
+                       data_read. The errors of the reading are raised when the field is returned.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the reading.
+        The default is {"function":None,"data_read":[],"nprefetch":2,"nworkers":1}.
+        Data:
+            - function  : function to read a field, it receives each element of data_read as data_in
+            - data_read : list of the data of the function for each field
+            - nprefetch : number of fields read in advance (0 to read the fields sequentially)
+            - nworkers  : number of threads reading the fields
+
+    Returns
+    -------
+    generator
+        Output of the function for each field.
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Import packages
+    # -------------------------------------------------------------------------------------------------------------------
+    from concurrent.futures import ThreadPoolExecutor
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    function  = data_in["function"]        # function to read a field
+    data_read = list(data_in["data_read"]) # data of the function for each field
+    nprefetch = int(data_in["nprefetch"])  # number of fields read in advance
+    nworkers  = int(data_in["nworkers"])   # number of threads
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the fields sequentially if the prefetching is not active
+    # -------------------------------------------------------------------------------------------------------------------
+    if nprefetch <= 0:
+        for data_ii in data_read:
+            yield function(data_in=data_ii)
+        return
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the fields in the pool of threads. The queue contains the fields submitted to the pool, when a field is
+    # returned the next one is submitted, so the pool reads at most nprefetch fields in advance. If the loop is stopped
+    # or an error is raised the fields pending in the queue are cancelled.
+    #   - queue : fields submitted to the pool
+    # -------------------------------------------------------------------------------------------------------------------
+    executor = ThreadPoolExecutor(max_workers=max(nworkers,1))
+    queue    = deque()
+    try:
+        for data_ii in data_read[:nprefetch]:
+            queue.append(executor.submit(function,data_in=data_ii))
+        for ii in range(nprefetch,len(data_read)+nprefetch):
+            future = queue.popleft()
+            if ii < len(data_read):
+                queue.append(executor.submit(function,data_in=data_read[ii]))
+            yield future.result()
+    finally:
+        for future in queue:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def read_norm_pair(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","padding":15,
+                            "shpx":1,"shpy":1,"shpz":1,"dx":1,"dy":1,"dz":1,"data_folder":"Data",
+                            "umean_file":"Umean.txt","unorm_file":"Unorm.txt","index":7000,"delta_pred":1,
+                            "data_type":"float32","mean_norm":False,"norm_out":True,"field_cache":None}):
+    """
+    .....................................................................................................................
+    # read_norm_pair: Function to read the input and the output fields of a prediction. The input field is normalized
+                      and padded, the output field is not padded. The input field is not read if it is not required
+                      (prediction already stored).
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data required for reading the fields.
+        The default is {"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","padding":15,
+                        "shpx":1,"shpy":1,"shpz":1,"dx":1,"dy":1,"dz":1,"data_folder":"Data",
+                        "umean_file":"Umean.txt","unorm_file":"Unorm.txt","index":7000,"delta_pred":1,
+                        "data_type":"float32","mean_norm":False,"norm_out":True,"field_cache":None}.
+        Data:
+            - folder      : folder to read the data of the velocity fields
+            - file        : file to read the data of the velocity fields
+            - padding     : padding of the input field
+            - shpx        : shape of the fields in x
+            - shpy        : shape of the fields in y
+            - shpz        : shape of the fields in z
+            - dx          : downsampling in x
+            - dy          : downsampling in y
+            - dz          : downsampling in z
+            - data_folder : folder to store the data generated by the code
+            - umean_file  : mean velocity file
+            - unorm_file  : file for the normalization of the velocity
+            - index       : index of the input field
+            - delta_pred  : distance between the input and the output fields
+            - data_type   : definition of the type of data (float32, float16)
+            - mean_norm   : flag for normalizing with the mean (True: use mean and std
+                                                                False: use min and max)
+            - norm_out    : flag to normalize the output field (False: the velocity fluctuation is returned)
+            - field_cache : cache of the fields (None to read the fields from the files)
+            - out_in      : (optional) channel-last tensor to write the normalized input velocity
+            - out_out     : (optional) channel-last tensor to write the normalized output velocity
+            - read_in     : (optional) flag to read the input field (default True)
+
+    Returns
+    -------
+    dict
+        Input and output fields.
+        Data:
+            - index             : index of the input field
+            - norm_velocity_in  : normalized input velocity (None if read_in is False)
+            - norm_velocity_out : normalized output velocity (velocity fluctuation if norm_out is False)
+            - norm_tensor_in    : channel-last tensor of the normalized input velocity (None if read_in is False)
+            - norm_tensor_out   : channel-last tensor of the normalized output velocity (None if norm_out is False)
+            - time_read         : time for reading the fields
+            - time_norm         : time for normalizing the fields
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Import packages
+    # -------------------------------------------------------------------------------------------------------------------
+    from py_bin.py_functions.read_norm_velocity import read_norm_velocity
+    from py_bin.py_functions.read_velocity import read_velocity
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    index      = int(data_in["index"])       # index of the input field
+    delta_pred = int(data_in["delta_pred"])  # distance between the input and the output fields
+    padding    = int(data_in["padding"])     # padding of the input field
+    norm_out   = bool(data_in["norm_out"])   # flag to normalize the output field
+    data_norm  = {key:data_in[key] for key in ["folder","file","shpx","shpy","shpz","dx","dy","dz","data_folder",
+                                               "umean_file","unorm_file","data_type","mean_norm","field_cache"]}
+    if "out_in" in data_in.keys():
+        out_in = data_in["out_in"]                # tensor of the input velocity
+    else:
+        out_in = None
+    if "out_out" in data_in.keys():
+        out_out = data_in["out_out"]              # tensor of the output velocity
+    else:
+        out_out = None
+    if "read_in" in data_in.keys():
+        read_in = bool(data_in["read_in"])        # flag to read the input field
+    else:
+        read_in = True
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the input field
+    # -------------------------------------------------------------------------------------------------------------------
+    if read_in:
+        data_norm_in     = dict(data_norm,index=index,padding=padding,out=out_in)
+        data_veloc_norm  = read_norm_velocity(data_in=data_norm_in)
+        norm_velocity_in = data_veloc_norm["norm_velocity"]
+        norm_tensor_in   = data_veloc_norm["norm_tensor"]
+        time_read        = data_veloc_norm["time_read"]
+        time_norm        = data_veloc_norm["time_norm"]
+    else:
+        norm_velocity_in = None
+        norm_tensor_in   = None
+        time_read        = 0
+        time_norm        = 0
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the output field
+    # -------------------------------------------------------------------------------------------------------------------
+    if norm_out:
+        data_norm_out     = dict(data_norm,index=index+delta_pred,padding=0,out=out_out)
+        data_veloc_norm   = read_norm_velocity(data_in=data_norm_out)
+        norm_velocity_out = data_veloc_norm["norm_velocity"]
+        norm_tensor_out   = data_veloc_norm["norm_tensor"]
+        time_read        += data_veloc_norm["time_read"]
+        time_norm        += data_veloc_norm["time_norm"]
+    else:
+        tstart            = time.time()
+        data_velocity_out = {key:data_norm[key] for key in ["folder","file","shpx","shpy","shpz","dx","dy","dz",
+                                                            "data_folder","umean_file","field_cache"]}
+        data_velocity_out = dict(data_velocity_out,index=index+delta_pred,padding=0,dtype="float32")
+        norm_velocity_out = read_velocity(data_velocity_out)
+        norm_tensor_out   = None
+        time_read        += time.time()-tstart
+    data_out = {"index":index,"norm_velocity_in":norm_velocity_in,"norm_velocity_out":norm_velocity_out,
+                "norm_tensor_in":norm_tensor_in,"norm_tensor_out":norm_tensor_out,"time_read":time_read,
+                "time_norm":time_norm}
+    return data_out
+
+
+def read_struc_pair(data_in={"struc_1":None,"data_1":{},"struc_2":None,"data_2":{},"index":7000}):
+    """
+    .....................................................................................................................
+    # read_struc_pair: Function to read the structures of two coherent structure classes of a field. The dictionaries
+                       of the data are copied, so the function can be evaluated in several threads.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the structures.
+        The default is {"struc_1":None,"data_1":{},"struc_2":None,"data_2":{},"index":7000}.
+        Data:
+            - struc_1 : class of the first coherent structure
+            - data_1  : data of the first coherent structure
+            - struc_2 : class of the second coherent structure
+            - data_2  : data of the second coherent structure
+            - index   : index of the field
+
+    Returns
+    -------
+    dict
+        Structures of the field.
+        Data:
+            - index     : index of the field
+            - struc_1   : first coherent structure
+            - struc_2   : second coherent structure
+            - time_read : time for reading the structures
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    index  = int(data_in["index"])                     # index of the field
+    data_1 = dict(data_in["data_1"],index=index)       # data of the first coherent structure
+    data_2 = dict(data_in["data_2"],index=index)       # data of the second coherent structure
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the structures
+    # -------------------------------------------------------------------------------------------------------------------
+    tstart  = time.time()
+    struc_1 = data_in["struc_1"](data_in=data_1)
+    struc_1.read_struc()
+    struc_2 = data_in["struc_2"](data_in=data_2)
+    struc_2.read_struc()
+    data_out = {"index":index,"struc_1":struc_1,"struc_2":struc_2,"time_read":time.time()-tstart}
+    return data_out
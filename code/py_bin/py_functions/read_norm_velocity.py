@@ -11,6 +11,7 @@ File to read and normalize the flow field.
     Functions:
         - read_norm_velocity : reads the flow and normalize the values
 """
+import sys
 import time
 
 def read_norm_velocity(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw",
@@ -46,6 +47,10 @@ def read_norm_velocity(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_
             - data_type   : definition of the type of data (float32, float16)
             - mean_norm   : flag for normalizing with the mean (True: use mean and std
                                                                 False: use min and max)
+            - field_cache : (optional) cache of the fields (py_bin.py_class.field_cache). The normalized velocity
+                            is stored without padding, so the input and the output fields share the stored data
+            - out         : (optional) channel-last tensor to write the normalized velocity, shape
+                            (shpy,shpz+2*padding,shpx+2*padding,3) and the data type
 
     Returns
     -------
@@ -53,7 +58,8 @@ def read_norm_velocity(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_
         Data containing the normalized velocity and the time required for reading the field and calculating
         the normalization.
         Data:
-            - norm_velocity : normalized velocity
+            - norm_velocity : normalized velocity, the components are views of the channels of norm_tensor
+            - norm_tensor   : channel-last tensor of the normalized velocity (shpy,shpz+2*padding,shpx+2*padding,3)
             - time_read     : time for reading the file
             - time_norm     : time for normalizing the field
 
@@ -62,7 +68,8 @@ def read_norm_velocity(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_
     # Load packages
     # -------------------------------------------------------------------------------------------------------------------
     from py_bin.py_functions.read_velocity import read_velocity
-    from py_bin.py_functions.norm_velocity import norm_velocity
+    from py_bin.py_functions.norm_velocity import norm_velocity_tensor
+    from py_bin.py_functions.periodic_domain import shift_pad
     
     # -------------------------------------------------------------------------------------------------------------------
     # Read the data
@@ -88,27 +95,68 @@ def read_norm_velocity(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_
     else:
         print("[trainvali_data.py:data_traintest_tf] Data type needs to be selected.")
         sys.exit()
+    if "field_cache" in data_in.keys():
+        field_cache = data_in["field_cache"]                   # cache of the fields
+    else:
+        field_cache = None
+    if "out" in data_in.keys():
+        out = data_in["out"]                                   # tensor to write the normalized velocity
+    else:
+        out = None
     
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the normalized velocity without padding from the cache. The normalization is pointwise and the padding is a
+    # periodic copy of the nodes, so the padding is applied to the stored normalized velocity.
+    #   - norm_tensor : normalized velocity without padding (y,z,x,component)
+    # -------------------------------------------------------------------------------------------------------------------
+    tstart      = time.time()
+    key_cache   = ("norm_velocity",folder+'/'+file,index,dx,dy,dz,data_folder,umean_file,unorm_file,data_type,
+                   mean_norm)
+    norm_tensor = None
+    if field_cache is not None:
+        norm_tensor = field_cache.get(data_in={"key":key_cache})
+        if norm_tensor is not None:
+            norm_tensor = norm_tensor["norm_tensor"]
+    tread       = time.time()
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read and normalize the velocity. The velocity is read in float32 without padding and it is normalized directly
+    # in the channel-last tensor of the data type. The tensor of the caller is used if the padding is not required.
+    # The velocity is read from the cache if it has been stored by read_velocity, but it is not stored again as only
+    # the normalized field is reused.
+    # -------------------------------------------------------------------------------------------------------------------
+    if norm_tensor is None:
+        data_velocity      = {"folder":folder,"file":file,"index":index,"dx":dx,"dy":dy,"dz":dz,
+                              "shpx":shpx,"shpy":shpy,"shpz":shpz,"padding":0,"data_folder":data_folder,
+                              "umean_file":umean_file,"field_cache":field_cache,"cache_store":False,
+                              "dtype":"float32"}
+        data_read_velocity = read_velocity(data_velocity)
+        tread              = time.time()
+        out_norm           = out if padding == 0 and field_cache is None else None
+        data_norm          = {"uu":data_read_velocity["uu"],"vv":data_read_velocity["vv"],
+                              "ww":data_read_velocity["ww"],"folder_data":data_folder,"unorm_file":unorm_file,
+                              "data_type":data_type,"mean_norm":mean_norm,"out":out_norm}
+        del data_read_velocity
+        norm_tensor        = norm_velocity_tensor(data_norm)["norm_tensor"]
+        if field_cache is not None:
+            field_cache.put(data_in={"key":key_cache,"value":{"norm_tensor":norm_tensor}})
     
     # -------------------------------------------------------------------------------------------------------------------
-    # Read and normalize the velocity
+    # Apply the padding writing the tensor of the output. The stored tensors are read-only, they are copied.
     # -------------------------------------------------------------------------------------------------------------------
-    tstart             = time.time()
-    data_velocity      = {"folder":folder,"file":file,"index":index,"dx":dx,"dy":dy,"dz":dz,
-                          "shpx":shpx,"shpy":shpy,"shpz":shpz,"padding":padding,"data_folder":data_folder,
-                          "umean_file":umean_file}
-    data_read_velocity = read_velocity(data_velocity)
-    tread              = time.time()
-    data_norm          = {"uu":data_read_velocity["uu"],"vv":data_read_velocity["vv"],
-                          "ww":data_read_velocity["ww"],"folder_data":data_folder,"unorm_file":unorm_file,
-                          "data_type":data_type,"mean_norm":mean_norm}
-    norm_velocity      = norm_velocity(data_norm)
-    tnorm              = time.time()
-    time_read          = tread-tstart
-    time_norm          = tnorm-tread
+    if padding > 0:
+        norm_tensor = shift_pad(data_in={"field":norm_tensor,"x0":0,"z0":0,"padding":padding,"out":out})["field"]
+    elif out is not None and norm_tensor is not out:
+        out[...]    = norm_tensor
+        norm_tensor = out
+    elif not norm_tensor.flags.writeable:
+        norm_tensor = norm_tensor.copy()
+    tnorm = time.time()
     
     # -------------------------------------------------------------------------------------------------------------------
     # Return the output
     # -------------------------------------------------------------------------------------------------------------------
-    data_out = {"norm_velocity":norm_velocity,"time_read":time_read,"time_norm":time_norm}
+    norm_velocity = {"unorm":norm_tensor[...,0],"vnorm":norm_tensor[...,1],"wnorm":norm_tensor[...,2]}
+    data_out      = {"norm_velocity":norm_velocity,"norm_tensor":norm_tensor,"time_read":tread-tstart,
+                     "time_norm":tnorm-tread}
     return data_out
\ No newline at end of file
@@ -10,6 +10,8 @@ File containing the function to improve the reading of the data in Berzelius. Th
     Functions:
         - read_tfrecord   : function to read the tfrecord
         - load_dataset    : function to read the data with the tensorflow format
+        - periodic_pad    : function to apply the periodic padding in the graph of tensorflow
+        - load_snapshots  : function to read the data stored as snapshots and to pair the input and output fields
 """
 # -----------------------------------------------------------------------------------------------------------------------
 # Import packages
@@ -18,6 +20,10 @@ import tensorflow as tf
 import sys
 import numpy as np
 import os
+import time
+from py_bin.py_functions.tfrecord_format import parse_example, parse_snapshot, compression_type
+from py_bin.py_functions.tfrecord_pipeline import read_pipeline
+from py_bin.py_functions.tfrecord_manifest import check_files
 
 def load_dataset(data_in={"tfrecord_files":'/tfrecord/dataset_0000.tfrecord',"padding":15,"shpx":1,"shpy":1,"shpz":1,
                            "data_type":"float32","index":[]}):
@@ -37,6 +43,9 @@ def load_dataset(data_in={"tfrecord_files":'/tfrecord/dataset_0000.tfrecord',"pa
             - shpy           : shape of the fields in the wall-normal direction
             - shpz           : shape of the fields in the spanwise direction
             - data_type      : type of data
+            - compression    : (optional) compression of the tfrecord files ("": no compression, "ZLIB", "GZIP")
+            - pipeline       : (optional) configuration of the pipeline (see tfrecord_pipeline.pipeline_config)
+            - cache_key      : (optional) parameters of the files included in the name of the cache files
     Returns
     -------
     dict
@@ -54,55 +63,35 @@ def load_dataset(data_in={"tfrecord_files":'/tfrecord/dataset_0000.tfrecord',"pa
     shpz           = int(data_in["shpz"])
     data_type      = str(data_in["data_type"])
     index          = np.array(data_in["index"],dtype="int")
-    if data_type == "float32":
-        dtype = tf.float32
-    elif data_type == "float16":
-        dtype = tf.float16
+    if "compression" in data_in.keys():
+        compression = compression_type(data_in={"compression":data_in["compression"]})["compression"]
     else:
-        print("Exit the calculation due to invalid data type.",flush=True)
-        sys.exit()
+        compression = ""
     
     # -------------------------------------------------------------------------------------------------------------------
     # Define the function to parse
     # -------------------------------------------------------------------------------------------------------------------
-    def parse_function(proto):
-        """
-        
-        .................................................................................................................
-        # _parse_function: Function for parsing the data
-        .................................................................................................................
-    
-        Parameters
-        ----------
-        proto : TFRecords data
-            Information to parse.
-
-        Returns
-        -------
-        feature : TFRecords data
-            Parsed features.
-        label : TYPE
-            Parsed labels.
-
-        """
-        # ---------------------------------------------------------------------------------------------------------------
-        # Define your `features` dictionary here:
-        # Adjust shape based on how data was flattened
-        # ---------------------------------------------------------------------------------------------------------------
-        feature_description = {'feature': tf.io.FixedLenFeature([shpy*(shpz+2*padding)*(shpx+2*padding)*3],dtype),
-                               'label': tf.io.FixedLenFeature([shpy*shpz*shpx*3],dtype)}
-        parsed_features     = tf.io.parse_single_example(proto,feature_description)
-        feature             = tf.reshape(parsed_features['feature'],[shpy,shpz+2*padding,shpx+2*padding,3])
-        label               = tf.reshape(parsed_features['label'],[shpy,shpz,shpx,3])
-        return feature,label
+    parse_function = parse_example(data_in={"padding":padding,"shpx":shpx,"shpy":shpy,"shpz":shpz,
+                                            "data_type":data_type})["parse_function"]
     
             
     # -------------------------------------------------------------------------------------------------------------------
     # This function reads multiple TFRecord files and returns a parsed dataset.
     # -------------------------------------------------------------------------------------------------------------------
-    files   = tf.data.Dataset.from_tensor_slices(tfrecord_files)
-    dataset = files.interleave(tf.data.TFRecordDataset, cycle_length=tf.data.experimental.AUTOTUNE)
-    return dataset.map(parse_function)  # Parse each example using the specified parsing function
+    if "pipeline" in data_in.keys():
+        pipeline = data_in["pipeline"]
+    else:
+        pipeline = {}
+    if "cache_key" in data_in.keys():
+        cache_key = data_in["cache_key"]
+    else:
+        cache_key = {}
+    dataset = read_pipeline(data_in={"files":list(tfrecord_files),
+                                     "read_function":lambda file: tf.data.TFRecordDataset(file,
+                                                                                          compression_type=compression),
+                                     "parse_function":parse_function,"pipeline":pipeline,
+                                     "cache_key":cache_key})["dataset"]
+    return dataset
 
     # -------------------------------------------------------------------------------------------------------------------
     # This function reads a TFRecord file and returns a parsed dataset.
@@ -112,6 +101,110 @@ def load_dataset(data_in={"tfrecord_files":'/tfrecord/dataset_0000.tfrecord',"pa
     data_out = {"data":dataset.map(parse_function)} 
     return data_out
 
+def periodic_pad(data_in={"field":None,"padding":15}):
+    """
+    .....................................................................................................................
+    # periodic_pad: Function to apply the periodic padding of a field in the graph of tensorflow. The padding is
+                    equivalent to py_bin.py_functions.periodic_domain.shift_pad with the origin in the first node.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the field.
+        The default is {"field":None,"padding":15}.
+        Data:
+            - field   : field without padding (y,z,x,3)
+            - padding : padding of the field
+
+    Returns
+    -------
+    dict
+        Padded field.
+        Data:
+            - field : field with padding (y,z+2*padding,x+2*padding,3)
+
+    """
+    field   = data_in["field"]
+    padding = int(data_in["padding"])
+    if padding > 0:
+        field = tf.concat([field[:,-padding:],field,field[:,:padding]],axis=1)
+        field = tf.concat([field[:,:,-padding:],field,field[:,:,:padding]],axis=2)
+    data_out = {"field":field}
+    return data_out
+
+
+def load_snapshots(data_in={"files_in":[],"files_out":[],"padding":15,"shpx":1,"shpy":1,"shpz":1,
+                            "data_type":"float32"}):
+    """
+    .....................................................................................................................
+    # load_snapshots: Function for loading the data stored as snapshots. Each input field is paired with its output
+                      field and the periodic padding of the input is applied in the pipeline.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        data required for loading the data
+        The default is {"files_in":[],"files_out":[],"padding":15,"shpx":1,"shpy":1,"shpz":1,"data_type":"float32"}.
+        Data:
+            - files_in    : list containing the path to the snapshots of the input fields
+            - files_out   : list containing the path to the snapshots of the output fields
+            - padding     : padding of the fields
+            - shpx        : shape of the fields in the streamwise direction
+            - shpy        : shape of the fields in the wall-normal direction
+            - shpz        : shape of the fields in the spanwise direction
+            - data_type   : type of data
+            - compression : (optional) compression of the tfrecord files ("": no compression, "ZLIB", "GZIP")
+            - pipeline    : (optional) configuration of the pipeline (see tfrecord_pipeline.pipeline_config)
+            - cache_key   : (optional) parameters of the files included in the name of the cache files
+    Returns
+    -------
+    tf.data.Dataset
+        Dataset of the padded input fields and the output fields
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    files_in  = list(data_in["files_in"])
+    files_out = list(data_in["files_out"])
+    padding   = int(data_in["padding"])
+    shpx      = int(data_in["shpx"])
+    shpy      = int(data_in["shpy"])
+    shpz      = int(data_in["shpz"])
+    data_type = str(data_in["data_type"])
+    if "compression" in data_in.keys():
+        compression = compression_type(data_in={"compression":data_in["compression"]})["compression"]
+    else:
+        compression = ""
+    if "pipeline" in data_in.keys():
+        pipeline = data_in["pipeline"]
+    else:
+        pipeline = {}
+    if "cache_key" in data_in.keys():
+        cache_key = data_in["cache_key"]
+    else:
+        cache_key = {}
+    parse_function = parse_snapshot(data_in={"shpx":shpx,"shpy":shpy,"shpz":shpz,
+                                             "data_type":data_type})["parse_function"]
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Define the functions to read the pair of snapshots and to pad the input field
+    # -------------------------------------------------------------------------------------------------------------------
+    def read_pair(file_in,file_out):
+        pair = tf.data.TFRecordDataset(tf.stack([file_in,file_out]),compression_type=compression)
+        return pair.batch(2)
+    def parse_pair(pair):
+        feature = periodic_pad(data_in={"field":parse_function(pair[0]),"padding":padding})["field"]
+        label   = parse_function(pair[1])
+        return feature,label
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the pairs of snapshots
+    # -------------------------------------------------------------------------------------------------------------------
+    dataset = read_pipeline(data_in={"files":(files_in,files_out),"read_function":read_pair,
+                                     "parse_function":parse_pair,"pipeline":pipeline,
+                                     "cache_key":cache_key})["dataset"]
+    return dataset
+
 def read_tfrecord(data_in={"tfrecord_folder":'/tfrecord/',"interval":[],"test_size":0.2,"padding":15,"shpx":1,
                            "shpy":1,"shpz":1,"data_type":"float32"}):
     """
@@ -134,6 +227,12 @@ def read_tfrecord(data_in={"tfrecord_folder":'/tfrecord/',"interval":[],"test_si
             - shpy            : shape of the field in the wall-normal direction
             - shpz            : shape of the field in the spanwise direction
             - data_type       : type of the data
+            - compression     : (optional) compression of the tfrecord files ("": no compression, "ZLIB", "GZIP")
+            - tfrecord_mode   : (optional) storage mode of the tfrecord files ("pair" or "snapshot", default "pair")
+            - delta_pred      : (optional) number of fields to advance the prediction in the snapshot mode (default 1)
+            - pipeline        : (optional) configuration of the pipeline (see tfrecord_pipeline.pipeline_config)
+            - check           : (optional) flag to check the files with the manifest of the folder (default False)
+            - check_hash      : (optional) flag to compare the checksum of the files in the check (default False)
   
     Returns
     -------
@@ -147,6 +246,26 @@ def read_tfrecord(data_in={"tfrecord_folder":'/tfrecord/',"interval":[],"test_si
     # Read the data
     # -------------------------------------------------------------------------------------------------------------------
     tfrecord_folder = str(data_in["tfrecord_folder"])
+    if "tfrecord_mode" in data_in.keys():
+        tfrecord_mode = str(data_in["tfrecord_mode"])
+    else:
+        tfrecord_mode = "pair"
+    if "delta_pred" in data_in.keys():
+        delta_pred = int(data_in["delta_pred"])
+    else:
+        delta_pred = 1
+    if "pipeline" in data_in.keys():
+        pipeline = data_in["pipeline"]
+    else:
+        pipeline = {}
+    if "check" in data_in.keys():
+        check = bool(data_in["check"])
+    else:
+        check = False
+    if "check_hash" in data_in.keys():
+        check_hash = bool(data_in["check_hash"])
+    else:
+        check_hash = False
     interval        = np.array(data_in["interval"],dtype="int")
     test_size       = float(data_in["test_size"])
     padding         = int(data_in["padding"])
@@ -154,79 +273,64 @@ def read_tfrecord(data_in={"tfrecord_folder":'/tfrecord/',"interval":[],"test_si
     shpy            = int(data_in["shpy"])
     shpz            = int(data_in["shpz"])
     data_type       = str(data_in["data_type"])
-    if data_type == "float32":
-        dtype = tf.float32
-    elif data_type == "float16":
-        dtype = tf.float16
+    if "compression" in data_in.keys():
+        compression = compression_type(data_in={"compression":data_in["compression"]})["compression"]
     else:
-        print("Exit the calculation due to invalid data type.",flush=True)
-        sys.exit()
-    
-    # -------------------------------------------------------------------------------------------------------------------
-    # Define the function to parse
-    # -------------------------------------------------------------------------------------------------------------------
-    def parse_function(proto):
-        """
-        
-        .................................................................................................................
-        # _parse_function: Function for parsing the data
-        .................................................................................................................
-    
-        Parameters
-        ----------
-        proto : TFRecords data
-            Information to parse.
-
-        Returns
-        -------
-        feature : TFRecords data
-            Parsed features.
-        label : TYPE
-            Parsed labels.
-
-        """
-        # ---------------------------------------------------------------------------------------------------------------
-        # Define your `features` dictionary here:
-        # Adjust shape based on how data was flattened
-        # ---------------------------------------------------------------------------------------------------------------
-        feature_description = {'feature': tf.io.FixedLenFeature([shpy*(shpz+2*padding)*(shpx+2*padding)*3],dtype),
-                               'label': tf.io.FixedLenFeature([shpy*shpz*shpx*3],dtype)}
-        parsed_features     = tf.io.parse_single_example(proto,feature_description)
-        feature             = tf.reshape(parsed_features['feature'],[shpy,shpz+2*padding,shpx+2*padding,3])
-        label               = tf.reshape(parsed_features['label'],[shpy,shpz,shpx,3])
-        return feature,label
+        compression = ""
     
     # -------------------------------------------------------------------------------------------------------------------
-    # Check data
+    # Check the files with the manifest of the folder. The tensors are not decoded, the files are validated with the
+    # size and optionally the checksum stored when they were written. The fields with invalid files are replaced by the
+    # next field with valid files.
+    #   - files_index : function returning the files of the sample of an index
+    #   - valid       : flag of validation of each file
     # -------------------------------------------------------------------------------------------------------------------
-    check = False
     if check:
+        tcheck = time.time()
+        if tfrecord_mode == "snapshot":
+            files_index = lambda index: ["snapshot_"+str(index)+".tfrecord",
+                                         "snapshot_"+str(index+delta_pred)+".tfrecord"]
+        else:
+            files_index = lambda index: ["dataset_"+str(index)+".tfrecord"]
+        files_check = sorted(set([file for index in interval for file in files_index(index)]))
+        data_check  = check_files(data_in={"output_directory":tfrecord_folder,"files":files_check,
+                                           "check_hash":check_hash,"nworkers":8})
+        valid       = data_check["valid"]
+        if not data_check["exist"]:
+            print("The folder "+tfrecord_folder+" has no manifest, only the existence of the files is checked.",
+                  flush=True)
+        index_max   = max([int(file.split("_")[-1].split(".")[0]) for file in os.listdir(tfrecord_folder)
+                           if file.endswith(".tfrecord")]+[int(np.max(interval))])
         for ind in np.arange(len(interval)):
-            index = interval[ind]
-            print("-"*100,flush=True)
-            print("Checking file: "+str(index),flush=True)
-            print("-"*100,flush=True)
-            index1  = index
-            fileii  = tfrecord_folder+"dataset_"+str(index1)+".tfrecord"
+            index1 = interval[ind]
             while True:
-                try:
-                    filessl = tf.data.Dataset.from_tensor_slices([fileii])
-                    dataset = filessl.interleave(tf.data.TFRecordDataset,cycle_length=tf.data.experimental.AUTOTUNE)
-                    mapdata = dataset.map(parse_function) 
-                    data_tf = list(mapdata.take(1).as_numpy_iterator())[0][0]
-                    data_tf_out = list(mapdata.take(1).as_numpy_iterator())[0][1]
+                files_new = [file for file in files_index(index1) if file not in valid.keys()]
+                if len(files_new) > 0:
+                    valid.update(check_files(data_in={"output_directory":tfrecord_folder,"files":files_new,
+                                                      "check_hash":check_hash,"nworkers":8})["valid"])
+                if all([valid[file] for file in files_index(index1)]):
                     break
-                except:
-                    index1 += 1
-                    fileii  = tfrecord_folder+"dataset_"+str(index1)+".tfrecord"
-                    print("-"*100,flush=True)
-                    print("Field corrupted, changing it by:  file: "+fileii,flush=True)
-                    print("-"*100,flush=True)
-            if index != index1:
+                print("-"*100,flush=True)
+                print("Field corrupted: "+str(index1),flush=True)
+                print("-"*100,flush=True)
+                index1 += 1
+                if index1 > index_max:
+                    print("No valid tfrecord file to replace the field "+str(interval[ind])+". Exit calculation!",
+                          flush=True)
+                    sys.exit()
+            if interval[ind] != index1:
+                print("Field "+str(interval[ind])+" changed by field "+str(index1),flush=True)
                 interval[ind] = index1
+        print("Time for checking the tfrecord files: "+str(time.time()-tcheck),flush=True)
     
-    all_files = sorted([os.path.join(tfrecord_folder, f) 
-                        for f in os.listdir(tfrecord_folder) if f.endswith('.tfrecord')])
+    # -------------------------------------------------------------------------------------------------------------------
+    # Define the pipelines and the parameters of the cache. The files of the validation data are not shuffled.
+    #   - pipeline_vali : configuration of the pipeline of the validation data
+    #   - cache_key     : parameters of the files included in the name of the cache files
+    # -------------------------------------------------------------------------------------------------------------------
+    pipeline_vali = dict(pipeline,shuffle_files=False)
+    cache_key     = {"padding":padding,"data_type":data_type,"delta_pred":delta_pred,"tfrecord_mode":tfrecord_mode,
+                     "compression":compression}
     
     # -------------------------------------------------------------------------------------------------------------------
     # List all tfrecord files
@@ -235,12 +339,34 @@ def read_tfrecord(data_in={"tfrecord_folder":'/tfrecord/',"interval":[],"test_si
     tfrecord_files_train = [tfrecord_folder+"dataset_"+str(index)+".tfrecord" for index in interval[:num_train]]
     tfrecord_files_vali  = [tfrecord_folder+"dataset_"+str(index)+".tfrecord" for index in interval[num_train:]]
     
+    # -------------------------------------------------------------------------------------------------------------------
+    # Load the data stored as snapshots. The output field of the index ii is the snapshot ii+delta_pred.
+    # -------------------------------------------------------------------------------------------------------------------
+    if tfrecord_mode == "snapshot":
+        snapshot_file = lambda index: tfrecord_folder+"snapshot_"+str(index)+".tfrecord"
+        data_train    = load_snapshots(data_in={"files_in":[snapshot_file(index) for index in interval[:num_train]],
+                                                "files_out":[snapshot_file(index+delta_pred)
+                                                             for index in interval[:num_train]],
+                                                "padding":padding,"shpx":shpx,"shpy":shpy,"shpz":shpz,
+                                                "data_type":data_type,"compression":compression,
+                                                "pipeline":pipeline,"cache_key":cache_key})
+        data_vali     = load_snapshots(data_in={"files_in":[snapshot_file(index) for index in interval[num_train:]],
+                                                "files_out":[snapshot_file(index+delta_pred)
+                                                             for index in interval[num_train:]],
+                                                "padding":padding,"shpx":shpx,"shpy":shpy,"shpz":shpz,
+                                                "data_type":data_type,"compression":compression,
+                                                "pipeline":pipeline_vali,"cache_key":cache_key})
+        data_out      = {"data_train":data_train,"data_vali":data_vali}
+        return data_out
+    
     # -------------------------------------------------------------------------------------------------------------------
     # Load the data
     # -------------------------------------------------------------------------------------------------------------------
     data_train = load_dataset(data_in={"tfrecord_files":tfrecord_files_train,"padding":padding,"shpx":shpx,"shpy":shpy,
-                                       "shpz":shpz,"data_type":data_type,"index":interval[:num_train]})
+                                       "shpz":shpz,"data_type":data_type,"index":interval[:num_train],
+                                       "compression":compression,"pipeline":pipeline,"cache_key":cache_key})
     data_vali  = load_dataset(data_in={"tfrecord_files":tfrecord_files_vali,"padding":padding,"shpx":shpx,"shpy":shpy,
-                                       "shpz":shpz,"data_type":data_type,"index":interval[num_train:]})
+                                       "shpz":shpz,"data_type":data_type,"index":interval[num_train:],
+                                       "compression":compression,"pipeline":pipeline_vali,"cache_key":cache_key})
     data_out   = {"data_train":data_train,"data_vali":data_vali}
     return data_out
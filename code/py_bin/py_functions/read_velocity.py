@@ -50,6 +50,10 @@ def read_velocity(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$I
             - padding     : padding of the fields
             - data_folder : folder to store generated data
             - umean_file  : file of the mean velocity
+            - field_cache : (optional) cache of the fields (py_bin.py_class.field_cache). The fluctuations are stored
+                            without padding, so the fields with different padding share the stored data
+            - cache_store : (optional) flag to store the field in the cache after reading it (default True)
+            - dtype       : (optional) type of the velocity arrays (default float64)
     Returns
     -------
     dict
@@ -84,6 +88,40 @@ def read_velocity(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$I
     umean_file    = str(data_in["umean_file"])  # file of the mean velocity
     file_complete = folder+'/'+file
     file_ii        = file_complete.replace("$INDEX$",index) 
+    if "field_cache" in data_in.keys():
+        field_cache = data_in["field_cache"]    # cache of the fields
+    else:
+        field_cache = None
+    if "cache_store" in data_in.keys():
+        cache_store = bool(data_in["cache_store"])  # flag to store the field in the cache
+    else:
+        cache_store = True
+    if "dtype" in data_in.keys():
+        dtype = str(data_in["dtype"])               # type of the velocity arrays
+    else:
+        dtype = "float64"
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the field from the cache if it has already been read
+    # -------------------------------------------------------------------------------------------------------------------
+    key_cache  = ("velocity",file_ii,dx,dy,dz,data_folder+'/'+umean_file,dtype)
+    data_cache = None
+    if field_cache is not None:
+        data_cache = field_cache.get(data_in={"key":key_cache})
+    if data_cache is not None:
+        uu = data_cache["uu"]
+        vv = data_cache["vv"]
+        ww = data_cache["ww"]
+        if padding > 0:
+            uu = padding_field(data_in={"field":uu,"shpx":shpx,"shpy":shpy,"shpz":shpz,"padding":padding})["field"]
+            vv = padding_field(data_in={"field":vv,"shpx":shpx,"shpy":shpy,"shpz":shpz,"padding":padding})["field"]
+            ww = padding_field(data_in={"field":ww,"shpx":shpx,"shpy":shpy,"shpz":shpz,"padding":padding})["field"]
+        else:
+            uu = uu.copy()
+            vv = vv.copy()
+            ww = ww.copy()
+        data_output = {"uu":uu,"vv":vv,"ww":ww}
+        return data_output
     try:
         dataUmean  = {"folder":data_folder,"file":umean_file,"dy":dy}
         meanU_data = read_Umean(dataUmean)
@@ -100,12 +138,33 @@ def read_velocity(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$I
     # -------------------------------------------------------------------------------------------------------------------
     # Read the information from the files. The information requires the mean values in the wall-normal directions
     # This values should be stored in the data folder, in the case of missing the file, the software will calculate it.
+    # The selection of the downsampling is read directly from the file into the arrays, so the field at full
+    # resolution is not loaded in memory. The mean velocity is subtracted in place.
+    #   - selection : strided selection of the downsampled field
+    #   - shp_read  : shape of the downsampled field
+    #   - velocity  : arrays of the velocity components
+    # -------------------------------------------------------------------------------------------------------------------
+    selection = np.s_[::dy,::dz,::dx]
+    with h5py.File(file_ii,'r') as file:
+        shp_read = tuple(len(range(0,nn,dd)) for nn,dd in zip(file['u'].shape,(dy,dz,dx)))
+        velocity = {}
+        for key in ["u","v","w"]:
+            velocity[key] = np.empty(shp_read,dtype=dtype)
+            file[key].read_direct(velocity[key],source_sel=selection)
+    uu  = velocity["u"]
+    vv  = velocity["v"]
+    ww  = velocity["w"]
+    uu -= np.asarray(UUmean,dtype=dtype).reshape(-1,1,1)
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Store the fluctuations in the cache. The stored arrays are read-only, the fields without padding are copied.
     # -------------------------------------------------------------------------------------------------------------------
-    file = h5py.File(file_ii,'r')    
-    UU   = np.array(file['u'])[::dy,::dz,::dx]
-    uu   = UU-UUmean.reshape(-1,1,1)
-    vv   = np.array(file['v'])[::dy,::dz,::dx]
-    ww   = np.array(file['w'])[::dy,::dz,::dx]
+    if field_cache is not None and cache_store:
+        field_cache.put(data_in={"key":key_cache,"value":{"uu":uu,"vv":vv,"ww":ww}})
+        if padding == 0:
+            uu = uu.copy()
+            vv = vv.copy()
+            ww = ww.copy()
     
     # -------------------------------------------------------------------------------------------------------------------
     # Apply the padding if necessary. The padding takes the variable padding to add that number of nodes in both sizes
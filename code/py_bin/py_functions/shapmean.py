@@ -9,9 +9,10 @@ Created on Fri Mar 22 09:23:59 2024
 
 File for calculating and reading the mean velocity. The file contains the following functions:
     Functions:
-        - save_Umean : function for saving the mean velocity
-        - read_Umean : function for reading the mean velocity
-        - calc_Umean : function for calculating the mean velocity
+        - save_Umean     : function for saving the mean velocity
+        - read_Umean     : function for reading the mean velocity
+        - field_SHAPmean : function for calculating the sums of the SHAP of a field
+        - calc_Umean     : function for calculating the mean velocity
 """
 
 # -----------------------------------------------------------------------------------------------------------------------
@@ -121,6 +122,73 @@ def read_SHAPmean(data_in={"folder":"Data","file":"SHAPmean.txt","dy":1}):
     return data_out
     
     
+def field_SHAPmean(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,
+                             "shpx":192,"shpy":201,"shpz":96}):
+    """
+    .....................................................................................................................
+    # field_SHAPmean: Function for calculating the sums of the SHAP of a field in the wall-normal planes
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the field.
+        The default is {"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,
+                        "shpx":192,"shpy":201,"shpz":96}.
+        Data:
+            - folder : path of the folder to read the SHAP data base
+            - file   : name of the file to read the SHAP
+            - index  : index of the field
+            - shpx   : shape of the tensors in the streamwise direction
+            - shpy   : shape of the tensors in the wall-normal direction
+            - shpz   : shape of the tensors in the spanwise direction
+
+    Returns
+    -------
+    dict
+        Sums of the SHAP as a function of the wall-normal distance. None if the file of the field is not found.
+        Data:
+            - SHAP_ucum : sum of the streamwise shap
+            - SHAP_vcum : sum of the wall-normal shap
+            - SHAP_wcum : sum of the spanwise shap
+            - SHAP_mcum : sum of the absolute value of the SHAP
+            - nn_cum    : number of gridpoints
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Load packages
+    # -------------------------------------------------------------------------------------------------------------------
+    import h5py
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read data
+    # -------------------------------------------------------------------------------------------------------------------
+    folder  = str(data_in["folder"])      # path to the folder for reading the SHAP data base
+    file    = str(data_in["file"])        # name of the file containing the SHAP data
+    index   = int(data_in["index"])       # index of the field
+    shpx    = int(data_in["shpx"])        # shape of the tensors in the streamwise direction
+    shpy    = int(data_in["shpy"])        # shape of the tensors in the wall-normal direction
+    shpz    = int(data_in["shpz"])        # shape of the tensors in the spanwise direction
+    file_ii = (folder+'/'+file).replace("$INDEX$",str(index))
+    print('Mean velocity calculation:' + str(file_ii),flush=True)
+    if not glob.glob(file_ii):
+        print('Skiping field '+str(index)+' as file was not found',flush=True)
+        return None
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Sum the SHAP in the wall-normal planes
+    # -------------------------------------------------------------------------------------------------------------------
+    file_r   = h5py.File(file_ii,'r')
+    SHAP_u   = np.array(file_r['SHAP_u'])
+    SHAP_v   = np.array(file_r['SHAP_v'])
+    SHAP_w   = np.array(file_r['SHAP_w'])
+    file_r.close()
+    SHAP_m   = np.sqrt(SHAP_u**2+SHAP_v**2+SHAP_w**2)
+    data_out = {"SHAP_ucum":np.sum(SHAP_u,axis=(1,2)),"SHAP_vcum":np.sum(SHAP_v,axis=(1,2)),
+                "SHAP_wcum":np.sum(SHAP_w,axis=(1,2)),"SHAP_mcum":np.sum(SHAP_m,axis=(1,2)),
+                "nn_cum":np.ones((shpy,))*shpx*shpz}
+    return data_out
+    
+    
 def calc_SHAPmean(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"folder":"../../P125_21pi_vu",
                            "file":"P125_21pi_vu.$INDEX$.h5.uvw","save_file":True,"SHAPmean_file":"SHAPmean.txt",
                            "data_folder":"Data","shpx":192,"shpy":201,"shpz":96}):
@@ -147,6 +215,9 @@ def calc_SHAPmean(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"fo
             - shpx          : shape of the tensors in the streamwise direction
             - shpy          : shape of the tensors in the wall-normal direction
             - shpz          : shape of the tensors in the spanwise direction
+            - nworkers      : (optional) number of processes
+            - chunk_size    : (optional) number of fields of each chunk
+            - chk_folder    : (optional) folder to store the partial sums of the chunks to resume the calculation
 
     Returns
     -------
@@ -163,7 +234,7 @@ def calc_SHAPmean(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"fo
     # -------------------------------------------------------------------------------------------------------------------
     # Load packages
     # -------------------------------------------------------------------------------------------------------------------
-    import h5py
+    from py_bin.py_functions.parallel_statistics import calc_parallel,merge_partials
     
     # -------------------------------------------------------------------------------------------------------------------
     # Read data
@@ -173,51 +244,40 @@ def calc_SHAPmean(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"fo
     field_delta   = int(data_in["field_delta"])
     folder        = str(data_in["folder"])        # path to the folder for reading the velocity data base
     file          = str(data_in["file"])          # name of the file containing the velocity data
-    file_comp     = folder+'/'+file
     save_file     = bool(data_in["save_file"])    # flag for saving the file
     SHAPmean_file = str(data_in["SHAPmean_file"]) # file for the mean velocity
     data_folder   = str(data_in["data_folder"])   # folder of the data calculated by the code
     shpx          = int(data_in["shpx"])          # shape of the tensors in the streamwise direction
     shpy          = int(data_in["shpy"])          # shape of the tensors in the wall-normal direction
     shpz          = int(data_in["shpz"])          # shape of the tensors in the spanwise direction
+    if "nworkers" in data_in.keys():
+        nworkers   = int(data_in["nworkers"])   # number of processes
+        chunk_size = int(data_in["chunk_size"]) # number of fields of each chunk
+        chk_folder = data_in["chk_folder"]      # folder of the partial sums of the chunks
+    else:
+        nworkers   = 1
+        chunk_size = 0
+        chk_folder = None
      
     # -------------------------------------------------------------------------------------------------------------------
-    # In the following lines:
-    #     - ii : index related to the field
-    #     - file_ii   : file of the shap field including the index
-    #     - SHAP_u    : streamwise shap
-    #     - SHAP_v    : wall-normal shap
-    #     - SHAP_w    : spanwise shap
-    #     - SHAP_m    : absolute value of the SHAP
+    # Sum the SHAP of the fields. The fields are divided in chunks calculated in parallel, the sums of each chunk are
+    # stored in the checkpoint folder.
     #     - SHAP_ucum : cumulative streamwise shap
     #     - SHAP_vcum : cumulative wall-normal shap
     #     - SHAP_wcum : cumulative spanwise shap
     #     - SHAP_mcum : cumulative value of the SHAP
-    #     - nn_cum vv : number of gridpoints used for calculate the mean shap
-    # -------------------------------------------------------------------------------------------------------------------
-    for ii in range(field_ini,field_fin,field_delta):            
-        file_ii = file_comp.replace("$INDEX$",str(ii))
-        print('Mean velocity calculation:' + str(file_ii),flush=True)
-        if glob.glob(file_ii):
-            file_r = h5py.File(file_ii,'r+')
-            SHAP_u = np.array(file_r['SHAP_u'])
-            SHAP_v = np.array(file_r['SHAP_v'])
-            SHAP_w = np.array(file_r['SHAP_w'])
-            SHAP_m = np.sqrt(SHAP_u**2+SHAP_v**2+SHAP_w**2)
-            if ii == field_ini:
-                SHAP_ucum = np.sum(SHAP_u,axis=(1,2))
-                SHAP_vcum = np.sum(SHAP_v,axis=(1,2))
-                SHAP_wcum = np.sum(SHAP_w,axis=(1,2))
-                SHAP_mcum = np.sum(SHAP_m,axis=(1,2))
-                nn_cum    = np.ones((shpy,))*shpx*shpz
-            else:
-                SHAP_ucum += np.sum(SHAP_u,axis=(1,2))
-                SHAP_vcum += np.sum(SHAP_v,axis=(1,2))
-                SHAP_wcum += np.sum(SHAP_w,axis=(1,2))
-                SHAP_mcum += np.sum(SHAP_m,axis=(1,2))
-                nn_cum    += np.ones((shpy,))*shpx*shpz
-        else:
-            print('Skiping field '+str(ii)+' as file was not found',flush=True)
+    #     - nn_cum    : number of gridpoints used for calculate the mean shap
+    # -------------------------------------------------------------------------------------------------------------------
+    data_partial = {"folder":folder,"file":file,"shpx":shpx,"shpy":shpy,"shpz":shpz}
+    data_cum     = calc_parallel(data_in={"function":field_SHAPmean,"merge":merge_partials,
+                                          "data_partial":data_partial,"field_ini":field_ini,"field_fin":field_fin,
+                                          "field_delta":field_delta,"nworkers":nworkers,"chunk_size":chunk_size,
+                                          "chk_folder":chk_folder,"chk_name":"SHAPmean"})
+    SHAP_ucum    = data_cum["SHAP_ucum"]
+    SHAP_vcum    = data_cum["SHAP_vcum"]
+    SHAP_wcum    = data_cum["SHAP_wcum"]
+    SHAP_mcum    = data_cum["SHAP_mcum"]
+    nn_cum       = data_cum["nn_cum"]
             
     # -------------------------------------------------------------------------------------------------------------------
     # Calculate the mean velocity
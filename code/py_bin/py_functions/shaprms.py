@@ -9,9 +9,11 @@ Created on Wed Mar 27 08:50:04 2024
 
 File to create the RMS values for the SHAP fields. Functions contained in the file:
     Functions:
-        - read_rms : function to read the rms of the velocity
-        - save_rms : function to save the rms of the velocity
-        - calc_rms : function to calculate the rms of the velocity
+        - read_rms        : function to read the rms of the velocity
+        - save_rms        : function to save the rms of the velocity
+        - field_rms       : function to calculate the sums of the squared SHAP of a field
+        - calc_rms        : function to calculate the rms of the velocity
+        - calc_rms_nomean : function to calculate the rms of the velocity without the mean value
 """
 
 # -----------------------------------------------------------------------------------------------------------------------
@@ -139,6 +141,94 @@ def save_rms(data_in={"file":"SHAPrms.txt","folder":"Data","SHAP_urms":[],"SHAP_
     file_save.write(content)
 
 
+def field_rms(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,
+                        "dx":1,"dy":1,"dz":1,"shpx":192,"shpy":201,"shpz":96,"SHAP_umean":0,"SHAP_vmean":0,
+                        "SHAP_wmean":0}):
+    """
+    .....................................................................................................................
+    # field_rms: Function to calculate the sums of the squared SHAP of a field in the wall-normal planes
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the field.
+        The default is {"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,
+                        "dx":1,"dy":1,"dz":1,"shpx":192,"shpy":201,"shpz":96,"SHAP_umean":0,"SHAP_vmean":0,
+                        "SHAP_wmean":0}.
+        Data:
+            - folder     : folder of the SHAP data
+            - file       : file of the SHAP data
+            - index      : index of the field
+            - dx         : downsampling in the streamwise direction
+            - dy         : downsampling in the wall-normal direction
+            - dz         : downsampling in the spanwise direction
+            - shpx       : shape of the tensors in the streamwise direction
+            - shpy       : shape of the tensors in the wall-normal direction
+            - shpz       : shape of the tensors in the spanwise direction
+            - SHAP_umean : mean streamwise SHAP subtracted from the field
+            - SHAP_vmean : mean wall-normal SHAP subtracted from the field
+            - SHAP_wmean : mean spanwise SHAP subtracted from the field
+
+    Returns
+    -------
+    dict
+        Sums of the SHAP as a function of the wall-normal distance. None if the file of the field is not found.
+        Data:
+            - SHAP_u2_cum : sum of the squared streamwise SHAP
+            - SHAP_v2_cum : sum of the squared wall-normal SHAP
+            - SHAP_w2_cum : sum of the squared spanwise SHAP
+            - SHAP_uv_cum : sum of the uv SHAP
+            - SHAP_vw_cum : sum of the vw SHAP
+            - SHAP_uw_cum : sum of the uw SHAP
+            - SHAP_m2_cum : sum of the squared absolute value of the SHAP
+            - nn_cum      : number of gridpoints
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Load packages
+    # -------------------------------------------------------------------------------------------------------------------
+    import h5py
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    folder     = str(data_in["folder"])                                      # folder name of the SHAP fields
+    file       = str(data_in["file"])                                        # file name of the SHAP fields
+    index      = int(data_in["index"])                                       # index of the field
+    dx         = int(data_in["dx"])                                          # downsampling in the x direction
+    dy         = int(data_in["dy"])                                          # downsampling in the y direction
+    dz         = int(data_in["dz"])                                          # downsampling in the z direction
+    shpx       = int(data_in["shpx"])                                        # shape of the tensor in the x direction
+    shpy       = int(data_in["shpy"])                                        # shape of the tensor in the y direction
+    shpz       = int(data_in["shpz"])                                        # shape of the tensor in the z direction
+    SHAP_umean = np.array(data_in["SHAP_umean"],dtype='float').reshape(-1,1,1) # mean streamwise SHAP
+    SHAP_vmean = np.array(data_in["SHAP_vmean"],dtype='float').reshape(-1,1,1) # mean wall-normal SHAP
+    SHAP_wmean = np.array(data_in["SHAP_wmean"],dtype='float').reshape(-1,1,1) # mean spanwise SHAP
+    file_ii    = (folder+'/'+file).replace("$INDEX$",str(index))
+    print('RMS velocity calculation:'+str(file_ii),flush=True)
+    if not glob.glob(file_ii):
+        print('Skiping field '+str(index)+' as file was not found',flush=True)
+        return None
+        
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the SHAP fields from the files and then calculate the sums in the planes
+    # -------------------------------------------------------------------------------------------------------------------
+    file_r   = h5py.File(file_ii,'r')
+    SHAP_u   = np.array(file_r['SHAP_u'])[::dy,::dz,::dx]-SHAP_umean
+    SHAP_v   = np.array(file_r['SHAP_v'])[::dy,::dz,::dx]-SHAP_vmean
+    SHAP_w   = np.array(file_r['SHAP_w'])[::dy,::dz,::dx]-SHAP_wmean
+    file_r.close()
+    SHAP_m2  = SHAP_u**2+SHAP_v**2+SHAP_w**2
+    data_out = {"SHAP_u2_cum":np.sum(np.multiply(SHAP_u,SHAP_u),axis=(1,2)),
+                "SHAP_v2_cum":np.sum(np.multiply(SHAP_v,SHAP_v),axis=(1,2)),
+                "SHAP_w2_cum":np.sum(np.multiply(SHAP_w,SHAP_w),axis=(1,2)),
+                "SHAP_uv_cum":np.sum(np.multiply(SHAP_u,SHAP_v),axis=(1,2)),
+                "SHAP_vw_cum":np.sum(np.multiply(SHAP_v,SHAP_w),axis=(1,2)),
+                "SHAP_uw_cum":np.sum(np.multiply(SHAP_u,SHAP_w),axis=(1,2)),
+                "SHAP_m2_cum":np.sum(SHAP_m2,axis=(1,2)),"nn_cum":np.ones((shpy,))*shpx*shpz}
+    return data_out
+    
+    
 def calc_rms(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"SHAPmean_file":"SHAPmean.txt",
                       "data_folder":"Data","file":"../../P125_21pi_vu","folder":"P125_21pi_vu.$INDEX$.h5.uvw",
                       "dx":1,"dy":1,"dz":1,"shpx":192,"shpy":201,"shpz":96,"save_file":True,
@@ -171,6 +261,9 @@ def calc_rms(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"SHAPmea
             - save_file     : flag for saving the information in a file (True: the information is saved in a file,
                                                                          False: the information is stored in a variable)
             - SHAPrms_file  : file containing the information of the RMS of the SHAP
+            - nworkers      : (optional) number of processes
+            - chunk_size    : (optional) number of fields of each chunk
+            - chk_folder    : (optional) folder to store the partial sums of the chunks to resume the calculation
 
     Returns
     -------
@@ -191,7 +284,7 @@ def calc_rms(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"SHAPmea
     # Load packages
     # -------------------------------------------------------------------------------------------------------------------
     from py_bin.py_functions.shapmean import read_SHAPmean
-    import h5py
+    from py_bin.py_functions.parallel_statistics import calc_parallel,merge_partials
     
     # -------------------------------------------------------------------------------------------------------------------
     # Read the data
@@ -211,46 +304,33 @@ def calc_rms(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"SHAPmea
     shpz           = int(data_in["shpz"])          # shape of the tensor in the z direction
     save_file      = bool(data_in["save_file"])    # flag to choose if the RMS is saved in a file
     SHAPrms_file   = str(data_in["SHAPrms_file"])  # file to store the RMS information
-    file_comp      = folder+'/'+file
-    for ii in range(field_ini,field_fin,field_delta):
-        file_ii = file_comp.replace("$INDEX$",str(ii))
-        print('RMS velocity calculation:'+str(file_ii),flush=True)
+    if "nworkers" in data_in.keys():
+        nworkers   = int(data_in["nworkers"])   # number of processes
+        chunk_size = int(data_in["chunk_size"]) # number of fields of each chunk
+        chk_folder = data_in["chk_folder"]      # folder of the partial sums of the chunks
+    else:
+        nworkers   = 1
+        chunk_size = 0
+        chk_folder = None
         
-        # ---------------------------------------------------------------------------------------------------------------
-        # Read the velocity fields from the files and then calculate their maximum and minimum values
-        # ---------------------------------------------------------------------------------------------------------------
-        if glob.glob(file_ii):
-            file = h5py.File(file_ii,'r+')
-            SHAP_u   = np.array(file['SHAP_u'])[::dy,::dz,::dx]
-            SHAP_v   = np.array(file['SHAP_v'])[::dy,::dz,::dx]
-            SHAP_w   = np.array(file['SHAP_w'])[::dy,::dz,::dx]
-            SHAP_m2  = SHAP_u**2+SHAP_v**2+SHAP_w**2
-            SHAP_u2  = np.multiply(SHAP_u,SHAP_u)
-            SHAP_v2  = np.multiply(SHAP_v,SHAP_v)
-            SHAP_w2  = np.multiply(SHAP_w,SHAP_w)
-            SHAP_uv  = np.multiply(SHAP_u,SHAP_v)
-            SHAP_vw  = np.multiply(SHAP_v,SHAP_w)
-            SHAP_uw  = np.multiply(SHAP_u,SHAP_w)
-            if ii == field_ini:
-                SHAP_u2_cum = np.sum(SHAP_u2,axis=(1,2))
-                SHAP_v2_cum = np.sum(SHAP_v2,axis=(1,2))
-                SHAP_w2_cum = np.sum(SHAP_w2,axis=(1,2))
-                SHAP_uv_cum = np.sum(SHAP_uv,axis=(1,2))
-                SHAP_vw_cum = np.sum(SHAP_vw,axis=(1,2))
-                SHAP_uw_cum = np.sum(SHAP_uw,axis=(1,2))
-                SHAP_m2_cum = np.sum(SHAP_m2,axis=(1,2))
-                nn_cum      = np.ones((shpy,))*shpx*shpz
-            else:
-                SHAP_u2_cum += np.sum(SHAP_u2,axis=(1,2))
-                SHAP_v2_cum += np.sum(SHAP_v2,axis=(1,2))
-                SHAP_w2_cum += np.sum(SHAP_w2,axis=(1,2))
-                SHAP_uv_cum += np.sum(SHAP_uv,axis=(1,2))
-                SHAP_vw_cum += np.sum(SHAP_vw,axis=(1,2))
-                SHAP_uw_cum += np.sum(SHAP_uw,axis=(1,2))
-                SHAP_m2_cum += np.sum(SHAP_m2,axis=(1,2))
-                nn_cum      += np.ones((shpy,))*shpx*shpz
-        else:
-            print('Skiping field '+str(ii)+' as file was not found',flush=True)
+    # -------------------------------------------------------------------------------------------------------------------
+    # Sum the squared SHAP of the fields. The fields are divided in chunks calculated in parallel, the sums of each
+    # chunk are stored in the checkpoint folder.
+    # -------------------------------------------------------------------------------------------------------------------
+    data_partial = {"folder":folder,"file":file,"dx":dx,"dy":dy,"dz":dz,"shpx":shpx,"shpy":shpy,"shpz":shpz,
+                    "SHAP_umean":0,"SHAP_vmean":0,"SHAP_wmean":0}
+    data_cum     = calc_parallel(data_in={"function":field_rms,"merge":merge_partials,"data_partial":data_partial,
+                                          "field_ini":field_ini,"field_fin":field_fin,"field_delta":field_delta,
+                                          "nworkers":nworkers,"chunk_size":chunk_size,"chk_folder":chk_folder,
+                                          "chk_name":"SHAPrms"})
+    SHAP_u2_cum  = data_cum["SHAP_u2_cum"]
+    SHAP_v2_cum  = data_cum["SHAP_v2_cum"]
+    SHAP_w2_cum  = data_cum["SHAP_w2_cum"]
+    SHAP_uv_cum  = data_cum["SHAP_uv_cum"]
+    SHAP_vw_cum  = data_cum["SHAP_vw_cum"]
+    SHAP_uw_cum  = data_cum["SHAP_uw_cum"]
+    SHAP_m2_cum  = data_cum["SHAP_m2_cum"]
+    nn_cum       = data_cum["nn_cum"]
     SHAP_urms = np.sqrt(np.divide(SHAP_u2_cum,nn_cum))    
     SHAP_vrms = np.sqrt(np.divide(SHAP_v2_cum,nn_cum))   
     SHAP_wrms = np.sqrt(np.divide(SHAP_w2_cum,nn_cum)) 
@@ -306,6 +386,9 @@ def calc_rms_nomean(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"
             - save_file     : flag for saving the information in a file (True: the information is saved in a file,
                                                                          False: the information is stored in a variable)
             - SHAPrms_file  : file containing the information of the RMS of the SHAP
+            - nworkers      : (optional) number of processes
+            - chunk_size    : (optional) number of fields of each chunk
+            - chk_folder    : (optional) folder to store the partial sums of the chunks to resume the calculation
 
     Returns
     -------
@@ -326,7 +409,7 @@ def calc_rms_nomean(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"
     # Load packages
     # -------------------------------------------------------------------------------------------------------------------
     from py_bin.py_functions.shapmean import read_SHAPmean
-    import h5py
+    from py_bin.py_functions.parallel_statistics import calc_parallel,merge_partials
     
     # -------------------------------------------------------------------------------------------------------------------
     # Read the data
@@ -347,7 +430,14 @@ def calc_rms_nomean(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"
     save_file      = bool(data_in["save_file"])    # flag to choose if the RMS is saved in a file
     SHAPrms_file   = str(data_in["SHAPrms_file"])  # file to store the RMS information
     SHAPrms_file   = SHAPrms_file.replace(".txt","_nomean.txt")
-    file_comp      = folder+'/'+file
+    if "nworkers" in data_in.keys():
+        nworkers   = int(data_in["nworkers"])   # number of processes
+        chunk_size = int(data_in["chunk_size"]) # number of fields of each chunk
+        chk_folder = data_in["chk_folder"]      # folder of the partial sums of the chunks
+    else:
+        nworkers   = 1
+        chunk_size = 0
+        chk_folder = None
     try:
         data_SHAPmean  = read_SHAPmean(data_in={"folder":data_folder,"file":SHAPmean_file,"dy":dy})
         SHAP_umean     = data_SHAPmean["SHAP_umean"]
@@ -356,45 +446,25 @@ def calc_rms_nomean(data_in={"field_ini":1000,"field_fin":9999,"field_delta":1,"
     except:
         print("RMS calculations require mean velocity file. Breaking calculation...",flush=True)
         sys.exit()
-    for ii in range(field_ini,field_fin,field_delta):
-        file_ii = file_comp.replace("$INDEX$",str(ii))
-        print('RMS velocity calculation:'+str(file_ii),flush=True)
         
-        # ---------------------------------------------------------------------------------------------------------------
-        # Read the velocity fields from the files and then calculate their maximum and minimum values
-        # ---------------------------------------------------------------------------------------------------------------
-        if glob.glob(file_ii):
-            file = h5py.File(file_ii,'r+')
-            SHAP_u   = np.array(file['SHAP_u'])[::dy,::dz,::dx]-SHAP_umean.reshape(-1,1,1)
-            SHAP_v   = np.array(file['SHAP_v'])[::dy,::dz,::dx]-SHAP_vmean.reshape(-1,1,1)
-            SHAP_w   = np.array(file['SHAP_w'])[::dy,::dz,::dx]-SHAP_wmean.reshape(-1,1,1)
-            SHAP_m2  = SHAP_u**2+SHAP_v**2+SHAP_w**2
-            SHAP_u2  = np.multiply(SHAP_u,SHAP_u)
-            SHAP_v2  = np.multiply(SHAP_v,SHAP_v)
-            SHAP_w2  = np.multiply(SHAP_w,SHAP_w)
-            SHAP_uv  = np.multiply(SHAP_u,SHAP_v)
-            SHAP_vw  = np.multiply(SHAP_v,SHAP_w)
-            SHAP_uw  = np.multiply(SHAP_u,SHAP_w)
-            if ii == field_ini:
-                SHAP_u2_cum = np.sum(SHAP_u2,axis=(1,2))
-                SHAP_v2_cum = np.sum(SHAP_v2,axis=(1,2))
-                SHAP_w2_cum = np.sum(SHAP_w2,axis=(1,2))
-                SHAP_uv_cum = np.sum(SHAP_uv,axis=(1,2))
-                SHAP_vw_cum = np.sum(SHAP_vw,axis=(1,2))
-                SHAP_uw_cum = np.sum(SHAP_uw,axis=(1,2))
-                SHAP_m2_cum = np.sum(SHAP_m2,axis=(1,2))
-                nn_cum      = np.ones((shpy,))*shpx*shpz
-            else:
-                SHAP_u2_cum += np.sum(SHAP_u2,axis=(1,2))
-                SHAP_v2_cum += np.sum(SHAP_v2,axis=(1,2))
-                SHAP_w2_cum += np.sum(SHAP_w2,axis=(1,2))
-                SHAP_uv_cum += np.sum(SHAP_uv,axis=(1,2))
-                SHAP_vw_cum += np.sum(SHAP_vw,axis=(1,2))
-                SHAP_uw_cum += np.sum(SHAP_uw,axis=(1,2))
-                SHAP_m2_cum += np.sum(SHAP_m2,axis=(1,2))
-                nn_cum      += np.ones((shpy,))*shpx*shpz
-        else:
-            print('Skiping field '+str(ii)+' as file was not found',flush=True)
+    # -------------------------------------------------------------------------------------------------------------------
+    # Sum the squared SHAP of the fields. The fields are divided in chunks calculated in parallel, the sums of each
+    # chunk are stored in the checkpoint folder.
+    # -------------------------------------------------------------------------------------------------------------------
+    data_partial = {"folder":folder,"file":file,"dx":dx,"dy":dy,"dz":dz,"shpx":shpx,"shpy":shpy,"shpz":shpz,
+                    "SHAP_umean":SHAP_umean,"SHAP_vmean":SHAP_vmean,"SHAP_wmean":SHAP_wmean}
+    data_cum     = calc_parallel(data_in={"function":field_rms,"merge":merge_partials,"data_partial":data_partial,
+                                          "field_ini":field_ini,"field_fin":field_fin,"field_delta":field_delta,
+                                          "nworkers":nworkers,"chunk_size":chunk_size,"chk_folder":chk_folder,
+                                          "chk_name":"SHAPrms_nomean"})
+    SHAP_u2_cum  = data_cum["SHAP_u2_cum"]
+    SHAP_v2_cum  = data_cum["SHAP_v2_cum"]
+    SHAP_w2_cum  = data_cum["SHAP_w2_cum"]
+    SHAP_uv_cum  = data_cum["SHAP_uv_cum"]
+    SHAP_vw_cum  = data_cum["SHAP_vw_cum"]
+    SHAP_uw_cum  = data_cum["SHAP_uw_cum"]
+    SHAP_m2_cum  = data_cum["SHAP_m2_cum"]
+    nn_cum       = data_cum["nn_cum"]
     SHAP_urms = np.sqrt(np.divide(SHAP_u2_cum,nn_cum))    
     SHAP_vrms = np.sqrt(np.divide(SHAP_v2_cum,nn_cum))   
     SHAP_wrms = np.sqrt(np.divide(SHAP_w2_cum,nn_cum)) 
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+-------------------------------------------------------------------------------------------------------------------------
+tfrecord_format.py
+-------------------------------------------------------------------------------------------------------------------------
+Created on Sat Oct 17 17:21:38 2026
+
+@author: Andres Cremades Botella
+
+File containing the format of the samples stored in the tfrecord files. Each sample stores the input and the output
+tensors as the raw little-endian bytes of the data type of the training (float32 or float16) and a header with the
+shape and the type of the tensors. The bytes are decoded with a single copy instead of parsing a list of floats for
+every node of the field. The files can be compressed with ZLIB or GZIP. Two storage modes are available:
+    - pair     : each file stores the padded input field ii and the output field ii+delta_pred
+    - snapshot : each file stores a single normalized field without padding, the pairs of fields are built and padded
+                 when the files are read
+The file contains the following functions:
+    Functions:
+        - compression_type   : function to check the type of compression of the tfrecord files
+        - serialize_example  : function to create the serialized example of a sample
+        - parse_example      : function to define the parser of the examples
+        - serialize_snapshot : function to create the serialized example of a snapshot
+        - parse_snapshot     : function to define the parser of the snapshots
+"""
+# -----------------------------------------------------------------------------------------------------------------------
+# Import packages for all the functions
+# -----------------------------------------------------------------------------------------------------------------------
+import tensorflow as tf
+import numpy as np
+import sys
+
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+# Define the functions
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+
+def compression_type(data_in={"compression":""}):
+    """
+    .....................................................................................................................
+    # compression_type: Function to check the type of compression of the tfrecord files
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the compression.
+        The default is {"compression":""}.
+        Data:
+            - compression : type of compression ("" or None: no compression, "ZLIB", "GZIP")
+
+    Returns
+    -------
+    dict
+        Type of compression.
+        Data:
+            - compression : type of compression used by tensorflow ("", "ZLIB", "GZIP")
+
+    """
+    compression = data_in["compression"]
+    if compression is None:
+        compression = ""
+    compression = str(compression).upper()
+    if compression not in ["","ZLIB","GZIP"]:
+        print("Exit the calculation due to invalid tfrecord compression: "+compression,flush=True)
+        sys.exit()
+    data_out = {"compression":compression}
+    return data_out
+
+
+def serialize_example(data_in={"feature":[],"label":[]}):
+    """
+    .....................................................................................................................
+    # serialize_example: Create a tf.train.Example message ready to be written to a file. The tensors are stored as
+                         raw little-endian bytes with the header of the shape and the type.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        data containing the input information.
+        The default is {"feature":[],"label":[]}.
+        Data:
+            - feature : input tensor of the sample
+            - label   : output tensor of the sample
+
+    Returns
+    -------
+    dict
+        Structure containing mapped example
+        Data:
+            - example : serialized example
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data. The output is converted to the type of the input.
+    # -------------------------------------------------------------------------------------------------------------------
+    feature = np.asarray(data_in["feature"])
+    label   = np.asarray(data_in["label"])
+    dtype   = feature.dtype.newbyteorder("<")
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Create a dictionary mapping the feature name to the tf.train.Example-compatible data type.
+    #   - feature, label             : raw bytes of the tensors
+    #   - feature_shape, label_shape : shape of the tensors
+    #   - dtype                      : type of the tensors
+    # -------------------------------------------------------------------------------------------------------------------
+    bytes_feature = np.ascontiguousarray(feature,dtype=dtype).tobytes()
+    bytes_label   = np.ascontiguousarray(label,dtype=dtype).tobytes()
+    feature_dict  = {'feature':tf.train.Feature(bytes_list=tf.train.BytesList(value=[bytes_feature])),
+                     'label':tf.train.Feature(bytes_list=tf.train.BytesList(value=[bytes_label])),
+                     'feature_shape':tf.train.Feature(int64_list=tf.train.Int64List(value=list(feature.shape))),
+                     'label_shape':tf.train.Feature(int64_list=tf.train.Int64List(value=list(label.shape))),
+                     'dtype':tf.train.Feature(bytes_list=tf.train.BytesList(value=[dtype.name.encode()]))}
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Create a Features message using tf.train.Example.
+    # -------------------------------------------------------------------------------------------------------------------
+    example_proto = tf.train.Example(features=tf.train.Features(feature=feature_dict))
+    data_out      = {"example":example_proto.SerializeToString()}
+    return data_out
+
+
+def parse_example(data_in={"padding":15,"shpx":1,"shpy":1,"shpz":1,"data_type":"float32"}):
+    """
+    .....................................................................................................................
+    # parse_example: Function to define the parser of the examples written by serialize_example. The header of each
+                     example is checked against the shape and the type of the training.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the tensors.
+        The default is {"padding":15,"shpx":1,"shpy":1,"shpz":1,"data_type":"float32"}.
+        Data:
+            - padding   : padding of the input field
+            - shpx      : shape of the fields in the streamwise direction
+            - shpy      : shape of the fields in the wall-normal direction
+            - shpz      : shape of the fields in the spanwise direction
+            - data_type : type of data (float32, float16)
+
+    Returns
+    -------
+    dict
+        Parser of the examples.
+        Data:
+            - parse_function : function returning the input and the output tensors of a serialized example
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    padding   = int(data_in["padding"])
+    shpx      = int(data_in["shpx"])
+    shpy      = int(data_in["shpy"])
+    shpz      = int(data_in["shpz"])
+    data_type = str(data_in["data_type"])
+    if data_type == "float32":
+        dtype = tf.float32
+    elif data_type == "float16":
+        dtype = tf.float16
+    else:
+        print("Exit the calculation due to invalid data type.",flush=True)
+        sys.exit()
+    shape_feature = [shpy,shpz+2*padding,shpx+2*padding,3]
+    shape_label   = [shpy,shpz,shpx,3]
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Define the function to parse
+    # -------------------------------------------------------------------------------------------------------------------
+    feature_description = {'feature':tf.io.FixedLenFeature([],tf.string),
+                           'label':tf.io.FixedLenFeature([],tf.string),
+                           'feature_shape':tf.io.FixedLenFeature([4],tf.int64),
+                           'label_shape':tf.io.FixedLenFeature([4],tf.int64),
+                           'dtype':tf.io.FixedLenFeature([],tf.string)}
+    def parse_function(proto):
+        """
+        .................................................................................................................
+        # parse_function: Function for parsing the data
+        .................................................................................................................
+
+        Parameters
+        ----------
+        proto : TFRecords data
+            Information to parse.
+
+        Returns
+        -------
+        feature : tensor
+            Parsed features.
+        label : tensor
+            Parsed labels.
+
+        """
+        parsed_features = tf.io.parse_single_example(proto,feature_description)
+        check_header    = [tf.debugging.assert_equal(parsed_features['dtype'],data_type,
+                                                     message="Invalid type of the tfrecord"),
+                           tf.debugging.assert_equal(parsed_features['feature_shape'],
+                                                     tf.constant(shape_feature,dtype=tf.int64),
+                                                     message="Invalid shape of the tfrecord feature"),
+                           tf.debugging.assert_equal(parsed_features['label_shape'],
+                                                     tf.constant(shape_label,dtype=tf.int64),
+                                                     message="Invalid shape of the tfrecord label")]
+        with tf.control_dependencies(check_header):
+            feature = tf.io.decode_raw(parsed_features['feature'],dtype,little_endian=True)
+            label   = tf.io.decode_raw(parsed_features['label'],dtype,little_endian=True)
+        feature = tf.reshape(feature,shape_feature)
+        label   = tf.reshape(label,shape_label)
+        return feature,label
+    data_out = {"parse_function":parse_function}
+    return data_out
+
+
+def serialize_snapshot(data_in={"field":[],"index":0}):
+    """
+    .....................................................................................................................
+    # serialize_snapshot: Create a tf.train.Example message of a single field. The field is stored as raw little-endian
+                          bytes with the header of the shape, the type and the index of the field.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        data containing the input information.
+        The default is {"field":[],"index":0}.
+        Data:
+            - field : normalized field without padding (y,z,x,3)
+            - index : index of the field
+
+    Returns
+    -------
+    dict
+        Structure containing mapped example
+        Data:
+            - example : serialized example
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    field = np.asarray(data_in["field"])
+    index = int(data_in["index"])
+    dtype = field.dtype.newbyteorder("<")
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Create the example
+    # -------------------------------------------------------------------------------------------------------------------
+    bytes_field   = np.ascontiguousarray(field,dtype=dtype).tobytes()
+    feature_dict  = {'field':tf.train.Feature(bytes_list=tf.train.BytesList(value=[bytes_field])),
+                     'field_shape':tf.train.Feature(int64_list=tf.train.Int64List(value=list(field.shape))),
+                     'dtype':tf.train.Feature(bytes_list=tf.train.BytesList(value=[dtype.name.encode()])),
+                     'index':tf.train.Feature(int64_list=tf.train.Int64List(value=[index]))}
+    example_proto = tf.train.Example(features=tf.train.Features(feature=feature_dict))
+    data_out      = {"example":example_proto.SerializeToString()}
+    return data_out
+
+
+def parse_snapshot(data_in={"shpx":1,"shpy":1,"shpz":1,"data_type":"float32"}):
+    """
+    .....................................................................................................................
+    # parse_snapshot: Function to define the parser of the examples written by serialize_snapshot. The header of each
+                      example is checked against the shape and the type of the training.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the fields.
+        The default is {"shpx":1,"shpy":1,"shpz":1,"data_type":"float32"}.
+        Data:
+            - shpx      : shape of the fields in the streamwise direction
+            - shpy      : shape of the fields in the wall-normal direction
+            - shpz      : shape of the fields in the spanwise direction
+            - data_type : type of data (float32, float16)
+
+    Returns
+    -------
+    dict
+        Parser of the snapshots.
+        Data:
+            - parse_function : function returning the field of a serialized example
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    shpx      = int(data_in["shpx"])
+    shpy      = int(data_in["shpy"])
+    shpz      = int(data_in["shpz"])
+    data_type = str(data_in["data_type"])
+    if data_type == "float32":
+        dtype = tf.float32
+    elif data_type == "float16":
+        dtype = tf.float16
+    else:
+        print("Exit the calculation due to invalid data type.",flush=True)
+        sys.exit()
+    shape_field = [shpy,shpz,shpx,3]
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Define the function to parse
+    # -------------------------------------------------------------------------------------------------------------------
+    feature_description = {'field':tf.io.FixedLenFeature([],tf.string),
+                           'field_shape':tf.io.FixedLenFeature([4],tf.int64),
+                           'dtype':tf.io.FixedLenFeature([],tf.string),
+                           'index':tf.io.FixedLenFeature([],tf.int64)}
+    def parse_function(proto):
+        """
+        .................................................................................................................
+        # parse_function: Function for parsing the data
+        .................................................................................................................
+
+        Parameters
+        ----------
+        proto : TFRecords data
+            Information to parse.
+
+        Returns
+        -------
+        field : tensor
+            Parsed field.
+
+        """
+        parsed_features = tf.io.parse_single_example(proto,feature_description)
+        check_header    = [tf.debugging.assert_equal(parsed_features['dtype'],data_type,
+                                                     message="Invalid type of the tfrecord"),
+                           tf.debugging.assert_equal(parsed_features['field_shape'],
+                                                     tf.constant(shape_field,dtype=tf.int64),
+                                                     message="Invalid shape of the tfrecord field")]
+        with tf.control_dependencies(check_header):
+            field = tf.io.decode_raw(parsed_features['field'],dtype,little_endian=True)
+        field = tf.reshape(field,shape_field)
+        return field
+    data_out = {"parse_function":parse_function}
+    return data_out
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+-------------------------------------------------------------------------------------------------------------------------
+tfrecord_manifest.py
+-------------------------------------------------------------------------------------------------------------------------
+Created on Sat Oct 17 20:31:52 2026
+
+@author: Andres Cremades Botella
+
+File containing the manifest of the tfrecord files. The manifest of a folder stores a line for each finished file with
+the size in bytes, the number of records and the md5 checksum of the file. The header of the manifest stores the
+parameters used to generate the files, so the files generated with different parameters are not used. The manifest is
+written by the workers creating the files in manifest_<worker>.txt and merged in manifest.txt. The files are validated
+against the manifest without decoding the tensors. The file contains the following functions:
+    Functions:
+        - file_checksum  : function to calculate the checksum of a file
+        - write_header   : function to write the parameters of the generation in the header of a manifest
+        - add_manifest   : function to add a file to a manifest
+        - read_manifest  : function to read the manifest of a folder
+        - merge_manifest : function to merge the manifests of the workers
+        - check_files    : function to validate a list of files against the manifest
+"""
+# -----------------------------------------------------------------------------------------------------------------------
+# Import packages for all the functions
+# -----------------------------------------------------------------------------------------------------------------------
+import os
+import json
+import hashlib
+
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+# Define the functions
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+
+def file_checksum(data_in={"file":"dataset_0000.tfrecord","block_size":16*1024**2}):
+    """
+    .....................................................................................................................
+    # file_checksum: Function to calculate the md5 checksum of a file. The file is read in blocks.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the file.
+        The default is {"file":"dataset_0000.tfrecord","block_size":16*1024**2}.
+        Data:
+            - file       : path to the file
+            - block_size : size of the blocks read from the file in bytes
+
+    Returns
+    -------
+    dict
+        Checksum of the file.
+        Data:
+            - checksum : md5 checksum of the file
+
+    """
+    file       = str(data_in["file"])
+    block_size = int(data_in["block_size"])
+    md5        = hashlib.md5()
+    with open(file,"rb") as file_read:
+        for block in iter(lambda: file_read.read(block_size),b""):
+            md5.update(block)
+    data_out = {"checksum":md5.hexdigest()}
+    return data_out
+
+
+def write_header(data_in={"manifest_file":"manifest.txt","params":{}}):
+    """
+    .....................................................................................................................
+    # write_header: Function to write the parameters of the generation of the files in the header of a new manifest.
+                    The header is a line starting with "#params" followed by the parameters in json format.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the manifest.
+        The default is {"manifest_file":"manifest.txt","params":{}}.
+        Data:
+            - manifest_file : file of the manifest
+            - params        : dictionary of the parameters of the generation of the files
+
+    Returns
+    -------
+    None.
+
+    """
+    manifest_file = str(data_in["manifest_file"])
+    params        = data_in["params"]
+    with open(manifest_file,"w") as file_manifest:
+        file_manifest.write("#params "+json.dumps(params,sort_keys=True,default=str)+"\n")
+
+
+def add_manifest(data_in={"manifest_file":"manifest.txt","file":"dataset_0000.tfrecord","nrecord":1}):
+    """
+    .....................................................................................................................
+    # add_manifest: Function to add a finished file to a manifest
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the file.
+        The default is {"manifest_file":"manifest.txt","file":"dataset_0000.tfrecord","nrecord":1}.
+        Data:
+            - manifest_file : file of the manifest
+            - file          : path to the finished file
+            - nrecord       : number of records of the file
+
+    Returns
+    -------
+    None.
+
+    """
+    manifest_file = str(data_in["manifest_file"])
+    file          = str(data_in["file"])
+    nrecord       = int(data_in["nrecord"])
+    checksum      = file_checksum(data_in={"file":file,"block_size":16*1024**2})["checksum"]
+    with open(manifest_file,"a") as file_manifest:
+        file_manifest.write(os.path.basename(file)+" "+str(os.path.getsize(file))+" "+str(nrecord)+" "+checksum+"\n")
+
+
+def read_manifest(data_in={"output_directory":'/tfrecord/'}):
+    """
+    .....................................................................................................................
+    # read_manifest: Function to read the manifest of a folder. The manifest contains the file manifest.txt and the
+                     files manifest_<worker>.txt written by the workers. The files of the manifest that do not exist or
+                     have a different size are not returned. If the parameters of the generation are given, the files
+                     of the manifests with different parameters in the header (or without header) are not returned.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the folder.
+        The default is {"output_directory":'/tfrecord/'}.
+        Data:
+            - output_directory : directory of the tfrecord files
+            - params           : (optional) dictionary of the parameters of the generation of the files
+
+    Returns
+    -------
+    dict
+        Finished files.
+        Data:
+            - files : dictionary of the finished files containing the size, the number of records and the checksum
+                      of each file
+            - exist : flag indicating if the folder has a manifest
+            - nskip : number of manifests skipped due to different parameters of the generation
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    output_directory = str(data_in["output_directory"])
+    files            = {}
+    file_list        = []
+    nskip            = 0
+    if "params" in data_in.keys():
+        params = json.loads(json.dumps(data_in["params"],sort_keys=True,default=str))
+    else:
+        params = None
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the manifests. The last entry of a file is kept. The manifests generated with different parameters are
+    # skipped.
+    # -------------------------------------------------------------------------------------------------------------------
+    if os.path.exists(output_directory):
+        file_list = sorted([file for file in os.listdir(output_directory)
+                            if file.startswith("manifest") and file.endswith(".txt")])
+        for file_manifest in file_list:
+            with open(os.path.join(output_directory,file_manifest),"r") as file_read:
+                lines = file_read.readlines()
+            if params is not None:
+                if len(lines) == 0 or not lines[0].startswith("#params ") or \
+                    json.loads(lines[0][len("#params "):]) != params:
+                    nskip += 1
+                    continue
+            for line in lines:
+                if line.startswith("#"):
+                    continue
+                line = line.split()
+                if len(line) == 4:
+                    files[line[0]] = {"size":int(line[1]),"nrecord":int(line[2]),"checksum":line[3]}
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Remove the files that do not exist or have a different size
+    # -------------------------------------------------------------------------------------------------------------------
+    files    = {file:entry for file,entry in files.items()
+                if os.path.exists(os.path.join(output_directory,file))
+                and os.path.getsize(os.path.join(output_directory,file)) == entry["size"]}
+    data_out = {"files":files,"exist":len(file_list) > 0,"nskip":nskip}
+    return data_out
+
+
+def merge_manifest(data_in={"output_directory":'/tfrecord/'}):
+    """
+    .....................................................................................................................
+    # merge_manifest: Function to merge the manifests of the workers in the file manifest.txt. If the parameters of
+                      the generation are given, only the manifests with the same parameters are merged and the
+                      parameters are stored in the header.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the folder.
+        The default is {"output_directory":'/tfrecord/'}.
+        Data:
+            - output_directory : directory of the tfrecord files
+            - params           : (optional) dictionary of the parameters of the generation of the files
+
+    Returns
+    -------
+    None.
+
+    """
+    output_directory = str(data_in["output_directory"])
+    file_manifest    = os.path.join(output_directory,"manifest.txt")
+    if "params" in data_in.keys():
+        files = read_manifest(data_in={"output_directory":output_directory,"params":data_in["params"]})["files"]
+        write_header(data_in={"manifest_file":file_manifest+".tmp","params":data_in["params"]})
+    else:
+        files = read_manifest(data_in={"output_directory":output_directory})["files"]
+        open(file_manifest+".tmp","w").close()
+    with open(file_manifest+".tmp","a") as file_write:
+        for file in sorted(files.keys()):
+            file_write.write(file+" "+str(files[file]["size"])+" "+str(files[file]["nrecord"])+" "+
+                             files[file]["checksum"]+"\n")
+    os.replace(file_manifest+".tmp",file_manifest)
+    for file in os.listdir(output_directory):
+        if file.startswith("manifest_") and file.endswith(".txt"):
+            os.remove(os.path.join(output_directory,file))
+
+
+def check_files(data_in={"output_directory":'/tfrecord/',"files":[],"check_hash":False,"nworkers":8}):
+    """
+    .....................................................................................................................
+    # check_files: Function to validate a list of files against the manifest. The files are valid if they are in the
+                   manifest with the same size. If the hash is checked, the checksum of the files is calculated in a
+                   pool of threads and compared with the manifest.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the files.
+        The default is {"output_directory":'/tfrecord/',"files":[],"check_hash":False,"nworkers":8}.
+        Data:
+            - output_directory : directory of the tfrecord files
+            - files            : names of the files to validate
+            - check_hash       : flag to compare the checksum of the files
+            - nworkers         : number of threads calculating the checksums
+
+    Returns
+    -------
+    dict
+        Result of the validation.
+        Data:
+            - valid : dictionary of the flag of validation of each file
+            - exist : flag indicating if the folder has a manifest (if not, only the existence of the files is checked)
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Import packages
+    # -------------------------------------------------------------------------------------------------------------------
+    from concurrent.futures import ThreadPoolExecutor
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    output_directory = str(data_in["output_directory"])
+    files            = [os.path.basename(str(file)) for file in data_in["files"]]
+    check_hash       = bool(data_in["check_hash"])
+    nworkers         = int(data_in["nworkers"])
+    data_manifest    = read_manifest(data_in={"output_directory":output_directory})
+    files_manifest   = data_manifest["files"]
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Validate the files with the size of the manifest. The folders without manifest only check the existence.
+    # -------------------------------------------------------------------------------------------------------------------
+    if data_manifest["exist"]:
+        valid = {file:file in files_manifest for file in files}
+    else:
+        valid = {file:os.path.exists(os.path.join(output_directory,file)) for file in files}
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Compare the checksums
+    # -------------------------------------------------------------------------------------------------------------------
+    if check_hash and data_manifest["exist"]:
+        files_hash = [file for file in files if valid[file]]
+        with ThreadPoolExecutor(max_workers=max(nworkers,1)) as executor:
+            checksums = executor.map(lambda file: file_checksum(data_in={"file":os.path.join(output_directory,file),
+                                                                         "block_size":16*1024**2})["checksum"],
+                                     files_hash)
+            for file,checksum in zip(files_hash,checksums):
+                valid[file] = checksum == files_manifest[file]["checksum"]
+    data_out = {"valid":valid,"exist":data_manifest["exist"]}
+    return data_out
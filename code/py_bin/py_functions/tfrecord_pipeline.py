@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+-------------------------------------------------------------------------------------------------------------------------
+tfrecord_pipeline.py
+-------------------------------------------------------------------------------------------------------------------------
+Created on Sat Oct 17 19:05:47 2026
+
+@author: Andres Cremades Botella
+
+File to build the input pipeline of the training from the tfrecord files. The files are optionally shuffled, read in
+parallel and the samples are parsed in parallel. The parsed samples can be cached in memory or in a file, shuffled, batched and
+prefetched. The pipeline can be evaluated without a model to measure the throughput of the input of the training. The
+file contains the following functions:
+    Functions:
+        - pipeline_config    : function to define the configuration of the pipeline
+        - read_pipeline      : function to read and parse the tfrecord files
+        - finish_pipeline    : function to shuffle, batch and prefetch the samples
+        - benchmark_pipeline : function to measure the throughput of the pipeline
+"""
+# -----------------------------------------------------------------------------------------------------------------------
+# Import packages for all the functions
+# -----------------------------------------------------------------------------------------------------------------------
+import tensorflow as tf
+import numpy as np
+import hashlib
+import json
+import time
+
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+# Define the functions
+# -----------------------------------------------------------------------------------------------------------------------
+# -----------------------------------------------------------------------------------------------------------------------
+
+def pipeline_config(data_in={}):
+    """
+    .....................................................................................................................
+    # pipeline_config: Function to define the configuration of the pipeline. The keys that are not defined take the
+                       default values.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Configuration of the pipeline.
+        The default is {}.
+        Data:
+            - parse_parallel  : number of samples parsed in parallel (-1 for autotune, default -1)
+            - deterministic   : flag to keep the order of the samples (default True)
+            - shuffle_files   : flag to shuffle the order of the files in each epoch if the samples are not cached
+                                (default False)
+            - data_cache      : cache of the parsed samples ("": no cache, "memory": cache in memory, other: prefix of
+                                the cache files, default "")
+            - shuffle_buffer  : number of samples of the shuffle buffer (0 to avoid the shuffle, default 0)
+            - autotune_ram    : memory budget of the autotune of tensorflow in GB (0 for the default, default 0)
+            - private_threads : number of threads of the pipeline (0 for the default, default 0)
+
+    Returns
+    -------
+    dict
+        Configuration of the pipeline with all the keys.
+
+    """
+    data_out = {"parse_parallel":-1,"deterministic":True,"shuffle_files":False,"data_cache":"","shuffle_buffer":0,
+                "autotune_ram":0,"private_threads":0}
+    for key in data_out.keys():
+        if key in data_in.keys():
+            data_out[key] = data_in[key]
+    data_out["parse_parallel"]  = int(data_out["parse_parallel"])
+    data_out["deterministic"]   = bool(data_out["deterministic"])
+    data_out["shuffle_files"]   = bool(data_out["shuffle_files"])
+    data_out["data_cache"]      = str(data_out["data_cache"])
+    data_out["shuffle_buffer"]  = int(data_out["shuffle_buffer"])
+    data_out["autotune_ram"]    = float(data_out["autotune_ram"])
+    data_out["private_threads"] = int(data_out["private_threads"])
+    return data_out
+
+
+def read_pipeline(data_in={"files":[],"read_function":None,"parse_function":None,"pipeline":{}}):
+    """
+    .....................................................................................................................
+    # read_pipeline: Function to read and parse the tfrecord files. The files are optionally shuffled and read in
+                     parallel, the samples are parsed in parallel and cached.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the pipeline.
+        The default is {"files":[],"read_function":None,"parse_function":None,"pipeline":{}}.
+        Data:
+            - files          : files to read (list of files or tuple of lists of files)
+            - read_function  : function returning the dataset of the records of each element of files
+            - parse_function : function parsing each record
+            - pipeline       : configuration of the pipeline (see pipeline_config)
+            - cache_key      : (optional) dictionary of the parameters of the parsing included in the name of the
+                               cache files (padding, data type...)
+
+    Returns
+    -------
+    dict
+        Dataset of the parsed samples.
+        Data:
+            - dataset : dataset of the parsed samples
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    files          = data_in["files"]
+    read_function  = data_in["read_function"]
+    parse_function = data_in["parse_function"]
+    pipeline       = pipeline_config(data_in=data_in["pipeline"])
+    if pipeline["parse_parallel"] < 0:
+        parse_parallel = tf.data.AUTOTUNE
+    else:
+        parse_parallel = max(pipeline["parse_parallel"],1)
+    deterministic = pipeline["deterministic"]
+    if "cache_key" in data_in.keys():
+        cache_key = data_in["cache_key"]
+    else:
+        cache_key = {}
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the files. The files are shuffled in each epoch if the samples are not cached, the cached samples are
+    # shuffled by the shuffle buffer.
+    #   - nfile : number of files
+    # -------------------------------------------------------------------------------------------------------------------
+    files   = tf.data.Dataset.from_tensor_slices(files)
+    nfile   = int(files.cardinality())
+    if pipeline["shuffle_files"] and pipeline["data_cache"] == "" and nfile > 1:
+        files = files.shuffle(nfile,reshuffle_each_iteration=True)
+    dataset = files.interleave(read_function,cycle_length=tf.data.AUTOTUNE,num_parallel_calls=tf.data.AUTOTUNE,
+                               deterministic=deterministic)
+    dataset = dataset.map(parse_function,num_parallel_calls=parse_parallel,deterministic=deterministic)
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Cache the samples. The name of the cache files contains a hash of the list of files and of the parameters of the
+    # parsing, so each set of files and parameters has its own cache.
+    # -------------------------------------------------------------------------------------------------------------------
+    if pipeline["data_cache"] == "memory":
+        dataset = dataset.cache()
+    elif pipeline["data_cache"] != "":
+        file_hash = hashlib.md5((str(data_in["files"])+
+                                 json.dumps(cache_key,sort_keys=True,default=str)).encode()).hexdigest()[:12]
+        dataset   = dataset.cache(pipeline["data_cache"]+"_"+file_hash)
+    data_out = {"dataset":dataset}
+    return data_out
+
+
+def finish_pipeline(data_in={"dataset":None,"batch_size":1,"prefetch":-1,"options":None,"pipeline":{}}):
+    """
+    .....................................................................................................................
+    # finish_pipeline: Function to shuffle, batch and prefetch the samples and to apply the options of the pipeline.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the pipeline.
+        The default is {"dataset":None,"batch_size":1,"prefetch":-1,"options":None,"pipeline":{}}.
+        Data:
+            - dataset    : dataset of the samples
+            - batch_size : size of the batch
+            - prefetch   : number of batches prefetched (-1 for autotune)
+            - options    : options of the dataset defined by the strategy (None to avoid them)
+            - pipeline   : configuration of the pipeline (see pipeline_config)
+
+    Returns
+    -------
+    dict
+        Dataset of the batches.
+        Data:
+            - dataset : dataset of the batches
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    dataset    = data_in["dataset"]
+    batch_size = int(data_in["batch_size"])
+    prefetch   = int(data_in["prefetch"])
+    options    = data_in["options"]
+    pipeline   = pipeline_config(data_in=data_in["pipeline"])
+    if prefetch < 0:
+        prefetch = tf.data.AUTOTUNE
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Shuffle, batch and prefetch
+    # -------------------------------------------------------------------------------------------------------------------
+    if pipeline["shuffle_buffer"] > 0:
+        dataset = dataset.shuffle(pipeline["shuffle_buffer"],reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.prefetch(prefetch)
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Apply the options. The options of the strategy are merged with the options of the pipeline.
+    # -------------------------------------------------------------------------------------------------------------------
+    options_pipe                   = tf.data.Options()
+    options_pipe.deterministic     = pipeline["deterministic"]
+    options_pipe.autotune.enabled  = True
+    if pipeline["autotune_ram"] > 0:
+        options_pipe.autotune.ram_budget = int(pipeline["autotune_ram"]*1024**3)
+    if pipeline["private_threads"] > 0:
+        options_pipe.threading.private_threadpool_size = pipeline["private_threads"]
+    if options is not None:
+        dataset = dataset.with_options(options)
+    dataset  = dataset.with_options(options_pipe)
+    data_out = {"dataset":dataset}
+    return data_out
+
+
+def benchmark_pipeline(data_in={"dataset":None,"nbatch":100,"nwarmup":5}):
+    """
+    .....................................................................................................................
+    # benchmark_pipeline: Function to measure the throughput of the pipeline. The batches are iterated without a model.
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the benchmark.
+        The default is {"dataset":None,"nbatch":100,"nwarmup":5}.
+        Data:
+            - dataset : dataset of the batches
+            - nbatch  : number of batches measured (the dataset is repeated if it is shorter)
+            - nwarmup : number of batches iterated before the measurement
+
+    Returns
+    -------
+    dict
+        Throughput of the pipeline.
+        Data:
+            - nsample     : number of samples measured
+            - time        : time of the measurement
+            - samples_sec : samples per second
+            - mb_sec      : MB per second
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    dataset = data_in["dataset"].repeat()
+    nbatch  = int(data_in["nbatch"])
+    nwarmup = int(data_in["nwarmup"])
+
+    # -------------------------------------------------------------------------------------------------------------------
+    # Iterate the batches. The warmup fills the buffers of the pipeline.
+    # -------------------------------------------------------------------------------------------------------------------
+    iterator = iter(dataset)
+    for ii in range(nwarmup):
+        next(iterator)
+    nsample = 0
+    nbytes  = 0
+    tstart  = time.time()
+    for ii in range(nbatch):
+        batch    = next(iterator)
+        nsample += int(batch[0].shape[0])
+        nbytes  += int(np.sum([tensor.shape.num_elements()*tensor.dtype.size for tensor in batch]))
+    time_bench = time.time()-tstart
+    data_out   = {"nsample":nsample,"time":time_bench,"samples_sec":nsample/time_bench,
+                  "mb_sec":nbytes/1024**2/time_bench}
+    print("-"*100,flush=True)
+    print("Pipeline benchmark: "+str(nsample)+" samples in "+str(time_bench)+" s",flush=True)
+    print("Samples per second: "+str(data_out["samples_sec"]),flush=True)
+    print("MB per second: "+str(data_out["mb_sec"]),flush=True)
+    print("-"*100,flush=True)
+    return data_out
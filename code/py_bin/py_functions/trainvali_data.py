@@ -22,7 +22,8 @@ File to prepare the data for the training of the neural network. The file contai
 import numpy as np
 import os
 import sys
-from py_bin.py_functions.read_norm_velocity import read_norm_velocity
+from py_bin.py_class.field_cache import field_cache
+from py_bin.py_functions.prefetch_fields import prefetch_fields, read_norm_pair
 
 # -----------------------------------------------------------------------------------------------------------------------
 # Define read function
@@ -278,6 +279,7 @@ def prepare_data_tf(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.
             - data_type   : type of data of the tensors
             - mean_norm   : flag for using the mean and std for normalizing (True: use mean and std
                                                                              False: use min and max)
+            - field_prefetch : (optional) number of fields read in the background (default 2)
 
     Returns
     -------
@@ -330,6 +332,29 @@ def prepare_data_tf(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.
         print("Folder: "+folder_tf+" is already created",flush=True)
     folder_savetf = folder_tf+'/'+folderii_tf
     
+    # -------------------------------------------------------------------------------------------------------------------
+    # Define the cache of the normalized fields. The output field of the index ii is the input field of the index
+    # ii+delta_pred, the cache stores the fields between them and the fields read in the background to read and
+    # normalize every field once.
+    #   - field_step   : minimum separation between the fields of the interval
+    #   - nfield_cache : number of fields stored in the cache
+    # -------------------------------------------------------------------------------------------------------------------
+    if "field_prefetch" in data_in.keys():
+        field_prefetch = int(data_in["field_prefetch"])        # number of fields read in the background
+    else:
+        field_prefetch = 2
+    field_step   = np.diff(np.unique(interval))
+    field_step   = int(np.min(field_step)) if len(field_step) > 0 else 1
+    nfield_cache = 2*(int(np.ceil(delta_pred/field_step))+1+field_prefetch)
+    cache        = field_cache(data_in={"max_bytes":nfield_cache*3*np.dtype(data_type).itemsize*shpx*shpy*shpz})
+    data_norm    = {"folder":folder,"file":file,"padding":padding,"shpx":shpx,"shpy":shpy,"shpz":shpz,"dx":dx,
+                    "dy":dy,"dz":dz,"data_folder":data_folder,"umean_file":umean_file,"unorm_file":unorm_file,
+                    "delta_pred":delta_pred,"data_type":data_type,"mean_norm":mean_norm,"norm_out":True,
+                    "field_cache":cache}
+    data_read    = [dict(data_norm,index=int(ii)) for ii in interval]
+    fields_read  = prefetch_fields(data_in={"function":read_norm_pair,"data_read":data_read,
+                                            "nprefetch":field_prefetch,"nworkers":1})
+    
     # -------------------------------------------------------------------------------------------------------------------
     # Define the input and the output data matrices, the precision of the matrices is reduced to data type to
     # adapt the memory required for them. Then the dataset is converted to the tensorflow dataset format.
@@ -339,9 +364,7 @@ def prepare_data_tf(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.
     #          does not use padding.
     # The variables are clear as soon as possible to save memory.
     # -------------------------------------------------------------------------------------------------------------------
-    for ii in interval: 
-        data_X               = np.zeros((1,shpy,shpz+2*padding,shpx+2*padding,3),dtype=data_type)
-        data_Y               = np.zeros((1,shpy,shpz,shpx,3),dtype=data_type)
+    for ii,data_veloc_norm in zip(interval,fields_read): 
         folder_savetf_ii     = folder_savetf.replace("$INDEX$",str(ii))
         try:
             os.mkdir(folder_savetf_ii)
@@ -349,43 +372,15 @@ def prepare_data_tf(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.
             print("Folder: "+folder_savetf_ii+" is already created",flush=True)
             
         # ---------------------------------------------------------------------------------------------------------------
-        # Read the input field
-        # ---------------------------------------------------------------------------------------------------------------
-        data_norm_X     = {"folder":folder,"file":file,"padding":padding,"shpx":shpx,
-                           "shpy":shpy,"shpz":shpz,"dx":dx,"dy":dy,"dz":dz,"data_folder":data_folder,
-                           "umean_file":umean_file,"unorm_file":unorm_file,"index":ii,"data_type":data_type,
-                           "mean_norm":mean_norm}
-        data_veloc_norm = read_norm_velocity(data_in=data_norm_X)
-        norm_velocity_X = data_veloc_norm["norm_velocity"]
-        print("Time for reading the field: "+str(data_veloc_norm["time_read"]),flush=True)
-        print("Time for normalizing the field: "+str(data_veloc_norm["time_norm"]),flush=True)
-        del data_norm_X,data_veloc_norm
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Read the output field
+        # Read the input and the output fields, they are read in the background during the previous iterations.
+        # The normalized fields are channel-last tensors of the data type, they are used as the input and output
+        # data without copying them
         # ---------------------------------------------------------------------------------------------------------------
-        data_norm_Y     = {"folder":folder,"file":file,"padding":0,"shpx":shpx,
-                           "shpy":shpy,"shpz":shpz,"dx":dx,"dy":dy,"dz":dz,"data_folder":data_folder,
-                           "umean_file":umean_file,"unorm_file":unorm_file,"index":ii+delta_pred,
-                           "data_type":data_type,"mean_norm":mean_norm}
-        data_veloc_norm = read_norm_velocity(data_in=data_norm_Y)
-        norm_velocity_Y = data_veloc_norm["norm_velocity"]
-        print("Time for reading the field: "+str(data_veloc_norm["time_read"]),flush=True)
-        print("Time for normalizing the field: "+str(data_veloc_norm["time_norm"]),flush=True)
-        del data_norm_Y,data_veloc_norm
-        print("-"*100,flush=True)
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Store the input and output data
-        # ---------------------------------------------------------------------------------------------------------------
-        data_X[0,:,:,:,0]    = norm_velocity_X['unorm']
-        data_X[0,:,:,:,1]    = norm_velocity_X['vnorm']
-        data_X[0,:,:,:,2]    = norm_velocity_X['wnorm']
-        del norm_velocity_X
-        data_Y[0,:,:,:,0]    = norm_velocity_Y['unorm']
-        data_Y[0,:,:,:,1]    = norm_velocity_Y['vnorm']
-        data_Y[0,:,:,:,2]    = norm_velocity_Y['wnorm']
-        del norm_velocity_Y
+        data_X = data_veloc_norm["norm_tensor_in"][np.newaxis]
+        data_Y = data_veloc_norm["norm_tensor_out"][np.newaxis]
+        print("Time for reading the fields: "+str(data_veloc_norm["time_read"]),flush=True)
+        print("Time for normalizing the fields: "+str(data_veloc_norm["time_norm"]),flush=True)
+        del data_veloc_norm
         print("-"*100,flush=True)
         
         # ---------------------------------------------------------------------------------------------------------------
@@ -619,6 +614,10 @@ def read_inout_notprepared(data_in={"folder":"../../P125_21pi_vu","file":"P125_2
             - data_type   : type of the data (float16, float32)
             - mean_norm    : Flag to normalize using mean and std (True: use mean and std
                                                                    False: use min and max)
+            - field_prefetch : (optional) number of fields read in the background (default 2)
+            - data_prev      : (optional) data of the previous window of the training ("interval", "data_X" and
+                               "data_Y"), the fields of the interval contained in it are copied instead of read.
+                               The arrays of the previous window are reused if their shape is the same (default None)
 
     Returns
     -------
@@ -627,6 +626,7 @@ def read_inout_notprepared(data_in={"folder":"../../P125_21pi_vu","file":"P125_2
         Data:
             - data_X      : training data
             - data_Y      : validation data
+            - interval    : index of the fields of the data
 
     """
     
@@ -656,6 +656,30 @@ def read_inout_notprepared(data_in={"folder":"../../P125_21pi_vu","file":"P125_2
         print("[trainvali_data.py:data_traintest_tf] Data type needs to be selected.")
         sys.exit()
     
+    # -------------------------------------------------------------------------------------------------------------------
+    # Define the cache of the normalized fields. The output field of the index ii is the input field of the index
+    # ii+delta_pred, the cache stores the fields between them and the fields read in the background to read and
+    # normalize every field once.
+    #   - field_step   : minimum separation between the fields of the interval
+    #   - nfield_cache : number of fields stored in the cache
+    # -------------------------------------------------------------------------------------------------------------------
+    if "field_prefetch" in data_in.keys():
+        field_prefetch = int(data_in["field_prefetch"])        # number of fields read in the background
+    else:
+        field_prefetch = 2
+    if "data_prev" in data_in.keys():
+        data_prev = data_in["data_prev"]                       # data of the previous window
+    else:
+        data_prev = None
+    field_step   = np.diff(np.unique(interval))
+    field_step   = int(np.min(field_step)) if len(field_step) > 0 else 1
+    nfield_cache = 2*(int(np.ceil(delta_pred/field_step))+1+field_prefetch)
+    cache        = field_cache(data_in={"max_bytes":nfield_cache*3*np.dtype(data_type).itemsize*shpx*shpy*shpz})
+    data_norm    = {"folder":folder,"file":file,"padding":padding,"shpx":shpx,"shpy":shpy,"shpz":shpz,"dx":dx,
+                    "dy":dy,"dz":dz,"data_folder":data_folder,"umean_file":umean_file,"unorm_file":unorm_file,
+                    "delta_pred":delta_pred,"data_type":data_type,"mean_norm":mean_norm,"norm_out":True,
+                    "field_cache":cache}
+    
     # -------------------------------------------------------------------------------------------------------------------
     # Define the input and the output data matrices, the precision of the matrices is reduced to data type to
     # adapt the memory required for them.
@@ -663,59 +687,52 @@ def read_inout_notprepared(data_in={"folder":"../../P125_21pi_vu","file":"P125_2
     #          of the model
     # data_Y : output data for training and validation. Read the file with the following index in the interval. It
     #          does not use padding.
-    # The variables are clear as soon as possible to save memory.
-    # -------------------------------------------------------------------------------------------------------------------
-    data_X = np.zeros((len(interval),shpy,shpz+2*padding,shpx+2*padding,3),dtype=data_type)
-    data_Y = np.zeros((len(interval),shpy,shpz,shpx,3),dtype=data_type)
-    for ii in np.arange(len(interval)):  
-        field_interval = interval[ii]  
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Read the input field
-        # ---------------------------------------------------------------------------------------------------------------
-        data_norm_X     = {"folder":folder,"file":file,"padding":padding,"shpx":shpx,
-                           "shpy":shpy,"shpz":shpz,"dx":dx,"dy":dy,"dz":dz,"data_folder":data_folder,
-                           "umean_file":umean_file,"unorm_file":unorm_file,"index":field_interval,
-                           "data_type":data_type,"mean_norm":mean_norm}
-        data_veloc_norm = read_norm_velocity(data_in=data_norm_X)
-        norm_velocity_X = data_veloc_norm["norm_velocity"]
-        print("Time for reading the field: "+str(data_veloc_norm["time_read"]),flush=True)
-        print("Time for normalizing the field: "+str(data_veloc_norm["time_norm"]),flush=True)
-        del data_norm_X,data_veloc_norm
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Read the output field
-        # ---------------------------------------------------------------------------------------------------------------
-        data_norm_Y     = {"folder":folder,"file":file,"padding":0,"shpx":shpx,
-                           "shpy":shpy,"shpz":shpz,"dx":dx,"dy":dy,"dz":dz,"data_folder":data_folder,
-                           "umean_file":umean_file,"unorm_file":unorm_file,"index":field_interval+delta_pred,
-                           "data_type":data_type,"mean_norm":mean_norm}
-        data_veloc_norm = read_norm_velocity(data_in=data_norm_Y)
-        norm_velocity_Y = data_veloc_norm["norm_velocity"]
-        print("Time for reading the field: "+str(data_veloc_norm["time_read"]),flush=True)
-        print("Time for normalizing the field: "+str(data_veloc_norm["time_norm"]),flush=True)
-        del data_norm_Y,data_veloc_norm
+    # The fields are normalized directly in their position of the matrices while they are read in the background.
+    # The fields contained in the previous window are moved to their new position and only the rest are read. The
+    # arrays of the previous window are reused when they have the same shape, the fancy indexing copies the common
+    # fields before they are written in their new position.
+    #   - pos_prev : position of each field in the previous window
+    #   - ind_keep : positions of the fields copied from the previous window
+    #   - ind_new  : positions of the fields read from the files
+    # -------------------------------------------------------------------------------------------------------------------
+    shp_X = (len(interval),shpy,shpz+2*padding,shpx+2*padding,3)
+    shp_Y = (len(interval),shpy,shpz,shpx,3)
+    if data_prev is not None and data_prev["data_X"].shape == shp_X and data_prev["data_Y"].shape == shp_Y \
+        and data_prev["data_X"].dtype == np.dtype(data_type):
+        data_X = data_prev["data_X"]
+        data_Y = data_prev["data_Y"]
+    else:
+        data_X = np.empty(shp_X,dtype=data_type)
+        data_Y = np.empty(shp_Y,dtype=data_type)
+    ind_keep = np.array([],dtype="int")
+    if data_prev is not None:
+        pos_prev = {int(index):ii for ii,index in enumerate(data_prev["interval"])}
+        ind_keep = np.array([ii for ii in np.arange(len(interval)) if int(interval[ii]) in pos_prev.keys()],
+                            dtype="int")
+        ind_old  = np.array([pos_prev[int(interval[ii])] for ii in ind_keep],dtype="int")
+        if len(ind_keep) > 0:
+            data_X[ind_keep] = data_prev["data_X"][ind_old]
+            data_Y[ind_keep] = data_prev["data_Y"][ind_old]
+        print("Fields reused from the previous window: "+str(len(ind_keep))+"/"+str(len(interval)),flush=True)
+    del data_prev
+    ind_new   = np.setdiff1d(np.arange(len(interval)),ind_keep)
+    data_read = [dict(data_norm,index=int(interval[ii]),out_in=data_X[ii],out_out=data_Y[ii]) for ii in ind_new]
+    fields_read = prefetch_fields(data_in={"function":read_norm_pair,"data_read":data_read,
+                                           "nprefetch":field_prefetch,"nworkers":1})
+    for data_veloc_norm in fields_read:  
+        print("Time for reading the fields: "+str(data_veloc_norm["time_read"]),flush=True)
+        print("Time for normalizing the fields: "+str(data_veloc_norm["time_norm"]),flush=True)
+        del data_veloc_norm
         print("-"*100,flush=True)
-        
-        # ---------------------------------------------------------------------------------------------------------------
-        # Store the input and output data
-        # ---------------------------------------------------------------------------------------------------------------
-        data_X[ii,:,:,:,0] = norm_velocity_X['unorm']
-        data_X[ii,:,:,:,1] = norm_velocity_X['vnorm']
-        data_X[ii,:,:,:,2] = norm_velocity_X['wnorm']
-        del norm_velocity_X
-        data_Y[ii,:,:,:,0] = norm_velocity_Y['unorm']
-        data_Y[ii,:,:,:,1] = norm_velocity_Y['vnorm']
-        data_Y[ii,:,:,:,2] = norm_velocity_Y['wnorm']
-        del norm_velocity_Y
     # -------------------------------------------------------------------------------------------------------------------
     # Store the database
     # -------------------------------------------------------------------------------------------------------------------
-    data_out           = {}
-    data_out["data_X"] = data_X
+    data_out             = {}
+    data_out["data_X"]   = data_X
     del data_X
-    data_out["data_Y"] = data_Y
+    data_out["data_Y"]   = data_Y
     del data_Y
+    data_out["interval"] = interval
     return data_out
 
 
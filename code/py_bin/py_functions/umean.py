@@ -9,9 +9,10 @@ Created on Fri Mar 22 09:23:59 2024
 
 File for calculating and reading the mean velocity. The file contains the following functions:
     Functions:
-        - save_Umean : function for saving the mean velocity
-        - read_Umean : function for reading the mean velocity
-        - calc_Umean : function for calculating the mean velocity
+        - save_Umean  : function for saving the mean velocity
+        - read_Umean  : function for reading the mean velocity
+        - field_Umean : function for calculating the sums of the velocity of a field
+        - calc_Umean  : function for calculating the mean velocity
 """
 
 # -----------------------------------------------------------------------------------------------------------------------
@@ -114,6 +115,64 @@ def read_Umean(data_in={"folder":"Data","file":"Umean.txt","dy":1}):
     return data_out
     
     
+def field_Umean(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,
+                          "shpx":192,"shpy":201,"shpz":96}):
+    """
+    .....................................................................................................................
+    # field_Umean: Function for calculating the sums of the velocity of a field in the wall-normal planes
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the field.
+        The default is {"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,
+                        "shpx":192,"shpy":201,"shpz":96}.
+        Data:
+            - folder : path of the folder to read the velocity data base
+            - file   : name of the file to read the velocity
+            - index  : index of the field
+            - shpx   : shape of the tensors in the streamwise direction
+            - shpy   : shape of the tensors in the wall-normal direction
+            - shpz   : shape of the tensors in the spanwise direction
+
+    Returns
+    -------
+    dict
+        Sums of the velocity as a function of the wall-normal distance.
+        Data:
+            - UU_cum : sum of the streamwise velocity
+            - VV_cum : sum of the wall-normal velocity
+            - WW_cum : sum of the spanwise velocity
+            - nn_cum : number of gridpoints
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Load packages
+    # -------------------------------------------------------------------------------------------------------------------
+    import h5py
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read data
+    # -------------------------------------------------------------------------------------------------------------------
+    folder  = str(data_in["folder"])      # path to the folder for reading the velocity data base
+    file    = str(data_in["file"])        # name of the file containing the velocity data
+    index   = int(data_in["index"])       # index of the field
+    shpx    = int(data_in["shpx"])        # shape of the tensors in the streamwise direction
+    shpy    = int(data_in["shpy"])        # shape of the tensors in the wall-normal direction
+    shpz    = int(data_in["shpz"])        # shape of the tensors in the spanwise direction
+    file_ii = (folder+'/'+file).replace("$INDEX$",str(index))
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Sum the velocity in the wall-normal planes
+    # -------------------------------------------------------------------------------------------------------------------
+    print('Mean velocity calculation:' + str(file_ii),flush=True)
+    file_r   = h5py.File(file_ii,'r')
+    data_out = {"UU_cum":np.sum(np.array(file_r['u']),axis=(1,2)),"VV_cum":np.sum(np.array(file_r['v']),axis=(1,2)),
+                "WW_cum":np.sum(np.array(file_r['w']),axis=(1,2)),"nn_cum":np.ones((shpy,))*shpx*shpz}
+    file_r.close()
+    return data_out
+    
+    
 def calc_Umean(data_in={"field_ini":1000,"field_fin":9999,"folder":"../../P125_21pi_vu",\
                            "file":"P125_21pi_vu.$INDEX$.h5.uvw","save_file":True,"umean_file":"Umean.txt",
                            "data_folder":"Data","shpx":192,"shpy":201,"shpz":96}):
@@ -139,6 +198,9 @@ def calc_Umean(data_in={"field_ini":1000,"field_fin":9999,"folder":"../../P125_2
             - shpx        : shape of the tensors in the streamwise direction
             - shpy        : shape of the tensors in the wall-normal direction
             - shpz        : shape of the tensors in the spanwise direction
+            - nworkers    : (optional) number of processes
+            - chunk_size  : (optional) number of fields of each chunk
+            - chk_folder  : (optional) folder to store the partial sums of the chunks to resume the calculation
 
     Returns
     -------
@@ -154,7 +216,7 @@ def calc_Umean(data_in={"field_ini":1000,"field_fin":9999,"folder":"../../P125_2
     # -------------------------------------------------------------------------------------------------------------------
     # Load packages
     # -------------------------------------------------------------------------------------------------------------------
-    import h5py
+    from py_bin.py_functions.parallel_statistics import calc_parallel,merge_partials
     
     # -------------------------------------------------------------------------------------------------------------------
     # Read data
@@ -163,43 +225,38 @@ def calc_Umean(data_in={"field_ini":1000,"field_fin":9999,"folder":"../../P125_2
     field_fin   = int(data_in["field_fin"])    # index of the final field used for calculating the mean velocity
     folder      = str(data_in["folder"])       # path to the folder for reading the velocity data base
     file        = str(data_in["file"])         # name of the file containing the velocity data
-    file_comp   = folder+'/'+file
     save_file   = bool(data_in["save_file"])   # flag for saving the file
     umean_file  = str(data_in["umean_file"])   # file for the mean velocity
     data_folder = str(data_in["data_folder"])  # folder of the data calculated by the code
     shpx        = int(data_in["shpx"])         # shape of the tensors in the streamwise direction
     shpy        = int(data_in["shpy"])         # shape of the tensors in the wall-normal direction
     shpz        = int(data_in["shpz"])         # shape of the tensors in the spanwise direction
+    if "nworkers" in data_in.keys():
+        nworkers   = int(data_in["nworkers"])   # number of processes
+        chunk_size = int(data_in["chunk_size"]) # number of fields of each chunk
+        chk_folder = data_in["chk_folder"]     # folder of the partial sums of the chunks
+    else:
+        nworkers   = 1
+        chunk_size = 0
+        chk_folder = None
      
     # -------------------------------------------------------------------------------------------------------------------
-    # In the following lines:
-    #     - ii : index related to the field
-    #     - file_ii : file of the velocity field including the index
-    #     - UU      : streamwise velocity
-    #     - VV      : wall-normal velocity
-    #     - WW      : spanwise velocity
+    # Sum the velocity of the fields. The fields are divided in chunks calculated in parallel, the sums of each chunk are
+    # stored in the checkpoint folder.
     #     - UU_cum  : cumulative streamwise velocity
     #     - VV_cum  : cumulative wall-normal velocity
     #     - WW_cum  : cumulative spanwise velocity
     #     - nn_cum  : number of gridpoints used for calculate the mean velocity
     # -------------------------------------------------------------------------------------------------------------------
-    for ii in range(field_ini,field_fin):            
-        file_ii = file_comp.replace("$INDEX$",str(ii))
-        print('Mean velocity calculation:' + str(file_ii),flush=True)
-        file_r = h5py.File(file_ii,'r')
-        UU     = np.array(file_r['u'])
-        VV     = np.array(file_r['v'])
-        WW     = np.array(file_r['w'])
-        if ii == field_ini:
-            UU_cum = np.sum(UU,axis=(1,2))
-            VV_cum = np.sum(VV,axis=(1,2))
-            WW_cum = np.sum(WW,axis=(1,2))
-            nn_cum = np.ones((shpy,))*shpx*shpz
-        else:
-            UU_cum += np.sum(UU,axis=(1,2))
-            VV_cum += np.sum(VV,axis=(1,2))
-            WW_cum += np.sum(WW,axis=(1,2))
-            nn_cum += np.ones((shpy,))*shpx*shpz
+    data_partial = {"folder":folder,"file":file,"shpx":shpx,"shpy":shpy,"shpz":shpz}
+    data_cum     = calc_parallel(data_in={"function":field_Umean,"merge":merge_partials,"data_partial":data_partial,
+                                          "field_ini":field_ini,"field_fin":field_fin,"field_delta":1,
+                                          "nworkers":nworkers,"chunk_size":chunk_size,"chk_folder":chk_folder,
+                                          "chk_name":"Umean"})
+    UU_cum       = data_cum["UU_cum"]
+    VV_cum       = data_cum["VV_cum"]
+    WW_cum       = data_cum["WW_cum"]
+    nn_cum       = data_cum["nn_cum"]
             
     # -------------------------------------------------------------------------------------------------------------------
     # Calculate the mean velocity
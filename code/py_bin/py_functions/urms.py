@@ -9,9 +9,10 @@ Created on Wed Mar 27 08:50:04 2024
 
 File to create the RMS values for the velocity fields. Functions contained in the file:
     Functions:
-        - read_rms : function to read the rms of the velocity
-        - save_rms : function to save the rms of the velocity
-        - calc_rms : function to calculate the rms of the velocity
+        - read_rms  : function to read the rms of the velocity
+        - save_rms  : function to save the rms of the velocity
+        - field_rms : function to calculate the sums of the squared velocity of a field
+        - calc_rms  : function to calculate the rms of the velocity
 """
 
 # -----------------------------------------------------------------------------------------------------------------------
@@ -129,6 +130,82 @@ def save_rms(data_in={"file":"Urms.txt","folder":"Data","uurms":[],"vvrms":[],"w
     file_save.write(content)
 
 
+def field_rms(data_in={"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,
+                        "dx":1,"dy":1,"dz":1,"shpx":192,"shpy":201,"shpz":96,"UUmean":[]}):
+    """
+    .....................................................................................................................
+    # field_rms: Function to calculate the sums of the squared velocity fluctuations of a field in the wall-normal
+                 planes
+    .....................................................................................................................
+    Parameters
+    ----------
+    data_in : dict, optional
+        Data of the field.
+        The default is {"folder":"../../P125_21pi_vu","file":"P125_21pi_vu.$INDEX$.h5.uvw","index":1000,
+                        "dx":1,"dy":1,"dz":1,"shpx":192,"shpy":201,"shpz":96,"UUmean":[]}.
+        Data:
+            - folder : folder of the velocity flow
+            - file   : file of the velocity flow
+            - index  : index of the field
+            - dx     : downsampling in the streamwise direction
+            - dy     : downsampling in the wall-normal direction
+            - dz     : downsampling in the spanwise direction
+            - shpx   : shape of the tensors in the streamwise direction
+            - shpy   : shape of the tensors in the wall-normal direction
+            - shpz   : shape of the tensors in the spanwise direction
+            - UUmean : mean streamwise velocity
+
+    Returns
+    -------
+    dict
+        Sums of the velocity fluctuations as a function of the wall-normal distance.
+        Data:
+            - uu2_cum : sum of the squared streamwise velocity
+            - vv2_cum : sum of the squared wall-normal velocity
+            - ww2_cum : sum of the squared spanwise velocity
+            - uv_cum  : sum of the uv stress
+            - vw_cum  : sum of the vw stress
+            - uw_cum  : sum of the uw stress
+            - nn_cum  : number of gridpoints
+
+    """
+    # -------------------------------------------------------------------------------------------------------------------
+    # Load packages
+    # -------------------------------------------------------------------------------------------------------------------
+    import h5py
+    
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the data
+    # -------------------------------------------------------------------------------------------------------------------
+    folder  = str(data_in["folder"])                      # folder name of the flow fields
+    file    = str(data_in["file"])                        # file name of the flow fields
+    index   = int(data_in["index"])                       # index of the field
+    dx      = int(data_in["dx"])                          # downsampling in the x direction
+    dy      = int(data_in["dy"])                          # downsampling in the y direction
+    dz      = int(data_in["dz"])                          # downsampling in the z direction
+    shpx    = int(data_in["shpx"])                        # shape of the tensor in the x direction
+    shpy    = int(data_in["shpy"])                        # shape of the tensor in the y direction
+    shpz    = int(data_in["shpz"])                        # shape of the tensor in the z direction
+    UUmean  = np.array(data_in["UUmean"],dtype='float')   # mean streamwise velocity
+    file_ii = (folder+'/'+file).replace("$INDEX$",str(index))
+    print('RMS velocity calculation:'+str(file_ii),flush=True)
+        
+    # -------------------------------------------------------------------------------------------------------------------
+    # Read the velocity fields from the files and then calculate the sums in the planes
+    # -------------------------------------------------------------------------------------------------------------------
+    file_r   = h5py.File(file_ii,'r')
+    UU       = np.array(file_r['u'])[::dy,::dz,::dx]
+    uu       = UU-UUmean.reshape(-1,1,1)
+    vv       = np.array(file_r['v'])[::dy,::dz,::dx]
+    ww       = np.array(file_r['w'])[::dy,::dz,::dx]
+    file_r.close()
+    data_out = {"uu2_cum":np.sum(np.multiply(uu,uu),axis=(1,2)),"vv2_cum":np.sum(np.multiply(vv,vv),axis=(1,2)),
+                "ww2_cum":np.sum(np.multiply(ww,ww),axis=(1,2)),"uv_cum":np.sum(np.multiply(uu,vv),axis=(1,2)),
+                "vw_cum":np.sum(np.multiply(vv,ww),axis=(1,2)),"uw_cum":np.sum(np.multiply(uu,ww),axis=(1,2)),
+                "nn_cum":np.ones((shpy,))*shpx*shpz}
+    return data_out
+
+
 def calc_rms(data_in={"field_ini":1000,"field_fin":9999,"umean_file":"Umean.txt","data_folder":"Data",\
                        "file":"../../P125_21pi_vu","folder":"P125_21pi_vu.$INDEX$.h5.uvw","dx":1,"dy":1,"dz":1,\
                            "shpx":192,"shpy":201,"shpz":96,"save_file":True,"urms_file":"Urms.txt"}):
@@ -159,6 +236,9 @@ def calc_rms(data_in={"field_ini":1000,"field_fin":9999,"umean_file":"Umean.txt"
             - save_file   : flag for saving the information in a file (True: the information is saved in a file,
                                                                        False: the information is stored in a variable)
             - urms_file   : file containing the information of the RMS of the velocity
+            - nworkers    : (optional) number of processes
+            - chunk_size  : (optional) number of fields of each chunk
+            - chk_folder  : (optional) folder to store the partial sums of the chunks to resume the calculation
 
     Returns
     -------
@@ -178,7 +258,7 @@ def calc_rms(data_in={"field_ini":1000,"field_fin":9999,"umean_file":"Umean.txt"
     # Load packages
     # -------------------------------------------------------------------------------------------------------------------
     from py_bin.py_functions.umean import read_Umean
-    import h5py
+    from py_bin.py_functions.parallel_statistics import calc_parallel,merge_partials
     
     # -------------------------------------------------------------------------------------------------------------------
     # Read the data
@@ -197,47 +277,38 @@ def calc_rms(data_in={"field_ini":1000,"field_fin":9999,"umean_file":"Umean.txt"
     shpz        = int(data_in["shpz"])         # shape of the tensor in the z direction
     save_file   = bool(data_in["save_file"])   # flag to choose if the RMS is saved in a file
     urms_file   = str(data_in["urms_file"])    # file to store the RMS information
-    file_comp   = folder+'/'+file
+    if "nworkers" in data_in.keys():
+        nworkers   = int(data_in["nworkers"])   # number of processes
+        chunk_size = int(data_in["chunk_size"]) # number of fields of each chunk
+        chk_folder = data_in["chk_folder"]      # folder of the partial sums of the chunks
+    else:
+        nworkers   = 1
+        chunk_size = 0
+        chk_folder = None
     try:
         data_umean  = read_Umean(data_in={"folder":data_folder,"file":umean_file,"dy":dy})
         UUmean      = data_umean["UUmean"]
     except:
         print("RMS calculations require mean velocity file. Breaking calculation...",flush=True)
         sys.exit()
-    for ii in range(field_ini,field_fin):
-        file_ii = file_comp.replace("$INDEX$",str(ii))
-        print('RMS velocity calculation:'+str(file_ii),flush=True)
         
-        # ---------------------------------------------------------------------------------------------------------------
-        # Read the velocity fields from the files and then calculate their maximum and minimum values
-        # ---------------------------------------------------------------------------------------------------------------
-        file = h5py.File(file_ii,'r')
-        UU   = np.array(file['u'])[::dy,::dz,::dx]
-        uu   = UU-UUmean.reshape(-1,1,1)
-        vv   = np.array(file['v'])[::dy,::dz,::dx]
-        ww   = np.array(file['w'])[::dy,::dz,::dx]
-        uu2  = np.multiply(uu,uu)
-        vv2  = np.multiply(vv,vv)
-        ww2  = np.multiply(ww,ww)
-        uv   = np.multiply(uu,vv)
-        vw   = np.multiply(vv,ww)
-        uw   = np.multiply(uu,ww)
-        if ii == field_ini:
-            uu2_cum = np.sum(uu2,axis=(1,2))
-            vv2_cum = np.sum(vv2,axis=(1,2))
-            ww2_cum = np.sum(ww2,axis=(1,2))
-            uv_cum  = np.sum(uv,axis=(1,2))
-            vw_cum  = np.sum(vw,axis=(1,2))
-            uw_cum  = np.sum(uw,axis=(1,2))
-            nn_cum  = np.ones((shpy,))*shpx*shpz
-        else:
-            uu2_cum += np.sum(uu2,axis=(1,2))
-            vv2_cum += np.sum(vv2,axis=(1,2))
-            ww2_cum += np.sum(ww2,axis=(1,2))
-            uv_cum  += np.sum(uv,axis=(1,2))
-            vw_cum  += np.sum(vw,axis=(1,2))
-            uw_cum  += np.sum(uw,axis=(1,2))
-            nn_cum  += np.ones((shpy,))*shpx*shpz
+    # -------------------------------------------------------------------------------------------------------------------
+    # Sum the squared velocity of the fields. The fields are divided in chunks calculated in parallel, the sums of each
+    # chunk are stored in the checkpoint folder.
+    # -------------------------------------------------------------------------------------------------------------------
+    data_partial = {"folder":folder,"file":file,"dx":dx,"dy":dy,"dz":dz,"shpx":shpx,"shpy":shpy,"shpz":shpz,
+                    "UUmean":UUmean}
+    data_cum     = calc_parallel(data_in={"function":field_rms,"merge":merge_partials,"data_partial":data_partial,
+                                          "field_ini":field_ini,"field_fin":field_fin,"field_delta":1,
+                                          "nworkers":nworkers,"chunk_size":chunk_size,"chk_folder":chk_folder,
+                                          "chk_name":"Urms"})
+    uu2_cum      = data_cum["uu2_cum"]
+    vv2_cum      = data_cum["vv2_cum"]
+    ww2_cum      = data_cum["ww2_cum"]
+    uv_cum       = data_cum["uv_cum"]
+    vw_cum       = data_cum["vw_cum"]
+    uw_cum       = data_cum["uw_cum"]
+    nn_cum       = data_cum["nn_cum"]
     uurms = np.sqrt(np.divide(uu2_cum,nn_cum))    
     vvrms = np.sqrt(np.divide(vv2_cum,nn_cum))   
     wwrms = np.sqrt(np.divide(ww2_cum,nn_cum)) 
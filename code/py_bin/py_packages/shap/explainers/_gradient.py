@@ -103,7 +103,9 @@ class GradientExplainer(Explainer):
         shap_values = self.shap_values(X, nsamples)
         return Explanation(values=shap_values, data=X, feature_names=self.features)
 
-    def shap_values(self, X, nsamples=200, ranked_outputs=None, output_rank_order="max", rseed=None, return_variances=False):
+    def shap_values(self, X, nsamples=200, ranked_outputs=None, output_rank_order="max", rseed=None, return_variances=False,
+                    joint_inputs=False, quadrature=None, nsamples_max=None, tolerance=None, check_every=10,
+                    nsamples_min=None):
         """ Return the values for the model applied to X.
 
         Parameters
@@ -130,6 +132,25 @@ class GradientExplainer(Explainer):
             Seeding the randomness in shap value computation  (background example choice,
             interpolation between current and background example, smoothing).
 
+        joint_inputs : bool
+            Only for TensorFlow. If True the samples of all the rows of X are evaluated in the same batches,
+            ordered by row and then by sample, so the model may couple each row with its own data (for instance
+            a different target field per row). All the rows must explain the same output.
+
+        quadrature : None, "gauss" or "trapezoid"
+            Only for TensorFlow. If None the path integral of the gradients is estimated with nsamples random
+            points. Otherwise it is integrated with a fixed Gauss-Legendre or trapezoidal rule of nsamples nodes
+            for every background sample (integrated gradients). The completeness error of the attributions is
+            stored in explainer.completeness_error.
+
+        nsamples_max, tolerance, check_every, nsamples_min : None, None, int and None
+            Only for TensorFlow and random samples. If tolerance is given the number of samples is adaptive: every
+            check_every samples the relative standard error of the sum of the attributions of each row is evaluated
+            and the sampling stops once it is below tolerance for all the rows, or after nsamples_max samples. The
+            tolerance is only checked after nsamples_min samples (nsamples if None), so the estimate of the error
+            uses enough samples. The samples used and the final error are stored in explainer.nsamples_done and
+            explainer.sample_error.
+
         Returns
         -------
         array or list
@@ -141,7 +162,18 @@ class GradientExplainer(Explainer):
             ranked_outputs, and indexes is a matrix that tells for each sample which output indexes
             were chosen as "top".
         """
-        return self.explainer.shap_values(X, nsamples, ranked_outputs, output_rank_order, rseed, return_variances)
+        tf_options = {}
+        if joint_inputs:
+            tf_options["joint_inputs"] = joint_inputs
+        if quadrature is not None:
+            tf_options["quadrature"] = quadrature
+        if tolerance is not None:
+            tf_options["nsamples_max"] = nsamples_max
+            tf_options["tolerance"] = tolerance
+            tf_options["check_every"] = check_every
+            tf_options["nsamples_min"] = nsamples_min
+        return self.explainer.shap_values(X, nsamples, ranked_outputs, output_rank_order, rseed, return_variances,
+                                          **tf_options)
 
 
 class _TFGradient(Explainer):
@@ -235,7 +267,28 @@ class _TFGradient(Explainer):
 
 #%%
 
-    def shap_values(self, X, nsamples=200, ranked_outputs=None, output_rank_order="max", rseed=None, return_variances=False):
+    def quadrature_nodes(self, quadrature, nnodes):
+        """ Return the nodes and weights of a quadrature rule of nnodes nodes in the interval [0,1].
+        """
+        nnodes = int(nnodes)
+        if quadrature == "gauss":
+            t, w = np.polynomial.legendre.leggauss(nnodes)
+            t = (t + 1) / 2
+            w = w / 2
+        elif quadrature == "trapezoid":
+            assert nnodes > 1, "The trapezoidal rule needs at least 2 nodes!"
+            t = np.linspace(0, 1, nnodes)
+            w = np.full(nnodes, 1 / (nnodes - 1))
+            w[0] /= 2
+            w[-1] /= 2
+        else:
+            emsg = "quadrature must be None, gauss or trapezoid!"
+            raise ValueError(emsg)
+        return t, w
+
+    def shap_values(self, X, nsamples=200, ranked_outputs=None, output_rank_order="max", rseed=None, return_variances=False,
+                    joint_inputs=False, quadrature=None, nsamples_max=None, tolerance=None, check_every=10,
+                    nsamples_min=None):
         global tf, keras
 
         import tensorflow as tf
@@ -280,6 +333,29 @@ class _TFGradient(Explainer):
         if rseed is None:
             rseed = np.random.randint(0, 1e6)
 
+        # Andres: with a quadrature rule the same nodes are used for all the background samples, the weights include
+        # the mean over the background samples
+        nback = self.data[0].shape[0]
+        adaptive = quadrature is None and tolerance is not None and nsamples_max is not None and nsamples_max > 0
+        if quadrature is None:
+            # Andres: with the adaptive sampling nsamples_max is the limit, the convergence is checked every
+            # check_every samples once nsamples_min samples are done (nsamples by default)
+            nevals = int(nsamples_max) if adaptive else nsamples
+            check_every = max(int(check_every), 2)
+            nsamples_min = nsamples if nsamples_min is None else int(nsamples_min)
+            nsamples_min = min(max(nsamples_min, 2), nevals)
+            self.nsamples_done = np.zeros((X[0].shape[0], model_output_ranks.shape[1]), dtype=int)
+            self.sample_error = np.zeros((X[0].shape[0], model_output_ranks.shape[1]))
+        else:
+            t_nodes, w_nodes = self.quadrature_nodes(quadrature, nsamples)
+            quad_rind = np.repeat(np.arange(nback), len(t_nodes))
+            quad_t = np.tile(t_nodes, nback).astype(np.float32)
+            quad_w = np.tile(w_nodes, nback) / nback
+            nevals = len(quad_t)
+            # Andres: difference between the sum of the attributions and the variation of the model output
+            self.completeness_delta = np.zeros((X[0].shape[0], model_output_ranks.shape[1]))
+            self.completeness_error = np.zeros((X[0].shape[0], model_output_ranks.shape[1]))
+
         for i in range(model_output_ranks.shape[1]): # Andres: For all the number of outputs of the model (i)
             np.random.seed(rseed) # so we get the same noise patterns for each output class
             phis = []
@@ -287,37 +363,109 @@ class _TFGradient(Explainer):
             for k in range(len(X)): # Andrés: all the parameters of the input list
                 phis.append(np.zeros(X[k].shape))
                 phi_vars.append(np.zeros(X[k].shape))
-            for j in range(X[0].shape[0]): #Andres : for all the number of samples fields in a single input (j)
+            # Andres: group of rows of X evaluated together. By default every row is evaluated on its own, with
+            # joint_inputs all the rows share the batches of samples
+            if joint_inputs:
+                groups = [np.arange(X[0].shape[0])]
+            else:
+                groups = [np.array([j]) for j in range(X[0].shape[0])]
+            for rows in groups: #Andres : for all the groups of samples fields in a single input (rows)
 
                 # compute the gradients at all the sample points
-                find = model_output_ranks[j,i] # Andres: get the index of the rank of the output i and the sample j
-                phis2 = np.zeros(X[0].shape[1:])
-                # fill in the samples arrays
-                for k in tqdm(range(nsamples),desc="Samples for input "+str(j)+" and output "+str(i)):
-                    samples_input = [np.zeros(X[t].shape[1:], dtype=np.float32) for t in range(len(X))]
-                    samples_delta = [np.zeros(X[t].shape[1:], dtype=np.float32) for t in range(len(X))]
-                    rind = np.random.choice(self.data[0].shape[0])
-                    t = np.random.uniform()
+                find = model_output_ranks[rows[0],i] # Andres: get the index of the rank of the output i and the sample
+                nrows = len(rows)
+                # Andres: running sums of the first and second moments of the samples for every input, only one batch
+                # of interpolated fields is kept in memory at the same time
+                phis2 = [np.zeros((nrows,)+X[t].shape[1:]) for t in range(len(X))]
+                # Andres: running sums of the sum of the attributions in the domain for each sample, used for the
+                # standard error of the estimation
+                total_sum = np.zeros(nrows)
+                total_sum2 = np.zeros(nrows)
+                ndone = 0
+                ncheck = check_every if quadrature is None else nevals
+                batch_size = max(int(self.batch_size)//nrows, 1)
+                for b in tqdm(range(0, nevals, batch_size),desc="Sample batches for input "+str(rows.tolist())+
+                              " and output "+str(i)):
+                    nbatch = min(batch_size, nevals-b)
+                    if quadrature is None:
+                        rind = np.random.choice(nback, (nrows, nbatch))
+                        t = np.random.uniform(size=(nrows, nbatch)).astype(np.float32)
+                        weight = np.ones((nrows, nbatch))
+                    else:
+                        rind = np.tile(quad_rind[b:b+nbatch], (nrows, 1))
+                        t = np.tile(quad_t[b:b+nbatch], (nrows, 1))
+                        weight = np.tile(quad_w[b:b+nbatch], (nrows, 1))
+                    samples_input = []
+                    samples_delta = []
                     for u in range(len(X)): # Andres : for all the inputs (u)
+                        x = np.asarray(X[u][rows], dtype=np.float32)[:, np.newaxis]
                         if self.local_smoothing > 0:
-                            x = X[u][j] + np.random.randn(*X[u][j].shape) * self.local_smoothing
-                        else:
-                            x = X[u][j]
-                        samples_input[u] = t * x + (1 - t) * self.data[u][rind]
-                        samples_delta[u] = x - self.data[u][rind]
-
-                    grads = []
-                    batch = [samples_input[a] for a in range(len(X))] # Andres: calculate the batch for all the inputs
-                    grads = self.run(self.gradient(find), self.model_inputs, batch)
+                            x = x + (np.random.randn(nrows, nbatch, *X[u].shape[1:]) *
+                                     self.local_smoothing).astype(np.float32)
+                        background = np.asarray(self.data[u][rind], dtype=np.float32)
+                        delta = x - background
+                        # Andres: the interpolation points of the batch are background+t*(x-background), the rows of
+                        # the batch are ordered by row of X and then by sample
+                        samples_input.append((background + t.reshape((nrows, nbatch)+(1,)*(delta.ndim-2)) * delta
+                                              ).reshape((nrows*nbatch,)+delta.shape[2:]))
+                        samples_delta.append(delta)
+                        del background
+
+                    # Andres: a single forward and backward pass for all the samples of the batch
+                    grads = self.run(self.gradient(find), self.model_inputs, samples_input)
+                    del samples_input
 
                     # assign the attributions to the right part of the output arrays
+                    totals = np.zeros((nrows, nbatch))
                     for a in range(len(X)): # Andres: for all the inputs
-                        grad = grads[a].numpy()[0]
-                        samples = grad * samples_delta[a]
-                        phis2 += samples**2/nsamples
-                        phis[a][j] += samples/nsamples
+                        samples = np.asarray(grads[a]).reshape(samples_delta[a].shape) * samples_delta[a]
+                        phis[a][rows] += np.einsum('rb,rb...->r...', weight, samples)
+                        phis2[a] += np.einsum('rb,rb...->r...', weight, np.square(samples))
+                        totals += samples.reshape(nrows, nbatch, -1).sum(axis=2)
+                    del grads, samples_delta, samples
+                    total_sum += totals.sum(axis=1)
+                    total_sum2 += np.square(totals).sum(axis=1)
+                    ndone += nbatch
+
+                    # Andres: relative standard error of the sum of the attributions, the sampling stops when all
+                    # the rows have converged
+                    if quadrature is None and ndone >= ncheck:
+                        ncheck = (ndone // check_every + 1) * check_every
+                        total_mean = total_sum / ndone
+                        total_var = np.maximum(total_sum2 / ndone - total_mean**2, 0) * ndone / (ndone - 1)
+                        sample_error = np.sqrt(total_var / ndone) / np.maximum(np.abs(total_mean), 1e-30)
+                        if adaptive and ndone >= nsamples_min and np.all(sample_error <= tolerance):
+                            break
+                # Andres: the random samples are accumulated without weights and averaged with the samples used
+                if quadrature is None:
+                    for a in range(len(X)):
+                        phis[a][rows] /= ndone
+                        phis2[a] /= ndone
+                    if ndone > 1:
+                        total_mean = total_sum / ndone
+                        total_var = np.maximum(total_sum2 / ndone - total_mean**2, 0) * ndone / (ndone - 1)
+                        self.sample_error[rows,i] = np.sqrt(total_var / ndone) / np.maximum(np.abs(total_mean), 1e-30)
+                    self.nsamples_done[rows,i] = ndone
                 for a in range(len(X)):
-                    phi_vars[a][j] = phis2-phis[a][j]**2 # estimate variance of means
+                    phi_vars[a][rows] = phis2[a]-phis[a][rows]**2 # estimate variance of means
+
+                # Andres: completeness of the attributions, the sum of the attributions must be equal to the
+                # difference between the output of the model in the field and in the background
+                if quadrature is not None:
+                    output_back = np.zeros(nrows)
+                    for r in range(nback):
+                        back = [np.repeat(self.data[u][r:r+1], nrows, axis=0) for u in range(len(X))]
+                        if not tf.executing_eagerly():
+                            output_r = np.asarray(self.run(self.model_output, self.model_inputs, back))
+                        else:
+                            output_r = np.asarray(self.run(self.model, self.model_inputs, back))
+                        output_r = output_r[:,find] if self.multi_output else output_r.reshape(-1)
+                        output_back += output_r / nback
+                    output_x = np.asarray(model_output_values)
+                    output_x = output_x[rows,find] if self.multi_output else output_x.reshape(-1)[rows]
+                    phis_sum = np.sum([phis[a][rows].reshape(nrows, -1).sum(axis=1) for a in range(len(X))], axis=0)
+                    self.completeness_delta[rows,i] = output_x - output_back
+                    self.completeness_error[rows,i] = output_x - output_back - phis_sum
 
                 # TODO: this could be avoided by integrating between endpoints if no local smoothing is used
                 # correct the sum of the values to equal the output of the model using a linear